@@ -9,12 +9,17 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from src.config.settings import settings
+from src.config.server import serve_production
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "src.main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=settings.reload,
-        log_level="info"
-    )
+    # Producción: multi-worker con uvloop/httptools (ver src/config/server.py)
+    if settings.environment == "production" or "--production" in sys.argv:
+        serve_production()
+    else:
+        uvicorn.run(
+            "src.main:app",
+            host=settings.host,
+            port=settings.port,
+            reload=settings.reload,
+            log_level="info"
+        )
@@ -0,0 +1,155 @@
+"""
+Script para poblar MongoDB con datos sintéticos (pruebas de carga)
+
+Ejemplos:
+    python seed.py --projects 1000
+    python seed.py --projects 50000 --sessions-per-project 10-30 --seed 7 --drop
+    python seed.py --projects 1000 --types api=3,deployment=1 --iterations 1=6,2=3,3=1
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.config.settings import settings
+from src.config.database import DOCUMENT_MODELS, init_db, close_db
+from src.controllers.analytics_controller import AnalyticsController
+from src.controllers.search_index_controller import SearchIndexController
+from src.utils.synthetic_data import SyntheticDataGenerator, parse_weights
+
+
+COLLECTIONS = ("projects", "analysis_sessions", "generated_docs")
+
+
+def _range(value: str):
+    """Interpreta "min-max" o un número fijo"""
+    low, _, high = value.partition("-")
+    low = int(low)
+    high = int(high) if high else low
+    if low < 0 or high < low:
+        raise argparse.ArgumentTypeError(f"Rango inválido: {value}")
+    return low, high
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos de proyectos, sesiones y documentos")
+    parser.add_argument("--projects", type=int, required=True, help="Cantidad de proyectos")
+    parser.add_argument("--sessions-per-project", type=_range, default=(5, 20), help="Rango min-max (default: 5-20)")
+    parser.add_argument("--types", type=parse_weights, default=None, help="Pesos por tipo de análisis (ej: api=3,adr=1)")
+    parser.add_argument("--iterations", type=lambda s: parse_weights(s, int), default=None, help="Pesos por nº de iteraciones (ej: 1=5,2=3,3=1)")
+    parser.add_argument("--statuses", type=parse_weights, default=None, help="Pesos por estado (ej: completed=5,pending_answers=3)")
+    parser.add_argument("--docs-ratio", type=float, default=0.3, help="Probabilidad de docs por sesión completada")
+    parser.add_argument("--files-per-doc", type=_range, default=(2, 8), help="Rango min-max de archivos por documento")
+    parser.add_argument("--file-kb", type=_range, default=(1, 8), help="Rango min-max de KB por archivo")
+    parser.add_argument("--days", type=int, default=365, help="Antigüedad máxima de los datos")
+    parser.add_argument("--now", type=datetime.fromisoformat, default=None, help="Fecha de referencia (default: 2025-01-01, determinista)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documentos por insert_many")
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many simultáneos")
+    parser.add_argument("--drop", action="store_true", help="Vacía todas las colecciones de la app antes de insertar")
+    return parser.parse_args(argv)
+
+
+async def seed(args) -> None:
+    generator = SyntheticDataGenerator(
+        seed=args.seed,
+        sessions_per_project=args.sessions_per_project,
+        type_weights=args.types,
+        iteration_weights=args.iterations,
+        status_weights=args.statuses,
+        docs_ratio=args.docs_ratio,
+        files_per_doc=args.files_per_doc,
+        file_kb=args.file_kb,
+        days=args.days,
+        now=args.now
+    )
+
+    client = AsyncIOMotorClient(settings.mongodb_url)
+    db = client[settings.database_name]
+
+    if args.drop:
+        # Todas las colecciones de la app, no solo las que se insertan: las
+        # derivadas (vocabulario, rollups, archivo, outbox, formularios
+        # compilados, claves de idempotencia, HTML) mezclarían datos del
+        # dataset anterior con el nuevo
+        dropped = [model.Settings.name for model in DOCUMENT_MODELS]
+        for name in dropped:
+            await db[name].drop()
+        print(f"🗑️  Colecciones vaciadas: {', '.join(dropped)}")
+
+    # Índices antes de insertar: así se mide con los mismos índices que producción
+    await init_db()
+
+    buffers = {name: [] for name in COLLECTIONS}
+    counts = {name: 0 for name in COLLECTIONS}
+    pending = set()
+    vocabulary = set()
+    errors = []
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def insert(name, documents):
+        try:
+            await db[name].insert_many(documents, ordered=False)
+            counts[name] += len(documents)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            limit.release()
+
+    async def flush(name, force=False):
+        if errors:
+            raise errors[0]
+        documents = buffers[name]
+        if not documents or (len(documents) < args.batch_size and not force):
+            return
+        buffers[name] = []
+        # Mientras Motor inserta en su thread pool se sigue generando el siguiente lote
+        await limit.acquire()
+        task = asyncio.create_task(insert(name, documents))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    started = time.perf_counter()
+    for index, (project, sessions, docs) in enumerate(generator.projects(args.projects), start=1):
+        buffers["projects"].append(project)
+        buffers["analysis_sessions"].extend(sessions)
+        for session in sessions:
+            vocabulary.update(session["search_terms"])
+        buffers["generated_docs"].extend(docs)
+
+        for name in COLLECTIONS:
+            await flush(name)
+
+        if index % 1000 == 0:
+            elapsed = time.perf_counter() - started
+            print(f"⏳ {index}/{args.projects} proyectos · {counts['analysis_sessions']} sesiones ({elapsed:.0f}s)")
+
+    for name in COLLECTIONS:
+        await flush(name, force=True)
+    if pending:
+        await asyncio.gather(*pending)
+    if errors:
+        raise errors[0]
+
+    # Vocabulario de la búsqueda difusa (las plantillas repiten palabras: es chico)
+    await SearchIndexController.index_terms(sorted(vocabulary))
+
+    # Los documentos se insertaron crudos: los rollups de analytics se calculan al final
+    rollups = await AnalyticsController.rebuild()
+    print(f"📊 Analytics: {rollups['buckets']} buckets diarios")
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"✅ Insertados {counts['projects']} proyectos, {counts['analysis_sessions']} sesiones "
+        f"y {counts['generated_docs']} documentos en {elapsed:.1f}s"
+    )
+
+    client.close()
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(seed(parse_args(sys.argv[1:])))
@@ -1,7 +1,6 @@
 """
 Configuración de la conexión a MongoDB usando Beanie
 """
-from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from typing import Optional
 
@@ -9,42 +8,67 @@ from .settings import settings
 from ..models.project import Project
 from ..models.analysis_session import AnalysisSession
 from ..models.generated_doc import GeneratedDoc
+from ..models.rendered_markdown import RenderedMarkdown
+from ..models.analysis_archive import AnalysisArchive
+from ..models.idempotency_record import IdempotencyRecord
+from ..models.search_term import SearchTerm
+from ..models.form_schema import FormSchema
+from ..models.outbox_event import OutboxEvent
+from ..models.analytics_rollup import AnalyticsRollup
+from ..repositories import StorageBackend, create_backend
+
+
+# Modelos (colecciones) de la aplicación
+DOCUMENT_MODELS = [
+    Project,
+    AnalysisSession,
+    GeneratedDoc,
+    RenderedMarkdown,
+    AnalysisArchive,
+    IdempotencyRecord,
+    SearchTerm,
+    FormSchema,
+    OutboxEvent,
+    AnalyticsRollup,
+]
 
 
 class Database:
-    """Gestor de conexión a MongoDB"""
+    """Gestor de conexión a la base de datos (MongoDB o en memoria)"""
     
-    client: Optional[AsyncIOMotorClient] = None
+    backend: Optional[StorageBackend] = None
     
     @classmethod
-    async def connect_db(cls):
-        """Conecta a MongoDB e inicializa Beanie"""
+    async def connect_db(cls, backend: Optional[StorageBackend] = None):
+        """
+        Conecta al backend e inicializa Beanie
+        
+        Args:
+            backend: Backend a usar (default: el de DATABASE_BACKEND)
+        """
         try:
-            # Crear cliente de MongoDB
-            cls.client = AsyncIOMotorClient(settings.mongodb_url)
+            cls.backend = backend or create_backend(settings.database_backend)
+            database = await cls.backend.connect(settings.database_name)
             
             # Inicializar Beanie con los modelos
             await init_beanie(
-                database=cls.client[settings.database_name],
-                document_models=[
-                    Project,
-                    AnalysisSession,
-                    GeneratedDoc,
-                ]
+                database=database,
+                document_models=DOCUMENT_MODELS
             )
             
-            print(f"✅ Conectado a MongoDB: {settings.database_name}")
+            print(f"✅ Conectado a {cls.backend.label}: {settings.database_name}")
             
         except Exception as e:
-            print(f"❌ Error conectando a MongoDB: {e}")
+            print(f"❌ Error conectando a la base de datos: {e}")
             raise
     
     @classmethod
     async def close_db(cls):
-        """Cierra la conexión a MongoDB"""
-        if cls.client:
-            cls.client.close()
-            print("🔌 Desconectado de MongoDB")
+        """Cierra la conexión"""
+        if cls.backend:
+            await cls.backend.close()
+            print(f"🔌 Desconectado de {cls.backend.label}")
+            cls.backend = None
 
 
 # Funciones para FastAPI lifespan
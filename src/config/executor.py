@@ -0,0 +1,159 @@
+"""
+Pool compartido para trabajo CPU-bound (fuera del event loop)
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .settings import settings
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estima rápidamente el tamaño de un payload JSON-like
+
+    No serializa: solo suma longitudes de strings y cantidad de elementos,
+    suficiente para decidir si conviene sacar el trabajo del event loop.
+    """
+    total = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            total += len(item)
+        elif isinstance(item, dict):
+            total += len(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            total += len(item)
+            stack.extend(item)
+        else:
+            total += 8
+    return total
+
+
+class CPUExecutor:
+    """Gestor del pool de ejecución CPU-bound y sus métricas"""
+
+    executor: Optional[Executor] = None
+    max_workers: int = 0
+
+    # Métricas
+    pending: int = 0
+    max_pending: int = 0
+    offloaded: int = 0
+    inline: int = 0
+    loop_lag_ms: float = 0.0
+    max_loop_lag_ms: float = 0.0
+
+    _lag_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def start(cls):
+        """Crea el pool y arranca el monitor de lag del event loop"""
+        cls.max_workers = settings.executor_max_workers or os.cpu_count() or 1
+
+        if settings.executor_kind == "thread":
+            cls.executor = ThreadPoolExecutor(
+                max_workers=cls.max_workers,
+                thread_name_prefix="cpu-executor"
+            )
+        else:
+            # spawn evita heredar el estado de Motor/threads del proceso padre
+            cls.executor = ProcessPoolExecutor(
+                max_workers=cls.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+        cls._lag_task = asyncio.create_task(cls._monitor_loop_lag())
+        print(f"⚙️  Executor {settings.executor_kind} iniciado ({cls.max_workers} workers)")
+
+    @classmethod
+    async def shutdown(cls):
+        """
+        Detiene el monitor y libera el pool
+
+        Esperar a que terminen los workers bloquea: se hace en un thread
+        para no frenar el event loop (requests en drenaje, otros hooks de
+        apagado). Lo que se pida mientras tanto se ejecuta inline.
+        """
+        if cls._lag_task:
+            cls._lag_task.cancel()
+            try:
+                await cls._lag_task
+            except asyncio.CancelledError:
+                pass
+            cls._lag_task = None
+
+        if cls.executor:
+            executor, cls.executor = cls.executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            print("⚙️  Executor detenido")
+
+    @classmethod
+    async def run(cls, func: Callable, *args, size: int = 0) -> Any:
+        """
+        Ejecuta func(*args) en el pool si el trabajo supera el umbral
+
+        Args:
+            func: Función a ejecutar (debe ser picklable para el pool de procesos)
+            *args: Argumentos de la función
+            size: Tamaño aproximado del trabajo (ver estimate_size)
+
+        Returns:
+            Resultado de la función
+        """
+        if cls.executor is None or size < settings.executor_offload_threshold:
+            cls.inline += 1
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        cls.pending += 1
+        cls.offloaded += 1
+        cls.max_pending = max(cls.max_pending, cls.pending)
+        try:
+            return await loop.run_in_executor(cls.executor, func, *args)
+        finally:
+            cls.pending -= 1
+
+    @classmethod
+    async def _monitor_loop_lag(cls):
+        """Mide cuánto se retrasa el event loop respecto al sleep esperado"""
+        loop = asyncio.get_running_loop()
+        interval = settings.executor_lag_interval
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - started - interval) * 1000
+            cls.loop_lag_ms = round(lag, 2)
+            cls.max_loop_lag_ms = max(cls.max_loop_lag_ms, cls.loop_lag_ms)
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        """Métricas actuales del executor"""
+        return {
+            "kind": settings.executor_kind,
+            "running": cls.executor is not None,
+            "max_workers": cls.max_workers,
+            "offload_threshold": settings.executor_offload_threshold,
+            "queue_depth": cls.pending,
+            "max_queue_depth": cls.max_pending,
+            "offloaded_total": cls.offloaded,
+            "inline_total": cls.inline,
+            "event_loop_lag_ms": cls.loop_lag_ms,
+            "max_event_loop_lag_ms": cls.max_loop_lag_ms,
+        }
+
+
+# Funciones para FastAPI lifespan
+async def init_executor():
+    """Inicia el pool CPU-bound al arrancar la app"""
+    CPUExecutor.start()
+
+
+async def close_executor():
+    """Libera el pool al apagar la app"""
+    await CPUExecutor.shutdown()
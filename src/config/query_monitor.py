@@ -0,0 +1,184 @@
+"""
+Registro de consultas lentas a MongoDB con la ruta HTTP que las originó
+"""
+import heapq
+import itertools
+import json
+import threading
+import uuid
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+
+from .settings import settings
+from ..utils.query_shape import command_shape, reply_count
+
+
+# Comandos internos del driver (handshake, auth, heartbeats)
+IGNORED_COMMANDS = frozenset({
+    "hello", "ismaster", "isMaster", "ping", "buildinfo", "buildInfo",
+    "saslStart", "saslContinue", "getnonce", "authenticate", "endSessions",
+})
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Petición HTTP en curso: {"request_id": ..., "scope": scope ASGI}
+# Motor copia el contexto al thread del driver, así el listener lo ve.
+_request_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_context", default=None)
+
+
+def current_route() -> Dict[str, Optional[str]]:
+    """Ruta (plantilla) e ID de la petición en curso, o nulos fuera de una petición"""
+    context = _request_context.get()
+    if context is None:
+        return {"route": None, "request_id": None}
+
+    scope = context["scope"]
+    # FastAPI deja la ruta resuelta en el scope tras el matching
+    route = scope.get("route")
+    template = getattr(route, "path", None) or scope.get("path")
+    return {
+        "route": f"{scope.get('method', '')} {template}".strip(),
+        "request_id": context["request_id"],
+    }
+
+
+class QueryContextMiddleware:
+    """
+    Middleware ASGI que asocia un request id a cada petición HTTP
+
+    Respeta el header X-Request-ID entrante (o genera uno) y lo devuelve en
+    la respuesta, para cruzar el log de consultas lentas con el del cliente.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex[:16]
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.lower().encode(), request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        token = _request_context.set({"request_id": request_id, "scope": scope})
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _request_context.reset(token)
+
+
+class SlowQueryListener(monitoring.CommandListener):
+    """
+    CommandListener de pymongo que registra los comandos lentos
+
+    Guarda los N más lentos en memoria (por proceso) para consultarlos
+    desde /api/admin/slow-queries. Los callbacks corren en los threads del
+    driver, por eso el estado compartido se protege con un lock.
+    """
+
+    def __init__(self, threshold_ms: float, capacity: int):
+        self.threshold_ms = threshold_ms
+        self.capacity = capacity
+        self._inflight: Dict[Any, tuple] = {}
+        self._worst: List[tuple] = []  # min-heap (duración, secuencia, entrada)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self.observed = 0
+        self.slow = 0
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        # Solo referencias: la forma se calcula únicamente si el comando es lento
+        self._inflight[(event.connection_id, event.request_id)] = (
+            event.database_name,
+            event.command,
+            current_route(),
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finish(event, reply=event.reply)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finish(event, error=str(event.failure.get("errmsg", event.failure)))
+
+    def _finish(self, event, reply: Optional[dict] = None, error: Optional[str] = None) -> None:
+        started = self._inflight.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+
+        self.observed += 1
+        duration_ms = event.duration_micros / 1000
+        if duration_ms < self.threshold_ms:
+            return
+
+        database, command, origin = started
+        entry = {
+            "at": datetime.utcnow().isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "command": event.command_name,
+            "database": database,
+            "shape": command_shape(command, event.command_name),
+            "documents": reply_count(reply) if reply is not None else None,
+            "error": error,
+            **origin,
+        }
+
+        with self._lock:
+            self.slow += 1
+            item = (duration_ms, next(self._sequence), entry)
+            if len(self._worst) < self.capacity:
+                heapq.heappush(self._worst, item)
+            elif duration_ms > self._worst[0][0]:
+                heapq.heapreplace(self._worst, item)
+
+        print(
+            f"🐢 Consulta lenta {entry['duration_ms']} ms · {entry['route'] or 'sin petición'} · "
+            f"{json.dumps(entry['shape'], ensure_ascii=False, default=str)}"
+        )
+
+    def worst(self) -> List[Dict[str, Any]]:
+        """Los comandos más lentos registrados, de mayor a menor duración"""
+        with self._lock:
+            items = sorted(self._worst, key=lambda item: item[0], reverse=True)
+        return [entry for _, _, entry in items]
+
+    def reset(self) -> None:
+        """Vacía el registro"""
+        with self._lock:
+            self._worst.clear()
+            self.observed = 0
+            self.slow = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """Estado del registro y los comandos más lentos"""
+        return {
+            "enabled": settings.slow_query_enabled,
+            "threshold_ms": self.threshold_ms,
+            "capacity": self.capacity,
+            "observed_total": self.observed,
+            "slow_total": self.slow,
+            "worst": self.worst(),
+        }
+
+
+# Instancia del proceso: se registra en el cliente de Motor en MongoBackend.connect
+slow_query_listener = SlowQueryListener(
+    threshold_ms=settings.slow_query_ms,
+    capacity=settings.slow_query_log_size
+)
@@ -0,0 +1,146 @@
+"""
+Arranque del servidor en modo producción (gunicorn + workers uvicorn)
+
+Cada worker es un proceso independiente con su propio event loop, su
+cliente de MongoDB, su pool CPU-bound y sus cachés en memoria (LRU de
+YAML, HTML renderizado, etc.): nada de eso se comparte entre workers.
+"""
+import os
+from typing import Any, Dict
+
+import uvicorn
+
+from .settings import settings
+
+
+APP_PATH = "src.main:app"
+
+
+def available_cpus() -> int:
+    """
+    CPUs disponibles para el proceso, respetando la cuota del contenedor
+
+    os.cpu_count() devuelve las CPUs del host; en Kubernetes/Docker la
+    cuota real está en el cgroup (v2: cpu.max, v1: cfs_quota_us).
+    """
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+    quota_files = [
+        ("/sys/fs/cgroup/cpu.max", None),
+        ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"),
+    ]
+    for quota_path, period_path in quota_files:
+        try:
+            with open(quota_path) as f:
+                values = f.read().split()
+            if period_path:
+                with open(period_path) as f:
+                    values.append(f.read().strip())
+            quota, period = values[0], values[1]
+            if quota not in ("max", "-1"):
+                return max(1, min(cpus, int(int(quota) // int(period))))
+        except (OSError, ValueError, IndexError):
+            continue
+
+    return max(1, cpus)
+
+
+def _worker_count() -> int:
+    """Workers configurados o uno por CPU disponible"""
+    return settings.workers or available_cpus()
+
+
+def _uvicorn_kwargs() -> Dict[str, Any]:
+    """
+    Opciones de uvicorn del fallback sin gunicorn
+
+    Ese camino es el de Windows, donde uvloop no existe: uvicorn elige el
+    loop disponible.
+    """
+    return {
+        "loop": "auto",
+        "http": settings.server_http,
+        "timeout_keep_alive": settings.keep_alive,
+        "timeout_graceful_shutdown": settings.graceful_timeout,
+    }
+
+
+try:
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class ProductionWorker(UvicornWorker):
+        """Worker uvicorn con uvloop/httptools y drenado de requests al apagar"""
+
+        CONFIG_KWARGS = {
+            "loop": settings.server_loop,
+            "http": settings.server_http,
+            "timeout_graceful_shutdown": settings.graceful_timeout,
+        }
+
+    class ProductionApplication(BaseApplication):
+        """Aplicación gunicorn configurada desde Settings (sin gunicorn.conf.py)"""
+
+        def __init__(self, options: Dict[str, Any]):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from ..main import app
+            return app
+
+except ImportError:
+    # gunicorn no está disponible en Windows
+    BaseApplication = None
+
+
+def serve_production():
+    """
+    Levanta la API con varios workers
+
+    - Workers: WORKERS o uno por CPU disponible
+    - Event loop/HTTP: uvloop + httptools
+    - Keep-alive y backlog desde Settings
+    - preload_app: la app se importa una vez en el master antes del fork
+    - SIGTERM: deja de aceptar conexiones y drena las requests en curso
+      durante GRACEFUL_TIMEOUT segundos
+    """
+    workers = _worker_count()
+
+    # El pool CPU-bound es por worker: repartir las CPUs entre workers. Va
+    # por el entorno porque los workers de uvicorn se crean con spawn y
+    # vuelven a leer Settings (no ven lo asignado en el master)
+    if not settings.executor_max_workers:
+        settings.executor_max_workers = max(1, available_cpus() // workers)
+        os.environ["EXECUTOR_MAX_WORKERS"] = str(settings.executor_max_workers)
+
+    if BaseApplication is None:
+        print(f"🏭 Modo producción: {workers} workers (auto/{settings.server_http})")
+        uvicorn.run(
+            APP_PATH,
+            host=settings.host,
+            port=settings.port,
+            workers=workers,
+            backlog=settings.backlog,
+            log_level="info",
+            **_uvicorn_kwargs()
+        )
+        return
+
+    print(f"🏭 Modo producción: {workers} workers ({settings.server_loop}/{settings.server_http})")
+
+    ProductionApplication({
+        "bind": f"{settings.host}:{settings.port}",
+        "workers": workers,
+        "worker_class": "src.config.server.ProductionWorker",
+        "preload_app": True,
+        "keepalive": settings.keep_alive,
+        "backlog": settings.backlog,
+        "graceful_timeout": settings.graceful_timeout,
+        "timeout": settings.worker_timeout,
+        "loglevel": "info",
+    }).run()
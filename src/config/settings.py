@@ -11,11 +11,21 @@ class Settings(BaseSettings):
     # MongoDB
     mongodb_url: str = "mongodb://localhost:27017"
     database_name: str = "documentation_ai"
+    database_backend: str = "mongo"  # mongo | memory (en el proceso, sin MongoDB: tests y benchmarks)
     
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
-    reload: bool = True
+    reload: bool = True  # Solo aplica en desarrollo
+    
+    # Servidor en producción (ENVIRONMENT=production)
+    workers: int = 0  # 0 = una por CPU disponible
+    server_loop: str = "uvloop"
+    server_http: str = "httptools"
+    keep_alive: int = 5  # Segundos de keep-alive HTTP
+    backlog: int = 2048  # Conexiones pendientes en el socket
+    graceful_timeout: int = 30  # Segundos para drenar requests al apagar
+    worker_timeout: int = 60  # Segundos sin respuesta antes de reiniciar un worker
     
     # CORS
     cors_origins: str = "http://localhost:8000,http://127.0.0.1:8000"
@@ -26,6 +36,81 @@ class Settings(BaseSettings):
     # Environment
     environment: str = "development"
     
+    # Executor para trabajo CPU-bound (process | thread)
+    executor_kind: str = "process"
+    executor_max_workers: int = 0  # 0 = número de CPUs
+    executor_offload_threshold: int = 64_000  # Tamaño aprox. a partir del cual se sale del event loop
+    executor_lag_interval: float = 0.5  # Segundos entre mediciones de lag del event loop
+    
+    # Ingesta de YAML crudo
+    yaml_max_bytes: int = 2_000_000
+    yaml_max_nodes: int = 100_000
+    yaml_cache_size: int = 256
+    
+    # Renderizado de markdown a HTML
+    markdown_cache_size: int = 512
+    markdown_cache_persistent: bool = False  # Guarda el HTML también en MongoDB
+    
+    # Caché de proyectos (read-through por worker; update/delete la invalidan en el worker que escribe)
+    project_cache_size: int = 4096
+    project_cache_ttl_seconds: float = 30  # Máxima antigüedad de un proyecto cambiado desde otro worker
+    
+    # Almacenamiento frío de sesiones completadas / de proyectos archivados
+    archive_after_days: int = 90
+    archive_batch_size: int = 200
+    archive_interval_hours: float = 0  # 0 = sin job periódico (solo vía /api/admin/archive)
+    
+    # Validación de respuestas
+    answers_max_value_length: int = 20_000  # Caracteres por respuesta
+    answers_max_items: int = 200  # Opciones por respuesta checkbox
+    answer_validator_cache_size: int = 2048
+    
+    # Esquema de formulario compilado (endpoint público)
+    form_schema_cache_size: int = 1024  # Esquemas serializados en memoria (por worker)
+    
+    # Paquete de prompt para Copilot (GET /api/analysis/{id}/bundle)
+    prompt_bundle_cache_size: int = 128  # Paquetes serializados en memoria por (sesión, revisión, formato)
+    prompt_bundle_chunk_bytes: int = 64 * 1024  # Bytes por fragmento de la respuesta
+    
+    # Idempotency-Key en los POST de creación
+    idempotency_ttl_hours: int = 24  # Tiempo que se guarda la respuesta original
+    idempotency_lock_seconds: int = 60  # Tras este tiempo un intento 'pending' se considera abandonado
+    
+    # Registro de consultas lentas a MongoDB
+    slow_query_enabled: bool = True
+    slow_query_ms: float = 100  # Umbral a partir del cual se registra un comando
+    slow_query_log_size: int = 50  # Comandos más lentos que se conservan en memoria
+    
+    # Búsqueda de sesiones
+    search_facet_limit: int = 20  # Valores por faceta de alta cardinalidad (proyecto, asignado)
+    search_fuzzy_threshold: float = 0.3  # Similitud mínima de trigramas (0 a 1) para considerar dos palabras iguales
+    search_fuzzy_max_terms: int = 20  # Palabras del vocabulario por palabra de la consulta
+    search_max_terms: int = 2000  # Palabras distintas indexadas por sesión
+    search_text_max_chars: int = 8000  # Tope de search_text por sesión (búsqueda literal)
+    search_vocabulary_cache_size: int = 50_000  # Palabras ya registradas en el vocabulario (por worker)
+    
+    # Listados en streaming (Accept: application/x-ndjson)
+    stream_batch_size: int = 100  # Documentos por lote del cursor
+    ndjson_chunk_bytes: int = 64 * 1024  # Bytes de líneas acumuladas antes de enviar
+    
+    # Notificaciones por webhook (outbox transaccional)
+    webhook_urls: str = ""  # URLs separadas por coma (integraciones de Copilot, canales de chat); vacío = sin notificaciones
+    webhook_timeout: float = 10  # Segundos por POST
+    outbox_poll_seconds: float = 2  # Espera del dispatcher cuando no hay eventos
+    outbox_batch_size: int = 100  # Eventos por POST a un mismo destino
+    outbox_max_attempts: int = 8  # Envíos antes de marcar el evento como fallido
+    outbox_backoff_seconds: float = 2  # Espera tras el primer fallo (se duplica en cada reintento)
+    outbox_backoff_max_seconds: float = 600
+    outbox_lease_seconds: float = 60  # Un lote tomado por un worker caído vuelve a estar disponible pasado este tiempo
+    outbox_retention_hours: int = 72  # TTL de los eventos ya entregados
+    
+    # Lecturas concurrentes idénticas (single-flight)
+    single_flight_enabled: bool = True  # Una sola lectura a MongoDB para pedidos simultáneos del mismo análisis/documento
+    single_flight_metrics_keys: int = 1000  # Claves con métricas por grupo (las menos recientes se descartan)
+    
+    # Operaciones masivas
+    bulk_batch_size: int = 500  # Documentos por update_many
+    
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -36,6 +121,11 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         """Convierte el string de CORS origins a lista"""
         return [origin.strip() for origin in self.cors_origins.split(",")]
+    
+    @property
+    def webhook_urls_list(self) -> List[str]:
+        """Convierte el string de webhooks a lista (sin vacíos)"""
+        return [url.strip() for url in self.webhook_urls.split(",") if url.strip()]
 
 
 # Instancia global de settings
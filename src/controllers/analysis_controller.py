@@ -1,41 +1,142 @@
 """
 Controlador de Sesiones de Análisis
 """
-from typing import List, Dict, Any, Optional
+import hashlib
+from typing import AsyncIterator, Awaitable, List, Dict, Any, Optional, Tuple
 from beanie import PydanticObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
 
 from ..models.analysis_session import (
     AnalysisSession,
     AnalysisType,
     AnalysisStatus
 )
-from ..models.project import Project
+from ..models.outbox_event import OutboxEventType
+from .archive_controller import ArchiveController
+from .form_schema_controller import FormSchemaController
+from .search_index_controller import SearchIndexController
+from .project_controller import ProjectController
+from .outbox_controller import OutboxController
+from .analytics_controller import AnalyticsController
 from ..utils.token_generator import generate_share_token
-from ..utils.yaml_validator import validate_yaml_structure
+from ..utils.yaml_validator import validate_yaml_structure, parse_yaml_string
+from ..utils.search import search_pattern
+from ..utils.links import link_id
+from ..utils.cache import LRUCache
+from ..utils.single_flight import SingleFlight
+from ..utils.bulk import iter_batches, update_in_batches
+from ..utils.answer_validator import AnswerValidator, completion_ratio
+from ..utils.revision import RevisionConflictError, update_with_revision
 from ..config.settings import settings
+from ..config.executor import CPUExecutor, estimate_size
+
+
+# YAML ya parseado y validado, indexado por hash SHA-256 del contenido crudo
+_yaml_cache = LRUCache(maxsize=settings.yaml_cache_size)
+
+# Validadores de respuestas compilados, indexados por (sesión, iteración)
+_validator_cache = LRUCache(maxsize=settings.answer_validator_cache_size)
+
+# Lecturas de sesiones en curso, por ("id", ID) o ("token", share_token)
+_session_reads = SingleFlight(
+    "analysis",
+    metrics_size=settings.single_flight_metrics_keys,
+    enabled=settings.single_flight_enabled
+)
+
+
+# Proyección de list_incomplete: solo campos del índice completeness_covered
+_PROGRESS_PROJECTION = {
+    "_id": 1,
+    "assigned_to": 1,
+    "answered_count": 1,
+    "required_answered": 1,
+    "required_total": 1,
+    "completion": 1,
+    "created_at": 1,
+}
+
+# Campos internos de la búsqueda que no se devuelven en los resultados
+_HIDDEN_SEARCH_FIELDS = {"search_text": 0, "search_terms": 0, "_score": 0}
+
+
+def _facet(field: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Subpipeline de $facet: conteo por valor de un campo, de mayor a menor"""
+    stages: List[Dict[str, Any]] = [
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+    ]
+    if limit:
+        stages.append({"$limit": limit})
+    return stages
 
 
 class AnalysisController:
     """Lógica de negocio para Sesiones de Análisis"""
     
+    @staticmethod
+    async def parse_raw_yaml(raw: bytes) -> Tuple[Dict[str, Any], str]:
+        """
+        Parsea y valida un YAML crudo (memoizado por hash del contenido)
+        
+        Returns:
+            Tupla (yaml_config, hash del contenido)
+        """
+        content_hash = hashlib.sha256(raw).hexdigest()
+        
+        yaml_config = _yaml_cache.get(content_hash)
+        if yaml_config is None:
+            try:
+                yaml_str = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                raise ValueError("El YAML debe estar codificado en UTF-8")
+            
+            yaml_config = await CPUExecutor.run(
+                parse_yaml_string,
+                yaml_str,
+                settings.yaml_max_nodes,
+                size=len(raw)
+            )
+            _yaml_cache.set(content_hash, yaml_config)
+        
+        return yaml_config, content_hash
+    
+    @staticmethod
+    async def _validate_yaml(
+        yaml_config: Dict[str, Any],
+        yaml_hash: Optional[str] = None
+    ) -> None:
+        """Valida el YAML salvo que ya se haya validado ese mismo contenido"""
+        if yaml_hash and yaml_hash in _yaml_cache:
+            return
+        
+        # Fuera del event loop si es grande
+        await CPUExecutor.run(
+            validate_yaml_structure,
+            yaml_config,
+            size=estimate_size(yaml_config)
+        )
+    
     @staticmethod
     async def create_analysis(
         project_id: PydanticObjectId,
         analysis_type: AnalysisType,
         yaml_config: Dict[str, Any],
         created_by: str,
-        assigned_to: str = None
+        assigned_to: str = None,
+        yaml_hash: str = None
     ) -> AnalysisSession:
         """Crea una nueva sesión de análisis"""
         
-        # Validar que el proyecto existe
-        project = await Project.get(project_id)
-        if not project:
-            raise ValueError(f"Proyecto {project_id} no encontrado")
+        # Validar que el proyecto existe; sin caché: su nombre se copia en la sesión
+        project = await ProjectController.get_project_for_write(project_id)
         
         # Validar estructura del YAML
-        validate_yaml_structure(yaml_config)
+        await AnalysisController._validate_yaml(yaml_config, yaml_hash)
+        search_fields = await SearchIndexController.build_fields(yaml_config, {})
+        form_schema_hash = await FormSchemaController.compile(yaml_config)
+        validator = AnalysisController._build_validator(yaml_config)
         
         # Generar token único
         share_token = generate_share_token()
@@ -43,8 +144,12 @@ class AnalysisController:
         # Crear sesión
         session = AnalysisSession(
             project=project,
+            project_name=project.name,
             analysis_type=analysis_type,
             yaml_config=yaml_config,
+            **search_fields,
+            form_schema_hash=form_schema_hash,
+            **AnalysisController._progress_fields(validator, {}),
             share_token=share_token,
             created_by=created_by,
             assigned_to=assigned_to,
@@ -54,86 +159,341 @@ class AnalysisController:
         )
         
         await session.insert()
+        await ProjectController.recheck_project_name(session)
+        _validator_cache.set((str(session.id), session.iteration), validator)
+        await AnalyticsController.record_created(session)
         return session
     
     @staticmethod
     async def get_analysis(analysis_id: PydanticObjectId) -> AnalysisSession:
-        """Obtiene una sesión de análisis por ID"""
-        session = await AnalysisSession.get(analysis_id, fetch_links=True)
+        """
+        Obtiene una sesión de análisis por ID (sin resolver el link al proyecto)
+        
+        Los pedidos simultáneos del mismo ID comparten una sola lectura
+        (single-flight); si fueron varios, cada uno recibe su propia copia.
+        """
+        session = await _session_reads.do(
+            ("id", analysis_id),
+            lambda: AnalysisController._load_session(AnalysisSession.get(analysis_id)),
+            label=str(analysis_id),
+            copy=AnalysisController._copy_session
+        )
         if not session:
             raise ValueError(f"Análisis {analysis_id} no encontrado")
         return session
     
     @staticmethod
     async def get_analysis_by_token(share_token: str) -> AnalysisSession:
-        """Obtiene una sesión de análisis por token (para URL pública)"""
-        session = await AnalysisSession.find_one(
-            AnalysisSession.share_token == share_token,
-            fetch_links=True
+        """Obtiene una sesión de análisis por token (para URL pública, single-flight)"""
+        session = await _session_reads.do(
+            ("token", share_token),
+            lambda: AnalysisController._load_session(AnalysisSession.find_one(
+                AnalysisSession.share_token == share_token
+            )),
+            # El token da acceso al formulario: en las métricas va solo su hash
+            label="token:" + hashlib.sha256(share_token.encode("utf-8")).hexdigest()[:12],
+            copy=AnalysisController._copy_session
         )
         if not session:
             raise ValueError(f"Token {share_token} inválido o expirado")
         return session
     
+    @staticmethod
+    async def _load_session(find: Awaitable[Optional[AnalysisSession]]) -> Optional[AnalysisSession]:
+        session = await find
+        if session is None:
+            return None
+        await ProjectController.fill_project_names([session])
+        # Sesiones en almacenamiento frío: rehidratar de forma transparente
+        return await ArchiveController.rehydrate(session)
+    
+    @staticmethod
+    def _copy_session(session: Optional[AnalysisSession]) -> Optional[AnalysisSession]:
+        return session.model_copy(deep=True) if session is not None else None
+    
+    @staticmethod
+    def _forget_reads(session: AnalysisSession) -> None:
+        """
+        Tras escribir una sesión, los pedidos siguientes no se unen a una
+        lectura empezada antes de la escritura
+        """
+        _session_reads.forget(("id", session.id))
+        _session_reads.forget(("token", session.share_token))
+    
+    @staticmethod
+    def get_answer_validator(session: AnalysisSession) -> AnswerValidator:
+        """
+        Validador de respuestas de la iteración actual de la sesión
+        
+        Se compila una vez desde yaml_config y se cachea por (id, iteración):
+        cada iteración trae un YAML nuevo, así que la clave nunca queda obsoleta.
+        """
+        key = (str(session.id), session.iteration)
+        validator = _validator_cache.get(key)
+        if validator is None:
+            validator = AnalysisController._build_validator(session.yaml_config)
+            _validator_cache.set(key, validator)
+        return validator
+    
+    @staticmethod
+    def _build_validator(yaml_config: Dict[str, Any]) -> AnswerValidator:
+        return AnswerValidator(
+            yaml_config,
+            max_value_length=settings.answers_max_value_length,
+            max_items=settings.answers_max_items
+        )
+    
+    @staticmethod
+    def _check_revision(session: AnalysisSession, expected_revision: Optional[int]) -> int:
+        """
+        Revisión contra la que se condiciona la escritura
+        
+        Con If-Match se exige la del cliente; sin él, la leída (protege
+        contra escrituras concurrentes entre la lectura y el update)
+        """
+        if expected_revision is None:
+            return session.revision
+        if expected_revision != session.revision:
+            raise RevisionConflictError(expected_revision, session.revision)
+        return expected_revision
+    
     @staticmethod
     async def update_answers(
         share_token: str,
-        answers: Dict[str, Any]
+        answers: Dict[str, Any],
+        complete: bool = False
     ) -> AnalysisSession:
-        """Actualiza las respuestas de una sesión (endpoint público)"""
+        """
+        Actualiza las respuestas de una sesión (endpoint público)
+        
+        Cada respuesta se escribe con $set sobre su propia clave, así dos
+        autosaves concurrentes de preguntas distintas no se pisan. El filtro
+        por share_token descarta el guardado si entretanto se creó una nueva
+        iteración (el token rota).
+        
+        Los contadores de avance se actualizan con $inc a partir del estado
+        previo que devuelve la propia escritura: solo cambian cuando una
+        pregunta pasa de vacía a respondida (o al revés) y son correctos
+        aunque haya autosaves concurrentes.
+        
+        Raises:
+            AnswerValidationError: Si las respuestas no cumplen el YAML
+                (se valida antes de cualquier escritura)
+        """
         session = await AnalysisController.get_analysis_by_token(share_token)
         
-        # Actualizar respuestas
-        session.answers.update(answers)
-        session.updated_at = datetime.utcnow()
+        validator = AnalysisController.get_answer_validator(session)
+        validator.validate(
+            answers,
+            current=session.answers,
+            require_complete=complete
+        )
+        
+        await ArchiveController.restore(session)
+        
+        now = datetime.utcnow()
+        # Las claves ya se validaron (sin '.' ni '$' inicial)
+        fields = {f"answers.{key}": value for key, value in answers.items()}
+        fields["updated_at"] = now
+        
+        # El aviso a los webhooks viaja en la misma escritura (outbox de la sesión)
+        update = OutboxController.with_event(
+            {"$set": fields, "$inc": {"revision": 1}},
+            OutboxEventType.ANSWERS_RECEIVED,
+            {"iteration": session.iteration, "question_ids": list(answers), "complete": complete}
+        )
+        
+        collection = AnalysisSession.get_motor_collection()
+        previous = await collection.find_one_and_update(
+            {"_id": session.id, "share_token": share_token},
+            update,
+            projection={"yaml_config": 1, "answers": 1, "revision": 1},
+            return_document=ReturnDocument.BEFORE
+        )
+        if previous is None:
+            raise ValueError(f"Token {share_token} inválido o expirado")
+        AnalysisController._forget_reads(session)
+        OutboxController.notify()
+        
+        # Estado posterior a esta escritura (el $set es atómico sobre 'previous')
+        merged = {**(previous.get("answers") or {}), **answers}
+        revision = previous["revision"] + 1
+        
+        delta = validator.completeness_delta(previous.get("answers"), answers)
+        if delta:
+            await AnalysisController._apply_progress_delta(session, share_token, delta)
         
-        await session.save()
+        # Los campos de búsqueda se recalculan con las respuestas ya fusionadas;
+        # si otra escritura avanzó la revisión, esa escritura los recalcula
+        search_fields = await SearchIndexController.build_fields(previous["yaml_config"], merged)
+        await collection.update_one(
+            {"_id": session.id, "revision": revision},
+            {"$set": search_fields}
+        )
+        
+        session.answers = merged
+        for field, value in search_fields.items():
+            setattr(session, field, value)
+        session.updated_at = now
+        session.revision = revision
         return session
     
+    @staticmethod
+    async def _apply_progress_delta(
+        session: AnalysisSession,
+        share_token: str,
+        delta: Dict[str, int]
+    ) -> None:
+        """
+        Aplica la variación de los contadores de avance y recalcula completion
+        
+        completion (una fracción) no admite $inc: se fija con los contadores
+        resultantes de este $inc y solo si siguen siendo esos. Si otro
+        autosave los movió entretanto, ese autosave fija el valor final.
+        """
+        collection = AnalysisSession.get_motor_collection()
+        counters = await collection.find_one_and_update(
+            {"_id": session.id, "share_token": share_token},
+            {"$inc": delta},
+            projection={"required_answered": 1, "required_total": 1, "answered_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if counters is None:
+            # Nueva iteración entretanto: sus contadores ya vienen reseteados
+            return
+        
+        required_answered = counters.get("required_answered", 0)
+        required_total = counters.get("required_total", 0)
+        completion = completion_ratio(required_answered, required_total)
+        await collection.update_one(
+            {"_id": session.id, "required_answered": required_answered, "required_total": required_total},
+            {"$set": {"completion": completion}}
+        )
+        
+        session.answered_count = counters.get("answered_count", 0)
+        session.required_answered = required_answered
+        session.required_total = required_total
+        session.completion = completion
+    
+    @staticmethod
+    def _progress_fields(validator: AnswerValidator, answers: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Contadores de avance completos (al crear la sesión o una iteración)"""
+        counters = validator.completeness(answers)
+        counters["completion"] = completion_ratio(counters["required_answered"], counters["required_total"])
+        return counters
+    
     @staticmethod
     async def add_iteration(
         analysis_id: PydanticObjectId,
         yaml_config: Dict[str, Any],
-        needs_more_info: bool = True
+        needs_more_info: bool = True,
+        yaml_hash: str = None,
+        expected_revision: Optional[int] = None
     ) -> AnalysisSession:
-        """Agrega una nueva iteración (nuevo YAML de Copilot)"""
+        """
+        Agrega una nueva iteración (nuevo YAML de Copilot)
+        
+        Raises:
+            RevisionConflictError: Si la sesión cambió desde expected_revision
+                (o desde la lectura, si no se indica)
+        """
         session = await AnalysisController.get_analysis(analysis_id)
+        expected = AnalysisController._check_revision(session, expected_revision)
+        await ArchiveController.restore(session)
         
         # Validar YAML
-        validate_yaml_structure(yaml_config)
+        await AnalysisController._validate_yaml(yaml_config, yaml_hash)
+        validator = AnalysisController._build_validator(yaml_config)
+        
+        now = datetime.utcnow()
         
         # Guardar iteración anterior en historial
         iteration_record = {
             "iteration": session.iteration,
             "yaml_generated": session.yaml_config,
             "answers_provided": session.answers,
-            "timestamp": datetime.utcnow()
+            "timestamp": now
         }
-        session.iteration_history.append(iteration_record)
         
-        # Actualizar a nueva iteración
-        session.iteration += 1
-        session.yaml_config = yaml_config
-        session.needs_more_info = needs_more_info
-        session.answers = {}  # Reset answers para nueva iteración
+        # Nueva iteración: reset de respuestas (y de su avance) y nuevo token
+        changes = {
+            "iteration": session.iteration + 1,
+            "yaml_config": yaml_config,
+            **await SearchIndexController.build_fields(yaml_config, {}),
+            "form_schema_hash": await FormSchemaController.compile(yaml_config),
+            **AnalysisController._progress_fields(validator, {}),
+            "needs_more_info": needs_more_info,
+            "answers": {},
+            "share_token": generate_share_token(),
+            "updated_at": now,
+        }
         
-        # Generar nuevo token
-        session.share_token = generate_share_token()
-        session.updated_at = datetime.utcnow()
+        session.revision = await update_with_revision(
+            AnalysisSession.get_motor_collection(),
+            session.id,
+            expected,
+            {"$set": changes, "$push": {"iteration_history": iteration_record}}
+        )
+        # Antes de rotar el token: el anterior ya no debe servir la lectura vieja
+        AnalysisController._forget_reads(session)
         
-        await session.save()
+        session.iteration_history.append(iteration_record)
+        for field, value in changes.items():
+            setattr(session, field, value)
+        _validator_cache.set((str(session.id), session.iteration), validator)
+        await AnalyticsController.record_iteration(session, now)
         return session
     
     @staticmethod
-    async def complete_analysis(analysis_id: PydanticObjectId) -> AnalysisSession:
-        """Marca el análisis como completo (Copilot dijo 'todo ok')"""
+    async def complete_analysis(
+        analysis_id: PydanticObjectId,
+        expected_revision: Optional[int] = None
+    ) -> AnalysisSession:
+        """
+        Marca el análisis como completo (Copilot dijo 'todo ok')
+        
+        Raises:
+            RevisionConflictError: Si la sesión cambió desde expected_revision
+                (o desde la lectura, si no se indica)
+        """
         session = await AnalysisController.get_analysis(analysis_id)
+        expected = AnalysisController._check_revision(session, expected_revision)
+        await ArchiveController.restore(session)
+        
+        now = datetime.utcnow()
+        # Completar dos veces no vuelve a contar en analytics ni mueve completed_at
+        newly_completed = session.status != AnalysisStatus.COMPLETED
+        changes = {
+            "status": AnalysisStatus.COMPLETED.value,
+            "needs_more_info": False,
+            "updated_at": now,
+        }
+        if newly_completed:
+            changes["completed_at"] = now
         
-        session.status = AnalysisStatus.COMPLETED
-        session.needs_more_info = False
-        session.updated_at = datetime.utcnow()
+        session.revision = await update_with_revision(
+            AnalysisSession.get_motor_collection(),
+            session.id,
+            expected,
+            OutboxController.with_event(
+                {"$set": changes},
+                OutboxEventType.ANALYSIS_COMPLETED,
+                {"iteration": session.iteration}
+            )
+        )
+        AnalysisController._forget_reads(session)
+        OutboxController.notify()
         
-        await session.save()
+        for field, value in changes.items():
+            setattr(session, field, value)
+        if newly_completed:
+            await AnalyticsController.record_completed([{
+                "project": link_id(session.project),
+                "project_name": session.project_name,
+                "created_by": session.created_by,
+                "created_at": session.created_at,
+                "iteration": session.iteration,
+            }], now)
         return session
     
     @staticmethod
@@ -151,51 +511,328 @@ class AnalysisController:
             .sort("-created_at")\
             .to_list()
         
-        return sessions
+        await ProjectController.fill_project_names(sessions)
+        return await ArchiveController.rehydrate_many(sessions)
+    
+    @staticmethod
+    async def _iter_sessions(cursor, batch_size: Optional[int] = None) -> AsyncIterator[AnalysisSession]:
+        """Sesiones de un cursor crudo, de a un lote en memoria"""
+        async for batch in iter_batches(cursor, batch_size or settings.stream_batch_size):
+            sessions = [AnalysisSession.model_validate(raw) for raw in batch]
+            await ProjectController.fill_project_names(sessions)
+            await ArchiveController.rehydrate_many(sessions)
+            for session in sessions:
+                yield session
+    
+    @staticmethod
+    async def iter_project_analyses(
+        project_id: PydanticObjectId,
+        analysis_type: AnalysisType = None,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[AnalysisSession]:
+        """
+        Igual que list_project_analyses pero recorriendo el cursor por lotes
+        (la memoria no depende de la cantidad de sesiones)
+        """
+        query: Dict[str, Any] = {"project.$id": project_id}
+        if analysis_type:
+            query["analysis_type"] = analysis_type.value
+        
+        batch_size = batch_size or settings.stream_batch_size
+        cursor = AnalysisSession.get_motor_collection()\
+            .find(query, _HIDDEN_SEARCH_FIELDS)\
+            .sort("created_at", -1)\
+            .batch_size(batch_size)
+        return AnalysisController._iter_sessions(cursor, batch_size)
 
     @staticmethod
     async def search_analyses(
         query: str,
         project_id: Optional[PydanticObjectId] = None,
         analysis_type: Optional[AnalysisType] = None,
-        limit: int = 50
-    ) -> List[AnalysisSession]:
+        status: Optional[AnalysisStatus] = None,
+        assigned_to: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        fuzzy: bool = True
+    ) -> Dict[str, Any]:
         """
-        Busca sesiones de análisis en TODO el contenido del YAML y respuestas.
-        Convierte el YAML completo a string para búsqueda universal.
+        Busca sesiones de análisis en el contenido del YAML y respuestas
+        
+        Con fuzzy (default) la búsqueda tolera errores de tipeo y acentos:
+        cada palabra de la consulta se compara por trigramas con los títulos
+        de sección, etiquetas y respuestas (ver SearchIndexController) y los
+        resultados se ordenan por similitud. Sin fuzzy, o si la consulta no
+        tiene palabras de al menos 3 letras, se busca la consulta literal
+        (substring) en todo el YAML y respuestas, más recientes primero.
+        
+        Una única agregación $facet devuelve la página de resultados, el
+        total y los conteos por tipo, estado, proyecto y asignado, todo sobre
+        las sesiones que cumplen la búsqueda y los filtros.
+        
+        Returns:
+            {"hits": [AnalysisSession], "total": int, "facets": {campo: [{value, label, count}]}}
         """
-        import json
+        stages, order = await AnalysisController._search_stages(
+            query, project_id, analysis_type, status, assigned_to, fuzzy
+        )
         
-        # Construir filtro base
-        base_filter = {}
+        facet_limit = settings.search_facet_limit
+        pipeline = stages + [
+            {"$facet": {
+                "hits": [
+                    {"$sort": order},
+                    {"$skip": offset},
+                    {"$limit": limit},
+                    {"$project": _HIDDEN_SEARCH_FIELDS},
+                ],
+                "total": [{"$count": "count"}],
+                "analysis_type": _facet("analysis_type"),
+                "status": _facet("status"),
+                "project": [
+                    {"$group": {
+                        "_id": "$project",
+                        "name": {"$first": "$project_name"},
+                        "count": {"$sum": 1},
+                    }},
+                    {"$sort": {"count": -1, "name": 1}},
+                    {"$limit": facet_limit},
+                ],
+                "assigned_to": _facet("assigned_to", facet_limit),
+            }},
+        ]
+        
+        result = (await AnalysisSession.get_motor_collection().aggregate(pipeline).to_list(length=1))[0]
+        
+        hits = [AnalysisSession.model_validate(raw) for raw in result["hits"]]
+        await ProjectController.fill_project_names(hits)
+        await ArchiveController.rehydrate_many(hits)
+        
+        facets = {
+            field: [{"value": item["_id"], "count": item["count"]} for item in result[field]]
+            for field in ("analysis_type", "status", "assigned_to")
+        }
+        facets["project"] = [
+            {"value": str(link_id(item["_id"])), "label": item.get("name"), "count": item["count"]}
+            for item in result["project"]
+        ]
+        
+        return {
+            "hits": hits,
+            "total": result["total"][0]["count"] if result["total"] else 0,
+            "facets": facets,
+        }
+    
+    @staticmethod
+    async def iter_search_analyses(
+        query: str,
+        project_id: Optional[PydanticObjectId] = None,
+        analysis_type: Optional[AnalysisType] = None,
+        status: Optional[AnalysisStatus] = None,
+        assigned_to: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        fuzzy: bool = True,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[AnalysisSession]:
+        """
+        Resultados de search_analyses (mismo filtro y orden) recorriendo el
+        cursor de la agregación por lotes; sin total ni facetas y sin límite
+        de página salvo que se indique limit
+        """
+        stages, order = await AnalysisController._search_stages(
+            query, project_id, analysis_type, status, assigned_to, fuzzy
+        )
+        
+        pipeline = stages + [{"$sort": order}]
+        if offset:
+            pipeline.append({"$skip": offset})
+        if limit:
+            pipeline.append({"$limit": limit})
+        pipeline.append({"$project": _HIDDEN_SEARCH_FIELDS})
+        
+        batch_size = batch_size or settings.stream_batch_size
+        cursor = AnalysisSession.get_motor_collection().aggregate(
+            pipeline,
+            batchSize=batch_size,
+            allowDiskUse=True
+        )
+        return AnalysisController._iter_sessions(cursor, batch_size)
+    
+    @staticmethod
+    async def _search_stages(
+        query: str,
+        project_id: Optional[PydanticObjectId],
+        analysis_type: Optional[AnalysisType],
+        status: Optional[AnalysisStatus],
+        assigned_to: Optional[str],
+        fuzzy: bool
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """
+        Etapas de filtrado (y relevancia) de la búsqueda de sesiones
+        
+        Returns:
+            Tupla (etapas del pipeline, orden de los resultados)
+        """
+        expansions = await SearchIndexController.expand_query(query) if fuzzy else []
+        
+        match: Dict[str, Any] = {}
+        if expansions:
+            conditions = SearchIndexController.match_conditions(expansions)
+            if len(conditions) == 1:
+                match.update(conditions[0])
+            else:
+                match["$or"] = conditions
+        else:
+            match["search_text"] = {"$regex": search_pattern(query)}
         if project_id:
-            base_filter["project"] = project_id
+            match["project.$id"] = project_id
         if analysis_type:
-            base_filter["analysis_type"] = analysis_type
+            match["analysis_type"] = analysis_type.value
+        if status:
+            match["status"] = status.value
+        if assigned_to:
+            match["assigned_to"] = assigned_to
         
-        # Obtener todas las sesiones que cumplan filtros base
-        all_sessions = await AnalysisSession.find(base_filter).to_list()
+        stages: List[Dict[str, Any]] = [{"$match": match}]
+        if expansions:
+            # Más relevantes primero (a igual relevancia, más recientes)
+            stages.append({"$addFields": {"_score": SearchIndexController.score_expression(expansions)}})
+            return stages, {"_score": -1, "created_at": -1, "_id": -1}
+        return stages, {"created_at": -1, "_id": -1}
+
+    @staticmethod
+    async def list_incomplete(
+        max_completion: float = 0.5,
+        older_than_days: float = 3,
+        status: AnalysisStatus = AnalysisStatus.PENDING_ANSWERS,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """
+        Sesiones con menos de max_completion de las requeridas respondidas
+        y creadas hace más de older_than_days, las menos avanzadas primero
         
-        # Filtrar en Python buscando en todo el contenido
-        query_lower = query.lower()
-        matching_sessions = []
+        Consulta cubierta por el índice completeness_covered: filtro, orden
+        y proyección se resuelven con el índice, sin leer las sesiones.
         
-        for session in all_sessions:
-            # Convertir YAML config completo a JSON string
-            yaml_str = json.dumps(session.yaml_config, ensure_ascii=False).lower()
-            
-            # Convertir answers completo a JSON string
-            answers_str = json.dumps(session.answers or {}, ensure_ascii=False).lower()
-            
-            # Buscar en ambos strings
-            if query_lower in yaml_str or query_lower in answers_str:
-                matching_sessions.append(session)
-                
-                # Limitar resultados
-                if len(matching_sessions) >= limit:
-                    break
-        
-        # Ordenar por fecha (más recientes primero)
-        matching_sessions.sort(key=lambda x: x.created_at, reverse=True)
-        
-        return matching_sessions[:limit]
+        Returns:
+            Documentos crudos con _id, assigned_to, contadores, completion y created_at
+        """
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        cursor = AnalysisSession.get_motor_collection()\
+            .find(
+                {
+                    "status": status.value,
+                    "completion": {"$lt": max_completion},
+                    "created_at": {"$lt": cutoff},
+                },
+                _PROGRESS_PROJECTION
+            )\
+            .sort([("completion", 1), ("created_at", 1)])\
+            .hint("completeness_covered")\
+            .limit(limit)
+        return await cursor.to_list(length=limit)
+
+    @staticmethod
+    def _bulk_query(
+        analysis_ids: Optional[List[PydanticObjectId]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Construye el filtro de una operación masiva por IDs y/o campos
+        
+        Raises:
+            ValueError: Si no se indicó ningún criterio (evita tocar toda la colección)
+        """
+        query: Dict[str, Any] = {}
+        if analysis_ids:
+            query["_id"] = {"$in": list(dict.fromkeys(analysis_ids))}
+        
+        for field, value in (filters or {}).items():
+            if value is None:
+                continue
+            if field == "project_id":
+                query["project.$id"] = PydanticObjectId(value)
+            else:
+                query[field] = value.value if hasattr(value, "value") else value
+        
+        if not query:
+            raise ValueError("Debe indicar IDs o al menos un filtro")
+        return query
+    
+    @staticmethod
+    async def bulk_complete(
+        analysis_ids: Optional[List[PydanticObjectId]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, int]:
+        """Marca como completas muchas sesiones por IDs o filtro"""
+        query = {"$and": [
+            AnalysisController._bulk_query(analysis_ids, filters),
+            {"status": {"$nin": [AnalysisStatus.COMPLETED.value, AnalysisStatus.ARCHIVED.value]}},
+        ]}
+        
+        # En milisegundos (lo que guarda MongoDB) para releer por completed_at
+        now = datetime.utcnow()
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        collection = AnalysisSession.get_motor_collection()
+        
+        async def record(batch: List[Dict[str, Any]]):
+            # El lote se leyó antes del update_many: una sesión que otro request
+            # completó entretanto no cumple el filtro y no lleva este completed_at
+            # (salvo que lo haya hecho en el mismo milisegundo)
+            changed = {
+                raw["_id"] async for raw in collection.find(
+                    {"_id": {"$in": [raw["_id"] for raw in batch]}, "completed_at": now},
+                    {"_id": 1}
+                )
+            }
+            await AnalyticsController.record_completed(
+                [raw for raw in batch if raw["_id"] in changed], now
+            )
+        
+        # Un mismo evento por lote: el relay lo distingue por sesión (event_id)
+        result = await update_in_batches(
+            collection,
+            query,
+            OutboxController.with_event(
+                {"$set": {
+                    "status": AnalysisStatus.COMPLETED.value,
+                    "needs_more_info": False,
+                    "updated_at": now,
+                    "completed_at": now,
+                }, "$inc": {"revision": 1}},
+                OutboxEventType.ANALYSIS_COMPLETED,
+                {"bulk": True}
+            ),
+            settings.bulk_batch_size,
+            projection={"project": 1, "project_name": 1, "created_by": 1, "created_at": 1, "iteration": 1},
+            on_batch=record
+        )
+        # Sin saber qué sesiones cambiaron, se olvidan todas las lecturas en curso
+        _session_reads.forget()
+        OutboxController.notify()
+        return result
+    
+    @staticmethod
+    async def bulk_reassign(
+        assigned_to: Optional[str],
+        analysis_ids: Optional[List[PydanticObjectId]] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, int]:
+        """Reasigna muchas sesiones a otro experto por IDs o filtro"""
+        query = {"$and": [
+            AnalysisController._bulk_query(analysis_ids, filters),
+            {"assigned_to": {"$ne": assigned_to}},
+        ]}
+        
+        result = await update_in_batches(
+            AnalysisSession.get_motor_collection(),
+            query,
+            {
+                "$set": {"assigned_to": assigned_to, "updated_at": datetime.utcnow()},
+                "$inc": {"revision": 1},
+            },
+            settings.bulk_batch_size
+        )
+        _session_reads.forget()
+        return result
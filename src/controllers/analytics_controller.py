@@ -0,0 +1,283 @@
+"""
+Controlador de Analytics (rollups diarios de throughput)
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import date, datetime, timedelta
+
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..models.analysis_session import AnalysisSession, AnalysisStatus
+from ..models.analytics_rollup import AnalyticsRollup
+from ..models.generated_doc import GeneratedDoc
+from ..utils.analytics import (
+    ROLLUP_COUNTERS,
+    RollupRow,
+    add_to_buckets,
+    completed_counters,
+    created_counters,
+    docs_counters,
+    iteration_counters,
+    rollup_rows,
+)
+from ..utils.links import link_id
+from ..config.settings import settings
+from .archive_controller import ArchiveController
+
+
+DUPLICATE_KEY = 11000
+
+# Evento a sumar: (momento, buckets que toca, contadores)
+RollupEvent = Tuple[datetime, Iterable[RollupRow], Dict[str, float]]
+
+
+def _dbref_id(value: Any) -> Any:
+    """ID de un Link leído crudo (DBRef) o ya resuelto"""
+    return getattr(value, "id", value)
+
+
+class AnalyticsController:
+    """
+    Rollups diarios por proyecto y por analista
+
+    Las escrituras de sesiones y documentos suman sus eventos con upsert +
+    $inc en el bucket del día; /api/analytics agrega solo esos buckets.
+    rebuild() los recalcula desde cero a partir de los datos de origen.
+    """
+
+    @staticmethod
+    async def record_events(events: Iterable[RollupEvent]) -> None:
+        """
+        Suma eventos en los rollups (un upsert por bucket tocado)
+
+        Un fallo se registra en el log sin interrumpir la escritura que lo
+        originó: los rollups son derivados y rebuild() corrige el desvío.
+        """
+        buckets: Dict[Tuple[str, str, datetime], Dict[str, Any]] = {}
+        for when, rows, counters in events:
+            add_to_buckets(buckets, when, rows, counters)
+        if not buckets:
+            return
+
+        now = datetime.utcnow()
+        operations = []
+        for bucket in buckets.values():
+            changes = {"updated_at": now}
+            if bucket["label"]:
+                changes["label"] = bucket["label"]
+            operations.append(UpdateOne(
+                {"dimension": bucket["dimension"], "key": bucket["key"], "day": bucket["day"]},
+                {
+                    "$inc": {counter: bucket[counter] for counter in ROLLUP_COUNTERS if bucket[counter]},
+                    "$set": changes,
+                    "$setOnInsert": {"week": bucket["week"]},
+                },
+                upsert=True
+            ))
+
+        try:
+            collection = AnalyticsRollup.get_motor_collection()
+            try:
+                await collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # Dos upserts simultáneos del mismo bucket: se reintentan solo
+                # los que chocaron (el otro ya creó el documento)
+                errors = e.details["writeErrors"]
+                if any(error["code"] != DUPLICATE_KEY for error in errors):
+                    raise
+                await collection.bulk_write([operations[error["index"]] for error in errors], ordered=False)
+        except Exception as e:
+            print(f"❌ Error actualizando analytics: {e}")
+
+    @staticmethod
+    def _session_rows(session: Any) -> Iterable[RollupRow]:
+        return rollup_rows(link_id(session.project), session.project_name, session.created_by)
+
+    @staticmethod
+    async def record_created(session: AnalysisSession) -> None:
+        """Sesión de análisis creada"""
+        await AnalyticsController.record_events([
+            (session.created_at, AnalyticsController._session_rows(session), created_counters()),
+        ])
+
+    @staticmethod
+    async def record_iteration(session: AnalysisSession, when: datetime) -> None:
+        """Iteración agregada a una sesión"""
+        await AnalyticsController.record_events([
+            (when, AnalyticsController._session_rows(session), iteration_counters()),
+        ])
+
+    @staticmethod
+    async def record_completed(sessions: Iterable[Dict[str, Any]], when: datetime) -> None:
+        """
+        Análisis completados en when
+
+        Args:
+            sessions: Documentos crudos con project, project_name, created_by,
+                created_at e iteration
+        """
+        await AnalyticsController.record_events([
+            (
+                when,
+                rollup_rows(_dbref_id(raw["project"]), raw.get("project_name"), raw.get("created_by")),
+                completed_counters(raw["created_at"], when, raw.get("iteration") or 1),
+            )
+            for raw in sessions
+        ])
+
+    @staticmethod
+    async def record_docs(doc: GeneratedDoc) -> None:
+        """Documentos generados guardados"""
+        await AnalyticsController.record_events([(
+            doc.generated_at,
+            rollup_rows(link_id(doc.project), doc.project_name, doc.generated_by),
+            docs_counters(len(doc.files)),
+        )])
+
+    @staticmethod
+    async def query(
+        group_by: str = "project",
+        granularity: str = "day",
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        key: Optional[str] = None,
+        limit: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Contadores por período (día o semana ISO) y proyecto/analista,
+        agregados solo desde los rollups
+
+        Por defecto, los últimos 30 días. Las semanas que cortan el rango
+        suman solo los días incluidos.
+
+        Returns:
+            {"date_from", "date_to", "totals": {...}, "buckets": [{period, key, label, ...}]}
+
+        Raises:
+            ValueError: Si date_from es posterior a date_to
+        """
+        date_to = date_to or datetime.utcnow().date()
+        date_from = date_from or date_to - timedelta(days=29)
+        if date_from > date_to:
+            raise ValueError("date_from no puede ser posterior a date_to")
+
+        match: Dict[str, Any] = {
+            "dimension": group_by,
+            "day": {
+                "$gte": datetime.combine(date_from, datetime.min.time()),
+                "$lte": datetime.combine(date_to, datetime.min.time()),
+            },
+        }
+        if key:
+            match["key"] = key
+        sums = {counter: {"$sum": f"${counter}"} for counter in ROLLUP_COUNTERS}
+
+        pipeline = [
+            {"$match": match},
+            {"$facet": {
+                "buckets": [
+                    # El label más reciente (un proyecto pudo renombrarse)
+                    {"$sort": {"day": 1}},
+                    {"$group": {
+                        "_id": {"period": "$day" if granularity == "day" else "$week", "key": "$key"},
+                        "label": {"$last": "$label"},
+                        **sums,
+                    }},
+                    {"$sort": {"_id.period": 1, "_id.key": 1}},
+                    {"$limit": limit},
+                ],
+                "totals": [{"$group": {"_id": None, **sums}}],
+            }},
+        ]
+        result = await AnalyticsRollup.get_motor_collection().aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {"buckets": [], "totals": []}
+
+        buckets = []
+        for row in facets["buckets"]:
+            period = row["_id"]["period"]
+            buckets.append({
+                "period": period.date().isoformat() if isinstance(period, datetime) else period,
+                "key": row["_id"]["key"],
+                "label": row.get("label"),
+                **{counter: row.get(counter, 0) for counter in ROLLUP_COUNTERS},
+            })
+        totals = facets["totals"][0] if facets["totals"] else {}
+
+        return {
+            "date_from": date_from,
+            "date_to": date_to,
+            "totals": {counter: totals.get(counter, 0) for counter in ROLLUP_COUNTERS},
+            "buckets": buckets,
+        }
+
+    @staticmethod
+    async def rebuild(batch_size: int = None) -> Dict[str, int]:
+        """
+        Recalcula todos los rollups desde analysis_sessions y generated_docs
+
+        Los buckets se arman en memoria con las mismas funciones que la
+        actualización incremental y se reemplazan en lotes; al final se
+        borran los que ya no corresponden a ningún dato. Conviene correrlo
+        con poco tráfico: un evento que llegue durante el recorrido puede
+        quedar contado dos veces o ninguna.
+
+        Returns:
+            Sesiones y documentos leídos, buckets escritos y borrados
+        """
+        batch_size = batch_size or settings.bulk_batch_size
+        # MongoDB guarda milisegundos: sin truncar, un bucket reemplazado en
+        # el mismo milisegundo del inicio quedaría "anterior" y se borraría
+        started_at = datetime.utcnow()
+        started_at = started_at.replace(microsecond=started_at.microsecond // 1000 * 1000)
+        buckets: Dict[Tuple[str, str, datetime], Dict[str, Any]] = {}
+        stats = {"sessions": 0, "docs": 0, "buckets": 0, "deleted": 0}
+
+        sessions = AnalysisSession.get_motor_collection().find({}, {
+            "project": 1, "project_name": 1, "created_by": 1, "created_at": 1, "updated_at": 1,
+            "status": 1, "completed_at": 1, "iteration": 1, "in_cold_storage": 1,
+            "iteration_history.timestamp": 1,
+        }).batch_size(batch_size)
+        async for raw in sessions:
+            rows = rollup_rows(_dbref_id(raw["project"]), raw.get("project_name"), raw.get("created_by"))
+            add_to_buckets(buckets, raw["created_at"], rows, created_counters())
+
+            history = raw.get("iteration_history") or []
+            if raw.get("in_cold_storage"):
+                history = (await ArchiveController.load_cold_fields(raw["_id"])).get("iteration_history") or []
+            for record in history:
+                add_to_buckets(buckets, record.get("timestamp") or raw["created_at"], rows, iteration_counters())
+
+            # Las sesiones anteriores a completed_at usan su última modificación
+            completed_at = raw.get("completed_at")
+            if completed_at is None and raw.get("status") == AnalysisStatus.COMPLETED.value:
+                completed_at = raw.get("updated_at")
+            if completed_at is not None:
+                add_to_buckets(buckets, completed_at, rows, completed_counters(
+                    raw["created_at"], completed_at, raw.get("iteration") or 1
+                ))
+            stats["sessions"] += 1
+
+        docs = GeneratedDoc.get_motor_collection().find({}, {
+            "project": 1, "project_name": 1, "generated_by": 1, "generated_at": 1, "files.path": 1,
+        }).batch_size(batch_size)
+        async for raw in docs:
+            rows = rollup_rows(_dbref_id(raw["project"]), raw.get("project_name"), raw.get("generated_by"))
+            add_to_buckets(buckets, raw["generated_at"], rows, docs_counters(len(raw.get("files") or [])))
+            stats["docs"] += 1
+
+        collection = AnalyticsRollup.get_motor_collection()
+        operations: List[ReplaceOne] = []
+        for bucket in buckets.values():
+            key = {"dimension": bucket["dimension"], "key": bucket["key"], "day": bucket["day"]}
+            operations.append(ReplaceOne(key, {**bucket, "updated_at": datetime.utcnow()}, upsert=True))
+            if len(operations) >= batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                operations.clear()
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+        stats["buckets"] = len(buckets)
+
+        # Buckets sin datos de origen (ni reemplazados ni tocados desde el inicio)
+        result = await collection.delete_many({"updated_at": {"$lt": started_at}})
+        stats["deleted"] = result.deleted_count
+        return stats
@@ -0,0 +1,298 @@
+"""
+Controlador de Almacenamiento Frío (tiering de sesiones de análisis)
+"""
+import asyncio
+import zlib
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+
+import bson
+from beanie import PydanticObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+from ..models.analysis_session import AnalysisSession, AnalysisStatus
+from ..models.analysis_archive import AnalysisArchive
+from ..models.project import Project, ProjectStatus
+from ..config.settings import settings
+
+
+# Campos pesados que se mueven al archivo
+COLD_FIELDS = ("yaml_config", "answers", "iteration_history")
+
+
+def _decompress(payload: bytes) -> Dict[str, Any]:
+    return bson.decode(zlib.decompress(payload))
+
+
+class ArchiveController:
+    """Lógica de negocio para mover sesiones antiguas a almacenamiento frío"""
+
+    _task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    async def archive_sessions(
+        older_than_days: int = None,
+        batch_size: int = None
+    ) -> Dict[str, int]:
+        """
+        Mueve a analysis_sessions_archive el contenido pesado de las sesiones
+        completadas (o de proyectos archivados) sin cambios desde hace N días
+
+        La sesión queda como stub (in_cold_storage=True) y se rehidrata al
+        leerla con AnalysisController.get_analysis.
+
+        Returns:
+            Conteo de sesiones archivadas y bytes antes/después de comprimir
+        """
+        older_than_days = older_than_days if older_than_days is not None else settings.archive_after_days
+        batch_size = batch_size or settings.archive_batch_size
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+        archived_projects = await Project.get_motor_collection().distinct(
+            "_id", {"status": ProjectStatus.ARCHIVED.value}
+        )
+
+        query = {
+            "in_cold_storage": {"$ne": True},
+            "updated_at": {"$lt": cutoff},
+            "$or": [
+                {"status": {"$in": [AnalysisStatus.COMPLETED.value, AnalysisStatus.ARCHIVED.value]}},
+                {"project.$id": {"$in": archived_projects}},
+            ],
+        }
+        projection = {field: 1 for field in COLD_FIELDS}
+        projection["updated_at"] = 1
+
+        sessions = AnalysisSession.get_motor_collection()
+        archives = AnalysisArchive.get_motor_collection()
+        cursor = sessions.find(query, projection).batch_size(batch_size)
+
+        stats = {"archived": 0, "original_bytes": 0, "compressed_bytes": 0}
+        batch = []
+
+        async def flush():
+            archive_ops = []
+            stub_ops = []
+            now = datetime.utcnow()
+
+            for raw in batch:
+                cold = {field: raw.get(field) for field in COLD_FIELDS}
+                original = bson.encode(cold)
+                payload = zlib.compress(original, 6)
+
+                archive_ops.append(ReplaceOne(
+                    {"session_id": raw["_id"]},
+                    {
+                        "session_id": raw["_id"],
+                        "payload": payload,
+                        "original_size": len(original),
+                        "compressed_size": len(payload),
+                        "archived_at": now,
+                    },
+                    upsert=True
+                ))
+
+                # Solo se convierte en stub si nadie la modificó desde la lectura
+                title = (raw.get("yaml_config") or {}).get("title")
+                stub_ops.append(UpdateOne(
+                    {"_id": raw["_id"], "updated_at": raw["updated_at"], "in_cold_storage": {"$ne": True}},
+                    {"$set": {
+                        "yaml_config": {"title": title} if title else {},
+                        "answers": {},
+                        "iteration_history": [],
+                        "in_cold_storage": True,
+                        "archived_at": now,
+                    }}
+                ))
+
+                stats["original_bytes"] += len(original)
+                stats["compressed_bytes"] += len(payload)
+
+            # Primero el archivo: si falla, las sesiones siguen intactas
+            await archives.bulk_write(archive_ops, ordered=False)
+            result = await sessions.bulk_write(stub_ops, ordered=False)
+            stats["archived"] += result.modified_count
+
+            # Las que cambiaron desde la lectura siguen calientes: su archivo sobra
+            if result.modified_count < len(batch):
+                hot = await sessions.distinct("_id", {
+                    "_id": {"$in": [raw["_id"] for raw in batch]},
+                    "in_cold_storage": {"$ne": True},
+                })
+                if hot:
+                    await archives.delete_many({"session_id": {"$in": hot}})
+            batch.clear()
+
+        async for raw in cursor:
+            batch.append(raw)
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+
+        return stats
+
+    @staticmethod
+    async def rehydrate(session: AnalysisSession) -> AnalysisSession:
+        """
+        Completa en memoria una sesión en almacenamiento frío (solo lectura)
+
+        La sesión sigue marcada como in_cold_storage; para modificarla usar
+        restore(). Si el archivo ya no está porque otro pedido la restauró
+        después de leer el stub, se toma la sesión actual de la colección.
+
+        Raises:
+            ValueError: Si la sesión sigue en almacenamiento frío sin archivo
+        """
+        if not session.in_cold_storage:
+            return session
+
+        archive = await AnalysisArchive.find_one(AnalysisArchive.session_id == session.id)
+        if not archive:
+            await ArchiveController._reload_restored([session])
+            if session.in_cold_storage:
+                raise ValueError(f"Archivo de la sesión {session.id} no encontrado")
+            return session
+
+        cold = _decompress(archive.payload)
+        session.yaml_config = cold.get("yaml_config") or {}
+        session.answers = cold.get("answers") or {}
+        session.iteration_history = cold.get("iteration_history") or []
+        return session
+
+    @staticmethod
+    async def rehydrate_many(sessions: List[AnalysisSession]) -> List[AnalysisSession]:
+        """
+        Igual que rehydrate para una página o lote de sesiones, con una sola
+        consulta $in al archivo para todas las que están en almacenamiento frío
+
+        Una sesión cuyo archivo no existe se relee (otro pedido pudo
+        restaurarla); si sigue en frío queda como stub, con aviso en el log.
+        """
+        cold_sessions = [session for session in sessions if session.in_cold_storage]
+        if not cold_sessions:
+            return sessions
+
+        archives = AnalysisArchive.get_motor_collection().find(
+            {"session_id": {"$in": [session.id for session in cold_sessions]}},
+            {"session_id": 1, "payload": 1}
+        )
+        payloads = {raw["session_id"]: raw["payload"] async for raw in archives}
+
+        missing = [session for session in cold_sessions if session.id not in payloads]
+        if missing:
+            await ArchiveController._reload_restored(missing)
+            for session in missing:
+                if session.in_cold_storage:
+                    print(f"⚠️  Archivo de la sesión {session.id} no encontrado")
+
+        for session in cold_sessions:
+            payload = payloads.get(session.id)
+            if payload is None:
+                continue
+            cold = _decompress(payload)
+            session.yaml_config = cold.get("yaml_config") or {}
+            session.answers = cold.get("answers") or {}
+            session.iteration_history = cold.get("iteration_history") or []
+        return sessions
+
+    @staticmethod
+    async def _reload_restored(sessions: List[AnalysisSession]) -> None:
+        """
+        Relee sesiones leídas como stub que otro pedido restauró entretanto
+        y copia su estado actual (campos pesados incluidos) en cada una
+
+        Las que siguen en almacenamiento frío (o ya no existen) no se tocan.
+        """
+        by_id = {session.id: session for session in sessions}
+        async for raw in AnalysisSession.get_motor_collection().find(
+            {"_id": {"$in": list(by_id)}, "in_cold_storage": {"$ne": True}}
+        ):
+            current = AnalysisSession.model_validate(raw)
+            session = by_id[current.id]
+            project_name = session.project_name
+            for field in AnalysisSession.model_fields:
+                setattr(session, field, getattr(current, field))
+            # Conserva el nombre ya completado (fill_project_names) en sesiones antiguas
+            if session.project_name is None:
+                session.project_name = project_name
+
+    @staticmethod
+    async def load_cold_fields(session_id: PydanticObjectId) -> Dict[str, Any]:
+        """
+        Campos pesados (COLD_FIELDS) de una sesión en almacenamiento frío
+
+        Raises:
+            ValueError: Si el archivo de la sesión no existe
+        """
+        archive = await AnalysisArchive.find_one(AnalysisArchive.session_id == session_id)
+        if not archive:
+            raise ValueError(f"Archivo de la sesión {session_id} no encontrado")
+        return _decompress(archive.payload)
+
+    @staticmethod
+    async def restore(session: AnalysisSession) -> AnalysisSession:
+        """
+        Devuelve una sesión al almacenamiento caliente antes de modificarla
+
+        Seguro con pedidos concurrentes: la escritura solo aplica si la sesión
+        sigue archivada y solo quien la aplicó borra el archivo; los demás
+        releen la sesión ya restaurada (con los cambios que haya tenido).
+        """
+        if not session.in_cold_storage:
+            return session
+
+        await ArchiveController.rehydrate(session)
+        if not session.in_cold_storage:
+            # rehydrate no encontró el archivo y releyó la sesión ya restaurada
+            return session
+
+        result = await AnalysisSession.get_motor_collection().update_one(
+            {"_id": session.id, "in_cold_storage": True, "archived_at": {"$ne": None}},
+            {"$set": {
+                "yaml_config": session.yaml_config,
+                "answers": session.answers,
+                "iteration_history": session.iteration_history,
+                "in_cold_storage": False,
+                "archived_at": None,
+            }}
+        )
+        if not result.modified_count:
+            # Otro pedido la restauró entre la lectura del archivo y esta escritura
+            await ArchiveController._reload_restored([session])
+            if session.in_cold_storage:
+                raise ValueError(f"Sesión {session.id} no encontrada")
+            return session
+
+        await AnalysisArchive.find(AnalysisArchive.session_id == session.id).delete()
+
+        session.in_cold_storage = False
+        session.archived_at = None
+        return session
+
+    @classmethod
+    def start_scheduler(cls):
+        """Arranca el job periódico si ARCHIVE_INTERVAL_HOURS > 0"""
+        if settings.archive_interval_hours > 0:
+            cls._task = asyncio.create_task(cls._run_periodically())
+
+    @classmethod
+    async def stop_scheduler(cls):
+        """Detiene el job periódico"""
+        if cls._task:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+
+    @classmethod
+    async def _run_periodically(cls):
+        while True:
+            await asyncio.sleep(settings.archive_interval_hours * 3600)
+            try:
+                stats = await cls.archive_sessions()
+                print(f"🧊 Archivado: {stats['archived']} sesiones movidas a almacenamiento frío")
+            except Exception as e:
+                print(f"❌ Error en el job de archivado: {e}")
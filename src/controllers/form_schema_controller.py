@@ -0,0 +1,93 @@
+"""
+Controlador de Esquemas de Formulario Compilados
+"""
+from typing import Any, Dict
+from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+
+from ..models.analysis_session import AnalysisSession
+from ..models.form_schema import FormSchema
+from ..utils.cache import LRUCache
+from ..utils.form_schema import build_form_schema, encode_form_schema
+from ..config.settings import settings
+from ..config.executor import CPUExecutor, estimate_size
+
+
+# JSON serializado de cada esquema, indexado por su hash (inmutable: nunca se invalida)
+_schema_cache = LRUCache(maxsize=settings.form_schema_cache_size)
+
+
+class FormSchemaController:
+    """Lógica de negocio para compilar y servir los esquemas de formulario"""
+
+    @staticmethod
+    async def compile(yaml_config: Dict[str, Any]) -> str:
+        """
+        Compila el YAML de una iteración y guarda el esquema si es nuevo
+
+        Se llama al crear la sesión y al agregar una iteración, así el
+        endpoint público nunca compila.
+
+        Returns:
+            Hash del esquema (para form_schema_hash de la sesión)
+        """
+        schema, body, schema_hash = await CPUExecutor.run(
+            build_form_schema,
+            yaml_config,
+            size=estimate_size(yaml_config)
+        )
+        if schema_hash in _schema_cache:
+            return schema_hash
+
+        # Upsert: otra sesión con el mismo YAML puede haberlo guardado antes
+        try:
+            await FormSchema.get_motor_collection().update_one(
+                {"schema_hash": schema_hash},
+                {"$setOnInsert": {"content": schema, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Otro worker lo insertó en paralelo
+            pass
+        _schema_cache.set(schema_hash, body)
+        return schema_hash
+
+    @staticmethod
+    async def get_body(schema_hash: str) -> bytes:
+        """
+        JSON serializado de un esquema (LRU en memoria y, si no, MongoDB)
+
+        Raises:
+            ValueError: Si el esquema no existe
+        """
+        body = _schema_cache.get(schema_hash)
+        if body is not None:
+            return body
+
+        stored = await FormSchema.find_one(FormSchema.schema_hash == schema_hash)
+        if not stored:
+            raise ValueError(f"Esquema de formulario {schema_hash} no encontrado")
+
+        body, _ = encode_form_schema(stored.content)
+        _schema_cache.set(schema_hash, body)
+        return body
+
+    @staticmethod
+    async def ensure_for_session(session: AnalysisSession) -> str:
+        """
+        Hash del esquema de la iteración actual, compilándolo si la sesión
+        es anterior a los esquemas precompilados
+
+        El hash se guarda condicionado a la iteración leída (si entretanto
+        llegó un YAML nuevo, esa iteración ya trae su propio esquema).
+        """
+        if session.form_schema_hash:
+            return session.form_schema_hash
+
+        schema_hash = await FormSchemaController.compile(session.yaml_config)
+        await AnalysisSession.get_motor_collection().update_one(
+            {"_id": session.id, "iteration": session.iteration},
+            {"$set": {"form_schema_hash": schema_hash}}
+        )
+        session.form_schema_hash = schema_hash
+        return schema_hash
@@ -1,13 +1,36 @@
 """
 Controlador de Documentos Generados
 """
-from typing import List, Dict, Any
+import hashlib
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from beanie import PydanticObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 
 from ..models.generated_doc import GeneratedDoc
 from ..models.analysis_session import AnalysisSession
-from ..models.project import Project
+from ..models.rendered_markdown import RenderedMarkdown
+from .project_controller import ProjectController
+from .analytics_controller import AnalyticsController
+from ..utils.bulk import iter_batches
+from ..utils.cache import LRUCache
+from ..utils.single_flight import SingleFlight
+from ..utils.markdown_renderer import render_markdown, content_hash
+from ..utils.snippets import build_file_hits
+from ..utils.cursor import encode_cursor, decode_cursor
+from ..config.settings import settings
+from ..config.executor import CPUExecutor, estimate_size
+
+
+# HTML renderizado indexado por hash del contenido markdown
+_html_cache = LRUCache(maxsize=settings.markdown_cache_size)
+
+# Lecturas de documentos en curso por ID
+_doc_reads = SingleFlight(
+    "docs",
+    metrics_size=settings.single_flight_metrics_keys,
+    enabled=settings.single_flight_enabled
+)
 
 
 class GeneratedDocController:
@@ -22,30 +45,34 @@ class GeneratedDocController:
     ) -> GeneratedDoc:
         """Guarda los archivos .md generados por Copilot"""
         
-        # Validar que el proyecto existe
-        project = await Project.get(project_id)
-        if not project:
-            raise ValueError(f"Proyecto {project_id} no encontrado")
+        # Validar que el proyecto existe; sin caché: su nombre se copia en el documento
+        project = await ProjectController.get_project_for_write(project_id)
         
         # Validar que la sesión existe
         session = await AnalysisSession.get(analysis_session_id)
         if not session:
             raise ValueError(f"Sesión {analysis_session_id} no encontrada")
         
-        # Agregar timestamp a cada archivo
+        # Agregar timestamp, tamaño y hash a cada archivo (para el manifest)
         for file in files:
             if "generated_at" not in file:
                 file["generated_at"] = datetime.utcnow()
+            encoded = file.get("content", "").encode("utf-8")
+            file["size"] = len(encoded)
+            file["hash"] = hashlib.sha256(encoded).hexdigest()
         
         # Crear documento
         doc = GeneratedDoc(
             project=project,
+            project_name=project.name,
             analysis_session=session,
             files=files,
             generated_by=generated_by
         )
         
         await doc.insert()
+        await ProjectController.recheck_project_name(doc)
+        await AnalyticsController.record_docs(doc)
         return doc
     
     @staticmethod
@@ -54,27 +81,242 @@ class GeneratedDocController:
     ) -> List[GeneratedDoc]:
         """Lista todos los documentos generados de un proyecto"""
         docs = await GeneratedDoc.find(
-            {"project.$id": project_id},
-            fetch_links=True
+            {"project.$id": project_id}
         ).sort("-generated_at").to_list()
         
+        await ProjectController.fill_project_names(docs)
         return docs
     
+    @staticmethod
+    async def iter_project_docs(
+        project_id: PydanticObjectId,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[GeneratedDoc]:
+        """
+        Igual que get_project_docs pero recorriendo el cursor por lotes
+        (la memoria no depende de la cantidad de documentos)
+        """
+        batch_size = batch_size or settings.stream_batch_size
+        cursor = GeneratedDoc.get_motor_collection()\
+            .find({"project.$id": project_id})\
+            .sort("generated_at", -1)\
+            .batch_size(batch_size)
+        
+        async def docs() -> AsyncIterator[GeneratedDoc]:
+            async for batch in iter_batches(cursor, batch_size):
+                items = [GeneratedDoc.model_validate(raw) for raw in batch]
+                await ProjectController.fill_project_names(items)
+                for doc in items:
+                    yield doc
+        
+        return docs()
+    
     @staticmethod
     async def get_analysis_docs(
         analysis_session_id: PydanticObjectId
     ) -> GeneratedDoc:
         """Obtiene los documentos de una sesión específica"""
         doc = await GeneratedDoc.find_one(
-            {"analysis_session.$id": analysis_session_id},
-            fetch_links=True
+            {"analysis_session.$id": analysis_session_id}
         )
+        if doc:
+            await ProjectController.fill_project_names([doc])
         return doc
     
     @staticmethod
     async def get_doc(doc_id: PydanticObjectId) -> GeneratedDoc:
-        """Obtiene un documento por ID"""
-        doc = await GeneratedDoc.get(doc_id, fetch_links=True)
+        """
+        Obtiene un documento por ID (sin resolver los links)
+        
+        Los pedidos simultáneos del mismo ID comparten una sola lectura y el
+        mismo objeto (sin copia: los archivos pueden pesar varios MB), así
+        que el resultado es de solo lectura.
+        """
+        doc = await _doc_reads.do(doc_id, lambda: GeneratedDocController._load_doc(doc_id))
         if not doc:
             raise ValueError(f"Documento {doc_id} no encontrado")
         return doc
+    
+    @staticmethod
+    async def _load_doc(doc_id: PydanticObjectId) -> Optional[GeneratedDoc]:
+        doc = await GeneratedDoc.get(doc_id)
+        if doc is not None:
+            await ProjectController.fill_project_names([doc])
+        return doc
+    
+    @staticmethod
+    async def get_manifest(doc_id: PydanticObjectId) -> Dict[str, Any]:
+        """
+        Obtiene la lista de archivos (ruta, tamaño, hash) sin su contenido
+        
+        El contenido nunca sale de MongoDB: para documentos antiguos sin
+        size/hash guardados, el tamaño se calcula en el servidor.
+        """
+        pipeline = [
+            {"$match": {"_id": doc_id}},
+            {"$project": {
+                "project": 1,
+                "analysis_session": 1,
+                "generated_at": 1,
+                "generated_by": 1,
+                "files": {"$map": {
+                    "input": "$files",
+                    "as": "f",
+                    "in": {
+                        "path": "$$f.path",
+                        "size": {"$ifNull": ["$$f.size", {"$strLenBytes": "$$f.content"}]},
+                        "hash": {"$ifNull": ["$$f.hash", None]},
+                        "generated_at": "$$f.generated_at",
+                    },
+                }},
+            }},
+        ]
+        
+        docs = await GeneratedDoc.get_motor_collection().aggregate(pipeline).to_list(length=1)
+        if not docs:
+            raise ValueError(f"Documento {doc_id} no encontrado")
+        return docs[0]
+    
+    @staticmethod
+    async def get_file(doc_id: PydanticObjectId, path: str) -> Dict[str, Any]:
+        """
+        Obtiene un único archivo del documento
+        
+        Usa una proyección $elemMatch para traer solo ese elemento de files
+        """
+        doc = await GeneratedDoc.get_motor_collection().find_one(
+            {"_id": doc_id, "files.path": path},
+            {"files": {"$elemMatch": {"path": path}}}
+        )
+        if not doc or not doc.get("files"):
+            raise ValueError(f"Archivo {path} no encontrado en el documento {doc_id}")
+        
+        file = doc["files"][0]
+        if not file.get("hash"):
+            # Documentos guardados antes de almacenar size/hash
+            encoded = file.get("content", "").encode("utf-8")
+            file["size"] = len(encoded)
+            file["hash"] = hashlib.sha256(encoded).hexdigest()
+        return file
+    
+    @staticmethod
+    async def render_file_html(doc_id: PydanticObjectId, path: str) -> Tuple[str, str]:
+        """
+        Renderiza un archivo markdown del documento a HTML sanitizado
+        
+        Usa un LRU en memoria y, si está habilitada, la colección
+        rendered_markdown como caché persistente; ambos por hash del contenido.
+        
+        Returns:
+            Tupla (html, hash del contenido)
+        """
+        file = await GeneratedDocController.get_file(doc_id, path)
+        content = file.get("content", "")
+        key = content_hash(content)
+        
+        html = _html_cache.get(key)
+        if html is not None:
+            return html, key
+        
+        if settings.markdown_cache_persistent:
+            cached = await RenderedMarkdown.find_one(RenderedMarkdown.content_hash == key)
+            if cached:
+                _html_cache.set(key, cached.html)
+                return cached.html, key
+        
+        html = await CPUExecutor.run(render_markdown, content, size=len(content))
+        _html_cache.set(key, html)
+        
+        if settings.markdown_cache_persistent:
+            try:
+                await RenderedMarkdown(content_hash=key, html=html).insert()
+            except DuplicateKeyError:
+                # Otro worker lo renderizó y guardó en paralelo
+                pass
+        
+        return html, key
+    
+    @staticmethod
+    async def search_docs(
+        query: str,
+        project_id: Optional[PydanticObjectId] = None,
+        analysis_session_id: Optional[PydanticObjectId] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Búsqueda full-text sobre las rutas y el contenido de los archivos
+        
+        Los documentos se ordenan por textScore (índice files_text) y cada uno
+        aporta uno o más hits por archivo con su snippet resaltado.
+        
+        Args:
+            query: Consulta (sintaxis $text: frases entre comillas, -excluir)
+            project_id: Filtrar por proyecto
+            analysis_session_id: Filtrar por sesión de análisis
+            limit: Documentos por página (la página trae todos los hits de
+                esos documentos, que pueden ser más que limit)
+            cursor: Cursor devuelto por la página anterior
+        
+        Returns:
+            Tupla (hits, cursor de la siguiente página o None)
+        """
+        match: Dict[str, Any] = {"$text": {"$search": query}}
+        if project_id:
+            match["project.$id"] = project_id
+        if analysis_session_id:
+            match["analysis_session.$id"] = analysis_session_id
+        
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": match},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+        ]
+        
+        # Keyset pagination sobre (score desc, _id asc)
+        if cursor:
+            position = decode_cursor(cursor)
+            last_id = PydanticObjectId(position["id"])
+            pipeline.append({"$match": {"$or": [
+                {"score": {"$lt": position["score"]}},
+                {"score": position["score"], "_id": {"$gt": last_id}},
+            ]}})
+        
+        pipeline += [
+            {"$sort": {"score": -1, "_id": 1}},
+            {"$limit": limit + 1},
+            {"$project": {
+                "score": 1,
+                "project": 1,
+                "analysis_session": 1,
+                "generated_at": 1,
+                "files.path": 1,
+                "files.content": 1,
+            }},
+        ]
+        
+        docs = await GeneratedDoc.get_motor_collection().aggregate(pipeline).to_list(length=None)
+        
+        next_cursor = None
+        if len(docs) > limit:
+            docs = docs[:limit]
+            next_cursor = encode_cursor({"score": docs[-1]["score"], "id": str(docs[-1]["_id"])})
+        
+        hits = []
+        for doc in docs:
+            file_hits = await CPUExecutor.run(
+                build_file_hits,
+                doc["files"],
+                query,
+                size=estimate_size(doc["files"])
+            )
+            for file_hit in file_hits:
+                hits.append({
+                    "doc_id": str(doc["_id"]),
+                    "project_id": str(doc["project"].id),
+                    "analysis_session_id": str(doc["analysis_session"].id),
+                    "score": doc["score"],
+                    "generated_at": doc["generated_at"],
+                    **file_hit,
+                })
+        
+        return hits, next_cursor
@@ -0,0 +1,157 @@
+"""
+Controlador de Idempotencia (header Idempotency-Key)
+"""
+import hashlib
+import json
+import secrets
+from typing import Dict, Any, Optional
+from datetime import datetime, timedelta
+
+from pymongo.errors import DuplicateKeyError
+
+from ..models.idempotency_record import IdempotencyRecord, IdempotencyStatus
+from ..config.settings import settings
+
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyInProgressError(ValueError):
+    """Otra petición con la misma clave todavía se está procesando"""
+
+
+class IdempotencyMismatchError(ValueError):
+    """La clave ya se usó con un body distinto"""
+
+
+class IdempotencyOwnershipLostError(IdempotencyInProgressError):
+    """
+    Otro intento retomó la clave (este superó IDEMPOTENCY_LOCK_SECONDS):
+    la respuesta que vale es la de ese intento
+    """
+
+
+def fingerprint(scope: str, payload: Any) -> str:
+    """SHA-256 del body en JSON canónico (independiente del orden de claves)"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{scope}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class IdempotencyController:
+    """Lógica de negocio para reintentos seguros de los POST de creación"""
+
+    @staticmethod
+    async def begin(key: str, scope: str, payload: Any) -> IdempotencyRecord:
+        """
+        Reserva la clave para esta petición
+
+        Cada intento que reserva o retoma la clave recibe su propio token
+        (owner); complete y release solo aplican con ese token.
+
+        Returns:
+            El registro completado cuya respuesta hay que devolver, o el
+            registro pendiente de este intento (status PENDING) si la
+            petición debe ejecutarse
+
+        Raises:
+            ValueError: Si la clave no es válida
+            IdempotencyMismatchError: Si la clave se usó con otro body
+            IdempotencyInProgressError: Si la primera petición sigue en curso
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f"Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres")
+
+        digest = fingerprint(scope, payload)
+        record = IdempotencyRecord(key=key, scope=scope, fingerprint=digest, owner=secrets.token_hex(16))
+
+        try:
+            await record.insert()
+            return record
+        except DuplicateKeyError:
+            pass
+
+        existing = await IdempotencyRecord.find_one(
+            IdempotencyRecord.key == key,
+            IdempotencyRecord.scope == scope
+        )
+        if not existing:
+            # Expiró por TTL entre el insert y la lectura: reintentar la reserva
+            return await IdempotencyController.begin(key, scope, payload)
+
+        if existing.fingerprint != digest:
+            raise IdempotencyMismatchError(
+                "Idempotency-Key ya utilizada con un body distinto"
+            )
+
+        if existing.status == IdempotencyStatus.COMPLETED:
+            return existing
+
+        # Pending: solo se retoma si el intento anterior quedó abandonado; el
+        # nuevo token deja sin efecto el complete/release de ese intento
+        stale_before = datetime.utcnow() - timedelta(seconds=settings.idempotency_lock_seconds)
+        owner = secrets.token_hex(16)
+        locked_at = datetime.utcnow()
+        result = await IdempotencyRecord.get_motor_collection().update_one(
+            {
+                "_id": existing.id,
+                "status": IdempotencyStatus.PENDING.value,
+                "locked_at": {"$lt": stale_before},
+            },
+            {"$set": {"locked_at": locked_at, "owner": owner}}
+        )
+        if result.modified_count == 0:
+            raise IdempotencyInProgressError(
+                "Hay una petición con esta Idempotency-Key en curso"
+            )
+        existing.owner = owner
+        existing.locked_at = locked_at
+        return existing
+
+    @staticmethod
+    def _owned(record: IdempotencyRecord) -> Dict[str, Any]:
+        """Filtro del registro pendiente de este intento (mismo token y mismo body)"""
+        return {
+            "key": record.key,
+            "scope": record.scope,
+            "owner": record.owner,
+            "fingerprint": record.fingerprint,
+            "status": IdempotencyStatus.PENDING.value,
+        }
+
+    @staticmethod
+    async def complete(
+        record: IdempotencyRecord,
+        status_code: int,
+        response: Optional[Dict[str, Any]] = None,
+        resource_id: Optional[str] = None
+    ) -> None:
+        """
+        Guarda la respuesta de la primera ejecución
+
+        Raises:
+            IdempotencyOwnershipLostError: Si otro intento retomó la clave
+                mientras esta petición se ejecutaba
+        """
+        result = await IdempotencyRecord.get_motor_collection().update_one(
+            IdempotencyController._owned(record),
+            {"$set": {
+                "status": IdempotencyStatus.COMPLETED.value,
+                "status_code": status_code,
+                "response": response,
+                "resource_id": resource_id,
+            }}
+        )
+        if result.modified_count == 0:
+            raise IdempotencyOwnershipLostError(
+                "Otra petición retomó esta Idempotency-Key; reintentar para obtener su respuesta"
+            )
+
+    @staticmethod
+    async def release(record: IdempotencyRecord) -> None:
+        """
+        Libera la clave si la petición falló, para que el cliente pueda
+        reintentar (sin efecto si otro intento ya la retomó)
+        """
+        await IdempotencyRecord.get_motor_collection().delete_one(
+            IdempotencyController._owned(record)
+        )
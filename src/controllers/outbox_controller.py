@@ -0,0 +1,318 @@
+"""
+Controlador del Outbox de Eventos (notificaciones por webhook)
+"""
+import asyncio
+import uuid
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+
+import httpx
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..models.analysis_session import AnalysisSession
+from ..models.outbox_event import OutboxEvent, OutboxEventType, OutboxStatus
+from ..utils.outbox import (
+    backoff_seconds,
+    batches_by_target,
+    event_body,
+    is_permanent_failure,
+    new_event,
+    with_events,
+)
+from ..config.settings import settings
+
+
+DUPLICATE_KEY = 11000
+
+# Datos de la sesión que el relay agrega a cada evento
+_CONTEXT_PROJECTION = {"outbox": 1, "project": 1, "project_name": 1, "analysis_type": 1, "assigned_to": 1}
+
+
+class OutboxController:
+    """
+    Outbox transaccional: los eventos se escriben con el cambio de estado y
+    se envían fuera del request
+
+    1. La escritura de la sesión hace $push del evento en su campo outbox
+       (mismo documento, misma operación: sin eventos perdidos ni fantasmas).
+    2. El relay copia los eventos a outbox_events, uno por destino, y los
+       quita de la sesión (idempotente: reintentarlo no duplica entregas).
+    3. El dispatcher toma los pendientes, los agrupa por destino y los
+       envía en lotes; si falla reintenta con backoff exponencial.
+
+    La entrega es at-least-once: el receptor deduplica por el id del evento.
+    """
+
+    _task: Optional[asyncio.Task] = None
+    _client: Optional[httpx.AsyncClient] = None
+    _wakeup: Optional[asyncio.Event] = None
+
+    @staticmethod
+    def with_event(
+        update: Dict[str, Any],
+        event_type: OutboxEventType,
+        payload: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Operación de actualización con el evento agregado al outbox de la sesión
+
+        Sin WEBHOOK_URLS devuelve update sin cambios (no se acumulan eventos
+        que nadie va a enviar).
+        """
+        if not settings.webhook_urls_list:
+            return update
+        return with_events(update, [new_event(event_type.value, payload or {})])
+
+    @classmethod
+    def notify(cls):
+        """Despierta al dispatcher de este worker tras escribir un evento (sin I/O)"""
+        if cls._wakeup is not None:
+            cls._wakeup.set()
+
+    @staticmethod
+    async def relay(batch_size: int = None) -> int:
+        """
+        Copia a outbox_events los eventos embebidos en las sesiones
+
+        Cada evento genera una entrega por destino (upsert con $setOnInsert
+        sobre event_id + target) y después se quita de la sesión con $pull.
+        Si el proceso cae entre los dos pasos, el siguiente relay repite el
+        upsert sin duplicar nada.
+
+        Returns:
+            Eventos relayados
+        """
+        batch_size = batch_size or settings.outbox_batch_size
+        targets = settings.webhook_urls_list
+        sessions = AnalysisSession.get_motor_collection()
+        deliveries = OutboxEvent.get_motor_collection()
+
+        pending = await sessions.find(
+            {"outbox.id": {"$exists": True}},
+            _CONTEXT_PROJECTION
+        ).limit(batch_size).to_list(length=batch_size)
+
+        relayed = 0
+        for raw in pending:
+            events = raw.get("outbox") or []
+            project = raw.get("project")
+            context = {
+                "analysis_id": str(raw["_id"]),
+                "project_id": str(project.id) if project is not None else None,
+                "project_name": raw.get("project_name"),
+                "analysis_type": raw.get("analysis_type"),
+                "assigned_to": raw.get("assigned_to"),
+            }
+
+            operations = [
+                UpdateOne(
+                    {"event_id": f"{raw['_id']}:{event['id']}", "target": target},
+                    {"$setOnInsert": {
+                        "type": event["type"],
+                        "payload": {**context, **(event.get("payload") or {})},
+                        "created_at": event["created_at"],
+                        "status": OutboxStatus.PENDING.value,
+                        "attempts": 0,
+                        "next_attempt_at": event["created_at"],
+                    }},
+                    upsert=True
+                )
+                for event in events
+                for target in targets
+            ]
+            if operations:
+                try:
+                    await deliveries.bulk_write(operations, ordered=False)
+                except BulkWriteError as e:
+                    # Otro worker relayó el mismo evento en paralelo
+                    if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                        raise
+
+            await sessions.update_one(
+                {"_id": raw["_id"]},
+                {"$pull": {"outbox": {"id": {"$in": [event["id"] for event in events]}}}}
+            )
+            relayed += len(events)
+
+        return relayed
+
+    @staticmethod
+    async def dispatch(client: httpx.AsyncClient) -> Dict[str, int]:
+        """
+        Envía las entregas pendientes cuyo próximo envío ya venció
+
+        Las entregas se reservan antes de enviarlas (claim + next_attempt_at
+        corrido OUTBOX_LEASE_SECONDS), así varios workers pueden correr el
+        dispatcher a la vez sin mandar dos veces el mismo lote. Los destinos
+        se atienden en paralelo; los lotes de un mismo destino, en orden.
+
+        Returns:
+            {"delivered": n, "retried": m, "failed": k}
+        """
+        collection = OutboxEvent.get_motor_collection()
+        now = datetime.utcnow()
+        due = {"status": OutboxStatus.PENDING.value, "next_attempt_at": {"$lte": now}}
+        limit = settings.outbox_batch_size * max(len(settings.webhook_urls_list), 1)
+
+        candidates = await collection.find(due, {"_id": 1})\
+            .sort([("next_attempt_at", 1)])\
+            .limit(limit)\
+            .to_list(length=limit)
+        stats = {"delivered": 0, "retried": 0, "failed": 0}
+        if not candidates:
+            return stats
+
+        claim = uuid.uuid4().hex
+        await collection.update_many(
+            {**due, "_id": {"$in": [raw["_id"] for raw in candidates]}},
+            {"$set": {
+                "claim": claim,
+                "next_attempt_at": now + timedelta(seconds=settings.outbox_lease_seconds),
+            }}
+        )
+        claimed = await collection.find({"claim": claim})\
+            .sort([("created_at", 1), ("_id", 1)])\
+            .to_list(length=None)
+
+        async def send_target(target: str, batches: List[List[Dict[str, Any]]]):
+            for batch in batches:
+                outcome = await OutboxController._deliver(client, target, batch)
+                stats[outcome] += len(batch)
+
+        grouped = batches_by_target(claimed, settings.outbox_batch_size)
+        await asyncio.gather(*(
+            send_target(target, batches) for target, batches in grouped.items()
+        ))
+        return stats
+
+    @staticmethod
+    async def _deliver(
+        client: httpx.AsyncClient,
+        target: str,
+        batch: List[Dict[str, Any]]
+    ) -> str:
+        """
+        POST de un lote a un destino y registro del resultado
+
+        Returns:
+            "delivered", "retried" o "failed"
+        """
+        collection = OutboxEvent.get_motor_collection()
+        ids = [delivery["_id"] for delivery in batch]
+
+        permanent = False
+        try:
+            response = await client.post(target, json=event_body(batch))
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            error = f"HTTP {e.response.status_code}"
+            permanent = is_permanent_failure(e.response.status_code)
+        except httpx.HTTPError as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            await collection.update_many(
+                {"_id": {"$in": ids}},
+                {
+                    "$set": {"status": OutboxStatus.DELIVERED.value, "delivered_at": datetime.utcnow()},
+                    "$inc": {"attempts": 1},
+                    "$unset": {"claim": "", "last_error": ""},
+                }
+            )
+            return "delivered"
+
+        now = datetime.utcnow()
+        operations = []
+        failed = 0
+        for delivery in batch:
+            attempts = delivery.get("attempts", 0) + 1
+            if permanent or attempts >= settings.outbox_max_attempts:
+                changes = {"status": OutboxStatus.FAILED.value}
+                failed += 1
+            else:
+                delay = backoff_seconds(
+                    attempts,
+                    settings.outbox_backoff_seconds,
+                    settings.outbox_backoff_max_seconds
+                )
+                changes = {"next_attempt_at": now + timedelta(seconds=delay)}
+            operations.append(UpdateOne(
+                {"_id": delivery["_id"]},
+                {
+                    "$set": {**changes, "attempts": attempts, "last_error": error},
+                    "$unset": {"claim": ""},
+                }
+            ))
+        await collection.bulk_write(operations, ordered=False)
+
+        print(f"⚠️  Webhook {target}: {error} ({len(batch)} eventos)")
+        return "failed" if failed == len(batch) else "retried"
+
+    @staticmethod
+    async def metrics() -> Dict[str, Any]:
+        """Entregas por estado y eventos todavía embebidos en sesiones"""
+        counts = {status.value: 0 for status in OutboxStatus}
+        cursor = OutboxEvent.get_motor_collection().aggregate([
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+        ])
+        async for row in cursor:
+            counts[row["_id"]] = row["count"]
+
+        waiting = await AnalysisSession.get_motor_collection().count_documents(
+            {"outbox.id": {"$exists": True}}
+        )
+        return {
+            "targets": len(settings.webhook_urls_list),
+            "sessions_with_events": waiting,
+            **counts,
+        }
+
+    @classmethod
+    def start_dispatcher(cls, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Arranca el dispatcher si hay WEBHOOK_URLS configuradas
+
+        Args:
+            transport: Transporte de httpx (tests: httpx.MockTransport)
+        """
+        if not settings.webhook_urls_list:
+            return
+        cls._client = httpx.AsyncClient(timeout=settings.webhook_timeout, transport=transport)
+        cls._wakeup = asyncio.Event()
+        cls._task = asyncio.create_task(cls._run())
+        print(f"📮 Dispatcher de webhooks iniciado ({len(settings.webhook_urls_list)} destinos)")
+
+    @classmethod
+    async def stop_dispatcher(cls):
+        """Detiene el dispatcher (lo pendiente queda en MongoDB para el próximo arranque)"""
+        if cls._task:
+            cls._task.cancel()
+            try:
+                await cls._task
+            except asyncio.CancelledError:
+                pass
+            cls._task = None
+        if cls._client:
+            await cls._client.aclose()
+            cls._client = None
+        cls._wakeup = None
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            busy = False
+            try:
+                relayed = await cls.relay()
+                stats = await cls.dispatch(cls._client)
+                busy = relayed > 0 or any(stats.values())
+            except Exception as e:
+                print(f"❌ Error en el dispatcher de webhooks: {e}")
+
+            # Con trabajo hecho se sigue sin esperar (puede haber más lotes)
+            if busy:
+                continue
+            try:
+                await asyncio.wait_for(cls._wakeup.wait(), timeout=settings.outbox_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            cls._wakeup.clear()
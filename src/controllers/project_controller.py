@@ -1,11 +1,30 @@
 """
 Controlador de Proyectos
 """
-from typing import List
+from typing import Any, Iterable, List, Dict, Optional
 from beanie import PydanticObjectId
 from datetime import datetime
 
 from ..models.project import Project, ProjectStatus
+from ..models.analysis_session import AnalysisSession, AnalysisStatus
+from ..models.generated_doc import GeneratedDoc
+from ..utils.bulk import update_in_batches
+from ..utils.revision import RevisionConflictError, update_with_revision
+from ..utils.links import link_id
+from ..utils.cache import TTLCache
+from ..utils.single_flight import SingleFlight
+from ..config.settings import settings
+
+
+# Proyectos por ID (read-through con TTL, ver get_project)
+_project_cache = TTLCache(maxsize=settings.project_cache_size, ttl=settings.project_cache_ttl_seconds)
+
+# Lecturas en curso por ID: los misses concurrentes del mismo proyecto esperan la misma
+_project_reads = SingleFlight(
+    "projects",
+    metrics_size=settings.single_flight_metrics_keys,
+    enabled=settings.single_flight_enabled
+)
 
 
 class ProjectController:
@@ -31,11 +50,81 @@ class ProjectController:
     
     @staticmethod
     async def get_project(project_id: PydanticObjectId) -> Project:
-        """Obtiene un proyecto por ID"""
+        """
+        Obtiene un proyecto por ID
+        
+        Read-through: se sirve de la caché del worker mientras no venza
+        (PROJECT_CACHE_TTL_SECONDS) y, si no está, los pedidos concurrentes
+        del mismo ID comparten una sola lectura. Devuelve una copia, así
+        quien la modifique no altera la caché.
+        """
+        project = _project_cache.get(project_id)
+        if project is None:
+            project = await ProjectController._load_project(project_id)
+        if not project:
+            raise ValueError(f"Proyecto {project_id} no encontrado")
+        return project.model_copy(deep=True)
+    
+    @staticmethod
+    async def get_project_for_write(project_id: PydanticObjectId) -> Project:
+        """
+        Obtiene un proyecto por ID sin pasar por la caché
+
+        Para cuando el nombre se copia en otro documento (project_name): con
+        el nombre cacheado de antes de un renombre hecho en otro worker, la
+        copia quedaría desactualizada para siempre (el update_many del
+        renombre ya corrió). Ver también recheck_project_name.
+        """
         project = await Project.get(project_id)
         if not project:
             raise ValueError(f"Proyecto {project_id} no encontrado")
         return project
+
+    @staticmethod
+    async def recheck_project_name(item: Any) -> None:
+        """
+        Corrige project_name de una sesión/documento recién insertado si el
+        proyecto se renombró entre la lectura y el insert
+
+        Si el renombre escribió el proyecto después de esta relectura, su
+        update_many corre después del insert y ya alcanza a item.
+        """
+        raw = await Project.get_motor_collection().find_one(
+            {"_id": link_id(item.project)}, {"name": 1}
+        )
+        if raw is None or raw["name"] == item.project_name:
+            return
+
+        # Igual que en update_project: en las sesiones el nombre sube la revisión
+        is_session = isinstance(item, AnalysisSession)
+        update = {"$set": {"project_name": raw["name"]}}
+        if is_session:
+            update["$inc"] = {"revision": 1}
+        result = await type(item).get_motor_collection().update_one(
+            {"_id": item.id, "project_name": item.project_name},
+            update
+        )
+        if result.modified_count:
+            item.project_name = raw["name"]
+            if is_session:
+                item.revision += 1
+
+    @staticmethod
+    async def _load_project(project_id: PydanticObjectId) -> Optional[Project]:
+        """Lee el proyecto de MongoDB, uniéndose a la lectura en curso si la hay"""
+        def loaded(project: Optional[Project]) -> None:
+            # Si el proyecto se invalidó mientras se leía, no se llama y no se cachea
+            if project is not None:
+                _project_cache.set(project_id, project)
+        
+        return await _project_reads.do(project_id, lambda: Project.get(project_id), on_done=loaded)
+    
+    @staticmethod
+    def invalidate_projects(project_ids: Iterable[PydanticObjectId]) -> None:
+        """Descarta proyectos de la caché de este worker (tras escribirlos)"""
+        for project_id in project_ids:
+            _project_cache.pop(project_id)
+            _project_reads.forget(project_id)
     
     @staticmethod
     async def list_projects(
@@ -66,30 +155,158 @@ class ProjectController:
         name: str = None,
         description: str = None,
         status: ProjectStatus = None,
-        metadata: dict = None
+        metadata: dict = None,
+        expected_revision: Optional[int] = None
     ) -> Project:
-        """Actualiza un proyecto"""
-        project = await ProjectController.get_project(project_id)
+        """
+        Actualiza un proyecto
         
+        La escritura se condiciona a la revisión (la del cliente vía If-Match,
+        o la leída) para no pisar cambios concurrentes.
+        
+        Raises:
+            RevisionConflictError: Si el proyecto cambió entretanto
+        """
+        # Sin caché: la revisión a comparar tiene que ser la actual
+        project = await Project.get(project_id)
+        if not project:
+            raise ValueError(f"Proyecto {project_id} no encontrado")
+        renamed = bool(name) and name != project.name
+        
+        if expected_revision is None:
+            expected_revision = project.revision
+        elif expected_revision != project.revision:
+            raise RevisionConflictError(expected_revision, project.revision)
+        
+        changes = {}
         if name:
-            project.name = name
+            changes["name"] = name
         if description:
-            project.description = description
+            changes["description"] = description
         if status:
-            project.status = status
+            changes["status"] = status
         if metadata:
-            project.metadata.update(metadata)
+            changes["metadata"] = {**(project.metadata or {}), **metadata}
+        changes["updated_at"] = datetime.utcnow()
         
-        project.updated_at = datetime.utcnow()
-        await project.save()
+        project.revision = await update_with_revision(
+            Project.get_motor_collection(),
+            project.id,
+            expected_revision,
+            {"$set": {
+                field: value.value if isinstance(value, ProjectStatus) else value
+                for field, value in changes.items()
+            }}
+        )
+        
+        for field, value in changes.items():
+            setattr(project, field, value)
+        ProjectController.invalidate_projects([project.id])
+        
+        # Propagar el nombre desnormalizado en sesiones y documentos; en las
+        # sesiones sube la revisión: el nombre forma parte de su representación
+        # (ETag de GET /api/analysis/{id} y caché del paquete de prompt)
+        if renamed:
+            for model, update in (
+                (AnalysisSession, {"$set": {"project_name": name}, "$inc": {"revision": 1}}),
+                (GeneratedDoc, {"$set": {"project_name": name}}),
+            ):
+                await model.get_motor_collection().update_many(
+                    {"project.$id": project.id, "project_name": {"$ne": name}},
+                    update
+                )
         
         return project
     
+    @staticmethod
+    async def fill_project_names(items: List[Any]) -> None:
+        """
+        Completa project_name en sesiones/documentos anteriores a la
+        desnormalización (una sola consulta para todos los faltantes)
+        
+        Sin efecto una vez ejecutada la migración backfill_project_name.
+        """
+        missing = {link_id(item.project) for item in items if item.project_name is None}
+        if not missing:
+            return
+        
+        names = {}
+        for project_id in missing:
+            cached = _project_cache.get(project_id)
+            if cached is not None:
+                names[project_id] = cached.name
+        
+        pending = [project_id for project_id in missing if project_id not in names]
+        if pending:
+            async for raw in Project.get_motor_collection().find(
+                {"_id": {"$in": pending}}, {"name": 1}
+            ):
+                names[raw["_id"]] = raw["name"]
+        for item in items:
+            if item.project_name is None:
+                item.project_name = names.get(link_id(item.project), "")
+    
     @staticmethod
     async def delete_project(project_id: PydanticObjectId) -> bool:
-        """Elimina un proyecto (soft delete)"""
-        project = await ProjectController.get_project(project_id)
-        project.status = ProjectStatus.ARCHIVED
-        project.updated_at = datetime.utcnow()
-        await project.save()
+        """Elimina un proyecto (soft delete en cascada)"""
+        await ProjectController.get_project(project_id)
+        await ProjectController.archive_projects([project_id])
         return True
+    
+    @staticmethod
+    async def archive_projects(
+        project_ids: List[PydanticObjectId]
+    ) -> Dict[str, Dict[str, int]]:
+        """
+        Archiva proyectos junto con sus sesiones de análisis y documentos
+        
+        Procesa los proyectos en lotes de BULK_BATCH_SIZE y las sesiones/docs
+        de cada lote con update_many acotados.
+        
+        Returns:
+            Conteos matched/modified por colección
+        """
+        batch_size = settings.bulk_batch_size
+        now = datetime.utcnow()
+        counts = {
+            "projects": {"matched": 0, "modified": 0},
+            "analysis_sessions": {"matched": 0, "modified": 0},
+            "generated_docs": {"matched": 0, "modified": 0},
+        }
+        
+        def add(key: str, result: Dict[str, int]):
+            counts[key]["matched"] += result["matched"]
+            counts[key]["modified"] += result["modified"]
+        
+        unique_ids = list(dict.fromkeys(project_ids))
+        for start in range(0, len(unique_ids), batch_size):
+            chunk = unique_ids[start:start + batch_size]
+            
+            add("projects", await update_in_batches(
+                Project.get_motor_collection(),
+                {"_id": {"$in": chunk}, "status": {"$ne": ProjectStatus.ARCHIVED.value}},
+                {
+                    "$set": {"status": ProjectStatus.ARCHIVED.value, "updated_at": now},
+                    "$inc": {"revision": 1},
+                },
+                batch_size
+            ))
+            add("analysis_sessions", await update_in_batches(
+                AnalysisSession.get_motor_collection(),
+                {"project.$id": {"$in": chunk}, "status": {"$ne": AnalysisStatus.ARCHIVED.value}},
+                {"$set": {
+                    "status": AnalysisStatus.ARCHIVED.value,
+                    "needs_more_info": False,
+                    "updated_at": now,
+                }, "$inc": {"revision": 1}},
+                batch_size
+            ))
+            add("generated_docs", await update_in_batches(
+                GeneratedDoc.get_motor_collection(),
+                {"project.$id": {"$in": chunk}, "archived": {"$ne": True}},
+                {"$set": {"archived": True, "archived_at": now}},
+                batch_size
+            ))
+            ProjectController.invalidate_projects(chunk)
+        
+        return counts
@@ -0,0 +1,85 @@
+"""
+Controlador del Paquete de Prompt para Copilot
+"""
+from typing import Tuple
+from beanie import PydanticObjectId
+
+from ..models.analysis_session import AnalysisSession, AnalysisStatus
+from ..utils.cache import LRUCache
+from ..utils.prompt_bundle import IncompleteAnalysisError, compile_prompt_bundle
+from ..config.settings import settings
+from ..config.executor import CPUExecutor, estimate_size
+from .analysis_controller import AnalysisController
+
+
+# Paquetes serializados por (sesión, revisión, formato): una revisión nunca cambia,
+# así que las entradas no se invalidan (las viejas salen por LRU)
+_bundle_cache = LRUCache(maxsize=settings.prompt_bundle_cache_size)
+
+
+class PromptBundleController:
+    """Lógica de negocio para compilar y servir el paquete de prompt de una sesión"""
+
+    @staticmethod
+    async def get_revision(analysis_id: PydanticObjectId, draft: bool = False) -> int:
+        """
+        Revisión actual de la sesión (solo lee revision y status)
+
+        Permite responder 304 o servir desde la caché sin cargar la sesión.
+
+        Raises:
+            ValueError: Si la sesión no existe
+            IncompleteAnalysisError: Si no está completa y no se pidió draft
+        """
+        head = await AnalysisSession.get_motor_collection().find_one(
+            {"_id": analysis_id},
+            {"revision": 1, "status": 1}
+        )
+        if head is None:
+            raise ValueError(f"Análisis {analysis_id} no encontrado")
+        if not draft and head.get("status") != AnalysisStatus.COMPLETED.value:
+            raise IncompleteAnalysisError(
+                f"El análisis {analysis_id} no está completo (usar draft=true para una versión preliminar)"
+            )
+        return head.get("revision") or 0
+
+    @staticmethod
+    async def get_body(
+        analysis_id: PydanticObjectId,
+        revision: int,
+        bundle_format: str = "markdown"
+    ) -> Tuple[bytes, int]:
+        """
+        Paquete serializado de la sesión (caché por revisión o compilado)
+
+        La compilación corre fuera del event loop si la sesión es grande. Si
+        la sesión cambió desde get_revision se compila la revisión nueva.
+
+        Returns:
+            (body, revisión a la que corresponde)
+        """
+        body = _bundle_cache.get((str(analysis_id), revision, bundle_format))
+        if body is not None:
+            return body, revision
+
+        # Rehidrata las sesiones en almacenamiento frío y completa project_name
+        session = await AnalysisController.get_analysis(analysis_id)
+        context = {
+            "id": str(session.id),
+            "project_name": session.project_name,
+            "analysis_type": session.analysis_type.value,
+            "status": session.status.value,
+            "iteration": session.iteration,
+            "revision": session.revision,
+        }
+        body = await CPUExecutor.run(
+            compile_prompt_bundle,
+            context,
+            session.yaml_config,
+            session.answers,
+            session.iteration_history,
+            bundle_format,
+            size=estimate_size(session.yaml_config) + estimate_size(session.iteration_history)
+        )
+        _bundle_cache.set((str(session.id), session.revision, bundle_format), body)
+        return body, session.revision
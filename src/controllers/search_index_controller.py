@@ -0,0 +1,212 @@
+"""
+Controlador del Índice de Búsqueda Difusa (trigramas)
+"""
+import asyncio
+from typing import Any, Dict, Iterable, List
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ..models.search_term import SearchTerm
+from ..utils.cache import LRUCache
+from ..utils.search import (
+    accent_insensitive_pattern,
+    build_search_fields,
+    gram_count_bounds,
+    search_terms_from_text,
+    trigrams,
+)
+from ..config.settings import settings
+from ..config.executor import CPUExecutor, estimate_size
+
+
+# Palabras que este worker ya registró en el vocabulario (evita upserts repetidos
+# en cada autosave)
+_known_terms = LRUCache(maxsize=settings.search_vocabulary_cache_size)
+
+DUPLICATE_KEY = 11000
+
+
+class SearchIndexController:
+    """
+    Mantenimiento y consulta del índice de trigramas
+
+    Cada sesión guarda sus palabras normalizadas en search_terms y cada
+    palabra distinta tiene una entrada con sus trigramas en el vocabulario
+    (colección search_terms). Buscar "kubernets" es entonces: palabras del
+    vocabulario parecidas (índice sobre grams) -> sesiones que contienen
+    alguna de ellas (índice sobre search_terms) -> ranking por similitud en
+    la agregación.
+    """
+
+    @staticmethod
+    async def build_fields(
+        yaml_config: Dict[str, Any],
+        answers: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        search_text y search_terms de una sesión (fuera del event loop si es
+        grande); las palabras nuevas se registran en el vocabulario
+
+        Returns:
+            {"search_text": str, "search_terms": [str]}
+        """
+        fields = await CPUExecutor.run(
+            build_search_fields,
+            yaml_config,
+            answers,
+            settings.search_max_terms,
+            settings.search_text_max_chars,
+            size=estimate_size(yaml_config) + estimate_size(answers)
+        )
+        await SearchIndexController.index_terms(fields["search_terms"])
+        return fields
+
+    @staticmethod
+    async def index_terms(terms: Iterable[str]) -> int:
+        """
+        Registra en el vocabulario las palabras que todavía no estén
+
+        Upsert con $setOnInsert: idempotente y seguro entre workers (si dos
+        insertan la misma palabra a la vez, el índice único rechaza una y
+        ese error se ignora).
+
+        Returns:
+            Palabras nuevas insertadas
+        """
+        new_terms = [term for term in dict.fromkeys(terms) if term not in _known_terms]
+        if not new_terms:
+            return 0
+
+        collection = SearchTerm.get_motor_collection()
+        inserted = 0
+        batch_size = settings.bulk_batch_size
+        for start in range(0, len(new_terms), batch_size):
+            batch = new_terms[start:start + batch_size]
+            operations = []
+            for term in batch:
+                grams = trigrams(term)
+                operations.append(UpdateOne(
+                    {"term": term},
+                    {"$setOnInsert": {"grams": grams, "gram_count": len(grams)}},
+                    upsert=True
+                ))
+            try:
+                result = await collection.bulk_write(operations, ordered=False)
+                inserted += result.upserted_count
+            except BulkWriteError as e:
+                if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+                    raise
+                inserted += e.details.get("nUpserted", 0)
+            for term in batch:
+                _known_terms.set(term, True)
+
+        return inserted
+
+    @staticmethod
+    async def similar_terms(word: str) -> Dict[str, float]:
+        """
+        Palabras del vocabulario parecidas a word, con su similitud
+
+        Solo se comparan las palabras que comparten algún trigrama y tienen
+        una longitud compatible con el umbral; el cálculo de la similitud y
+        el corte por umbral se hacen en la propia agregación.
+
+        Returns:
+            {palabra: similitud} con las search_fuzzy_max_terms más parecidas
+        """
+        threshold = settings.search_fuzzy_threshold
+        grams = trigrams(word)
+        low, high = gram_count_bounds(len(grams), threshold)
+
+        pipeline = [
+            {"$match": {"grams": {"$in": grams}, "gram_count": {"$gte": low, "$lte": high}}},
+            {"$project": {
+                "_id": 0,
+                "term": 1,
+                "gram_count": 1,
+                "shared": {"$size": {"$setIntersection": ["$grams", {"$literal": grams}]}},
+            }},
+            # Jaccard: compartidos / (|A| + |B| - compartidos)
+            {"$addFields": {"similarity": {"$divide": [
+                "$shared",
+                {"$subtract": [{"$add": ["$gram_count", len(grams)]}, "$shared"]},
+            ]}}},
+            {"$match": {"similarity": {"$gte": threshold}}},
+            {"$sort": {"similarity": -1, "term": 1}},
+            {"$limit": settings.search_fuzzy_max_terms},
+        ]
+        cursor = SearchTerm.get_motor_collection().aggregate(pipeline)
+        return {item["term"]: item["similarity"] async for item in cursor}
+
+    @staticmethod
+    async def expand_query(query: str) -> Dict[str, Dict[str, float]]:
+        """
+        Palabras candidatas para cada palabra de la consulta (en paralelo)
+
+        Returns:
+            {palabra normalizada: {candidata: similitud}} (vacío si la
+            consulta no tiene palabras indexables); una palabra sin
+            candidatas se busca como substring (ver match_conditions)
+        """
+        words = search_terms_from_text(query)
+        expansions = await asyncio.gather(*(
+            SearchIndexController.similar_terms(word) for word in words
+        ))
+        return dict(zip(words, expansions))
+
+    @staticmethod
+    def match_conditions(expansions: Dict[str, Dict[str, float]]) -> List[Dict[str, Any]]:
+        """
+        Condiciones ($or) de las sesiones que contienen alguna palabra de la consulta
+
+        Las candidatas se buscan en search_terms (índice multikey). Una
+        palabra sin candidatas en el vocabulario (fuera del tope de
+        search_terms, o de sesiones sin indexar) se busca como substring en
+        search_text, igual que la búsqueda literal pero sin distinguir acentos.
+        """
+        conditions: List[Dict[str, Any]] = []
+        candidates = sorted({term for terms in expansions.values() for term in terms})
+        if candidates:
+            conditions.append({"search_terms": {"$in": candidates}})
+        for word, terms in expansions.items():
+            if not terms:
+                conditions.append({"search_text": {"$regex": accent_insensitive_pattern(word)}})
+        return conditions
+
+    @staticmethod
+    def score_expression(expansions: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+        """
+        Expresión de agregación con la relevancia de una sesión (0 a 1)
+
+        Por cada palabra de la consulta se toma la mejor similitud entre sus
+        candidatas presentes en search_terms de la sesión (1 si no tiene
+        candidatas y aparece en search_text); la relevancia es la media
+        sobre las palabras de la consulta.
+        """
+        scores = []
+        for word, candidates in expansions.items():
+            if not candidates:
+                scores.append({"$cond": [
+                    {"$regexMatch": {
+                        "input": {"$ifNull": ["$search_text", ""]},
+                        "regex": accent_insensitive_pattern(word),
+                    }},
+                    1,
+                    0,
+                ]})
+                continue
+            terms = list(candidates)
+            similarities = [candidates[term] for term in terms]
+            scores.append({"$ifNull": [
+                {"$max": {"$map": {
+                    "input": {"$setIntersection": ["$search_terms", {"$literal": terms}]},
+                    "as": "term",
+                    "in": {"$arrayElemAt": [
+                        {"$literal": similarities},
+                        {"$indexOfArray": [{"$literal": terms}, "$$term"]},
+                    ]},
+                }}},
+                0,
+            ]})
+        return {"$divide": [{"$add": scores}, len(scores)]}
@@ -7,21 +7,32 @@ from contextlib import asynccontextmanager
 
 from .config.settings import settings
 from .config.database import init_db, close_db
-from .routes import projects, analysis, generated_docs
+from .config.executor import init_executor, close_executor
+from .config.query_monitor import QueryContextMiddleware
+from .controllers.archive_controller import ArchiveController
+from .controllers.outbox_controller import OutboxController
+from .routes import projects, analysis, generated_docs, admin, analytics
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Ciclo de vida de la aplicación
-    Inicializa y cierra la conexión a MongoDB
+    Inicializa y cierra la conexión a MongoDB, el pool CPU-bound y los jobs
+    en segundo plano (archivado y dispatcher de webhooks)
     """
     # Startup
     print("🚀 Iniciando aplicación...")
     await init_db()
+    await init_executor()
+    ArchiveController.start_scheduler()
+    OutboxController.start_dispatcher()
     yield
     # Shutdown
     print("🛑 Cerrando aplicación...")
+    await OutboxController.stop_dispatcher()
+    await ArchiveController.stop_scheduler()
+    await close_executor()
     await close_db()
 
 
@@ -42,10 +53,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request id + ruta en curso para el registro de consultas lentas
+app.add_middleware(QueryContextMiddleware)
+
 # Registrar routers
 app.include_router(projects.router)
 app.include_router(analysis.router)
 app.include_router(generated_docs.router)
+app.include_router(admin.router)
+app.include_router(analytics.router)
 
 
 # ============================================
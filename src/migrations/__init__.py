@@ -0,0 +1,3 @@
+"""
+Migraciones de datos (se ejecutan con python -m src.migrations.<nombre>)
+"""
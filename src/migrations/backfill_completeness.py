@@ -0,0 +1,73 @@
+"""
+Migración: calcula los contadores de avance (answered_count, required_total,
+required_answered y completion) en las sesiones creadas antes de que se
+guardaran en la sesión
+
+Idempotente: solo toca sesiones sin completion, y cada escritura se
+condiciona a la revisión leída para no pisar cambios concurrentes. Uso:
+
+    python -m src.migrations.backfill_completeness [--batch-size 500]
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from ..config.database import init_db, close_db
+from ..config.settings import settings
+from ..controllers.archive_controller import ArchiveController
+from ..models.analysis_session import AnalysisSession
+from ..utils.answer_validator import AnswerValidator, completion_ratio
+
+
+async def backfill_completeness(batch_size: int = None) -> int:
+    """
+    Recorre las sesiones sin completion y guarda sus contadores en
+    bulk_write de batch_size operaciones (las de almacenamiento frío se
+    rehidratan antes)
+
+    Returns:
+        Sesiones modificadas
+    """
+    batch_size = batch_size or settings.bulk_batch_size
+    collection = AnalysisSession.get_motor_collection()
+    modified = 0
+    operations = []
+
+    async def flush():
+        nonlocal modified
+        result = await collection.bulk_write(operations, ordered=False)
+        modified += result.modified_count
+        operations.clear()
+
+    cursor = collection.find({"completion": {"$exists": False}}).batch_size(batch_size)
+    async for raw in cursor:
+        session = await ArchiveController.rehydrate(AnalysisSession.model_validate(raw))
+        counters = AnswerValidator(session.yaml_config).completeness(session.answers)
+        counters["completion"] = completion_ratio(counters["required_answered"], counters["required_total"])
+        operations.append(UpdateOne(
+            {"_id": session.id, "revision": raw.get("revision")},
+            {"$set": counters}
+        ))
+        if len(operations) >= batch_size:
+            await flush()
+    if operations:
+        await flush()
+
+    return modified
+
+
+async def main(batch_size: int = None):
+    await init_db()
+    try:
+        modified = await backfill_completeness(batch_size)
+        print(f"✅ Avance de respuestas completado: {modified} sesiones")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula los contadores de avance en las sesiones existentes")
+    parser.add_argument("--batch-size", type=int, default=None, help="Default: BULK_BATCH_SIZE")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
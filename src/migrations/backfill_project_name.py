@@ -0,0 +1,74 @@
+"""
+Migración: completa project_name en analysis_sessions y generated_docs
+
+Idempotente: solo toca documentos cuyo project_name falta o no coincide
+con el nombre actual del proyecto. Uso:
+
+    python -m src.migrations.backfill_project_name [--batch-size 500]
+"""
+import argparse
+import asyncio
+from typing import Dict
+
+from pymongo import UpdateMany
+
+from ..config.database import init_db, close_db
+from ..config.settings import settings
+from ..models.project import Project
+from ..models.analysis_session import AnalysisSession
+from ..models.generated_doc import GeneratedDoc
+
+
+async def backfill_project_name(batch_size: int = None) -> Dict[str, int]:
+    """
+    Recorre los proyectos y propaga su nombre con un UpdateMany por
+    proyecto y colección, enviados en bulk_write de batch_size operaciones
+
+    Returns:
+        Documentos modificados por colección
+    """
+    batch_size = batch_size or settings.bulk_batch_size
+    targets = {
+        "analysis_sessions": AnalysisSession.get_motor_collection(),
+        "generated_docs": GeneratedDoc.get_motor_collection(),
+    }
+    counts = {name: 0 for name in targets}
+    operations = []
+
+    async def flush():
+        for name, collection in targets.items():
+            result = await collection.bulk_write(operations, ordered=False)
+            counts[name] += result.modified_count
+        operations.clear()
+
+    cursor = Project.get_motor_collection().find({}, {"name": 1}).batch_size(batch_size)
+    async for project in cursor:
+        operations.append(UpdateMany(
+            {"project.$id": project["_id"], "project_name": {"$ne": project["name"]}},
+            {"$set": {"project_name": project["name"]}}
+        ))
+        if len(operations) >= batch_size:
+            await flush()
+    if operations:
+        await flush()
+
+    return counts
+
+
+async def main(batch_size: int = None):
+    await init_db()
+    try:
+        counts = await backfill_project_name(batch_size)
+        print(
+            f"✅ project_name completado: {counts['analysis_sessions']} sesiones, "
+            f"{counts['generated_docs']} documentos"
+        )
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Completa project_name en sesiones y documentos")
+    parser.add_argument("--batch-size", type=int, default=None, help="Default: BULK_BATCH_SIZE")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
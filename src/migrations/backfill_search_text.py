@@ -0,0 +1,86 @@
+"""
+Migración: calcula search_text y search_terms en las sesiones creadas antes
+de la búsqueda con facetas y de la búsqueda difusa
+
+Idempotente: solo toca sesiones a las que les falta alguno de los dos campos
+(con --all, todas: p. ej. para acotar el search_text completo de versiones
+anteriores), y cada escritura se condiciona a la revisión leída para no pisar
+cambios concurrentes. Las palabras nuevas se registran en el vocabulario. Uso:
+
+    python -m src.migrations.backfill_search_text [--batch-size 500] [--all]
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from ..config.database import init_db, close_db
+from ..config.settings import settings
+from ..controllers.archive_controller import ArchiveController
+from ..controllers.search_index_controller import SearchIndexController
+from ..models.analysis_session import AnalysisSession
+from ..utils.search import build_search_fields
+
+
+async def backfill_search_text(batch_size: int = None, recompute_all: bool = False) -> int:
+    """
+    Recorre las sesiones sin search_text o sin search_terms (o todas, con
+    recompute_all) y los guarda en bulk_write de batch_size operaciones (las
+    de almacenamiento frío se rehidratan antes)
+
+    Returns:
+        Sesiones modificadas
+    """
+    batch_size = batch_size or settings.bulk_batch_size
+    collection = AnalysisSession.get_motor_collection()
+    modified = 0
+    operations = []
+    terms = set()
+
+    async def flush():
+        nonlocal modified
+        # Vocabulario antes que las sesiones: una sesión nunca apunta a palabras sin indexar
+        await SearchIndexController.index_terms(sorted(terms))
+        result = await collection.bulk_write(operations, ordered=False)
+        modified += result.modified_count
+        operations.clear()
+        terms.clear()
+
+    query = {} if recompute_all else {"$or": [{"search_text": None}, {"search_terms": None}]}
+    cursor = collection.find(query).batch_size(batch_size)
+    async for raw in cursor:
+        session = await ArchiveController.rehydrate(AnalysisSession.model_validate(raw))
+        fields = build_search_fields(
+            session.yaml_config,
+            session.answers,
+            settings.search_max_terms,
+            settings.search_text_max_chars
+        )
+        terms.update(fields["search_terms"])
+        operations.append(UpdateOne(
+            {"_id": session.id, "revision": raw.get("revision")},
+            {"$set": fields}
+        ))
+        if len(operations) >= batch_size:
+            await flush()
+    if operations:
+        await flush()
+
+    return modified
+
+
+async def main(batch_size: int = None, recompute_all: bool = False):
+    await init_db()
+    try:
+        modified = await backfill_search_text(batch_size, recompute_all)
+        print(f"✅ search_text y search_terms completados: {modified} sesiones")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula search_text y search_terms en las sesiones existentes")
+    parser.add_argument("--batch-size", type=int, default=None, help="Default: BULK_BATCH_SIZE")
+    parser.add_argument("--all", action="store_true", help="Recalcula también las sesiones que ya los tienen")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size, args.all))
@@ -0,0 +1,33 @@
+"""
+Migración: reconstruye desde cero los rollups diarios de analytics
+(analytics_daily) a partir de analysis_sessions y generated_docs
+
+Idempotente: cada ejecución deja los rollups igual que si se hubieran
+actualizado de forma incremental desde el principio. Uso:
+
+    python -m src.migrations.rebuild_analytics [--batch-size 500]
+"""
+import argparse
+import asyncio
+
+from ..config.database import init_db, close_db
+from ..controllers.analytics_controller import AnalyticsController
+
+
+async def main(batch_size: int = None):
+    await init_db()
+    try:
+        stats = await AnalyticsController.rebuild(batch_size)
+        print(
+            f"✅ Analytics reconstruido: {stats['sessions']} sesiones, {stats['docs']} documentos, "
+            f"{stats['buckets']} buckets ({stats['deleted']} obsoletos borrados)"
+        )
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconstruye los rollups diarios de analytics")
+    parser.add_argument("--batch-size", type=int, default=None, help="Default: BULK_BATCH_SIZE")
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,32 @@
+"""
+Modelo de Archivo Frío de Sesiones de Análisis
+"""
+from beanie import Document, PydanticObjectId
+from pydantic import Field
+from pymongo import IndexModel
+from datetime import datetime
+
+
+class AnalysisArchive(Document):
+    """
+    Contenido pesado de una sesión archivada (yaml_config, answers e
+    iteration_history) comprimido con zlib sobre BSON
+    
+    En analysis_sessions queda un stub liviano con in_cold_storage=True
+    """
+    
+    session_id: PydanticObjectId = Field(..., description="ID de la sesión en analysis_sessions")
+    payload: bytes = Field(..., description="BSON comprimido con zlib")
+    original_size: int = Field(..., description="Bytes antes de comprimir")
+    compressed_size: int = Field(..., description="Bytes comprimidos")
+    archived_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "analysis_sessions_archive"
+        indexes = [
+            IndexModel([("session_id", 1)], unique=True),
+            "archived_at",
+        ]
+    
+    def __repr__(self):
+        return f"<AnalysisArchive {self.session_id} {self.compressed_size}B>"
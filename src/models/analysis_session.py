@@ -3,6 +3,7 @@ Modelo de Sesión de Análisis (Preguntas y Respuestas)
 """
 from beanie import Document, Link
 from pydantic import Field
+from pymongo import IndexModel
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 from enum import Enum
@@ -15,6 +16,7 @@ class AnalysisStatus(str, Enum):
     PENDING_ANSWERS = "pending_answers"  # Esperando que alguien responda
     COMPLETED = "completed"              # Copilot confirmó "todo ok"
     IN_REVIEW = "in_review"              # En revisión por el analista
+    ARCHIVED = "archived"                # Proyecto archivado
 
 
 class AnalysisType(str, Enum):
@@ -53,6 +55,10 @@ class AnalysisSession(Document):
     
     # Relación con el proyecto
     project: Link[Project] = Field(..., description="Proyecto asociado")
+    project_name: Optional[str] = Field(
+        None,
+        description="Nombre del proyecto (desnormalizado para no resolver el link)"
+    )
     
     # Tipo de análisis
     analysis_type: AnalysisType = Field(..., description="Tipo de documentación a generar")
@@ -75,6 +81,33 @@ class AnalysisSession(Document):
         description="Respuestas del formulario"
     )
     
+    # Textos de respuestas + YAML normalizados y acotados (ver build_search_text)
+    search_text: Optional[str] = Field(
+        None,
+        description="Texto de búsqueda derivado de answers y yaml_config (hasta SEARCH_TEXT_MAX_CHARS)"
+    )
+    
+    # Palabras normalizadas para la búsqueda difusa (ver build_search_terms)
+    search_terms: Optional[List[str]] = Field(
+        None,
+        description="Palabras de respuestas y YAML (las de respuestas primero), sin acentos"
+    )
+    
+    # Avance de las respuestas de la iteración actual (ver AnswerValidator.completeness)
+    answered_count: int = Field(default=0, description="Preguntas con respuesta")
+    required_total: int = Field(default=0, description="Preguntas requeridas del YAML")
+    required_answered: int = Field(default=0, description="Preguntas requeridas con respuesta")
+    completion: float = Field(
+        default=0.0,
+        description="required_answered / required_total (1.0 si no hay requeridas)"
+    )
+    
+    # Formulario compilado de la iteración actual (colección form_schemas)
+    form_schema_hash: Optional[str] = Field(
+        None,
+        description="Hash del esquema de formulario compilado desde yaml_config"
+    )
+    
     # Control de iteraciones
     iteration: int = Field(default=1, description="Número de iteración actual")
     needs_more_info: bool = Field(
@@ -95,6 +128,7 @@ class AnalysisSession(Document):
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = Field(None, description="Momento en que se marcó como completo")
     
     # Historial de iteraciones
     iteration_history: List[Dict[str, Any]] = Field(
@@ -102,6 +136,23 @@ class AnalysisSession(Document):
         description="Historial de todas las iteraciones"
     )
     
+    # Control de concurrencia optimista: se incrementa en cada escritura
+    revision: int = Field(default=0, description="Revisión del documento (ETag)")
+    
+    # Outbox transaccional: eventos escritos con el cambio de estado, pendientes
+    # de que el relay los pase a outbox_events (ver OutboxController)
+    outbox: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Eventos para webhooks todavía no relayados"
+    )
+    
+    # Almacenamiento frío (ver ArchiveController)
+    in_cold_storage: bool = Field(
+        default=False,
+        description="True si el contenido pesado está en analysis_sessions_archive"
+    )
+    archived_at: Optional[datetime] = Field(None, description="Fecha de paso a almacenamiento frío")
+    
     class Settings:
         name = "analysis_sessions"
         indexes = [
@@ -112,6 +163,27 @@ class AnalysisSession(Document):
             "created_by",
             "assigned_to",
             "created_at",
+            # Búsqueda difusa: sesiones que contienen alguna palabra candidata
+            "search_terms",
+            # Relay del outbox: solo sesiones con eventos pendientes
+            IndexModel([("outbox.id", 1)], name="outbox_pending", sparse=True),
+            # Job de archivado: sesiones completadas por antigüedad
+            IndexModel([("status", 1), ("updated_at", 1)]),
+            # Avance de respuestas: cubre la consulta de AnalysisController.list_incomplete
+            # (filtro, orden y proyección salen del índice sin leer documentos)
+            IndexModel(
+                [
+                    ("status", 1),
+                    ("completion", 1),
+                    ("created_at", 1),
+                    ("_id", 1),
+                    ("assigned_to", 1),
+                    ("answered_count", 1),
+                    ("required_answered", 1),
+                    ("required_total", 1),
+                ],
+                name="completeness_covered"
+            ),
         ]
     
     class Config:
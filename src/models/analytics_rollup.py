@@ -0,0 +1,46 @@
+"""
+Modelo de Rollup Diario de Analytics
+"""
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from typing import Optional
+from datetime import datetime
+
+
+class AnalyticsRollup(Document):
+    """
+    Contadores de un día para un proyecto o un analista
+
+    Se actualizan con $inc en cada escritura relevante (ver
+    AnalyticsController) y se pueden reconstruir desde analysis_sessions y
+    generated_docs. /api/analytics lee solo esta colección: las semanas se
+    obtienen sumando los días (campo week).
+    """
+    
+    dimension: str = Field(..., description="project | analyst")
+    key: str = Field(..., description="ID del proyecto o email del analista")
+    label: Optional[str] = Field(None, description="Nombre del proyecto o email del analista")
+    day: datetime = Field(..., description="Inicio del día (UTC)")
+    week: str = Field(..., description="Semana ISO del día (2026-W03)")
+    
+    analyses_created: int = Field(default=0)
+    iterations_added: int = Field(default=0)
+    analyses_completed: int = Field(default=0)
+    completed_iterations: int = Field(default=0, description="Iteraciones de los análisis completados ese día")
+    completion_seconds: float = Field(default=0, description="Tiempo de creación a completado, sumado")
+    docs_generated: int = Field(default=0)
+    files_generated: int = Field(default=0)
+    
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "analytics_daily"
+        indexes = [
+            IndexModel([("dimension", 1), ("key", 1), ("day", 1)], unique=True),
+            # /api/analytics: una dimensión en un rango de días
+            IndexModel([("dimension", 1), ("day", 1)]),
+        ]
+    
+    def __repr__(self):
+        return f"<AnalyticsRollup {self.dimension}={self.key} {self.day:%Y-%m-%d}>"
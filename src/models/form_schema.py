@@ -0,0 +1,31 @@
+"""
+Modelo de Esquemas de Formulario Compilados
+"""
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from typing import Dict, Any
+from datetime import datetime
+
+
+class FormSchema(Document):
+    """
+    Esquema de formulario compilado desde el YAML de una iteración
+
+    Direccionado por contenido: iteraciones (o sesiones) con el mismo
+    formulario comparten la entrada, y una entrada nunca cambia, por lo que
+    el endpoint público la sirve como recurso inmutable.
+    """
+    
+    schema_hash: str = Field(..., description="Hash del esquema serializado + versión del compilador")
+    content: Dict[str, Any] = Field(..., description="Esquema compilado (ver compile_form_schema)")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "form_schemas"
+        indexes = [
+            IndexModel([("schema_hash", 1)], unique=True),
+        ]
+    
+    def __repr__(self):
+        return f"<FormSchema {self.schema_hash[:16]}>"
@@ -3,7 +3,8 @@ Modelo de Documentos Generados
 """
 from beanie import Document, Link
 from pydantic import Field
-from typing import List, Dict, Any
+from pymongo import IndexModel, TEXT
+from typing import List, Dict, Any, Optional
 from datetime import datetime
 
 from .project import Project
@@ -30,6 +31,10 @@ class GeneratedDoc(Document):
     
     # Relaciones
     project: Link[Project] = Field(..., description="Proyecto asociado")
+    project_name: Optional[str] = Field(
+        None,
+        description="Nombre del proyecto (desnormalizado para no resolver el link)"
+    )
     analysis_session: Link[AnalysisSession] = Field(..., description="Sesión de análisis que generó estos docs")
     
     # Archivos generados
@@ -42,6 +47,10 @@ class GeneratedDoc(Document):
     generated_at: datetime = Field(default_factory=datetime.utcnow)
     generated_by: str = Field(..., description="Email de quien guardó los documentos")
     
+    # Archivado (en cascada al archivar el proyecto)
+    archived: bool = Field(default=False, description="True si el proyecto fue archivado")
+    archived_at: Optional[datetime] = Field(None, description="Fecha de archivado")
+    
     class Settings:
         name = "generated_docs"
         indexes = [
@@ -49,6 +58,13 @@ class GeneratedDoc(Document):
             "analysis_session",
             "generated_at",
             "generated_by",
+            # Búsqueda full-text sobre rutas y contenido de los archivos
+            IndexModel(
+                [("files.path", TEXT), ("files.content", TEXT)],
+                name="files_text",
+                weights={"files.path": 5, "files.content": 1},
+                default_language="spanish"
+            ),
         ]
     
     class Config:
@@ -58,6 +74,8 @@ class GeneratedDoc(Document):
                     {
                         "path": "ai_docs/06-infraestructura/01-deployment.md",
                         "content": "# Deployment\n\n...",
+                        "size": 16,
+                        "hash": "9f2c...e1",
                         "generated_at": "2025-01-15T10:30:00Z"
                     },
                     {
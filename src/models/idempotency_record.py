@@ -0,0 +1,60 @@
+"""
+Modelo de Registro de Idempotencia
+"""
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+
+from ..config.settings import settings
+
+
+class IdempotencyStatus(str, Enum):
+    """Estados de una petición idempotente"""
+    PENDING = "pending"
+    COMPLETED = "completed"
+
+
+class IdempotencyRecord(Document):
+    """
+    Resultado de la primera ejecución de un POST con Idempotency-Key
+
+    Los reintentos con la misma clave (y el mismo body) devuelven la
+    respuesta guardada sin volver a validar ni insertar. MongoDB elimina
+    los registros por TTL pasadas IDEMPOTENCY_TTL_HOURS.
+    """
+    
+    key: str = Field(..., description="Valor del header Idempotency-Key")
+    scope: str = Field(..., description="Método y ruta a la que aplica la clave")
+    fingerprint: str = Field(..., description="SHA-256 del body canónico")
+    
+    status: IdempotencyStatus = Field(default=IdempotencyStatus.PENDING)
+    status_code: Optional[int] = Field(None, description="Código HTTP de la respuesta original")
+    response: Optional[Dict[str, Any]] = Field(None, description="Body JSON de la respuesta original")
+    resource_id: Optional[str] = Field(
+        None,
+        description="ID del recurso creado (cuando la respuesta es demasiado grande para guardarla)"
+    )
+    
+    owner: Optional[str] = Field(
+        None,
+        description="Token del intento que tiene la clave (al empezar o al retomarla)"
+    )
+    
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    locked_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "idempotency_keys"
+        indexes = [
+            IndexModel([("key", 1), ("scope", 1)], unique=True),
+            IndexModel(
+                [("created_at", 1)],
+                expireAfterSeconds=settings.idempotency_ttl_hours * 3600
+            ),
+        ]
+    
+    def __repr__(self):
+        return f"<IdempotencyRecord {self.scope} {self.key} ({self.status})>"
@@ -0,0 +1,67 @@
+"""
+Modelo de Evento del Outbox (notificaciones por webhook)
+"""
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from typing import Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+
+from ..config.settings import settings
+
+
+class OutboxEventType(str, Enum):
+    """Eventos que se notifican a los webhooks"""
+    ANSWERS_RECEIVED = "answers.received"      # Autosave o envío de respuestas
+    ANALYSIS_COMPLETED = "analysis.completed"  # Copilot confirmó "todo ok"
+
+
+class OutboxStatus(str, Enum):
+    """Estados de entrega de un evento a un destino"""
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    FAILED = "failed"  # Se agotaron los reintentos (o el destino lo rechazó)
+
+
+class OutboxEvent(Document):
+    """
+    Entrega pendiente de un evento a un destino (un documento por evento y URL)
+
+    Los eventos nacen embebidos en la sesión (campo outbox), escritos en la
+    misma operación que el cambio de estado; el relay de OutboxController
+    los copia aquí y el dispatcher los envía en lotes por destino. MongoDB
+    elimina los entregados por TTL pasadas OUTBOX_RETENTION_HOURS.
+    """
+    
+    event_id: str = Field(..., description="ID del evento ('<sesión>:<evento>'), para deduplicar en el receptor")
+    target: str = Field(..., description="URL del webhook")
+    type: OutboxEventType = Field(..., description="Tipo de evento")
+    payload: Dict[str, Any] = Field(default_factory=dict, description="Cuerpo del evento")
+    created_at: datetime = Field(default_factory=datetime.utcnow, description="Momento del cambio de estado")
+    
+    status: OutboxStatus = Field(default=OutboxStatus.PENDING)
+    attempts: int = Field(default=0, description="Envíos intentados")
+    next_attempt_at: datetime = Field(
+        default_factory=datetime.utcnow,
+        description="Próximo envío (backoff) o fin de la reserva del worker que lo tomó"
+    )
+    claim: Optional[str] = Field(None, description="Reserva del dispatcher que lo está enviando")
+    last_error: Optional[str] = Field(None, description="Último error de envío")
+    delivered_at: Optional[datetime] = Field(None, description="Momento de la entrega")
+    
+    class Settings:
+        name = "outbox_events"
+        indexes = [
+            IndexModel([("event_id", 1), ("target", 1)], unique=True),
+            # Dispatcher: pendientes cuyo próximo envío ya venció
+            IndexModel([("status", 1), ("next_attempt_at", 1)]),
+            "claim",
+            IndexModel(
+                [("delivered_at", 1)],
+                expireAfterSeconds=settings.outbox_retention_hours * 3600
+            ),
+        ]
+    
+    def __repr__(self):
+        return f"<OutboxEvent {self.type} -> {self.target} ({self.status})>"
@@ -39,6 +39,9 @@ class Project(Document):
         description="Información adicional (repository, technology, etc.)"
     )
     
+    # Control de concurrencia optimista: se incrementa en cada escritura
+    revision: int = Field(default=0, description="Revisión del documento (ETag)")
+    
     class Settings:
         name = "projects"
         indexes = [
@@ -0,0 +1,28 @@
+"""
+Modelo de Caché Persistente de Markdown Renderizado
+"""
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from datetime import datetime
+
+
+class RenderedMarkdown(Document):
+    """
+    HTML renderizado de un archivo markdown, indexado por hash del contenido
+    
+    Segundo nivel de caché (tras el LRU en memoria) compartido entre workers
+    """
+    
+    content_hash: str = Field(..., description="Hash del markdown + versión del renderizador")
+    html: str = Field(..., description="HTML sanitizado con tabla de contenidos")
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "rendered_markdown"
+        indexes = [
+            IndexModel([("content_hash", 1)], unique=True),
+        ]
+    
+    def __repr__(self):
+        return f"<RenderedMarkdown {self.content_hash[:16]}>"
@@ -0,0 +1,36 @@
+"""
+Modelo del Vocabulario de Búsqueda (índice de trigramas)
+"""
+from beanie import Document
+from pydantic import Field
+from pymongo import IndexModel
+from typing import List
+from datetime import datetime
+
+
+class SearchTerm(Document):
+    """
+    Palabra del vocabulario de búsqueda con sus trigramas
+
+    Una entrada por palabra distinta de search_terms de las sesiones. La
+    búsqueda difusa busca primero aquí las palabras parecidas a la consulta
+    (índice multikey sobre grams) y después las sesiones que las contienen.
+    Las palabras que dejan de usarse no se borran: solo amplían la lista de
+    candidatas sin cambiar los resultados.
+    """
+    
+    term: str = Field(..., description="Palabra normalizada (minúsculas, sin acentos)")
+    grams: List[str] = Field(..., description="Trigramas de la palabra (ver trigrams)")
+    gram_count: int = Field(..., description="Cantidad de trigramas (filtro por longitud)")
+    
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Settings:
+        name = "search_terms"
+        indexes = [
+            IndexModel([("term", 1)], unique=True),
+            IndexModel([("grams", 1), ("gram_count", 1)]),
+        ]
+    
+    def __repr__(self):
+        return f"<SearchTerm {self.term}>"
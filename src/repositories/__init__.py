@@ -0,0 +1,22 @@
+"""
+Backends de persistencia: MongoDB o en memoria (DATABASE_BACKEND)
+"""
+from .base import StorageBackend
+from .memory import MemoryBackend
+from .mongo import MongoBackend
+
+BACKENDS = {
+    MongoBackend.name: MongoBackend,
+    MemoryBackend.name: MemoryBackend,
+}
+
+
+def create_backend(name: str) -> StorageBackend:
+    """Instancia el backend configurado"""
+    try:
+        return BACKENDS[name.lower()]()
+    except KeyError:
+        raise ValueError(
+            f"DATABASE_BACKEND desconocido: {name} (opciones: {', '.join(BACKENDS)})"
+        )
+
@@ -0,0 +1,27 @@
+"""
+Interfaz de los backends de persistencia
+"""
+from abc import ABC, abstractmethod
+from typing import Any
+
+
+class StorageBackend(ABC):
+    """
+    Backend sobre el que se inicializa Beanie
+
+    connect() devuelve una base de datos con la API de Motor (colecciones con
+    find, update_one, aggregate, bulk_write...). Los modelos de Beanie y las
+    operaciones crudas de los controladores funcionan igual sobre cualquier
+    backend.
+    """
+
+    name: str = ""
+    label: str = ""
+
+    @abstractmethod
+    async def connect(self, database_name: str) -> Any:
+        """Abre la conexión y devuelve la base de datos"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Libera la conexión"""
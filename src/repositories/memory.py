@@ -0,0 +1,789 @@
+"""
+Backend en memoria compatible con la API de Motor que usan Beanie y los controladores
+
+Cada colección guarda los documentos como BSON (igual que MongoDB: mismos
+tipos, datetimes truncados a milisegundos, copias independientes en cada
+lectura) e implementa índices únicos, TTL, text y de igualdad. Permite
+levantar la API completa en el proceso, sin servicios externos, para tests
+unitarios y micro-benchmarks.
+
+No es thread-safe: está pensado para un único event loop.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import bson
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+from .base import StorageBackend
+from .memory_query import (
+    MISSING,
+    apply_update,
+    equality_fields,
+    evaluate,
+    freeze,
+    matches,
+    normalize_sort,
+    parse_text_search,
+    plain,
+    project,
+    resolve,
+    set_path,
+    sort_documents,
+    text_score,
+    unsupported,
+    upsert_seed,
+    values_equal,
+)
+
+
+SERVER_VERSION = "7.0.0"
+TTL_SWEEP_SECONDS = 1.0
+
+
+def _encode(document: Mapping[str, Any]) -> bytes:
+    try:
+        return bson.encode(document)
+    except bson.errors.InvalidDocument as e:
+        raise OperationFailure(str(e))
+
+
+# ============================================================================
+# ÍNDICES
+# ============================================================================
+
+class _Index:
+    """Índice de una colección: clave → ids (prefiltro de igualdad y unicidad)"""
+
+    def __init__(self, name: str, keys: List[Tuple[str, Any]], options: Dict[str, Any]):
+        self.name = name
+        self.keys = keys
+        self.options = options
+        self.unique = bool(options.get("unique"))
+        self.expire_after = options.get("expireAfterSeconds")
+        self.text_weights = None
+        if any(direction == "text" for _, direction in keys):
+            weights = options.get("weights") or {}
+            self.text_weights = {
+                field: weights.get(field, 1) for field, direction in keys if direction == "text"
+            }
+        self.sparse = bool(options.get("sparse"))
+        self.field = keys[0][0]
+        self.entries: Dict[Any, set] = {}
+        self.owners: Dict[Any, Any] = {}  # solo índices únicos: clave → _id
+
+    def info(self) -> Dict[str, Any]:
+        return {"v": 2, "key": list(self.keys), **self.options}
+
+    def field_keys(self, document: Mapping[str, Any]) -> set:
+        """Claves del primer campo (multikey: un valor por elemento de array)"""
+        values = resolve(document, self.field)
+        if not values:
+            return {None}
+        keys = set()
+        for value in values:
+            keys.add(freeze(value))
+            if isinstance(value, list):
+                keys.update(freeze(item) for item in value)
+        return keys
+
+    def unique_key(self, document: Mapping[str, Any]) -> Any:
+        """Clave de unicidad, o None si un índice sparse no aplica al documento"""
+        key = []
+        present = False
+        for field, _ in self.keys:
+            values = resolve(document, field)
+            present = present or bool(values)
+            key.append(freeze(values[0]) if len(values) == 1 else freeze(values or None))
+        if self.sparse and not present:
+            return None
+        return tuple(key)
+
+    def conflict(self, doc_id: Any, document: Mapping[str, Any]) -> bool:
+        key = self.unique_key(document)
+        owner = self.owners.get(key) if key is not None else None
+        return owner is not None and owner != doc_id
+
+    def add(self, doc_id: Any, document: Mapping[str, Any]) -> None:
+        for key in self.field_keys(document):
+            self.entries.setdefault(key, set()).add(doc_id)
+        if self.unique:
+            key = self.unique_key(document)
+            if key is not None:
+                self.owners[key] = doc_id
+
+    def remove(self, doc_id: Any, document: Mapping[str, Any]) -> None:
+        if self.unique:
+            key = self.unique_key(document)
+            if key is not None and self.owners.get(key) == doc_id:
+                del self.owners[key]
+        for key in self.field_keys(document):
+            ids = self.entries.get(key)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self.entries[key]
+
+
+# ============================================================================
+# CURSORES
+# ============================================================================
+
+class MemoryCursor:
+    """Cursor de find(): se evalúa al empezar a iterar (snapshot)"""
+
+    def __init__(self, collection: "MemoryCollection", filter: Optional[Mapping[str, Any]] = None,
+                 projection: Any = None, sort: Any = None, skip: int = 0, limit: int = 0):
+        self.collection = collection
+        self._filter = filter or {}
+        self._projection = projection
+        self._sort = normalize_sort(sort)
+        self._skip = skip or 0
+        self._limit = limit or 0
+        self._results: Optional[List[dict]] = None
+        self._position = 0
+
+    def sort(self, key_or_list: Any, direction: Any = None) -> "MemoryCursor":
+        self._sort = normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, skip: int) -> "MemoryCursor":
+        self._skip = skip
+        return self
+
+    def limit(self, limit: int) -> "MemoryCursor":
+        self._limit = limit
+        return self
+
+    def batch_size(self, batch_size: int) -> "MemoryCursor":
+        return self
+
+    def hint(self, index: Any) -> "MemoryCursor":
+        # Sin planificador: el índice sugerido no cambia el resultado
+        return self
+
+    def _evaluate(self) -> List[dict]:
+        if self._results is None:
+            self._results = self.collection._find(
+                self._filter, self._projection, self._sort, self._skip, self._limit
+            )
+        return self._results
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        results = self._evaluate()
+        end = len(results) if length is None else self._position + length
+        batch = results[self._position:end]
+        self._position += len(batch)
+        return batch
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        results = self._evaluate()
+        if self._position >= len(results):
+            raise StopAsyncIteration
+        self._position += 1
+        return results[self._position - 1]
+
+    async def next(self) -> dict:
+        return await self.__anext__()
+
+    def close(self) -> None:
+        self._results = []
+        self._position = 0
+
+
+class MemoryCommandCursor(MemoryCursor):
+    """Cursor de aggregate() sobre resultados ya calculados"""
+
+    def __init__(self, results: List[dict]):
+        self._results = results
+        self._position = 0
+
+    def _evaluate(self) -> List[dict]:
+        return self._results
+
+
+# ============================================================================
+# COLECCIÓN
+# ============================================================================
+
+class MemoryCollection:
+    """Subconjunto de AsyncIOMotorCollection sobre un diccionario en memoria"""
+
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.full_name = f"{database.name}.{name}"
+        # _id congelado → (documento, BSON); el orden de inserción es el natural
+        self._documents: Dict[Any, Tuple[dict, bytes]] = {}
+        self._sequence: Dict[Any, int] = {}
+        self._counter = 0
+        self._indexes: Dict[str, _Index] = {}
+        self._last_sweep = 0.0
+
+    def __repr__(self):
+        return f"MemoryCollection({self.full_name!r})"
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def _sweep_expired(self) -> None:
+        """Borra los documentos vencidos por índices TTL (como el monitor TTL de MongoDB)"""
+        ttl_indexes = [index for index in self._indexes.values() if index.expire_after is not None]
+        now = time.monotonic()
+        if not ttl_indexes or now - self._last_sweep < TTL_SWEEP_SECONDS:
+            return
+        self._last_sweep = now
+        current = datetime.utcnow()
+        for index in ttl_indexes:
+            cutoff = current - timedelta(seconds=index.expire_after)
+            for key, (document, _) in list(self._documents.items()):
+                dates = [value for value in resolve(document, index.field) if isinstance(value, datetime)]
+                if dates and min(dates) < cutoff:
+                    self._remove(key)
+
+    def _candidates(self, query: Mapping[str, Any]) -> Iterable[Tuple[dict, bytes]]:
+        """Documentos a evaluar: los de un índice de igualdad si el filtro lo permite"""
+        self._sweep_expired()
+        fields = equality_fields(query)
+        if "_id" in fields:
+            found = (self._documents.get(freeze(value)) for value in fields["_id"])
+            return [item for item in found if item is not None]
+        for index in self._indexes.values():
+            if index.text_weights is None and index.field in fields:
+                ids = set()
+                for value in fields[index.field]:
+                    ids.update(index.entries.get(freeze(value), ()))
+                return [self._documents[key] for key in sorted(ids, key=self._sequence.__getitem__)]
+        return list(self._documents.values())
+
+    def _text_weights(self) -> Dict[str, int]:
+        for index in self._indexes.values():
+            if index.text_weights is not None:
+                return index.text_weights
+        raise OperationFailure("text index required for $text query", code=27)
+
+    def _select(self, query: Optional[Mapping[str, Any]]) -> List[Tuple[dict, bytes, Optional[float]]]:
+        """Documentos que cumplen el filtro, con su textScore si hay $text"""
+        query = plain(query or {})
+        search = query.pop("$text", None)
+        selected = []
+        if search is None:
+            for document, raw in self._candidates(query):
+                if matches(document, query):
+                    selected.append((document, raw, None))
+            return selected
+
+        weights = self._text_weights()
+        terms, phrases, excluded = parse_text_search(search["$search"])
+        for document, raw in self._candidates(query):
+            if not matches(document, query):
+                continue
+            score = text_score(document, weights, terms, phrases, excluded)
+            if score is not None:
+                selected.append((document, raw, score))
+        return selected
+
+    def _find(self, query, projection=None, sort=None, skip=0, limit=0) -> List[dict]:
+        projection = plain(projection)
+        selected = self._select(query)
+        if sort:
+            order = sort_documents([item[0] for item in selected], sort)
+            position = {id(document): index for index, document in enumerate(order)}
+            selected.sort(key=lambda item: position[id(item[0])])
+        if skip:
+            selected = selected[skip:]
+        if limit:
+            selected = selected[:abs(limit)]
+        return [project(bson.decode(raw), projection) for _, raw, _ in selected]
+
+    def find(self, filter: Optional[Mapping[str, Any]] = None, projection: Any = None, *args,
+             sort: Any = None, skip: int = 0, limit: int = 0, session=None, **kwargs) -> MemoryCursor:
+        return MemoryCursor(self, filter, projection, sort, skip, limit)
+
+    async def find_one(self, filter: Any = None, projection: Any = None, *args,
+                       sort: Any = None, session=None, **kwargs) -> Optional[dict]:
+        if filter is not None and not isinstance(filter, Mapping):
+            filter = {"_id": filter}
+        results = self._find(filter, projection, normalize_sort(sort), limit=1)
+        return results[0] if results else None
+
+    async def count_documents(self, filter: Mapping[str, Any], session=None,
+                              skip: int = 0, limit: int = 0, **kwargs) -> int:
+        count = max(len(self._select(filter)) - (skip or 0), 0)
+        return min(count, limit) if limit else count
+
+    async def estimated_document_count(self, **kwargs) -> int:
+        self._sweep_expired()
+        return len(self._documents)
+
+    async def distinct(self, key: str, filter: Optional[Mapping[str, Any]] = None,
+                       session=None, **kwargs) -> List[Any]:
+        seen, values = set(), []
+        for document, _, _ in self._select(filter):
+            for value in resolve(document, key):
+                for item in (value if isinstance(value, list) else [value]):
+                    frozen = freeze(item)
+                    if frozen not in seen:
+                        seen.add(frozen)
+                        values.append(item)
+        return values
+
+    def aggregate(self, pipeline: List[Mapping[str, Any]], session=None, **kwargs) -> MemoryCommandCursor:
+        return MemoryCommandCursor(self._aggregate(plain(pipeline)))
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def _check_unique(self, document: Mapping[str, Any], doc_id: Any) -> None:
+        for index in self._indexes.values():
+            if index.unique and index.conflict(doc_id, document):
+                raise DuplicateKeyError(
+                    f"E11000 duplicate key error collection: {self.full_name} "
+                    f"index: {index.name} dup key: {index.unique_key(document)}",
+                    11000
+                )
+
+    def _store(self, document: dict, replacing: Optional[dict] = None) -> dict:
+        """Valida unicidad, guarda el documento y actualiza índices; devuelve la versión guardada"""
+        raw = _encode(document)
+        stored = bson.decode(raw)
+        key = freeze(stored["_id"])
+        self._check_unique(stored, key)
+        if replacing is not None:
+            for index in self._indexes.values():
+                index.remove(key, replacing)
+        self._documents[key] = (stored, raw)
+        if key not in self._sequence:
+            self._counter += 1
+            self._sequence[key] = self._counter
+        for index in self._indexes.values():
+            index.add(key, stored)
+        return stored
+
+    def _remove(self, key: Any) -> None:
+        document, _ = self._documents.pop(key)
+        del self._sequence[key]
+        for index in self._indexes.values():
+            index.remove(key, document)
+
+    def _insert(self, document: dict) -> Any:
+        if document.get("_id") is None:
+            document["_id"] = ObjectId()
+        if freeze(document["_id"]) in self._documents:
+            raise DuplicateKeyError(
+                f"E11000 duplicate key error collection: {self.full_name} index: _id_ dup key: "
+                f"{{ _id: {document['_id']!r} }}",
+                11000
+            )
+        self._store(document)
+        return document["_id"]
+
+    async def insert_one(self, document: dict, *args, session=None, **kwargs) -> InsertOneResult:
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True, *args,
+                          session=None, **kwargs) -> InsertManyResult:
+        inserted, errors = [], []
+        for position, document in enumerate(documents):
+            try:
+                inserted.append(self._insert(document))
+            except DuplicateKeyError as e:
+                errors.append({"index": position, "code": 11000, "errmsg": str(e), "op": document})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({
+                "writeErrors": errors, "writeConcernErrors": [], "nInserted": len(inserted),
+                "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": [],
+            })
+        return InsertManyResult(inserted, True)
+
+    def _update(self, filter: Mapping[str, Any], update: Any, upsert: bool, multi: bool,
+                replacement: bool = False, sort: Any = None) -> Tuple[Dict[str, Any], Optional[dict], Optional[dict]]:
+        """Aplica un update/replace; devuelve (raw_result, antes, después) del primer documento"""
+        filter, update = plain(filter or {}), plain(update)
+        if replacement and any(str(key).startswith("$") for key in update):
+            raise ValueError("El documento de reemplazo no puede contener operadores")
+        if not replacement and not isinstance(update, list) and not all(str(key).startswith("$") for key in update):
+            raise ValueError("El documento de actualización requiere operadores ($set, $inc...)")
+
+        selected = [item[0] for item in self._select(filter)]
+        if sort:
+            selected = sort_documents(selected, normalize_sort(sort))
+        if not multi:
+            selected = selected[:1]
+
+        matched = modified = 0
+        before = after = None
+        for document in selected:
+            key = freeze(document["_id"])
+            raw = self._documents[key][1]
+            if replacement:
+                if "_id" in update and not values_equal(update["_id"], document["_id"]):
+                    raise ValueError("El campo _id es inmutable")
+                changed = {"_id": document["_id"], **{k: v for k, v in update.items() if k != "_id"}}
+            else:
+                changed = bson.decode(raw)
+                apply_update(changed, update)
+            matched += 1
+            if _encode(changed) != raw:
+                self._store(changed, replacing=document)
+                modified += 1
+            if before is None:
+                before, after = bson.decode(raw), bson.decode(self._documents[key][1])
+
+        result: Dict[str, Any] = {"n": matched, "nModified": modified, "updatedExisting": matched > 0, "ok": 1.0}
+        if matched == 0 and upsert:
+            if replacement:
+                document = dict(update)
+                seed = upsert_seed(filter)
+                if "_id" not in document and "_id" in seed:
+                    document["_id"] = seed["_id"]
+            else:
+                document = upsert_seed(filter)
+                apply_update(document, update, is_insert=True)
+            doc_id = self._insert(document)
+            result.update({"n": 1, "upserted": doc_id})
+            after = bson.decode(self._documents[freeze(doc_id)][1])
+        return result, before, after
+
+    async def update_one(self, filter: Mapping[str, Any], update: Any, upsert: bool = False, *args,
+                         session=None, **kwargs) -> UpdateResult:
+        result, _, _ = self._update(filter, update, upsert, multi=False)
+        return UpdateResult(result, True)
+
+    async def update_many(self, filter: Mapping[str, Any], update: Any, upsert: bool = False, *args,
+                          session=None, **kwargs) -> UpdateResult:
+        result, _, _ = self._update(filter, update, upsert, multi=True)
+        return UpdateResult(result, True)
+
+    async def replace_one(self, filter: Mapping[str, Any], replacement: Mapping[str, Any],
+                          upsert: bool = False, *args, session=None, **kwargs) -> UpdateResult:
+        result, _, _ = self._update(filter, replacement, upsert, multi=False, replacement=True)
+        return UpdateResult(result, True)
+
+    async def find_one_and_update(self, filter: Mapping[str, Any], update: Any, projection: Any = None,
+                                  sort: Any = None, upsert: bool = False,
+                                  return_document: bool = ReturnDocument.BEFORE, session=None,
+                                  **kwargs) -> Optional[dict]:
+        _, before, after = self._update(filter, update, upsert, multi=False, sort=sort)
+        document = after if return_document else before
+        return project(document, plain(projection)) if document is not None else None
+
+    async def find_one_and_replace(self, filter: Mapping[str, Any], replacement: Mapping[str, Any],
+                                   projection: Any = None, sort: Any = None, upsert: bool = False,
+                                   return_document: bool = ReturnDocument.BEFORE, session=None,
+                                   **kwargs) -> Optional[dict]:
+        _, before, after = self._update(filter, replacement, upsert, multi=False, replacement=True, sort=sort)
+        document = after if return_document else before
+        return project(document, plain(projection)) if document is not None else None
+
+    async def find_one_and_delete(self, filter: Mapping[str, Any], projection: Any = None,
+                                  sort: Any = None, session=None, **kwargs) -> Optional[dict]:
+        selected = [item[0] for item in self._select(filter)]
+        if sort:
+            selected = sort_documents(selected, normalize_sort(sort))
+        if not selected:
+            return None
+        key = freeze(selected[0]["_id"])
+        raw = self._documents[key][1]
+        self._remove(key)
+        return project(bson.decode(raw), plain(projection))
+
+    def _delete(self, filter: Mapping[str, Any], multi: bool) -> int:
+        selected = self._select(filter)
+        if not multi:
+            selected = selected[:1]
+        for document, _, _ in selected:
+            self._remove(freeze(document["_id"]))
+        return len(selected)
+
+    async def delete_one(self, filter: Mapping[str, Any], *args, session=None, **kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, multi=False), "ok": 1.0}, True)
+
+    async def delete_many(self, filter: Mapping[str, Any], *args, session=None, **kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, multi=True), "ok": 1.0}, True)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, *args,
+                         session=None, **kwargs) -> BulkWriteResult:
+        totals = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0,
+                  "upserted": [], "writeErrors": [], "writeConcernErrors": []}
+        for position, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self._insert(request._doc)
+                    totals["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany, ReplaceOne)):
+                    result, _, _ = self._update(
+                        request._filter, request._doc, bool(request._upsert),
+                        multi=isinstance(request, UpdateMany),
+                        replacement=isinstance(request, ReplaceOne)
+                    )
+                    if "upserted" in result:
+                        totals["nUpserted"] += 1
+                        totals["upserted"].append({"index": position, "_id": result["upserted"]})
+                    else:
+                        totals["nMatched"] += result["n"]
+                        totals["nModified"] += result["nModified"]
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    totals["nRemoved"] += self._delete(request._filter, multi=isinstance(request, DeleteMany))
+                else:
+                    raise unsupported("Operación bulk", type(request).__name__)
+            except DuplicateKeyError as e:
+                totals["writeErrors"].append({"index": position, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if totals["writeErrors"]:
+            raise BulkWriteError(totals)
+        return BulkWriteResult(totals, True)
+
+    # ------------------------------------------------------------------
+    # Índices y administración
+    # ------------------------------------------------------------------
+
+    def _add_index(self, keys: Any, options: Dict[str, Any]) -> str:
+        keys = [(field, direction) for field, direction in (keys.items() if isinstance(keys, Mapping) else keys)]
+        name = options.pop("name", None) or "_".join(f"{field}_{direction}" for field, direction in keys)
+        if name in self._indexes:
+            return name
+        index = _Index(name, keys, options)
+        if index.text_weights is not None and any(
+            other.text_weights is not None for other in self._indexes.values()
+        ):
+            raise OperationFailure("Solo se permite un índice text por colección", code=85)
+        for key, (document, _) in self._documents.items():
+            if index.unique and index.conflict(key, document):
+                raise DuplicateKeyError(f"E11000 duplicate key error index: {name}", 11000)
+            index.add(key, document)
+        self._indexes[name] = index
+        return name
+
+    async def create_index(self, keys: Any, session=None, **kwargs) -> str:
+        if isinstance(keys, str):
+            keys = [(keys, 1)]
+        return self._add_index(keys, dict(kwargs))
+
+    async def create_indexes(self, indexes: List[Any], session=None, **kwargs) -> List[str]:
+        names = []
+        for model in indexes:
+            document = dict(model.document)
+            keys = list(document.pop("key").items())
+            names.append(self._add_index(keys, document))
+        return names
+
+    async def index_information(self, session=None, **kwargs) -> Dict[str, Dict[str, Any]]:
+        info = {"_id_": {"v": 2, "key": [("_id", 1)]}}
+        info.update({name: index.info() for name, index in self._indexes.items()})
+        return info
+
+    async def drop_index(self, index_or_name: Any, session=None, **kwargs) -> None:
+        if index_or_name not in self._indexes:
+            raise OperationFailure(f"index not found with name [{index_or_name}]", code=27)
+        del self._indexes[index_or_name]
+
+    async def drop_indexes(self, session=None, **kwargs) -> None:
+        self._indexes.clear()
+
+    async def drop(self, session=None, **kwargs) -> None:
+        self._documents.clear()
+        self._sequence.clear()
+        self._indexes.clear()
+
+    # ------------------------------------------------------------------
+    # Agregación
+    # ------------------------------------------------------------------
+
+    def _aggregate(self, pipeline: List[Mapping[str, Any]]) -> List[dict]:
+        scores: Dict[int, float] = {}
+        if pipeline and "$match" in pipeline[0]:
+            # El $match inicial usa los índices (y es el único lugar válido para $text)
+            selected = self._select(pipeline[0]["$match"])
+            documents = []
+            for _, raw, score in selected:
+                document = bson.decode(raw)
+                if score is not None:
+                    scores[id(document)] = score
+                documents.append(document)
+            pipeline = pipeline[1:]
+        else:
+            documents = [bson.decode(raw) for _, raw in self._candidates({})]
+
+        variables = {"$meta": {"textScore": lambda document: scores.get(id(document), 0.0)}}
+        return run_pipeline(documents, pipeline, variables)
+
+
+def _group_key(value: Any) -> Any:
+    return freeze(None if value is MISSING else value)
+
+
+def _accumulate(groups: Dict[Any, dict], accumulators: Dict[str, Any], document: dict,
+                key: Any, variables: Dict[str, Any]) -> None:
+    state = groups[key]
+    for field, spec in accumulators.items():
+        operator, expression = next(iter(spec.items()))
+        value = evaluate(expression, document, variables)
+        if operator == "$sum":
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                state[field] = state.get(field, 0) + value
+            else:
+                state.setdefault(field, 0)
+        elif operator == "$first":
+            state.setdefault(field, None if value is MISSING else value)
+        elif operator == "$last":
+            state[field] = None if value is MISSING else value
+        else:
+            raise unsupported("Acumulador", operator)
+
+
+def _project_stage(documents: List[dict], spec: Mapping[str, Any], variables: Dict[str, Any]) -> List[dict]:
+    plain = {path: rule for path, rule in spec.items()
+             if isinstance(rule, bool) or (isinstance(rule, (int, float)) and rule in (0, 1))}
+    computed = {path: rule for path, rule in spec.items() if path not in plain}
+    if not computed:
+        return [project(document, plain) for document in documents]
+
+    inclusion = {path: rule for path, rule in plain.items() if path != "_id" or rule}
+    exclude_id = "_id" in plain and not plain["_id"]
+    result = []
+    for document in documents:
+        projected = project(document, {**inclusion, "_id": 0 if exclude_id else 1}) if inclusion \
+            else ({} if exclude_id else {"_id": document.get("_id")})
+        for path, expression in computed.items():
+            value = evaluate(expression, document, {**variables, "ROOT": document})
+            if value is not MISSING:
+                projected[path] = value
+        result.append(projected)
+    return result
+
+
+def run_pipeline(documents: List[dict], pipeline: List[Mapping[str, Any]],
+                 variables: Optional[Dict[str, Any]] = None) -> List[dict]:
+    """Ejecuta etapas de agregación sobre documentos ya cargados"""
+    variables = variables or {}
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            if "$text" in spec:
+                raise OperationFailure("$match with $text is only allowed as the first pipeline stage", code=17313)
+            documents = [document for document in documents if matches(document, spec)]
+        elif name == "$addFields":
+            for document in documents:
+                for path, expression in spec.items():
+                    value = evaluate(expression, document, {**variables, "ROOT": document})
+                    if value is not MISSING:
+                        set_path(document, path, value)
+        elif name == "$project":
+            documents = _project_stage(documents, spec, variables)
+        elif name == "$sort":
+            documents = sort_documents(documents, normalize_sort(spec))
+        elif name == "$skip":
+            documents = documents[spec:]
+        elif name == "$limit":
+            documents = documents[:spec]
+        elif name == "$count":
+            documents = [{spec: len(documents)}] if documents else []
+        elif name == "$group":
+            accumulators = {field: rule for field, rule in spec.items() if field != "_id"}
+            groups: Dict[Any, dict] = {}
+            for document in documents:
+                group_id = evaluate(spec["_id"], document, {**variables, "ROOT": document})
+                group_id = None if group_id is MISSING else group_id
+                key = _group_key(group_id)
+                if key not in groups:
+                    groups[key] = {"_id": group_id}
+                _accumulate(groups, accumulators, document, key, {**variables, "ROOT": document})
+            documents = list(groups.values())
+        elif name == "$facet":
+            documents = [{
+                field: run_pipeline([dict(document) for document in documents], list(subpipeline), variables)
+                for field, subpipeline in spec.items()
+            }]
+        else:
+            raise unsupported("Etapa de agregación", name)
+    return documents
+
+
+# ============================================================================
+# BASE DE DATOS Y BACKEND
+# ============================================================================
+
+class MemoryDatabase:
+    """Subconjunto de AsyncIOMotorDatabase"""
+
+    def __init__(self, client: "MemoryClient", name: str):
+        self.client = client
+        self.name = name
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        return self.get_collection(name)
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self.get_collection(name)
+
+    def get_collection(self, name: str, **kwargs) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    async def list_collection_names(self, **kwargs) -> List[str]:
+        return list(self._collections)
+
+    async def drop_collection(self, name: str, **kwargs) -> None:
+        self._collections.pop(name if isinstance(name, str) else name.name, None)
+
+    async def command(self, command: Any, **kwargs) -> Dict[str, Any]:
+        name = command if isinstance(command, str) else next(iter(command))
+        if name.lower() == "buildinfo":
+            return {"version": SERVER_VERSION, "versionArray": [7, 0, 0, 0], "ok": 1.0}
+        if name == "ping":
+            return {"ok": 1.0}
+        raise unsupported("Comando", name)
+
+
+class MemoryClient:
+    """Subconjunto de AsyncIOMotorClient: bases de datos en el proceso"""
+
+    def __init__(self):
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        return self.get_database(name)
+
+    def get_database(self, name: str, **kwargs) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(self, name)
+        return self._databases[name]
+
+    async def drop_database(self, name: str, **kwargs) -> None:
+        self._databases.pop(name if isinstance(name, str) else name.name, None)
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StorageBackend):
+    """Datos en memoria del proceso: se pierden al cerrar"""
+
+    name = "memory"
+    label = "base de datos en memoria"
+
+    def __init__(self, client: Optional[MemoryClient] = None):
+        self.client = client or MemoryClient()
+
+    async def connect(self, database_name: str) -> MemoryDatabase:
+        return self.client[database_name]
+
+    async def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,835 @@
+"""
+Semántica de consultas de MongoDB sobre diccionarios en memoria
+
+Funciones puras usadas por el backend en memoria: filtros, actualizaciones,
+ordenamiento, proyecciones y expresiones de agregación. Cubren solo los
+operadores que usan los controllers (listados en SUPPORTED_OPERATORS);
+cualquier otro lanza NotImplementedError en lugar de devolver un resultado
+distinto al de MongoDB. tests/test_memory_backend.py corre los mismos casos
+contra MongoDB real (MONGODB_TEST_URL) para verificar la paridad.
+"""
+import re
+import unicodedata
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from bson import DBRef, ObjectId, Regex
+from bson.decimal128 import Decimal128
+from bson.int64 import Int64
+from bson.timestamp import Timestamp
+
+
+class _Missing:
+    """Marca de campo inexistente (distinto de null)"""
+
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+
+# Operadores emulados, por categoría. Agregar uno nuevo requiere su caso en
+# tests/test_memory_backend.py (que corre también contra MongoDB real)
+SUPPORTED_OPERATORS = {
+    "query": ("$ne", "$in", "$nin", "$gt", "$gte", "$lt", "$lte", "$exists", "$regex",
+              "$and", "$or", "$text"),
+    "update": ("$set", "$setOnInsert", "$unset", "$inc", "$push ($each)", "$pull (documento)"),
+    "projection": ("$elemMatch",),
+    "stage": ("$match", "$addFields", "$project", "$sort", "$skip", "$limit", "$count",
+              "$group", "$facet"),
+    "accumulator": ("$sum", "$first", "$last"),
+    "expression": ("$literal", "$meta", "$ifNull", "$cond", "$add", "$subtract", "$divide",
+                   "$max", "$strLenBytes", "$regexMatch", "$size", "$setIntersection",
+                   "$indexOfArray", "$arrayElemAt", "$map"),
+}
+
+
+def unsupported(kind: str, name: str) -> NotImplementedError:
+    return NotImplementedError(f"{kind} {name} no soportado por el backend en memoria")
+
+
+# ============================================================================
+# TIPOS, IGUALDAD Y ORDEN (orden de tipos BSON de MongoDB)
+# ============================================================================
+
+def type_rank(value: Any) -> int:
+    if value is None or value is MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float, Decimal, Decimal128, Int64)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, (Mapping, DBRef)):
+        return 4
+    if isinstance(value, (list, tuple)):
+        return 5
+    if isinstance(value, (bytes, bytearray)):
+        return 6
+    if isinstance(value, ObjectId):
+        return 7
+    if isinstance(value, datetime):
+        return 9
+    if isinstance(value, Timestamp):
+        return 10
+    if isinstance(value, (re.Pattern, Regex)):
+        return 11
+    return 12
+
+
+def sort_value(value: Any) -> Tuple:
+    """Clave de orden total compatible con la comparación de MongoDB"""
+    rank = type_rank(value)
+    if rank == 1:
+        return (rank, 0)
+    if rank == 2:
+        if isinstance(value, Decimal128):
+            value = value.to_decimal()
+        return (rank, value)
+    if rank == 4:
+        if isinstance(value, DBRef):
+            value = value.as_doc()
+        return (rank, tuple((key, sort_value(item)) for key, item in value.items()))
+    if rank == 5:
+        return (rank, tuple(sort_value(item) for item in value))
+    if rank == 10:
+        return (rank, (value.time, value.inc))
+    if rank == 11:
+        return (rank, str(value.pattern))
+    return (rank, value)
+
+
+def freeze(value: Any) -> Any:
+    """Versión hasheable de un valor, para índices y distinct"""
+    if isinstance(value, bool):
+        return ("bool", value)
+    if isinstance(value, DBRef):
+        return ("dbref", value.collection, freeze(value.id))
+    if isinstance(value, Mapping):
+        return ("obj", tuple((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return ("arr", tuple(freeze(item) for item in value))
+    if isinstance(value, Decimal128):
+        return value.to_decimal()
+    return value
+
+
+def values_equal(left: Any, right: Any) -> bool:
+    if left is MISSING:
+        left = None
+    if right is MISSING:
+        right = None
+    left_rank, right_rank = type_rank(left), type_rank(right)
+    if left_rank != right_rank:
+        return False
+    if left_rank == 4:
+        left = left.as_doc() if isinstance(left, DBRef) else left
+        right = right.as_doc() if isinstance(right, DBRef) else right
+        return list(left.keys()) == list(right.keys()) and all(
+            values_equal(left[key], right[key]) for key in left
+        )
+    if left_rank == 5:
+        return len(left) == len(right) and all(values_equal(a, b) for a, b in zip(left, right))
+    return sort_value(left) == sort_value(right)
+
+
+def compare(left: Any, right: Any) -> Optional[int]:
+    """-1/0/1 si ambos valores son comparables (mismo tipo BSON), None si no"""
+    if type_rank(left) != type_rank(right):
+        return None
+    left_key, right_key = sort_value(left), sort_value(right)
+    return (left_key > right_key) - (left_key < right_key)
+
+
+def plain(value: Any) -> Any:
+    """
+    Copia de un filtro/actualización con dicts y claves str simples
+
+    Beanie arma las consultas con operadores (Mapping propios) y claves
+    ExpressionField, cuyo == devuelve otro operador en lugar de un bool.
+    """
+    if isinstance(value, Mapping) and not isinstance(value, DBRef):
+        return {str.__str__(key) if isinstance(key, str) else key: plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain(item) for item in value]
+    return value
+
+
+# ============================================================================
+# RUTAS (campos con puntos, arrays y DBRef)
+# ============================================================================
+
+def _step(value: Any, part: str) -> Any:
+    if isinstance(value, DBRef):
+        if part == "$id":
+            return value.id
+        if part == "$ref":
+            return value.collection
+        if part == "$db":
+            return value.database if value.database is not None else MISSING
+        return MISSING
+    if isinstance(value, Mapping):
+        return value.get(part, MISSING)
+    if isinstance(value, list) and part.isdigit():
+        index = int(part)
+        return value[index] if index < len(value) else MISSING
+    return MISSING
+
+
+def resolve(document: Any, path: str) -> List[Any]:
+    """
+    Valores en una ruta con puntos, recorriendo arrays intermedios
+
+    "files.path" sobre una lista de archivos devuelve la ruta de cada uno
+    (igual que un filtro de MongoDB). Lista vacía si el campo no existe.
+    """
+    values = [document]
+    for part in path.split("."):
+        found = []
+        for value in values:
+            if isinstance(value, list) and not part.isdigit():
+                for item in value:
+                    item = _step(item, part)
+                    if item is not MISSING:
+                        found.append(item)
+            else:
+                value = _step(value, part)
+                if value is not MISSING:
+                    found.append(value)
+        values = found
+    return values
+
+
+def get_path(document: Any, path: str) -> Any:
+    """Valor en una ruta para expresiones de agregación ("$files.path" proyecta arrays)"""
+    value = document
+    for part in path.split("."):
+        if isinstance(value, list) and not part.isdigit():
+            value = [item for item in (get_path(element, part) for element in value) if item is not MISSING]
+        else:
+            value = _step(value, part)
+        if value is MISSING:
+            return MISSING
+    return value
+
+
+def _parent(document: dict, path: str, create: bool) -> Tuple[Any, str]:
+    parts = path.split(".")
+    if "$" in parts or any(part.startswith("$[") for part in parts):
+        raise unsupported("Operador posicional en", path)
+    container: Any = document
+    for part in parts[:-1]:
+        if isinstance(container, list):
+            index = int(part)
+            if index >= len(container):
+                if not create:
+                    return None, parts[-1]
+                container.extend([None] * (index + 1 - len(container)))
+            if container[index] is None and create:
+                container[index] = {}
+            container = container[index]
+        else:
+            if part not in container or container[part] is None:
+                if not create:
+                    return None, parts[-1]
+                container[part] = {}
+            container = container[part]
+        if not isinstance(container, (dict, list)):
+            raise ValueError(f"No se puede recorrer '{part}' en {path}: no es un documento")
+    return container, parts[-1]
+
+
+def set_path(document: dict, path: str, value: Any) -> None:
+    container, key = _parent(document, path, create=True)
+    if isinstance(container, list):
+        index = int(key)
+        if index >= len(container):
+            container.extend([None] * (index + 1 - len(container)))
+        container[index] = value
+    else:
+        container[key] = value
+
+
+def read_path(document: dict, path: str) -> Any:
+    container, key = _parent(document, path, create=False)
+    if container is None:
+        return MISSING
+    return _step(container, key)
+
+
+def unset_path(document: dict, path: str) -> None:
+    container, key = _parent(document, path, create=False)
+    if isinstance(container, dict):
+        container.pop(key, None)
+    elif isinstance(container, list) and key.isdigit() and int(key) < len(container):
+        container[int(key)] = None
+
+
+# ============================================================================
+# FILTROS
+# ============================================================================
+
+def _is_operator_dict(value: Any) -> bool:
+    return isinstance(value, Mapping) and bool(value) and all(str(key).startswith("$") for key in value)
+
+
+def _expand(candidates: List[Any]) -> List[Any]:
+    """Valores candidatos más los elementos de los arrays (semántica multikey)"""
+    expanded = []
+    for value in candidates:
+        expanded.append(value)
+        if isinstance(value, list):
+            expanded.extend(value)
+    return expanded
+
+
+def _regex(pattern: Any, options: str = "") -> re.Pattern:
+    if isinstance(pattern, re.Pattern):
+        return pattern
+    if isinstance(pattern, Regex):
+        return pattern.try_compile()
+    flags = 0
+    for option in options or "":
+        flags |= {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}.get(option, 0)
+    return re.compile(pattern, flags)
+
+
+def _matches_value(candidates: List[Any], expected: Any) -> bool:
+    if isinstance(expected, (re.Pattern, Regex)):
+        pattern = _regex(expected)
+        return any(isinstance(value, str) and pattern.search(value) for value in _expand(candidates))
+    if expected is None:
+        return not candidates or any(value is None for value in _expand(candidates))
+    return any(values_equal(value, expected) for value in _expand(candidates))
+
+
+def _compare_any(candidates: List[Any], target: Any, accept: Callable[[int], bool]) -> bool:
+    for value in _expand(candidates):
+        result = compare(value, target)
+        if result is not None and accept(result):
+            return True
+    return False
+
+
+def _match_operators(candidates: List[Any], operators: Mapping[str, Any]) -> bool:
+    for operator, target in operators.items():
+        if operator == "$ne":
+            ok = not _matches_value(candidates, target)
+        elif operator == "$in":
+            ok = any(_matches_value(candidates, item) for item in target)
+        elif operator == "$nin":
+            ok = not any(_matches_value(candidates, item) for item in target)
+        elif operator in ("$gt", "$gte", "$lt", "$lte"):
+            if target is None and operator in ("$gte", "$lte"):
+                ok = _matches_value(candidates, None)
+            else:
+                accept = {
+                    "$gt": lambda r: r > 0,
+                    "$gte": lambda r: r >= 0,
+                    "$lt": lambda r: r < 0,
+                    "$lte": lambda r: r <= 0,
+                }[operator]
+                ok = _compare_any(candidates, target, accept)
+        elif operator == "$exists":
+            ok = bool(candidates) == bool(target)
+        elif operator == "$regex":
+            pattern = _regex(target, operators.get("$options", ""))
+            ok = any(isinstance(value, str) and pattern.search(value) for value in _expand(candidates))
+        elif operator == "$options":
+            continue
+        else:
+            raise unsupported("Operador", operator)
+        if not ok:
+            return False
+    return True
+
+
+def _element_matches(element: Any, condition: Mapping[str, Any]) -> bool:
+    return isinstance(element, Mapping) and matches(element, condition)
+
+
+def matches(document: Mapping[str, Any], query: Optional[Mapping[str, Any]]) -> bool:
+    """True si el documento cumple el filtro (sin $text: lo resuelve la colección)"""
+    if not query:
+        return True
+    for key, condition in query.items():
+        if key == "$and":
+            ok = all(matches(document, item) for item in condition)
+        elif key == "$or":
+            ok = any(matches(document, item) for item in condition)
+        elif key.startswith("$"):
+            raise unsupported("Operador", key)
+        elif _is_operator_dict(condition):
+            ok = _match_operators(resolve(document, key), condition)
+        else:
+            ok = _matches_value(resolve(document, key), condition)
+        if not ok:
+            return False
+    return True
+
+
+def equality_fields(query: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """
+    Campos del filtro con igualdad sobre valores escalares (usables por un índice)
+
+    Devuelve {campo: [valores posibles]} para igualdades directas e $in.
+    """
+    fields: Dict[str, Any] = {}
+    for key, condition in (query or {}).items():
+        if key.startswith("$"):
+            continue
+        if _is_operator_dict(condition):
+            if "$in" not in condition:
+                continue
+            values = list(condition["$in"])
+        elif isinstance(condition, Mapping):
+            continue
+        else:
+            values = [condition]
+        if all(_indexable(value) for value in values):
+            fields[key] = values
+    return fields
+
+
+def _indexable(value: Any) -> bool:
+    return value is not None and not isinstance(value, (Mapping, list, tuple, re.Pattern, Regex, DBRef))
+
+
+# ============================================================================
+# ACTUALIZACIONES
+# ============================================================================
+
+def _number(value: Any, operator: str, path: str) -> Any:
+    if value is MISSING:
+        return value
+    if isinstance(value, bool) or not isinstance(value, (int, float, Int64, Decimal128)):
+        raise ValueError(f"{operator} requiere un valor numérico en {path}")
+    return value
+
+
+def _push_values(argument: Any) -> List[Any]:
+    if isinstance(argument, Mapping) and "$each" in argument:
+        for modifier in argument:
+            if modifier != "$each":
+                raise unsupported("Modificador de $push", modifier)
+        return list(argument["$each"])
+    return [argument]
+
+
+def apply_update(document: dict, update: Mapping[str, Any], is_insert: bool = False) -> None:
+    """Aplica un documento de actualización con operadores ($set, $inc...) in-place"""
+    if isinstance(update, list):
+        raise unsupported("Pipeline de actualización", "(lista de etapas)")
+    for operator, fields in update.items():
+        if operator == "$setOnInsert":
+            if not is_insert:
+                continue
+            operator = "$set"
+        for path, argument in fields.items():
+            current = read_path(document, path)
+            if path == "_id" and not is_insert:
+                if operator == "$set" and values_equal(current, argument):
+                    continue
+                raise ValueError("El campo _id es inmutable")
+            if operator == "$set":
+                set_path(document, path, argument)
+            elif operator == "$unset":
+                unset_path(document, path)
+            elif operator == "$inc":
+                _number(argument, operator, path)
+                current = _number(current, operator, path)
+                set_path(document, path, argument if current is MISSING else current + argument)
+            elif operator == "$push":
+                if current is MISSING:
+                    current = []
+                    set_path(document, path, current)
+                if not isinstance(current, list):
+                    raise ValueError(f"$push requiere un array en {path}")
+                current.extend(_push_values(argument))
+            elif operator == "$pull":
+                if not isinstance(argument, Mapping) or _is_operator_dict(argument):
+                    raise unsupported("Condición de $pull", str(argument))
+                if isinstance(current, list):
+                    current[:] = [item for item in current if not _element_matches(item, argument)]
+            else:
+                raise unsupported("Operador de actualización", operator)
+
+
+def upsert_seed(query: Mapping[str, Any]) -> dict:
+    """Documento base de un upsert: los campos con igualdad del filtro"""
+    document: dict = {}
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            for item in condition:
+                for path, value in upsert_seed(item).items():
+                    set_path(document, path, value)
+        elif key.startswith("$"):
+            continue
+        elif _is_operator_dict(condition):
+            continue
+        elif "$" not in key:
+            set_path(document, key, condition)
+    return document
+
+
+# ============================================================================
+# ORDEN Y PROYECCIÓN
+# ============================================================================
+
+def _field_sort_value(document: Mapping[str, Any], path: str, descending: bool) -> Tuple:
+    values = resolve(document, path)
+    if not values:
+        return sort_value(None)
+    flat = []
+    for value in values:
+        if isinstance(value, list):
+            flat.extend(value if value else [None])
+        else:
+            flat.append(value)
+    keys = [sort_value(value) for value in flat]
+    return max(keys) if descending else min(keys)
+
+
+def normalize_sort(sort: Any, direction: Any = None) -> List[Tuple[str, int]]:
+    """Acepta los formatos de pymongo: "campo", [("campo", 1)], {"campo": -1}"""
+    if sort is None:
+        return []
+    if isinstance(sort, str):
+        return [(str.__str__(sort), direction if direction is not None else 1)]
+    items = sort.items() if isinstance(sort, Mapping) else sort
+    result = []
+    for item in items:
+        if isinstance(item, str):
+            result.append((str.__str__(item), 1))
+        else:
+            field, order = item
+            if isinstance(order, Mapping):
+                raise unsupported("Orden", str(dict(order)))
+            result.append((str.__str__(field), int(order)))
+    return result
+
+
+def sort_documents(documents: Iterable[Mapping[str, Any]], spec: List[Tuple[str, int]]) -> List:
+    """Orden estable multi-campo: se ordena por cada clave de la menos a la más significativa"""
+    result = list(documents)
+    for field, direction in reversed(spec):
+        descending = direction < 0
+        result.sort(key=lambda doc: _field_sort_value(doc, field, descending), reverse=descending)
+    return result
+
+
+def _projection_tree(paths: Dict[str, Any]) -> Dict[str, Any]:
+    tree: Dict[str, Any] = {}
+    for path, value in paths.items():
+        node = tree
+        parts = path.split(".")
+        for part in parts[:-1]:
+            child = node.get(part)
+            if not isinstance(child, dict):
+                child = node[part] = {}
+            node = child
+        node[parts[-1]] = value
+    return tree
+
+
+def _include(value: Any, tree: Dict[str, Any]) -> Any:
+    if isinstance(value, list):
+        return [_include(item, tree) for item in value if isinstance(item, (Mapping, list))]
+    if not isinstance(value, Mapping):
+        return MISSING
+    result = {}
+    for key, item in value.items():
+        if key not in tree:
+            continue
+        rule = tree[key]
+        if isinstance(rule, dict):
+            projected = _include(item, rule)
+            if projected is not MISSING:
+                result[key] = projected
+        else:
+            result[key] = item
+    return result
+
+
+def _exclude(value: Any, tree: Dict[str, Any]) -> Any:
+    if isinstance(value, list):
+        return [_exclude(item, tree) for item in value]
+    if not isinstance(value, Mapping):
+        return value
+    result = {}
+    for key, item in value.items():
+        rule = tree.get(key)
+        if rule is None:
+            result[key] = item
+        elif isinstance(rule, dict):
+            result[key] = _exclude(item, rule)
+    return result
+
+
+def project(document: dict, projection: Optional[Any]) -> dict:
+    """Proyección de find(): inclusión/exclusión con puntos y $elemMatch"""
+    if not projection:
+        return document
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+
+    include_id = bool(projection.get("_id", 1))
+    special: Dict[str, Any] = {}
+    plain: Dict[str, Any] = {}
+    for path, rule in projection.items():
+        if path == "_id":
+            continue
+        if isinstance(rule, Mapping):
+            special[path] = rule
+        else:
+            plain[path] = bool(rule)
+
+    for path, rule in special.items():
+        if list(rule) != ["$elemMatch"]:
+            raise unsupported("Proyección", str(dict(rule)))
+
+    inclusion = any(plain.values()) or bool(special)
+    if inclusion:
+        if not all(plain.values()):
+            raise ValueError("No se pueden mezclar inclusión y exclusión en una proyección")
+        tree = _projection_tree({path: True for path in plain})
+        for path in special:
+            tree[path] = True
+        result = _include(document, tree)
+    else:
+        result = _exclude(document, _projection_tree({path: False for path in plain}))
+
+    for path, rule in special.items():
+        value = result.get(path)
+        if isinstance(value, list):
+            found = [item for item in value if _element_matches(item, rule["$elemMatch"])][:1]
+            if found:
+                result[path] = found
+            else:
+                result.pop(path, None)
+
+    if include_id and "_id" in document:
+        result = {"_id": document["_id"], **{key: item for key, item in result.items() if key != "_id"}}
+    else:
+        result.pop("_id", None)
+    return result
+
+
+# ============================================================================
+# EXPRESIONES DE AGREGACIÓN
+# ============================================================================
+
+def _truthy(value: Any) -> bool:
+    if value is MISSING or value is None or value is False:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value != 0
+    return True
+
+
+def _null(value: Any) -> bool:
+    return value is MISSING or value is None
+
+
+def _arithmetic(values: List[Any], operator: str) -> Any:
+    if any(_null(value) for value in values):
+        return None
+    if operator == "$add":
+        if any(isinstance(value, datetime) for value in values):
+            base = next(value for value in values if isinstance(value, datetime))
+            millis = sum(value for value in values if not isinstance(value, datetime))
+            return base + timedelta(milliseconds=millis)
+        return sum(values)
+    left, right = values
+    if operator == "$subtract":
+        if isinstance(left, datetime) and isinstance(right, datetime):
+            return int((left - right).total_seconds() * 1000)
+        return left - right
+    return left / right
+
+
+def evaluate(expression: Any, document: Any, variables: Optional[Dict[str, Any]] = None) -> Any:
+    """Evalúa una expresión de agregación ("$campo", "$$variable", operadores)"""
+    variables = variables or {}
+    if isinstance(expression, str):
+        if expression.startswith("$$"):
+            name, _, path = expression[2:].partition(".")
+            if name == "ROOT":
+                base = variables.get("ROOT", document)
+            elif name == "CURRENT":
+                base = document
+            elif name in variables:
+                base = variables[name]
+            else:
+                raise unsupported("Variable", name)
+            return get_path(base, path) if path else base
+        if expression.startswith("$"):
+            return get_path(document, expression[1:])
+        return expression
+    if isinstance(expression, list):
+        return [evaluate(item, document, variables) for item in expression]
+    if not isinstance(expression, Mapping):
+        return expression
+    if not (len(expression) == 1 and next(iter(expression)).startswith("$")):
+        result = {}
+        for key, item in expression.items():
+            value = evaluate(item, document, variables)
+            if value is not MISSING:
+                result[key] = value
+        return result
+
+    operator, argument = next(iter(expression.items()))
+
+    def arg(index: int = None) -> Any:
+        if index is None:
+            return evaluate(argument, document, variables)
+        return evaluate(argument[index], document, variables)
+
+    if operator == "$literal":
+        return argument
+    if operator == "$meta":
+        meta = variables.get("$meta", {})
+        if argument not in meta:
+            raise unsupported("$meta", str(argument))
+        return meta[argument](document)
+    if operator == "$ifNull":
+        values = [evaluate(item, document, variables) for item in argument]
+        for value in values[:-1]:
+            if not _null(value):
+                return value
+        return values[-1]
+    if operator == "$cond":
+        if isinstance(argument, Mapping):
+            condition, then, otherwise = argument["if"], argument["then"], argument["else"]
+        else:
+            condition, then, otherwise = argument
+        branch = then if _truthy(evaluate(condition, document, variables)) else otherwise
+        return evaluate(branch, document, variables)
+    if operator in ("$add", "$subtract", "$divide"):
+        return _arithmetic(arg(), operator)
+    if operator == "$max":
+        values = arg()
+        if isinstance(argument, list) and len(argument) > 1:
+            flat = values
+        else:
+            value = values[0] if isinstance(argument, list) else values
+            flat = value if isinstance(value, list) else [value]
+        present = [value for value in flat if not _null(value)]
+        return max(present, key=sort_value) if present else None
+    if operator == "$strLenBytes":
+        value = arg()
+        if isinstance(value, list):
+            value = value[0]
+        if not isinstance(value, str):
+            raise ValueError("$strLenBytes requiere un string")
+        return len(value.encode("utf-8"))
+    if operator == "$regexMatch":
+        value = evaluate(argument["input"], document, variables)
+        if _null(value):
+            return False
+        if not isinstance(value, str):
+            raise ValueError("$regexMatch requiere un string")
+        pattern = _regex(argument["regex"], argument.get("options", ""))
+        return pattern.search(value) is not None
+    if operator == "$size":
+        value = arg()
+        if isinstance(argument, list):
+            value = value[0]
+        if not isinstance(value, list):
+            raise ValueError("$size requiere un array")
+        return len(value)
+    if operator == "$setIntersection":
+        arrays = arg()
+        if any(_null(array) for array in arrays):
+            return None
+        others = [{freeze(item) for item in array} for array in arrays[1:]]
+        common, seen = [], set()
+        for item in arrays[0]:
+            key = freeze(item)
+            if key not in seen and all(key in other for other in others):
+                seen.add(key)
+                common.append(item)
+        return common
+    if operator == "$indexOfArray":
+        array, value = arg(0), arg(1)
+        if _null(array):
+            return None
+        return next((index for index, item in enumerate(array) if values_equal(item, value)), -1)
+    if operator == "$arrayElemAt":
+        array, index = arg(0), arg(1)
+        if _null(array):
+            return None
+        return array[index] if -len(array) <= index < len(array) else MISSING
+    if operator == "$map":
+        items = evaluate(argument["input"], document, variables)
+        if _null(items):
+            return None
+        name = argument.get("as", "this")
+        return [
+            evaluate(argument["in"], document, {**variables, name: item})
+            for item in items
+        ]
+    raise unsupported("Expresión", operator)
+
+
+# ============================================================================
+# TEXTO (índice text)
+# ============================================================================
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def fold(text: str) -> str:
+    """Minúsculas y sin diacríticos (los índices text v3 ignoran acentos)"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def parse_text_search(search: str) -> Tuple[List[str], List[str], List[str]]:
+    """Separa una búsqueda $text en (términos, frases, términos excluidos)"""
+    phrases = [fold(phrase) for phrase in re.findall(r'"([^"]*)"', search)]
+    rest = re.sub(r'"[^"]*"', " ", search)
+    terms, excluded = [], []
+    for token in rest.split():
+        target = excluded if token.startswith("-") else terms
+        target.extend(_WORD.findall(fold(token.lstrip("-"))))
+    for phrase in phrases:
+        terms.extend(_WORD.findall(phrase))
+    return terms, phrases, excluded
+
+
+def text_score(
+    document: Mapping[str, Any],
+    weights: Dict[str, int],
+    terms: List[str],
+    phrases: List[str],
+    excluded: List[str]
+) -> Optional[float]:
+    """
+    Puntaje de un documento para una búsqueda $text, o None si no coincide
+
+    Aproximación del textScore de MongoDB: suma ponderada por campo de las
+    apariciones de cada término (sin stemming).
+    """
+    score = 0.0
+    texts = []
+    seen_words = set()
+    for field, weight in weights.items():
+        for value in _expand(resolve(document, field)):
+            if not isinstance(value, str):
+                continue
+            folded = fold(value)
+            words = _WORD.findall(folded)
+            texts.append(folded)
+            seen_words.update(words)
+            hits = sum(words.count(term) for term in set(terms))
+            if hits:
+                score += weight * hits / (0.5 + 0.5 * len(words) ** 0.5)
+    if score == 0 or seen_words.intersection(excluded):
+        return None
+    if phrases and not all(any(phrase in text for text in texts) for phrase in phrases):
+        return None
+    return score
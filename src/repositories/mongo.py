@@ -0,0 +1,30 @@
+"""
+Backend MongoDB (Motor)
+"""
+from typing import Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from .base import StorageBackend
+from ..config.settings import settings
+from ..config.query_monitor import slow_query_listener
+
+
+class MongoBackend(StorageBackend):
+    """Servidor MongoDB de MONGODB_URL, con registro de consultas lentas"""
+
+    name = "mongo"
+    label = "MongoDB"
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url or settings.mongodb_url
+        self.client: Optional[AsyncIOMotorClient] = None
+
+    async def connect(self, database_name: str) -> AsyncIOMotorDatabase:
+        listeners = [slow_query_listener] if settings.slow_query_enabled else []
+        self.client = AsyncIOMotorClient(self.url, event_listeners=listeners)
+        return self.client[database_name]
+
+    async def close(self) -> None:
+        if self.client:
+            self.client.close()
@@ -0,0 +1,98 @@
+"""
+Rutas de Administración y Métricas
+"""
+from fastapi import APIRouter, HTTPException, Query, status
+
+from ..config.executor import CPUExecutor
+from ..config.query_monitor import slow_query_listener
+from ..utils.single_flight import single_flight_metrics
+from ..controllers.archive_controller import ArchiveController
+from ..controllers.outbox_controller import OutboxController
+from ..controllers.analytics_controller import AnalyticsController
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/executor")
+async def get_executor_metrics():
+    """
+    Métricas del pool CPU-bound
+
+    - **queue_depth**: Tareas en cola o ejecutándose en el pool
+    - **event_loop_lag_ms**: Retraso medido del event loop
+    """
+    return CPUExecutor.metrics()
+
+
+@router.get("/slow-queries")
+async def get_slow_queries():
+    """
+    Comandos de MongoDB más lentos de este worker (por encima de SLOW_QUERY_MS)
+
+    Cada entrada incluye la forma del comando (sin valores), la duración,
+    los documentos devueltos y la ruta/request id que lo originó
+    """
+    return slow_query_listener.metrics()
+
+
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_slow_queries():
+    """Vacía el registro de consultas lentas"""
+    slow_query_listener.reset()
+
+
+@router.get("/single-flight")
+async def get_single_flight_metrics(
+    top: int = Query(20, ge=1, le=1000, description="Claves por grupo, las más deduplicadas primero")
+):
+    """
+    Lecturas concurrentes compartidas de este worker (análisis, tokens,
+    documentos y proyectos)
+
+    - **executions**: Lecturas que llegaron a MongoDB
+    - **deduplicated**: Pedidos que esperaron una lectura ya en curso
+    """
+    return single_flight_metrics(top)
+
+
+@router.get("/outbox")
+async def get_outbox_metrics():
+    """
+    Estado de las notificaciones por webhook
+
+    - **sessions_with_events**: Sesiones con eventos que el relay todavía no copió
+    - **pending / delivered / failed**: Entregas (evento x destino) por estado
+    """
+    return await OutboxController.metrics()
+
+
+@router.post("/analytics/rebuild")
+async def rebuild_analytics(
+    batch_size: int = Query(None, ge=1, le=5000)
+):
+    """
+    Recalcula desde cero los rollups de /api/analytics a partir de las
+    sesiones y los documentos (conviene correrlo con poco tráfico)
+    """
+    return await AnalyticsController.rebuild(batch_size=batch_size)
+
+
+@router.post("/archive")
+async def run_archive(
+    older_than_days: int = Query(None, ge=0, description="Default: ARCHIVE_AFTER_DAYS"),
+    batch_size: int = Query(None, ge=1, le=5000)
+):
+    """
+    Mueve a almacenamiento frío las sesiones completadas (o de proyectos
+    archivados) sin cambios en los últimos N días
+    """
+    try:
+        return await ArchiveController.archive_sessions(
+            older_than_days=older_than_days,
+            batch_size=batch_size
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -1,95 +1,160 @@
 """
 Rutas de Análisis (Sesiones de Preguntas/Respuestas)
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 from beanie import PydanticObjectId
 
 from ..controllers.analysis_controller import AnalysisController
+from ..controllers.form_schema_controller import FormSchemaController
+from ..controllers.prompt_bundle_controller import PromptBundleController
+from ..utils.answer_validator import AnswerValidationError
+from ..utils.revision import RevisionConflictError
+from ..utils.links import link_id
+from ..utils.prompt_bundle import BUNDLE_EXTENSIONS, BUNDLE_MEDIA_TYPES, IncompleteAnalysisError
 from .schemas.analysis_schemas import (
     AnalysisCreate,
     AnswersUpdate,
     IterationCreate,
     AnalysisResponse,
-    PublicAnalysisResponse
+    PublicAnalysisResponse,
+    AnalysisBulkSelection,
+    AnalysisBulkReassign,
+    AnalysisSearchResponse,
+    AnalysisProgress
 )
+from .schemas.project_schemas import BulkCounts
 from ..config.settings import settings
-from ..models.analysis_session import AnalysisType
+from ..models.analysis_session import AnalysisType, AnalysisStatus
+from .idempotency import IDEMPOTENCY_HEADER, run_idempotent
+from .preconditions import IF_MATCH_HEADER, expected_revision, revision_conflict, set_etag
+from .ndjson import NDJSON_RESPONSES, ndjson_response, wants_ndjson
 
 router = APIRouter(prefix="/api", tags=["analysis"])
 
+# Los esquemas compilados se direccionan por contenido: nunca cambian
+FORM_SCHEMA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+YAML_CONTENT_TYPES = ("text/yaml", "application/yaml", "application/x-yaml", "text/x-yaml")
+
+# Documenta el body text/yaml en OpenAPI (FastAPI no lo infiere de Request)
+YAML_BODY_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {"text/yaml": {"schema": {"type": "string"}}}
+    }
+}
+
+
+def _build_analysis_response(session) -> AnalysisResponse:
+    """Construye la respuesta de una sesión (project_name está desnormalizado)"""
+    return AnalysisResponse(
+        id=str(session.id),
+        project_id=str(link_id(session.project)),
+        project_name=session.project_name,
+        analysis_type=session.analysis_type,
+        status=session.status,
+        yaml_config=session.yaml_config,
+        answers=session.answers,
+        iteration=session.iteration,
+        needs_more_info=session.needs_more_info,
+        share_token=session.share_token,
+        share_url=session.get_share_url(settings.frontend_url),
+        created_by=session.created_by,
+        assigned_to=session.assigned_to,
+        created_at=session.created_at,
+        updated_at=session.updated_at,
+        revision=session.revision,
+        answered_count=session.answered_count,
+        required_total=session.required_total,
+        required_answered=session.required_answered,
+        completion=session.completion
+    )
+
+
+async def _read_yaml_body(request: Request) -> bytes:
+    """Lee el body YAML en streaming cortando al superar el límite de bytes"""
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in YAML_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type debe ser uno de: {', '.join(YAML_CONTENT_TYPES)}"
+        )
+    
+    max_bytes = settings.yaml_max_bytes
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"El YAML supera el máximo de {max_bytes} bytes"
+    )
+    
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+    
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise too_large
+    
+    return bytes(body)
+
 
 # ============================================
 # RUTAS PRIVADAS (para el analista)
 # ============================================
 
 @router.post("/projects/{project_id}/analysis", response_model=AnalysisResponse, status_code=status.HTTP_201_CREATED)
-async def create_analysis(project_id: str, data: AnalysisCreate):
+async def create_analysis(
+    project_id: str,
+    data: AnalysisCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
+):
     """
     Crea una nueva sesión de análisis
     
-    El analista pega el YAML generado por Copilot y obtiene una URL para compartir
+    El analista pega el YAML generado por Copilot y obtiene una URL para compartir.
+    Con el header **Idempotency-Key** los reintentos devuelven la misma sesión
+    (mismo share_token) en lugar de crear otra.
     """
-    try:
-        session = await AnalysisController.create_analysis(
-            project_id=PydanticObjectId(data.project_id),
-            analysis_type=data.analysis_type,
-            yaml_config=data.yaml_config,
-            created_by=data.created_by,
-            assigned_to=data.assigned_to
-        )
-        
-        # Obtener nombre del proyecto
-        await session.fetch_link('project')
-        
-        return AnalysisResponse(
-            id=str(session.id),
-            project_id=str(session.project.id),
-            project_name=session.project.name,
-            analysis_type=session.analysis_type,
-            status=session.status,
-            yaml_config=session.yaml_config,
-            answers=session.answers,
-            iteration=session.iteration,
-            needs_more_info=session.needs_more_info,
-            share_token=session.share_token,
-            share_url=session.get_share_url(settings.frontend_url),
-            created_by=session.created_by,
-            assigned_to=session.assigned_to,
-            created_at=session.created_at,
-            updated_at=session.updated_at
-        )
-    except ValueError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+    async def create():
+        try:
+            session = await AnalysisController.create_analysis(
+                project_id=PydanticObjectId(data.project_id),
+                analysis_type=data.analysis_type,
+                yaml_config=data.yaml_config,
+                created_by=data.created_by,
+                assigned_to=data.assigned_to
+            )
+            
+            return _build_analysis_response(session)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    return await run_idempotent(
+        key=idempotency_key,
+        scope=f"POST /api/projects/{project_id}/analysis",
+        payload=data,
+        status_code=status.HTTP_201_CREATED,
+        create=create
+    )
 
 
 @router.get("/analysis/{analysis_id}", response_model=AnalysisResponse)
-async def get_analysis(analysis_id: str):
-    """Obtiene una sesión de análisis (para el analista)"""
+async def get_analysis(analysis_id: str, response: Response):
+    """
+    Obtiene una sesión de análisis (para el analista)
+    
+    El header ETag lleva la revisión; se reenvía como If-Match al modificarla
+    """
     try:
         session = await AnalysisController.get_analysis(PydanticObjectId(analysis_id))
-        await session.fetch_link('project')
-        
-        return AnalysisResponse(
-            id=str(session.id),
-            project_id=str(session.project.id),
-            project_name=session.project.name,
-            analysis_type=session.analysis_type,
-            status=session.status,
-            yaml_config=session.yaml_config,
-            answers=session.answers,
-            iteration=session.iteration,
-            needs_more_info=session.needs_more_info,
-            share_token=session.share_token,
-            share_url=session.get_share_url(settings.frontend_url),
-            created_by=session.created_by,
-            assigned_to=session.assigned_to,
-            created_at=session.created_at,
-            updated_at=session.updated_at
-        )
+        set_etag(response, session.revision)
+        return _build_analysis_response(session)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -98,69 +163,112 @@ async def get_analysis(analysis_id: str):
 
 
 @router.put("/analysis/{analysis_id}/iteration", response_model=AnalysisResponse)
-async def add_iteration(analysis_id: str, data: IterationCreate):
+async def add_iteration(
+    analysis_id: str,
+    data: IterationCreate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias=IF_MATCH_HEADER)
+):
     """
     Agrega una nueva iteración (Copilot generó nuevo YAML)
     
-    El analista pega el nuevo YAML y obtiene una nueva URL para compartir
+    El analista pega el nuevo YAML y obtiene una nueva URL para compartir.
+    Con **If-Match** responde 412 si la sesión cambió desde que se leyó.
     """
+    expected = expected_revision(if_match)
     try:
         session = await AnalysisController.add_iteration(
             analysis_id=PydanticObjectId(analysis_id),
             yaml_config=data.yaml_config,
-            needs_more_info=data.needs_more_info
+            needs_more_info=data.needs_more_info,
+            expected_revision=expected
         )
         
-        await session.fetch_link('project')
+        set_etag(response, session.revision)
+        return _build_analysis_response(session)
+    except RevisionConflictError as e:
+        raise revision_conflict(e, expected)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get(
+    "/analysis/{analysis_id}/bundle",
+    responses={200: {"content": {media_type: {} for media_type in BUNDLE_MEDIA_TYPES.values()}}}
+)
+async def get_prompt_bundle(
+    analysis_id: str,
+    request: Request,
+    bundle_format: Literal["markdown", "json"] = Query("markdown", alias="format"),
+    draft: bool = Query(False, description="Permite el paquete de un análisis no completado")
+):
+    """
+    Paquete de prompt para que Copilot genere los ai_docs/...
+    
+    YAML final, respuestas emparejadas con sus preguntas (sin las vacías)
+    e iteraciones anteriores, en markdown o JSON. Se compila una vez por
+    revisión de la sesión y se envía en fragmentos; el ETag es la revisión,
+    así que una nueva descarga sin cambios responde 304.
+    """
+    try:
+        analysis_oid = PydanticObjectId(analysis_id)
+        revision = await PromptBundleController.get_revision(analysis_oid, draft)
         
-        return AnalysisResponse(
-            id=str(session.id),
-            project_id=str(session.project.id),
-            project_name=session.project.name,
-            analysis_type=session.analysis_type,
-            status=session.status,
-            yaml_config=session.yaml_config,
-            answers=session.answers,
-            iteration=session.iteration,
-            needs_more_info=session.needs_more_info,
-            share_token=session.share_token,
-            share_url=session.get_share_url(settings.frontend_url),
-            created_by=session.created_by,
-            assigned_to=session.assigned_to,
-            created_at=session.created_at,
-            updated_at=session.updated_at
+        etag = f'"{revision}-{bundle_format}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        body, revision = await PromptBundleController.get_body(analysis_oid, revision, bundle_format)
+    except IncompleteAnalysisError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
         )
     except ValueError as e:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
+            status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    
+    chunk = settings.prompt_bundle_chunk_bytes
+    view = memoryview(body)
+    filename = f"bundle-{analysis_id}-r{revision}.{BUNDLE_EXTENSIONS[bundle_format]}"
+    return StreamingResponse(
+        (bytes(view[start:start + chunk]) for start in range(0, len(body), chunk)),
+        media_type=BUNDLE_MEDIA_TYPES[bundle_format],
+        headers={
+            "ETag": f'"{revision}-{bundle_format}"',
+            "Cache-Control": "private, no-cache",
+            "Content-Length": str(len(body)),
+            "Content-Disposition": f'inline; filename="{filename}"',
+        }
+    )
 
 
 @router.put("/analysis/{analysis_id}/complete", response_model=AnalysisResponse)
-async def complete_analysis(analysis_id: str):
-    """Marca el análisis como completo (Copilot dijo 'todo ok')"""
+async def complete_analysis(
+    analysis_id: str,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias=IF_MATCH_HEADER)
+):
+    """
+    Marca el análisis como completo (Copilot dijo 'todo ok')
+    
+    Con **If-Match** responde 412 si la sesión cambió desde que se leyó.
+    """
+    expected = expected_revision(if_match)
     try:
-        session = await AnalysisController.complete_analysis(PydanticObjectId(analysis_id))
-        await session.fetch_link('project')
-        
-        return AnalysisResponse(
-            id=str(session.id),
-            project_id=str(session.project.id),
-            project_name=session.project.name,
-            analysis_type=session.analysis_type,
-            status=session.status,
-            yaml_config=session.yaml_config,
-            answers=session.answers,
-            iteration=session.iteration,
-            needs_more_info=session.needs_more_info,
-            share_token=session.share_token,
-            share_url=session.get_share_url(settings.frontend_url),
-            created_by=session.created_by,
-            assigned_to=session.assigned_to,
-            created_at=session.created_at,
-            updated_at=session.updated_at
+        session = await AnalysisController.complete_analysis(
+            PydanticObjectId(analysis_id),
+            expected_revision=expected
         )
+        set_etag(response, session.revision)
+        return _build_analysis_response(session)
+    except RevisionConflictError as e:
+        raise revision_conflict(e, expected)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -168,13 +276,30 @@ async def complete_analysis(analysis_id: str):
         )
 
 
-@router.get("/projects/{project_id}/analyses", response_model=List[AnalysisResponse])
+@router.get(
+    "/projects/{project_id}/analyses",
+    response_model=List[AnalysisResponse],
+    responses=NDJSON_RESPONSES
+)
 async def list_project_analyses(
     project_id: str,
+    request: Request,
     analysis_type: AnalysisType = None
 ):
-    """Lista todas las sesiones de análisis de un proyecto"""
+    """
+    Lista todas las sesiones de análisis de un proyecto
+    
+    Con Accept: application/x-ndjson las sesiones se envían a medida que se
+    leen del cursor (una por línea), sin armar la lista completa en memoria.
+    """
     try:
+        if wants_ndjson(request):
+            sessions = await AnalysisController.iter_project_analyses(
+                project_id=PydanticObjectId(project_id),
+                analysis_type=analysis_type
+            )
+            return await ndjson_response(sessions, _build_analysis_response)
+        
         sessions = await AnalysisController.list_project_analyses(
             project_id=PydanticObjectId(project_id),
             analysis_type=analysis_type
@@ -182,24 +307,7 @@ async def list_project_analyses(
         
         result = []
         for session in sessions:
-            await session.fetch_link('project')
-            result.append(AnalysisResponse(
-                id=str(session.id),
-                project_id=str(session.project.id),
-                project_name=session.project.name,
-                analysis_type=session.analysis_type,
-                status=session.status,
-                yaml_config=session.yaml_config,
-                answers=session.answers,
-                iteration=session.iteration,
-                needs_more_info=session.needs_more_info,
-                share_token=session.share_token,
-                share_url=session.get_share_url(settings.frontend_url),
-                created_by=session.created_by,
-                assigned_to=session.assigned_to,
-                created_at=session.created_at,
-                updated_at=session.updated_at
-            ))
+            result.append(_build_analysis_response(session))
         
         return result
     except Exception as e:
@@ -209,6 +317,133 @@ async def list_project_analyses(
         )
 
 
+# ============================================
+# OPERACIONES MASIVAS
+# ============================================
+
+def _bulk_args(data: AnalysisBulkSelection) -> dict:
+    """Convierte la selección del body en argumentos del controlador"""
+    return {
+        "analysis_ids": [PydanticObjectId(analysis_id) for analysis_id in data.ids],
+        "filters": data.filter.model_dump(exclude_none=True) if data.filter else None,
+    }
+
+
+@router.post("/analysis/bulk/complete", response_model=BulkCounts)
+async def bulk_complete_analyses(data: AnalysisBulkSelection):
+    """Marca como completas varias sesiones por IDs y/o filtro"""
+    try:
+        return await AnalysisController.bulk_complete(**_bulk_args(data))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/analysis/bulk/reassign", response_model=BulkCounts)
+async def bulk_reassign_analyses(data: AnalysisBulkReassign):
+    """Reasigna varias sesiones a otro experto por IDs y/o filtro"""
+    try:
+        return await AnalysisController.bulk_reassign(
+            assigned_to=data.assigned_to,
+            **_bulk_args(data)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+# ============================================
+# RUTAS DE INGESTA DE YAML CRUDO (text/yaml)
+# ============================================
+
+@router.post(
+    "/projects/{project_id}/analysis/yaml",
+    response_model=AnalysisResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=YAML_BODY_OPENAPI
+)
+async def create_analysis_from_yaml(
+    project_id: str,
+    request: Request,
+    analysis_type: AnalysisType,
+    created_by: str,
+    assigned_to: Optional[str] = None
+):
+    """
+    Crea una sesión de análisis a partir del YAML crudo de Copilot
+    
+    El body es el YAML tal cual (Content-Type: text/yaml); los demás
+    datos van como query params.
+    """
+    raw = await _read_yaml_body(request)
+    
+    try:
+        yaml_config, yaml_hash = await AnalysisController.parse_raw_yaml(raw)
+        
+        session = await AnalysisController.create_analysis(
+            project_id=PydanticObjectId(project_id),
+            analysis_type=analysis_type,
+            yaml_config=yaml_config,
+            created_by=created_by,
+            assigned_to=assigned_to,
+            yaml_hash=yaml_hash
+        )
+        
+        return _build_analysis_response(session)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.put(
+    "/analysis/{analysis_id}/iteration/yaml",
+    response_model=AnalysisResponse,
+    openapi_extra=YAML_BODY_OPENAPI
+)
+async def add_iteration_from_yaml(
+    analysis_id: str,
+    request: Request,
+    response: Response,
+    needs_more_info: bool = True,
+    if_match: Optional[str] = Header(None, alias=IF_MATCH_HEADER)
+):
+    """
+    Agrega una nueva iteración a partir del YAML crudo de Copilot
+    
+    El body es el YAML tal cual (Content-Type: text/yaml).
+    Con **If-Match** responde 412 si la sesión cambió desde que se leyó.
+    """
+    expected = expected_revision(if_match)
+    raw = await _read_yaml_body(request)
+    
+    try:
+        yaml_config, yaml_hash = await AnalysisController.parse_raw_yaml(raw)
+        
+        session = await AnalysisController.add_iteration(
+            analysis_id=PydanticObjectId(analysis_id),
+            yaml_config=yaml_config,
+            needs_more_info=needs_more_info,
+            yaml_hash=yaml_hash,
+            expected_revision=expected
+        )
+        
+        set_etag(response, session.revision)
+        return _build_analysis_response(session)
+    except RevisionConflictError as e:
+        raise revision_conflict(e, expected)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 # ============================================
 # RUTAS PÚBLICAS (para responder preguntas)
 # ============================================
@@ -219,18 +454,20 @@ async def get_public_analysis(share_token: str):
     Obtiene una sesión de análisis por token (URL pública)
     
     Esta ruta NO requiere autenticación y se usa para que el experto
-    pueda ver y responder las preguntas
+    pueda ver y responder las preguntas. El formulario ya compilado de la
+    iteración se obtiene de form_schema_url (cacheable sin expiración).
     """
     try:
         session = await AnalysisController.get_analysis_by_token(share_token)
-        await session.fetch_link('project')
-        
+        schema_hash = await FormSchemaController.ensure_for_session(session)
         return PublicAnalysisResponse(
-            project_name=session.project.name,
+            project_name=session.project_name,
             analysis_type=session.analysis_type,
             yaml_config=session.yaml_config,
             answers=session.answers,
-            iteration=session.iteration
+            iteration=session.iteration,
+            form_schema_hash=schema_hash,
+            form_schema_url=f"/api/form-schemas/{schema_hash}"
         )
     except ValueError as e:
         raise HTTPException(
@@ -239,6 +476,31 @@ async def get_public_analysis(share_token: str):
         )
 
 
+@router.get("/form-schemas/{schema_hash}")
+async def get_form_schema(schema_hash: str, request: Request):
+    """
+    Formulario compilado de una iteración (endpoint público)
+    
+    Preguntas en orden estable, defaults resueltos y tablas de opciones
+    precalculadas. El hash identifica el contenido, así que la respuesta
+    es inmutable: se cachea sin expiración y responde 304 a If-None-Match.
+    """
+    etag = f'"{schema_hash}"'
+    headers = {"ETag": etag, "Cache-Control": FORM_SCHEMA_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    try:
+        body = await FormSchemaController.get_body(schema_hash)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.post("/answer/{share_token}", status_code=status.HTTP_200_OK)
 async def update_public_answers(share_token: str, data: AnswersUpdate):
     """
@@ -249,13 +511,19 @@ async def update_public_answers(share_token: str, data: AnswersUpdate):
     try:
         await AnalysisController.update_answers(
             share_token=share_token,
-            answers=data.answers
+            answers=data.answers,
+            complete=data.complete
         )
         
         return {
             "success": True,
             "message": "Respuestas guardadas correctamente"
         }
+    except AnswerValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": str(e), "errors": e.errors}
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -268,50 +536,99 @@ async def update_public_answers(share_token: str, data: AnswersUpdate):
         )
 
 
-@router.get("/search/analyses", response_model=List[AnalysisResponse])
+@router.get("/search/analyses", response_model=AnalysisSearchResponse, responses=NDJSON_RESPONSES)
 async def search_analyses(
     q: str,
+    request: Request,
     project_id: str = None,
     analysis_type: AnalysisType = None,
-    limit: int = 50
+    analysis_status: AnalysisStatus = Query(None, alias="status"),
+    assigned_to: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Default: 50 (sin límite en NDJSON)"),
+    offset: int = Query(0, ge=0),
+    fuzzy: bool = True
 ):
     """
     Busca sesiones de análisis por texto en:
     - Título del YAML
-    - Descripción del YAML
-    - Preguntas del YAML
+    - Títulos de sección y preguntas del YAML
     - Respuestas del experto
+    
+    Con fuzzy=true (default) tolera errores de tipeo y acentos
+    ("kubernets", "descripcion") y ordena por similitud; con fuzzy=false
+    busca el texto literal en todo el YAML y las respuestas.
+    
+    Devuelve en la misma respuesta la página de resultados, el total y las
+    facetas (conteos por tipo, estado, proyecto y asignado) para armar
+    la pantalla de búsqueda con una sola llamada.
+    
+    Con Accept: application/x-ndjson se envían solo los resultados (una
+    sesión por línea, mismo orden) a medida que se leen del cursor, sin
+    total ni facetas y sin límite salvo que se indique limit.
     """
     try:
-        sessions = await AnalysisController.search_analyses(
-            query=q,
-            project_id=PydanticObjectId(project_id) if project_id else None,
-            analysis_type=analysis_type,
+        search_args = {
+            "query": q,
+            "project_id": PydanticObjectId(project_id) if project_id else None,
+            "analysis_type": analysis_type,
+            "status": analysis_status,
+            "assigned_to": assigned_to,
+            "offset": offset,
+            "fuzzy": fuzzy,
+        }
+        if wants_ndjson(request):
+            sessions = await AnalysisController.iter_search_analyses(limit=limit, **search_args)
+            return await ndjson_response(sessions, _build_analysis_response)
+        
+        limit = limit or 50
+        result = await AnalysisController.search_analyses(limit=limit, **search_args)
+        
+        return AnalysisSearchResponse(
+            hits=[_build_analysis_response(session) for session in result["hits"]],
+            total=result["total"],
+            limit=limit,
+            offset=offset,
+            facets=result["facets"]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/progress/analyses", response_model=List[AnalysisProgress])
+async def list_incomplete_analyses(
+    max_completion: float = Query(0.5, ge=0, le=1, description="Fracción de requeridas respondidas (exclusiva)"),
+    older_than_days: float = Query(3, ge=0, description="Antigüedad mínima desde la creación"),
+    analysis_status: AnalysisStatus = Query(AnalysisStatus.PENDING_ANSWERS, alias="status"),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Sesiones atrasadas: menos de max_completion de las preguntas requeridas
+    respondidas y creadas hace más de older_than_days (las menos avanzadas
+    primero). Se resuelve solo con un índice, sin cargar las sesiones.
+    """
+    try:
+        rows = await AnalysisController.list_incomplete(
+            max_completion=max_completion,
+            older_than_days=older_than_days,
+            status=analysis_status,
             limit=limit
         )
         
-        result = []
-        for session in sessions:
-            await session.fetch_link('project')
-            result.append(AnalysisResponse(
-                id=str(session.id),
-                project_id=str(session.project.id),
-                project_name=session.project.name,
-                analysis_type=session.analysis_type,
-                status=session.status,
-                yaml_config=session.yaml_config,
-                answers=session.answers,
-                iteration=session.iteration,
-                needs_more_info=session.needs_more_info,
-                share_token=session.share_token,
-                share_url=session.get_share_url(settings.frontend_url),
-                created_by=session.created_by,
-                assigned_to=session.assigned_to,
-                created_at=session.created_at,
-                updated_at=session.updated_at
-            ))
-        
-        return result
+        return [
+            AnalysisProgress(
+                id=str(row["_id"]),
+                assigned_to=row.get("assigned_to"),
+                answered_count=row["answered_count"],
+                required_total=row["required_total"],
+                required_answered=row["required_answered"],
+                completion=row["completion"],
+                created_at=row["created_at"]
+            )
+            for row in rows
+        ]
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -0,0 +1,56 @@
+"""
+Rutas de Analytics (throughput por proyecto y analista)
+"""
+from fastapi import APIRouter, HTTPException, Query, status
+from typing import Literal, Optional
+from datetime import date
+
+from ..controllers.analytics_controller import AnalyticsController
+from ..utils.analytics import derive_metrics
+from .schemas.analytics_schemas import AnalyticsBucket, AnalyticsCounters, AnalyticsResponse
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+
+
+@router.get("", response_model=AnalyticsResponse)
+async def get_analytics(
+    group_by: Literal["project", "analyst"] = Query("project", description="Proyecto o analista (created_by / generated_by)"),
+    granularity: Literal["day", "week"] = Query("day"),
+    date_from: Optional[date] = Query(None, description="Default: 29 días antes de date_to"),
+    date_to: Optional[date] = Query(None, description="Default: hoy (UTC)"),
+    key: Optional[str] = Query(None, description="Un solo proyecto (ID) o analista (email)"),
+    limit: int = Query(1000, ge=1, le=10000, description="Máximo de buckets")
+):
+    """
+    Análisis creados, iteraciones, tiempo hasta completar y documentos
+    generados por día o semana, por proyecto o por analista
+
+    Se calcula solo con los rollups diarios (analytics_daily), nunca
+    recorriendo sesiones ni documentos.
+    """
+    try:
+        result = await AnalyticsController.query(
+            group_by=group_by,
+            granularity=granularity,
+            date_from=date_from,
+            date_to=date_to,
+            key=key,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return AnalyticsResponse(
+        group_by=group_by,
+        granularity=granularity,
+        date_from=result["date_from"],
+        date_to=result["date_to"],
+        totals=AnalyticsCounters(**result["totals"], **derive_metrics(result["totals"])),
+        buckets=[
+            AnalyticsBucket(**bucket, **derive_metrics(bucket))
+            for bucket in result["buckets"]
+        ]
+    )
@@ -1,17 +1,61 @@
 """
 Rutas de Documentos Generados
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import List, Dict, Any
+from fastapi import APIRouter, Header, HTTPException, Query, Request, status
+from fastapi.responses import HTMLResponse, Response
+from typing import List, Dict, Any, Optional
 from beanie import PydanticObjectId
 from pydantic import BaseModel, Field
 from datetime import datetime
 
 from ..controllers.generated_doc_controller import GeneratedDocController
+from ..models.generated_doc import GeneratedDoc
+from ..utils.http_range import parse_range, RangeNotSatisfiable
+from ..utils.links import link_id
+from .idempotency import IDEMPOTENCY_HEADER, run_idempotent
+from .ndjson import NDJSON_RESPONSES, ndjson_response, wants_ndjson
 
 router = APIRouter(prefix="/api", tags=["generated-docs"])
 
 
+class ManifestFile(BaseModel):
+    """Entrada del manifest: un archivo sin su contenido"""
+    path: str
+    size: int = Field(..., description="Tamaño en bytes (UTF-8)")
+    hash: Optional[str] = Field(None, description="SHA-256 del contenido")
+    generated_at: Optional[datetime] = None
+
+
+class DocManifestResponse(BaseModel):
+    """Manifest de un documento generado"""
+    id: str
+    project_id: str
+    analysis_session_id: str
+    generated_at: datetime
+    generated_by: str
+    total_size: int
+    files: List[ManifestFile]
+
+
+class DocSearchHit(BaseModel):
+    """Un archivo que coincide con la búsqueda"""
+    doc_id: str
+    project_id: str
+    analysis_session_id: str
+    path: str
+    path_highlighted: str = Field(..., description="Ruta con coincidencias en <mark>")
+    snippet: str = Field(..., description="Fragmento HTML escapado con coincidencias en <mark>")
+    matches: int = Field(..., description="Relevancia del archivo dentro del documento")
+    score: float = Field(..., description="textScore del documento")
+    generated_at: datetime
+
+
+class DocSearchResponse(BaseModel):
+    """Página de resultados de búsqueda en documentos"""
+    hits: List[DocSearchHit]
+    next_cursor: Optional[str] = Field(None, description="Cursor para la siguiente página")
+
+
 # ============================================
 # SCHEMAS
 # ============================================
@@ -65,38 +109,156 @@ class GeneratedDocsResponse(BaseModel):
         from_attributes = True
 
 
+def _build_doc_response(doc: GeneratedDoc) -> GeneratedDocsResponse:
+    """Construye la respuesta de un documento (project_name está desnormalizado)"""
+    return GeneratedDocsResponse(
+        id=str(doc.id),
+        project_id=str(link_id(doc.project)),
+        project_name=doc.project_name,
+        analysis_session_id=str(link_id(doc.analysis_session)),
+        files=doc.files,
+        generated_at=doc.generated_at,
+        generated_by=doc.generated_by
+    )
+
+
 # ============================================
 # ENDPOINTS
 # ============================================
 
 @router.post("/projects/{project_id}/generate-docs", response_model=GeneratedDocsResponse, status_code=status.HTTP_201_CREATED)
-async def save_generated_docs(project_id: str, data: GeneratedDocsCreate):
+async def save_generated_docs(
+    project_id: str,
+    data: GeneratedDocsCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
+):
     """
     Guarda los archivos .md generados por Copilot
     
-    El analista copia y pega los archivos generados por Copilot en el paso final
+    El analista copia y pega los archivos generados por Copilot en el paso final.
+    Con el header **Idempotency-Key** los reintentos devuelven el mismo documento
+    en lugar de guardar una copia.
+    """
+    async def create():
+        try:
+            # Convertir files a dict
+            files_dict = [file.dict() for file in data.files]
+            
+            doc = await GeneratedDocController.save_generated_docs(
+                project_id=PydanticObjectId(project_id),
+                analysis_session_id=PydanticObjectId(data.analysis_session_id),
+                files=files_dict,
+                generated_by=data.generated_by
+            )
+            
+            return _build_doc_response(doc)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=str(e)
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    async def replay(doc_id: str):
+        doc = await GeneratedDocController.get_doc(PydanticObjectId(doc_id))
+        return _build_doc_response(doc)
+    
+    # Los archivos pueden pesar varios MB: se guarda solo el id y se relee
+    return await run_idempotent(
+        key=idempotency_key,
+        scope=f"POST /api/projects/{project_id}/generate-docs",
+        payload=data,
+        status_code=status.HTTP_201_CREATED,
+        create=create,
+        replay=replay
+    )
+
+
+@router.get(
+    "/projects/{project_id}/docs",
+    response_model=List[GeneratedDocsResponse],
+    responses=NDJSON_RESPONSES
+)
+async def get_project_docs(project_id: str, request: Request):
+    """
+    Lista todos los documentos generados de un proyecto
+    
+    Con Accept: application/x-ndjson los documentos se envían a medida que
+    se leen del cursor (uno por línea), sin armar la lista completa en memoria.
     """
     try:
-        # Convertir files a dict
-        files_dict = [file.dict() for file in data.files]
+        if wants_ndjson(request):
+            docs = await GeneratedDocController.iter_project_docs(
+                project_id=PydanticObjectId(project_id)
+            )
+            return await ndjson_response(docs, _build_doc_response)
         
-        doc = await GeneratedDocController.save_generated_docs(
-            project_id=PydanticObjectId(project_id),
-            analysis_session_id=PydanticObjectId(data.analysis_session_id),
-            files=files_dict,
-            generated_by=data.generated_by
+        docs = await GeneratedDocController.get_project_docs(
+            project_id=PydanticObjectId(project_id)
         )
         
-        await doc.fetch_link(doc.project)
+        result = []
+        for doc in docs:
+            result.append(_build_doc_response(doc))
         
-        return GeneratedDocsResponse(
-            id=str(doc.id),
-            project_id=str(doc.project.id),
-            project_name=doc.project.name,
-            analysis_session_id=str(doc.analysis_session.ref.id),
-            files=doc.files,
-            generated_at=doc.generated_at,
-            generated_by=doc.generated_by
+        return result
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/search/docs", response_model=DocSearchResponse)
+async def search_docs(
+    q: str,
+    project_id: str = None,
+    analysis_session_id: str = None,
+    limit: int = Query(20, ge=1, le=100, description="Documentos por página (no hits)"),
+    cursor: str = None
+):
+    """
+    Busca texto en las rutas y el contenido de los documentos generados
+    
+    - **q**: Consulta (admite "frases exactas" y -exclusiones)
+    - **project_id** / **analysis_session_id**: Filtros opcionales
+    - **limit**: Documentos por página. Cada documento aporta un hit por
+      archivo que coincide, así que una página puede traer más de limit hits
+    - **cursor**: Valor de next_cursor de la página anterior
+    """
+    try:
+        hits, next_cursor = await GeneratedDocController.search_docs(
+            query=q,
+            project_id=PydanticObjectId(project_id) if project_id else None,
+            analysis_session_id=PydanticObjectId(analysis_session_id) if analysis_session_id else None,
+            limit=limit,
+            cursor=cursor
+        )
+        return DocSearchResponse(hits=hits, next_cursor=next_cursor)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/docs/{doc_id}/html/{file_path:path}", response_class=HTMLResponse)
+async def get_doc_file_html(doc_id: str, file_path: str, request: Request):
+    """
+    Renderiza un archivo markdown del documento a HTML sanitizado con índice
+    
+    Prefijo propio (no un sufijo .html en /files/): un archivo generado cuyo
+    nombre termina en .html se sigue descargando crudo desde /files/.
+    El HTML se cachea por hash del contenido; el hash se expone como ETag
+    """
+    try:
+        html, etag = await GeneratedDocController.render_file_html(
+            PydanticObjectId(doc_id),
+            file_path
         )
     except ValueError as e:
         raise HTTPException(
@@ -108,35 +270,93 @@ async def save_generated_docs(project_id: str, data: GeneratedDocsCreate):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    
+    etag = f'"{etag}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    return HTMLResponse(content=html, headers={"ETag": etag})
 
 
-@router.get("/projects/{project_id}/docs", response_model=List[GeneratedDocsResponse])
-async def get_project_docs(project_id: str):
-    """Lista todos los documentos generados de un proyecto"""
+@router.get("/docs/{doc_id}/files/{file_path:path}")
+async def get_doc_file(doc_id: str, file_path: str, request: Request):
+    """
+    Obtiene el markdown crudo de un único archivo del documento
+    
+    Soporta `Range: bytes=...` (respuesta 206) e `If-None-Match` (304)
+    """
     try:
-        docs = await GeneratedDocController.get_project_docs(
-            project_id=PydanticObjectId(project_id)
+        file = await GeneratedDocController.get_file(PydanticObjectId(doc_id), file_path)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
         )
-        
-        result = []
-        for doc in docs:
-            await doc.fetch_link(doc.project)
-            result.append(GeneratedDocsResponse(
-                id=str(doc.id),
-                project_id=str(doc.project.id),
-                project_name=doc.project.name,
-                analysis_session_id=str(doc.analysis_session.ref.id),
-                files=doc.files,
-                generated_at=doc.generated_at,
-                generated_by=doc.generated_by
-            ))
-        
-        return result
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    
+    body = file.get("content", "").encode("utf-8")
+    etag = f'"{file["hash"]}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+    media_type = "text/markdown"  # Starlette agrega charset=utf-8
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    # If-Range: solo se respeta el Range si el recurso no cambió
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if if_range and if_range != etag:
+        range_header = None
+    
+    try:
+        byte_range = parse_range(range_header, len(body))
+    except RangeNotSatisfiable:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={**headers, "Content-Range": f"bytes */{len(body)}"}
+        )
+    
+    if byte_range is None:
+        return Response(content=body, media_type=media_type, headers=headers)
+    
+    start, end = byte_range
+    return Response(
+        content=body[start:end + 1],
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{len(body)}"}
+    )
+
+
+@router.get("/docs/{doc_id}/manifest", response_model=DocManifestResponse)
+async def get_doc_manifest(doc_id: str):
+    """Lista rutas, tamaños y hashes de los archivos sin transferir su contenido"""
+    try:
+        manifest = await GeneratedDocController.get_manifest(PydanticObjectId(doc_id))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return DocManifestResponse(
+        id=str(manifest["_id"]),
+        project_id=str(manifest["project"].id),
+        analysis_session_id=str(manifest["analysis_session"].id),
+        generated_at=manifest["generated_at"],
+        generated_by=manifest["generated_by"],
+        total_size=sum(f["size"] for f in manifest["files"]),
+        files=manifest["files"]
+    )
 
 
 @router.get("/docs/{doc_id}", response_model=GeneratedDocsResponse)
@@ -144,17 +364,7 @@ async def get_doc(doc_id: str):
     """Obtiene un documento por ID"""
     try:
         doc = await GeneratedDocController.get_doc(PydanticObjectId(doc_id))
-        await doc.fetch_link(doc.project)
-        
-        return GeneratedDocsResponse(
-            id=str(doc.id),
-            project_id=str(doc.project.id),
-            project_name=doc.project.name,
-            analysis_session_id=str(doc.analysis_session.ref.id),
-            files=doc.files,
-            generated_at=doc.generated_at,
-            generated_by=doc.generated_by
-        )
+        return _build_doc_response(doc)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,85 @@
+"""
+Soporte del header Idempotency-Key para las rutas de creación
+"""
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Any, Awaitable, Callable, Optional
+
+from ..controllers.idempotency_controller import (
+    IdempotencyController,
+    IdempotencyInProgressError,
+    IdempotencyMismatchError,
+    IdempotencyOwnershipLostError
+)
+from ..models.idempotency_record import IdempotencyStatus
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+
+async def run_idempotent(
+    key: Optional[str],
+    scope: str,
+    payload: BaseModel,
+    status_code: int,
+    create: Callable[[], Awaitable[Any]],
+    replay: Optional[Callable[[str], Awaitable[Any]]] = None
+) -> Any:
+    """
+    Ejecuta create() una sola vez por (Idempotency-Key, scope)
+
+    Sin header se comporta como antes. Con header, un reintento devuelve la
+    respuesta guardada (con Idempotent-Replayed: true) sin volver a ejecutar
+    validaciones ni inserts. Si la ejecución tardó más que
+    IDEMPOTENCY_LOCK_SECONDS y otro intento retomó la clave, este responde
+    409: la respuesta que queda guardada es la del otro intento.
+
+    Args:
+        key: Valor del header (None si no se envió)
+        scope: Método y ruta, p. ej. "POST /api/projects/{id}/analysis"
+        payload: Body recibido; se compara con el de la primera petición
+        status_code: Código HTTP de la respuesta de create()
+        create: Ejecuta la operación y devuelve la respuesta (modelo con id)
+        replay: Si se indica, solo se guarda el id del recurso y la
+            respuesta se reconstruye con replay(id) (respuestas muy grandes)
+    """
+    if key is None:
+        return await create()
+
+    try:
+        record = await IdempotencyController.begin(key, scope, payload.model_dump(mode="json"))
+    except IdempotencyInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except IdempotencyMismatchError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if record.status == IdempotencyStatus.COMPLETED:
+        if replay is not None and record.resource_id:
+            content = jsonable_encoder(await replay(record.resource_id))
+        else:
+            content = record.response
+        return JSONResponse(
+            content=content,
+            status_code=record.status_code or status_code,
+            headers={REPLAYED_HEADER: "true"}
+        )
+
+    try:
+        result = await create()
+    except Exception:
+        await IdempotencyController.release(record)
+        raise
+
+    try:
+        if replay is not None:
+            await IdempotencyController.complete(record, status_code, resource_id=str(result.id))
+        else:
+            await IdempotencyController.complete(record, status_code, response=jsonable_encoder(result))
+    except IdempotencyOwnershipLostError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return result
@@ -0,0 +1,79 @@
+"""
+Respuestas NDJSON (un objeto JSON por línea) para listados sin límite
+"""
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Any, AsyncIterator, Callable
+
+from ..config.settings import settings
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Documenta en OpenAPI la variante NDJSON de la respuesta 200
+NDJSON_RESPONSES = {
+    200: {
+        "description": f"Con Accept: {NDJSON_MEDIA_TYPE}, un objeto JSON por línea",
+        "content": {NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+    }
+}
+
+
+def wants_ndjson(request: Request) -> bool:
+    """True si el cliente pidió NDJSON en el header Accept"""
+    accept = request.headers.get("accept", "")
+    return any(
+        part.split(";")[0].strip().lower() == NDJSON_MEDIA_TYPE
+        for part in accept.split(",")
+    )
+
+
+async def _chunks(
+    items: AsyncIterator[Any],
+    serialize: Callable[[Any], BaseModel]
+) -> AsyncIterator[bytes]:
+    """Líneas NDJSON agrupadas en bloques de ~NDJSON_CHUNK_BYTES"""
+    buffer = []
+    size = 0
+    async for item in items:
+        line = serialize(item).model_dump_json().encode("utf-8") + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= settings.ndjson_chunk_bytes:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+async def ndjson_response(
+    items: AsyncIterator[Any],
+    serialize: Callable[[Any], BaseModel]
+) -> StreamingResponse:
+    """
+    Respuesta que serializa items a medida que llegan del cursor
+    
+    El primer bloque se calcula antes de devolver la respuesta: un error
+    en la consulta todavía puede responderse con su código HTTP. Un error
+    posterior (con el status 200 ya enviado) corta la conexión y el cliente
+    ve una línea incompleta.
+    
+    Args:
+        items: Iterador asíncrono de documentos (ver iter_batches)
+        serialize: Convierte cada documento en su schema de respuesta
+    """
+    chunks = _chunks(items, serialize)
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = b""
+    
+    async def body() -> AsyncIterator[bytes]:
+        if first:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+    
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
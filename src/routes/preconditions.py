@@ -0,0 +1,41 @@
+"""
+Soporte de ETag / If-Match (control de concurrencia optimista)
+"""
+from fastapi import HTTPException, Response, status
+from typing import Optional
+
+from ..utils.revision import RevisionConflictError, format_etag, parse_if_match
+
+
+IF_MATCH_HEADER = "If-Match"
+
+
+def expected_revision(if_match: Optional[str]) -> Optional[int]:
+    """Revisión exigida por el header If-Match (412 si no es un ETag válido)"""
+    try:
+        return parse_if_match(if_match)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail=str(e)
+        )
+
+
+def revision_conflict(e: RevisionConflictError, expected: Optional[int]) -> HTTPException:
+    """
+    412 si el cliente exigió una revisión con If-Match; 409 si el conflicto
+    fue con una escritura concurrente entre la lectura y el update
+    """
+    return HTTPException(
+        status_code=(
+            status.HTTP_412_PRECONDITION_FAILED
+            if expected is not None
+            else status.HTTP_409_CONFLICT
+        ),
+        detail={"message": str(e), "current_revision": e.current}
+    )
+
+
+def set_etag(response: Response, revision: int) -> None:
+    """Expone la revisión del recurso como ETag"""
+    response.headers["ETag"] = format_etag(revision)
@@ -1,19 +1,46 @@
 """
 Rutas de Proyectos
 """
-from fastapi import APIRouter, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Header, HTTPException, Response, status
+from typing import List, Optional
 from beanie import PydanticObjectId
 
 from ..controllers.project_controller import ProjectController
-from .schemas.project_schemas import ProjectCreate, ProjectUpdate, ProjectResponse
+from .schemas.project_schemas import (
+    ProjectCreate,
+    ProjectUpdate,
+    ProjectResponse,
+    ProjectBulkArchive,
+    ProjectBulkArchiveResponse
+)
 from ..models.project import ProjectStatus
+from ..utils.revision import RevisionConflictError
+from .idempotency import IDEMPOTENCY_HEADER, run_idempotent
+from .preconditions import IF_MATCH_HEADER, expected_revision, revision_conflict, set_etag
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
 
+def _build_project_response(project) -> ProjectResponse:
+    """Construye la respuesta de un proyecto"""
+    return ProjectResponse(
+        id=str(project.id),
+        name=project.name,
+        description=project.description,
+        created_by=project.created_by,
+        created_at=project.created_at,
+        updated_at=project.updated_at,
+        status=project.status,
+        metadata=project.metadata,
+        revision=project.revision
+    )
+
+
 @router.post("/", response_model=ProjectResponse, status_code=status.HTTP_201_CREATED)
-async def create_project(data: ProjectCreate):
+async def create_project(
+    data: ProjectCreate,
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
+):
     """
     Crea un nuevo proyecto
     
@@ -21,29 +48,30 @@ async def create_project(data: ProjectCreate):
     - **description**: Descripción opcional
     - **created_by**: Email del creador
     - **metadata**: Información adicional (repository, technology, etc.)
+    - **Idempotency-Key** (header opcional): los reintentos devuelven el mismo proyecto
     """
-    try:
-        project = await ProjectController.create_project(
-            name=data.name,
-            description=data.description,
-            created_by=data.created_by,
-            metadata=data.metadata
-        )
-        return ProjectResponse(
-            id=str(project.id),
-            name=project.name,
-            description=project.description,
-            created_by=project.created_by,
-            created_at=project.created_at,
-            updated_at=project.updated_at,
-            status=project.status,
-            metadata=project.metadata
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=str(e)
-        )
+    async def create():
+        try:
+            project = await ProjectController.create_project(
+                name=data.name,
+                description=data.description,
+                created_by=data.created_by,
+                metadata=data.metadata
+            )
+            return _build_project_response(project)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    return await run_idempotent(
+        key=idempotency_key,
+        scope="POST /api/projects",
+        payload=data,
+        status_code=status.HTTP_201_CREATED,
+        create=create
+    )
 
 
 @router.get("/", response_model=List[ProjectResponse])
@@ -69,35 +97,41 @@ async def list_projects(
     )
     
     return [
-        ProjectResponse(
-            id=str(p.id),
-            name=p.name,
-            description=p.description,
-            created_by=p.created_by,
-            created_at=p.created_at,
-            updated_at=p.updated_at,
-            status=p.status,
-            metadata=p.metadata
-        )
+        _build_project_response(p)
         for p in projects
     ]
 
 
+@router.post("/bulk/archive", response_model=ProjectBulkArchiveResponse)
+async def bulk_archive_projects(data: ProjectBulkArchive):
+    """
+    Archiva varios proyectos en cascada
+    
+    Marca como archivados los proyectos, sus sesiones de análisis y sus
+    documentos generados, en lotes acotados
+    """
+    try:
+        return await ProjectController.archive_projects(
+            [PydanticObjectId(project_id) for project_id in data.project_ids]
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.get("/{project_id}", response_model=ProjectResponse)
-async def get_project(project_id: str):
-    """Obtiene un proyecto por ID"""
+async def get_project(project_id: str, response: Response):
+    """
+    Obtiene un proyecto por ID
+    
+    El header ETag lleva la revisión; se reenvía como If-Match al modificarlo
+    """
     try:
         project = await ProjectController.get_project(PydanticObjectId(project_id))
-        return ProjectResponse(
-            id=str(project.id),
-            name=project.name,
-            description=project.description,
-            created_by=project.created_by,
-            created_at=project.created_at,
-            updated_at=project.updated_at,
-            status=project.status,
-            metadata=project.metadata
-        )
+        set_etag(response, project.revision)
+        return _build_project_response(project)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -111,26 +145,31 @@ async def get_project(project_id: str):
 
 
 @router.put("/{project_id}", response_model=ProjectResponse)
-async def update_project(project_id: str, data: ProjectUpdate):
-    """Actualiza un proyecto"""
+async def update_project(
+    project_id: str,
+    data: ProjectUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias=IF_MATCH_HEADER)
+):
+    """
+    Actualiza un proyecto
+    
+    Con **If-Match** responde 412 si el proyecto cambió desde que se leyó
+    """
+    expected = expected_revision(if_match)
     try:
         project = await ProjectController.update_project(
             project_id=PydanticObjectId(project_id),
             name=data.name,
             description=data.description,
             status=data.status,
-            metadata=data.metadata
-        )
-        return ProjectResponse(
-            id=str(project.id),
-            name=project.name,
-            description=project.description,
-            created_by=project.created_by,
-            created_at=project.created_at,
-            updated_at=project.updated_at,
-            status=project.status,
-            metadata=project.metadata
+            metadata=data.metadata,
+            expected_revision=expected
         )
+        set_etag(response, project.revision)
+        return _build_project_response(project)
+    except RevisionConflictError as e:
+        raise revision_conflict(e, expected)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -145,7 +184,7 @@ async def update_project(project_id: str, data: ProjectUpdate):
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_project(project_id: str):
-    """Elimina un proyecto (soft delete)"""
+    """Elimina un proyecto (soft delete: archiva también sus sesiones y documentos)"""
     try:
         await ProjectController.delete_project(PydanticObjectId(project_id))
     except ValueError as e:
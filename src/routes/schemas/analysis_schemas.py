@@ -39,6 +39,10 @@ class AnalysisCreate(BaseModel):
 class AnswersUpdate(BaseModel):
     """Schema para actualizar respuestas"""
     answers: Dict[str, Any] = Field(..., description="Respuestas del formulario")
+    complete: bool = Field(
+        default=False,
+        description="Envío final: exige todas las preguntas requeridas"
+    )
     
     class Config:
         json_schema_extra = {
@@ -69,10 +73,41 @@ class IterationCreate(BaseModel):
         }
 
 
+class AnalysisBulkFilter(BaseModel):
+    """Filtro de sesiones para operaciones masivas"""
+    project_id: Optional[str] = None
+    analysis_type: Optional[AnalysisType] = None
+    status: Optional[AnalysisStatus] = None
+    created_by: Optional[str] = None
+    assigned_to: Optional[str] = None
+
+
+class AnalysisBulkSelection(BaseModel):
+    """Selección de sesiones por IDs y/o filtro"""
+    ids: List[str] = Field(default_factory=list, max_length=10000, description="IDs de sesiones")
+    filter: Optional[AnalysisBulkFilter] = Field(None, description="Filtro por campos")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "filter": {
+                    "project_id": "507f1f77bcf86cd799439011",
+                    "status": "in_review"
+                }
+            }
+        }
+
+
+class AnalysisBulkReassign(AnalysisBulkSelection):
+    """Reasignación masiva de sesiones"""
+    assigned_to: Optional[str] = Field(..., description="Email del nuevo experto (null para desasignar)")
+
+
 # ============================================
 # RESPONSE SCHEMAS
 # ============================================
 
+
 class AnalysisResponse(BaseModel):
     """Schema de respuesta de una sesión de análisis"""
     id: str
@@ -90,11 +125,27 @@ class AnalysisResponse(BaseModel):
     assigned_to: Optional[str]
     created_at: datetime
     updated_at: datetime
+    revision: int = Field(..., description="Revisión actual (igual al ETag)")
+    answered_count: int = Field(0, description="Preguntas con respuesta")
+    required_total: int = Field(0, description="Preguntas requeridas del YAML")
+    required_answered: int = Field(0, description="Preguntas requeridas con respuesta")
+    completion: float = Field(0.0, description="Fracción de requeridas respondidas (0 a 1)")
     
     class Config:
         from_attributes = True
 
 
+class AnalysisProgress(BaseModel):
+    """Avance de las respuestas de una sesión (sin contenido)"""
+    id: str
+    assigned_to: Optional[str]
+    answered_count: int
+    required_total: int
+    required_answered: int
+    completion: float = Field(..., description="Fracción de requeridas respondidas (0 a 1)")
+    created_at: datetime
+
+
 class PublicAnalysisResponse(BaseModel):
     """Schema de respuesta para URL pública (sin info sensible)"""
     project_name: str
@@ -102,6 +153,32 @@ class PublicAnalysisResponse(BaseModel):
     yaml_config: Dict[str, Any]
     answers: Dict[str, Any]
     iteration: int
+    form_schema_hash: str = Field(..., description="Hash del formulario compilado de la iteración")
+    form_schema_url: str = Field(..., description="URL del formulario compilado (recurso inmutable)")
     
     class Config:
         from_attributes = True
+
+
+class FacetCount(BaseModel):
+    """Cantidad de resultados con un valor de la faceta"""
+    value: Optional[str] = Field(None, description="Valor del campo (null = sin valor)")
+    label: Optional[str] = Field(None, description="Nombre para mostrar (facetas de proyecto)")
+    count: int
+
+
+class AnalysisSearchFacets(BaseModel):
+    """Conteos de la búsqueda por campo"""
+    analysis_type: List[FacetCount]
+    status: List[FacetCount]
+    project: List[FacetCount]
+    assigned_to: List[FacetCount]
+
+
+class AnalysisSearchResponse(BaseModel):
+    """Página de resultados de búsqueda de sesiones con sus facetas"""
+    hits: List[AnalysisResponse]
+    total: int = Field(..., description="Sesiones que cumplen la búsqueda y los filtros")
+    limit: int
+    offset: int
+    facets: AnalysisSearchFacets
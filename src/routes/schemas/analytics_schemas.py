@@ -0,0 +1,41 @@
+"""
+Esquemas Pydantic para Analytics
+"""
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import date
+
+
+# ============================================
+# RESPONSE SCHEMAS
+# ============================================
+
+class AnalyticsCounters(BaseModel):
+    """Contadores sumados de un período (y métricas derivadas)"""
+    analyses_created: int = 0
+    iterations_added: int = 0
+    analyses_completed: int = 0
+    completed_iterations: int = 0
+    completion_seconds: float = 0
+    docs_generated: int = 0
+    files_generated: int = 0
+    iterations_per_analysis: Optional[float] = Field(None, description="Iteraciones agregadas por análisis creado")
+    avg_iterations_to_complete: Optional[float] = Field(None, description="Iteraciones de los análisis completados")
+    avg_hours_to_complete: Optional[float] = Field(None, description="Horas de creación a completado")
+
+
+class AnalyticsBucket(AnalyticsCounters):
+    """Contadores de un período para un proyecto o analista"""
+    period: str = Field(..., description="Día (2026-01-05) o semana ISO (2026-W02)")
+    key: str = Field(..., description="ID del proyecto o email del analista")
+    label: Optional[str] = Field(None, description="Nombre del proyecto o email del analista")
+
+
+class AnalyticsResponse(BaseModel):
+    """Schema de respuesta de /api/analytics"""
+    group_by: str
+    granularity: str
+    date_from: date
+    date_to: date
+    totals: AnalyticsCounters
+    buckets: List[AnalyticsBucket]
@@ -2,7 +2,7 @@
 Esquemas Pydantic para Proyectos
 """
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 from ...models.project import ProjectStatus
@@ -41,6 +41,11 @@ class ProjectUpdate(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+class ProjectBulkArchive(BaseModel):
+    """Schema para archivar proyectos en lote"""
+    project_ids: List[str] = Field(..., min_length=1, max_length=10000, description="IDs de proyectos")
+
+
 # ============================================
 # RESPONSE SCHEMAS
 # ============================================
@@ -55,6 +60,20 @@ class ProjectResponse(BaseModel):
     updated_at: datetime
     status: ProjectStatus
     metadata: Dict[str, Any]
+    revision: int = Field(..., description="Revisión actual (igual al ETag)")
     
     class Config:
         from_attributes = True
+
+
+class BulkCounts(BaseModel):
+    """Conteos de una operación masiva sobre una colección"""
+    matched: int
+    modified: int
+
+
+class ProjectBulkArchiveResponse(BaseModel):
+    """Resultado del archivado en cascada"""
+    projects: BulkCounts
+    analysis_sessions: BulkCounts
+    generated_docs: BulkCounts
@@ -0,0 +1,108 @@
+"""
+Rollups diarios de analytics (throughput de análisis y documentos)
+
+Cada evento (sesión creada, iteración, análisis completado, documentos
+generados) suma contadores en el bucket del día de su proyecto y de su
+analista. Las mismas funciones alimentan la actualización incremental y la
+reconstrucción desde cero, así ambas cuentan exactamente lo mismo.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+# Contadores de cada bucket (todos aditivos: se actualizan con $inc)
+ROLLUP_COUNTERS = (
+    "analyses_created",
+    "iterations_added",
+    "analyses_completed",
+    "completed_iterations",  # Iteraciones que necesitaron los análisis completados ese día
+    "completion_seconds",    # Tiempo de creación a completado, sumado
+    "docs_generated",
+    "files_generated",
+)
+
+DIMENSION_PROJECT = "project"
+DIMENSION_ANALYST = "analyst"
+ROLLUP_DIMENSIONS = (DIMENSION_PROJECT, DIMENSION_ANALYST)
+
+# (dimensión, clave, label) de cada bucket que toca un evento
+RollupRow = Tuple[str, str, Optional[str]]
+
+
+def day_bucket(when: datetime) -> datetime:
+    """Inicio (UTC) del día de when"""
+    return datetime(when.year, when.month, when.day)
+
+
+def iso_week(when: datetime) -> str:
+    """Semana ISO de when ("2026-W03")"""
+    year, week, _ = when.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def rollup_rows(project_id: Any, project_name: Optional[str], analyst: Optional[str]) -> Iterable[RollupRow]:
+    """Buckets que toca un evento: el de su proyecto y el de su analista (si lo hay)"""
+    rows = [(DIMENSION_PROJECT, str(project_id), project_name)]
+    if analyst:
+        rows.append((DIMENSION_ANALYST, analyst, analyst))
+    return rows
+
+
+def created_counters() -> Dict[str, float]:
+    return {"analyses_created": 1}
+
+
+def iteration_counters() -> Dict[str, float]:
+    return {"iterations_added": 1}
+
+
+def completed_counters(created_at: datetime, completed_at: datetime, iterations: int) -> Dict[str, float]:
+    return {
+        "analyses_completed": 1,
+        "completed_iterations": iterations,
+        "completion_seconds": max((completed_at - created_at).total_seconds(), 0.0),
+    }
+
+
+def docs_counters(files: int) -> Dict[str, float]:
+    return {"docs_generated": 1, "files_generated": files}
+
+
+def add_to_buckets(
+    buckets: Dict[Tuple[str, str, datetime], Dict[str, Any]],
+    when: datetime,
+    rows: Iterable[RollupRow],
+    counters: Dict[str, float]
+) -> None:
+    """Suma counters en los buckets en memoria (reconstrucción desde cero)"""
+    day = day_bucket(when)
+    for dimension, key, label in rows:
+        bucket = buckets.setdefault((dimension, key, day), {
+            "dimension": dimension,
+            "key": key,
+            "label": label,
+            "day": day,
+            "week": iso_week(day),
+            **{counter: 0 for counter in ROLLUP_COUNTERS},
+        })
+        if label:
+            bucket["label"] = label
+        for counter, value in counters.items():
+            bucket[counter] += value
+
+
+def derive_metrics(totals: Dict[str, Any]) -> Dict[str, Optional[float]]:
+    """
+    Métricas derivadas de contadores sumados
+
+    Returns:
+        iterations_per_analysis (iteraciones agregadas por análisis creado),
+        avg_iterations_to_complete y avg_hours_to_complete (de los completados)
+    """
+    created = totals.get("analyses_created") or 0
+    completed = totals.get("analyses_completed") or 0
+    return {
+        "iterations_per_analysis": round(totals.get("iterations_added", 0) / created, 2) if created else None,
+        "avg_iterations_to_complete": round(totals.get("completed_iterations", 0) / completed, 2) if completed else None,
+        "avg_hours_to_complete": round(totals.get("completion_seconds", 0) / completed / 3600, 2) if completed else None,
+    }
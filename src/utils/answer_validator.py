@@ -0,0 +1,219 @@
+"""
+Validación de respuestas contra las preguntas del YAML de la iteración
+"""
+from typing import Any, Dict, FrozenSet, Iterator, Optional
+
+
+TEXT_TYPES = ("text", "textarea")
+SINGLE_CHOICE_TYPES = ("select", "radio")
+MULTI_CHOICE_TYPES = ("checkbox",)
+
+# Sufijo que usa el formulario para el texto libre de "Otro" (showOther)
+OTHER_SUFFIX = "_other"
+
+
+class AnswerValidationError(ValueError):
+    """Las respuestas no cumplen el formulario de la iteración actual"""
+
+    def __init__(self, errors: Dict[str, str]):
+        self.errors = errors
+        super().__init__(f"Respuestas inválidas: {len(errors)} error(es)")
+
+
+def iter_questions(yaml_config: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Recorre las preguntas de todas las secciones en orden"""
+    for section in yaml_config.get("sections") or []:
+        if not isinstance(section, dict):
+            continue
+        for question in section.get("questions") or []:
+            if isinstance(question, dict) and question.get("id"):
+                yield question
+
+
+def completion_ratio(required_answered: int, required_total: int) -> float:
+    """Fracción de preguntas requeridas respondidas (1.0 si no hay requeridas)"""
+    if required_total <= 0:
+        return 1.0
+    return round(min(required_answered, required_total) / required_total, 4)
+
+
+def is_answered(value: Any) -> bool:
+    """True si el valor cuenta como respondido (no vacío)"""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return value.strip() != ""
+    if isinstance(value, (list, dict)):
+        return len(value) > 0
+    return True
+
+
+class _QuestionRule:
+    """Regla compilada de una pregunta"""
+
+    __slots__ = ("type", "required", "allowed", "show_other")
+
+    def __init__(self, question: Dict[str, Any]):
+        self.type = question.get("type", "text")
+        self.required = bool(question.get("required", False))
+        self.show_other = bool(question.get("showOther", False))
+
+        values = [
+            str(option.get("value"))
+            for option in question.get("options") or []
+            if isinstance(option, dict) and option.get("value") is not None
+        ]
+        self.allowed: Optional[FrozenSet[str]] = frozenset(values) if values else None
+
+
+class AnswerValidator:
+    """
+    Validador compilado una vez por (sesión, iteración)
+
+    Comprueba tipos, opciones permitidas de select/radio/checkbox, tamaños
+    y, al enviar el formulario completo, las preguntas requeridas.
+    """
+
+    def __init__(
+        self,
+        yaml_config: Dict[str, Any],
+        max_value_length: int = 20_000,
+        max_items: int = 200
+    ):
+        self.max_value_length = max_value_length
+        self.max_items = max_items
+        self.rules: Dict[str, _QuestionRule] = {
+            str(question["id"]): _QuestionRule(question)
+            for question in iter_questions(yaml_config)
+        }
+        self.required: FrozenSet[str] = frozenset(
+            question_id for question_id, rule in self.rules.items() if rule.required
+        )
+
+    def _check_text(self, value: Any) -> Optional[str]:
+        if not isinstance(value, str):
+            return "debe ser texto"
+        if len(value) > self.max_value_length:
+            return f"supera el máximo de {self.max_value_length} caracteres"
+        return None
+
+    def _check_value(self, rule: _QuestionRule, value: Any) -> Optional[str]:
+        if value is None:
+            return None
+
+        if rule.type in MULTI_CHOICE_TYPES:
+            if not isinstance(value, list):
+                return "debe ser una lista"
+            if len(value) > self.max_items:
+                return f"supera el máximo de {self.max_items} opciones"
+            for item in value:
+                error = self._check_text(item)
+                if error:
+                    return f"cada opción {error}"
+                if rule.allowed is not None and not rule.show_other and item not in rule.allowed:
+                    return f"opción no permitida: {item}"
+            return None
+
+        error = self._check_text(value)
+        if error:
+            return error
+        if (
+            rule.type in SINGLE_CHOICE_TYPES
+            and rule.allowed is not None
+            and not rule.show_other
+            and value != ""
+            and value not in rule.allowed
+        ):
+            return f"opción no permitida: {value}"
+        return None
+
+    def validate(
+        self,
+        answers: Dict[str, Any],
+        current: Optional[Dict[str, Any]] = None,
+        require_complete: bool = False
+    ) -> None:
+        """
+        Valida un lote de respuestas (autosave parcial o envío final)
+
+        Args:
+            answers: Respuestas recibidas
+            current: Respuestas ya guardadas (para comprobar requeridas)
+            require_complete: Exigir que todas las requeridas tengan valor
+
+        Raises:
+            AnswerValidationError: Con el detalle de errores por pregunta
+        """
+        errors: Dict[str, str] = {}
+
+        for key, value in answers.items():
+            if not key or "." in key or key.startswith("$"):
+                errors[key] = "identificador inválido"
+                continue
+
+            rule = self.rules.get(key)
+            if rule is None:
+                base = key[:-len(OTHER_SUFFIX)] if key.endswith(OTHER_SUFFIX) else None
+                base_rule = self.rules.get(base) if base else None
+                if base_rule is None or not base_rule.show_other:
+                    errors[key] = "pregunta desconocida"
+                    continue
+                error = None if value is None else self._check_text(value)
+            else:
+                error = self._check_value(rule, value)
+
+            if error:
+                errors[key] = error
+
+        if require_complete:
+            merged = {**(current or {}), **answers}
+            for question_id in self.required:
+                if not is_answered(merged.get(question_id)) and question_id not in errors:
+                    errors[question_id] = "respuesta requerida"
+
+        if errors:
+            raise AnswerValidationError(errors)
+
+    def completeness(self, answers: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Contadores de avance de un conjunto completo de respuestas
+
+        Returns:
+            {"answered_count", "required_total", "required_answered"}
+        """
+        answered = {
+            question_id for question_id in self.rules
+            if is_answered((answers or {}).get(question_id))
+        }
+        return {
+            "answered_count": len(answered),
+            "required_total": len(self.required),
+            "required_answered": len(answered & self.required),
+        }
+
+    def completeness_delta(
+        self,
+        current: Optional[Dict[str, Any]],
+        changes: Dict[str, Any]
+    ) -> Dict[str, int]:
+        """
+        Variación de los contadores al aplicar changes sobre current
+
+        Solo miran las preguntas tocadas, así el autosave no recorre el
+        formulario entero. Los textos de "Otro" no cuentan como preguntas.
+
+        Returns:
+            {"answered_count": n, "required_answered": m} con solo los
+            contadores que cambian (vacío si ninguno)
+        """
+        delta: Dict[str, int] = {}
+        for question_id, value in changes.items():
+            if question_id not in self.rules:
+                continue
+            change = int(is_answered(value)) - int(is_answered((current or {}).get(question_id)))
+            if not change:
+                continue
+            delta["answered_count"] = delta.get("answered_count", 0) + change
+            if question_id in self.required:
+                delta["required_answered"] = delta.get("required_answered", 0) + change
+        return {field: value for field, value in delta.items() if value}
@@ -0,0 +1,78 @@
+"""
+Operaciones masivas (actualizaciones y lecturas) en lotes acotados
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+async def update_in_batches(
+    collection,
+    query: Dict[str, Any],
+    update: Dict[str, Any],
+    batch_size: int = 500,
+    projection: Optional[Dict[str, Any]] = None,
+    on_batch: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+) -> Dict[str, int]:
+    """
+    Aplica update a todos los documentos que cumplen query, en lotes por _id
+    
+    Cada update_many toca como máximo batch_size documentos, así ninguna
+    operación individual bloquea la colección con miles de escrituras.
+    
+    Args:
+        collection: Colección de Motor
+        query: Filtro de documentos
+        update: Operación de actualización ($set, $inc...)
+        batch_size: Documentos por lote
+        projection: Campos a leer de cada documento además de _id
+        on_batch: Se llama tras cada update_many con los documentos del lote
+            (leídos antes de actualizarlos: puede haber alguno que entretanto
+            dejó de cumplir query y el update no tocó)
+    
+    Returns:
+        {"matched": n, "modified": m}
+    """
+    result = {"matched": 0, "modified": 0}
+    batch: List[Dict[str, Any]] = []
+    
+    async def flush():
+        # Se repite el filtro: un documento ya actualizado que el cursor
+        # vuelva a entregar no se cuenta dos veces
+        outcome = await collection.update_many(
+            {"$and": [query, {"_id": {"$in": [raw["_id"] for raw in batch]}}]},
+            update
+        )
+        result["matched"] += outcome.matched_count
+        result["modified"] += outcome.modified_count
+        if on_batch is not None:
+            await on_batch(list(batch))
+        batch.clear()
+    
+    async for raw in collection.find(query, {"_id": 1, **(projection or {})}).batch_size(batch_size):
+        batch.append(raw)
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    
+    return result
+
+
+async def iter_batches(cursor, batch_size: int = 100) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Recorre un cursor de Motor en lotes de batch_size documentos crudos
+    
+    El cursor pide al servidor de a batch_size documentos, así en memoria
+    nunca hay más de un lote (más el que está en tránsito).
+    
+    Args:
+        cursor: Cursor de find() o aggregate()
+        batch_size: Documentos por lote
+    """
+    batch: List[Dict[str, Any]] = []
+    async for raw in cursor:
+        batch.append(raw)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,116 @@
+"""
+Caché en memoria con política LRU
+
+Importante: la caché vive en el proceso, por lo que cada worker
+mantiene la suya propia.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Caché acotada que descarta primero las entradas menos usadas"""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Obtiene un valor y lo marca como usado recientemente"""
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guarda un valor descartando el menos usado si se supera maxsize"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Elimina una entrada (invalidación)"""
+        return self._data.pop(key, default)
+
+    def clear(self) -> None:
+        """Vacía la caché"""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_MISSING = object()
+
+
+class TTLCache(LRUCache):
+    """
+    LRUCache cuyas entradas vencen ttl segundos después de guardarse
+
+    Para datos que cambian en otro worker sin aviso: como mucho se sirve
+    un valor con ttl segundos de antigüedad.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self._clock = clock
+        self.expired = 0
+
+    def _entry(self, key: Hashable) -> Any:
+        """Valor vigente de key (las entradas vencidas se descartan al leerlas)"""
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expired += 1
+            return _MISSING
+        return value
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Obtiene un valor vigente y lo marca como usado recientemente"""
+        value = self._entry(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Guarda un valor con vencimiento en ttl segundos"""
+        super().set(key, (self._clock() + self.ttl, value))
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Elimina una entrada (invalidación)"""
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._entry(key) is not _MISSING
+
+    def stats(self) -> Dict[str, Any]:
+        """Estadísticas de uso"""
+        return {**super().stats(), "ttl": self.ttl, "expired": self.expired}
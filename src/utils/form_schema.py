@@ -0,0 +1,172 @@
+"""
+Compilación del YAML de una iteración a un esquema de formulario normalizado
+
+El frontend recibe el formulario ya resuelto: preguntas en orden estable,
+defaults aplicados y tablas de opciones precalculadas, en lugar de
+reinterpretar el YAML en cada carga. Los nombres de las propiedades
+siguen los del YAML (showOther, otherPlaceholder...).
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .answer_validator import MULTI_CHOICE_TYPES, OTHER_SUFFIX, SINGLE_CHOICE_TYPES
+from .yaml_validator import YAMLQuestion
+
+
+# Cambiar al modificar la compilación para invalidar las cachés
+FORM_SCHEMA_VERSION = "1"
+
+# Defaults de las propiedades opcionales de una pregunta (los de YAMLQuestion)
+QUESTION_DEFAULTS = {
+    name: field.get_default()
+    for name, field in YAMLQuestion.model_fields.items()
+    if not field.is_required()
+}
+
+
+def _options(question: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Opciones normalizadas: value como string y label (o el value si falta)"""
+    options = []
+    for option in question.get("options") or []:
+        if not isinstance(option, dict) or option.get("value") is None:
+            continue
+        value = str(option["value"])
+        label = option.get("label")
+        options.append({"value": value, "label": str(label) if label is not None else value})
+    return options
+
+
+def _resolve_option(value: str, labels: Dict[str, str], show_other: bool) -> Optional[str]:
+    """value de la opción indicada por value o por label (None si no es opción ni admite "Otro")"""
+    if not value:
+        return None
+    if value in labels:
+        return value
+    by_label = next((option for option, label in labels.items() if label == value), None)
+    if by_label is not None:
+        return by_label
+    return value if show_other else None
+
+
+def _resolve_default(
+    raw: Any,
+    question_type: str,
+    labels: Dict[str, str],
+    show_other: bool
+) -> Any:
+    """
+    Valor inicial de la pregunta en el formato que guarda el formulario
+
+    Las opciones se pueden indicar por value o por label; en checkbox el
+    default puede ser una lista o un string separado por comas. Un valor que
+    no es opción solo se conserva si la pregunta admite "Otro".
+    """
+    if question_type in MULTI_CHOICE_TYPES:
+        items = raw if isinstance(raw, list) else str(raw or "").split(",")
+        resolved = (_resolve_option(str(item).strip(), labels, show_other) for item in items)
+        return [value for value in dict.fromkeys(resolved) if value]
+
+    if question_type in SINGLE_CHOICE_TYPES:
+        if raw is None or str(raw).strip() == "":
+            return None
+        return _resolve_option(str(raw).strip(), labels, show_other)
+
+    return "" if raw is None else str(raw)
+
+
+def compile_form_schema(yaml_config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compila el YAML (ya validado) de una iteración
+
+    Función pura (sin I/O) para poder ejecutarse en el pool de procesos.
+
+    Args:
+        yaml_config: YAML de la iteración
+
+    Returns:
+        Esquema con sections (cada una con questionIds), questions en orden
+        de aparición, optionLabels {pregunta: {value: label}} y required
+    """
+    sections = []
+    questions = []
+    option_labels: Dict[str, Dict[str, str]] = {}
+
+    for section in yaml_config.get("sections") or []:
+        if not isinstance(section, dict):
+            continue
+        index = len(sections)
+        question_ids = []
+
+        for raw in section.get("questions") or []:
+            if not isinstance(raw, dict) or not raw.get("id"):
+                continue
+            question = {**QUESTION_DEFAULTS, **raw}
+            question_id = str(question["id"])
+            question_type = question.get("type") or "text"
+            show_other = bool(question.get("showOther"))
+            options = _options(question)
+            labels = {option["value"]: option["label"] for option in options}
+
+            compiled = {
+                "id": question_id,
+                "section": index,
+                "type": question_type,
+                "label": str(question.get("label") or ""),
+                "placeholder": question["placeholder"],
+                "help": question["help"],
+                "required": bool(question["required"]),
+                "multiple": question_type in MULTI_CHOICE_TYPES,
+                "default": _resolve_default(question.get("default"), question_type, labels, show_other),
+                "showOther": show_other,
+            }
+            if question_type == "textarea":
+                compiled["rows"] = question["rows"]
+            if options:
+                compiled["options"] = options
+                option_labels[question_id] = labels
+            if show_other:
+                compiled["otherKey"] = f"{question_id}{OTHER_SUFFIX}"
+                compiled["otherPlaceholder"] = question["otherPlaceholder"]
+
+            questions.append(compiled)
+            question_ids.append(question_id)
+
+        sections.append({
+            "index": index,
+            "icon": section.get("icon", ""),
+            "title": section.get("title", ""),
+            "description": section.get("description", ""),
+            "questionIds": question_ids,
+        })
+
+    return {
+        "version": FORM_SCHEMA_VERSION,
+        "title": yaml_config.get("title", ""),
+        "description": yaml_config.get("description", ""),
+        "warning": yaml_config.get("warning"),
+        "sections": sections,
+        "questions": questions,
+        "optionLabels": option_labels,
+        "required": [question["id"] for question in questions if question["required"]],
+    }
+
+
+def encode_form_schema(schema: Dict[str, Any]) -> Tuple[bytes, str]:
+    """
+    JSON canónico del esquema y su hash de contenido
+
+    Returns:
+        Tupla (cuerpo JSON, hash "v{versión}-{sha256}")
+    """
+    body = json.dumps(
+        schema, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+    ).encode("utf-8")
+    return body, f"v{FORM_SCHEMA_VERSION}-{hashlib.sha256(body).hexdigest()}"
+
+
+def build_form_schema(yaml_config: Dict[str, Any]) -> Tuple[Dict[str, Any], bytes, str]:
+    """compile_form_schema + encode_form_schema en una sola llamada (para el pool de procesos)"""
+    schema = compile_form_schema(yaml_config)
+    body, schema_hash = encode_form_schema(schema)
+    return schema, body, schema_hash
@@ -0,0 +1,57 @@
+"""
+Soporte de HTTP Range (RFC 9110) para respuestas de un solo rango
+"""
+import re
+from typing import Optional, Tuple
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(ValueError):
+    """El rango pedido no se puede servir (responder 416)"""
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Interpreta un header Range de un solo rango de bytes
+    
+    Args:
+        header: Valor del header Range (o None)
+        size: Tamaño total del recurso en bytes
+    
+    Returns:
+        Tupla (inicio, fin) inclusiva, o None si hay que servir el recurso
+        completo (sin header, multi-rango, unidad desconocida o rango
+        inválido como bytes=5-2: RFC 9110 §14.1.1 pide ignorar el header)
+    
+    Raises:
+        RangeNotSatisfiable: Si el rango queda fuera del recurso
+    """
+    if not header:
+        return None
+    
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Multi-rango u otra unidad: se ignora y se sirve completo
+        return None
+    
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    
+    if not start:
+        # Sufijo: los últimos N bytes
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(0, size - length), size - 1
+    
+    first = int(start)
+    if end and int(end) < first:
+        # Sintácticamente inválido (último < primero): se ignora, no es un 416
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable(header)
+    last = min(int(end), size - 1) if end else size - 1
+    return first, last
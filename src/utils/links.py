@@ -0,0 +1,9 @@
+"""
+Utilidades para Links de Beanie
+"""
+from beanie import Link, PydanticObjectId
+
+
+def link_id(value) -> PydanticObjectId:
+    """ID de un Link de Beanie, esté resuelto (Document) o no (Link)"""
+    return value.ref.id if isinstance(value, Link) else value.id
@@ -0,0 +1,80 @@
+"""
+Renderizado de markdown a HTML sanitizado con tabla de contenidos
+"""
+import hashlib
+from html import escape
+from typing import Dict, List
+
+from markdown_it import MarkdownIt
+
+from .text import slugify
+
+
+# Cambiar al modificar el renderizado para invalidar las cachés
+RENDERER_VERSION = "1"
+
+# html=False escapa cualquier HTML crudo del markdown y markdown-it
+# descarta enlaces javascript:/vbscript:/file:/data:
+_markdown = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+
+
+def content_hash(content: str) -> str:
+    """Hash del contenido markdown (incluye la versión del renderizador)"""
+    digest = hashlib.sha256(content.encode("utf-8")).hexdigest()
+    return f"v{RENDERER_VERSION}-{digest}"
+
+
+def _inline_text(inline_token) -> str:
+    """Texto plano de un token inline (sin marcas de énfasis ni enlaces)"""
+    children = inline_token.children or []
+    return "".join(
+        child.content for child in children
+        if child.type in ("text", "code_inline")
+    ) or inline_token.content
+
+
+def _build_toc(toc: List[Dict[str, str]]) -> str:
+    """Genera el <nav> de la tabla de contenidos"""
+    if not toc:
+        return ""
+    
+    items = "\n".join(
+        f'<li class="toc-h{entry["level"]}"><a href="#{entry["id"]}">{escape(entry["text"])}</a></li>'
+        for entry in toc
+    )
+    return f'<nav class="toc">\n<ul>\n{items}\n</ul>\n</nav>\n'
+
+
+def render_markdown(content: str) -> str:
+    """
+    Renderiza markdown a HTML sanitizado precedido por su tabla de contenidos
+    
+    Función pura (sin I/O) para poder ejecutarse en el pool de procesos.
+    
+    Args:
+        content: Contenido markdown
+    
+    Returns:
+        HTML con <nav class="toc"> y <article> con el contenido
+    """
+    tokens = _markdown.parse(content)
+    
+    toc = []
+    used_ids = {}
+    for index, token in enumerate(tokens):
+        if token.type != "heading_open":
+            continue
+        
+        text = _inline_text(tokens[index + 1])
+        slug = slugify(text) or "seccion"
+        
+        # Evitar ids duplicados: intro, intro-1, intro-2...
+        count = used_ids.get(slug, 0)
+        used_ids[slug] = count + 1
+        anchor = slug if count == 0 else f"{slug}-{count}"
+        
+        token.attrSet("id", anchor)
+        toc.append({"level": int(token.tag[1]), "text": text, "id": anchor})
+    
+    body = _markdown.renderer.render(tokens, _markdown.options, {})
+    return f'{_build_toc(toc)}<article class="markdown-body">\n{body}</article>\n'
@@ -0,0 +1,72 @@
+"""
+Utilidades del outbox de eventos (notificaciones por webhook)
+"""
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+
+def new_event(event_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Evento listo para embeberse en el campo outbox de la sesión"""
+    return {
+        "id": uuid.uuid4().hex,
+        "type": event_type,
+        "created_at": datetime.utcnow(),
+        "payload": payload,
+    }
+
+
+def with_events(update: Dict[str, Any], events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Agrega a una operación de actualización el $push de los eventos
+
+    El evento queda escrito en el mismo documento y la misma operación
+    que el cambio de estado: o se aplican los dos o ninguno.
+    """
+    if not events:
+        return update
+    push = dict(update.get("$push", {}))
+    push["outbox"] = {"$each": events}
+    return {**update, "$push": push}
+
+
+def backoff_seconds(attempts: int, base: float, cap: float) -> float:
+    """Espera antes del siguiente envío tras attempts fallos (exponencial con tope)"""
+    return min(cap, base * (2 ** max(attempts - 1, 0)))
+
+
+def is_permanent_failure(status_code: int) -> bool:
+    """True si el destino rechazó el lote de forma definitiva (4xx salvo 408 y 429)"""
+    return 400 <= status_code < 500 and status_code not in (408, 429)
+
+
+def batches_by_target(
+    deliveries: Iterable[Dict[str, Any]],
+    batch_size: int
+) -> Dict[str, List[List[Dict[str, Any]]]]:
+    """
+    Agrupa las entregas por destino en lotes de batch_size
+
+    Conserva el orden de entrada, así cada destino recibe sus eventos en
+    el orden en que se produjeron.
+    """
+    grouped: Dict[str, List[List[Dict[str, Any]]]] = {}
+    for delivery in deliveries:
+        batches = grouped.setdefault(delivery["target"], [[]])
+        if len(batches[-1]) >= batch_size:
+            batches.append([])
+        batches[-1].append(delivery)
+    return grouped
+
+
+def event_body(deliveries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cuerpo JSON del POST de un lote: {"events": [{id, type, created_at, payload}]}"""
+    return {"events": [
+        {
+            "id": delivery["event_id"],
+            "type": delivery["type"],
+            "created_at": delivery["created_at"].isoformat(),
+            "payload": delivery["payload"],
+        }
+        for delivery in deliveries
+    ]}
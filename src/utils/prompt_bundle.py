@@ -0,0 +1,197 @@
+"""
+Paquete de prompt para Copilot compilado desde una sesión de análisis
+
+Reúne en un solo documento lo que Copilot necesita para generar los
+archivos ai_docs/...: el YAML final, cada respuesta junto a su pregunta
+(las vacías se omiten) y las respuestas de las iteraciones anteriores.
+Se compila en markdown (para pegar en el chat) o en JSON compacto.
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import yaml
+
+from .answer_validator import OTHER_SUFFIX, is_answered
+
+
+# Cambiar al modificar la compilación para invalidar las cachés
+PROMPT_BUNDLE_VERSION = "1"
+
+BUNDLE_FORMATS = ("markdown", "json")
+
+BUNDLE_MEDIA_TYPES = {
+    "markdown": "text/markdown",  # Starlette agrega charset=utf-8
+    "json": "application/json",
+}
+
+BUNDLE_EXTENSIONS = {"markdown": "md", "json": "json"}
+
+
+class IncompleteAnalysisError(ValueError):
+    """El análisis todavía no está completo (el paquete se pide sin draft)"""
+
+
+def _display(value: Any, labels: Dict[str, str]) -> Any:
+    """Respuesta con los labels de las opciones en lugar de sus values"""
+    if isinstance(value, list):
+        return [labels.get(str(item), item) for item in value]
+    if isinstance(value, (str, int, float)) and str(value) in labels:
+        return labels[str(value)]
+    return value
+
+
+def pair_answers(
+    yaml_config: Optional[Dict[str, Any]],
+    answers: Optional[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Respuestas agrupadas por sección y emparejadas con su pregunta
+
+    Se omiten las preguntas sin respuesta y las secciones que quedan
+    vacías; el texto de "Otro" se adjunta a su pregunta.
+
+    Returns:
+        [{"title", "answers": [{"id", "question", "answer", "other"?}]}]
+    """
+    answers = answers or {}
+    sections = []
+    for section in (yaml_config or {}).get("sections") or []:
+        items = []
+        for question in section.get("questions") or []:
+            question_id = question.get("id")
+            value = answers.get(question_id)
+            if not is_answered(value):
+                continue
+
+            labels = {
+                str(option.get("value")): str(option.get("label", option.get("value")))
+                for option in question.get("options") or []
+                if isinstance(option, dict)
+            }
+            item = {
+                "id": question_id,
+                "question": question.get("label") or question_id,
+                "answer": _display(value, labels),
+            }
+            other = answers.get(f"{question_id}{OTHER_SUFFIX}")
+            if is_answered(other):
+                item["other"] = other
+            items.append(item)
+
+        if items:
+            sections.append({"title": section.get("title") or "", "answers": items})
+    return sections
+
+
+def build_prompt_bundle(
+    context: Dict[str, Any],
+    yaml_config: Dict[str, Any],
+    answers: Optional[Dict[str, Any]],
+    iteration_history: Optional[List[Dict[str, Any]]]
+) -> Dict[str, Any]:
+    """
+    Contenido del paquete (independiente del formato)
+
+    Args:
+        context: Datos de la sesión (id, proyecto, tipo, estado, iteración, revisión)
+        yaml_config: YAML de la iteración actual
+        answers: Respuestas de la iteración actual
+        iteration_history: Iteraciones anteriores (AnalysisSession.iteration_history)
+    """
+    iterations = []
+    for record in iteration_history or []:
+        paired = pair_answers(record.get("yaml_generated"), record.get("answers_provided"))
+        timestamp = record.get("timestamp")
+        iterations.append({
+            "iteration": record.get("iteration"),
+            "title": (record.get("yaml_generated") or {}).get("title"),
+            "timestamp": timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+            "answers": paired,
+        })
+
+    return {
+        "version": PROMPT_BUNDLE_VERSION,
+        "analysis": context,
+        "title": yaml_config.get("title"),
+        "answers": pair_answers(yaml_config, answers),
+        "iterations": iterations,
+        "yaml_config": yaml_config,
+    }
+
+
+def _answer_text(item: Dict[str, Any]) -> str:
+    answer = item["answer"]
+    text = ", ".join(str(value) for value in answer) if isinstance(answer, list) else str(answer)
+    if "other" in item:
+        text = f"{text} (Otro: {item['other']})"
+    # Las respuestas de varias líneas quedan dentro del ítem de la lista
+    return text.strip().replace("\n", "\n  ")
+
+
+def _markdown_answers(sections: List[Dict[str, Any]], heading: str) -> List[str]:
+    lines = []
+    for section in sections:
+        lines.append(f"{heading} {section['title']}".rstrip())
+        lines.append("")
+        for item in section["answers"]:
+            lines.append(f"- **{item['question']}** (`{item['id']}`): {_answer_text(item)}")
+        lines.append("")
+    return lines
+
+
+def render_prompt_bundle_markdown(bundle: Dict[str, Any]) -> str:
+    """Paquete en markdown: encabezado, respuestas actuales, historial y YAML final"""
+    analysis = bundle["analysis"]
+    lines = [
+        f"# {bundle.get('title') or analysis.get('analysis_type')}",
+        "",
+        f"- Proyecto: {analysis.get('project_name') or ''}",
+        f"- Tipo de análisis: {analysis.get('analysis_type')}",
+        f"- Iteración: {analysis.get('iteration')} (revisión {analysis.get('revision')})",
+        f"- Estado: {analysis.get('status')}",
+        "",
+        f"## Respuestas (iteración {analysis.get('iteration')})",
+        "",
+    ]
+    lines.extend(_markdown_answers(bundle["answers"], "###") or ["_Sin respuestas_", ""])
+
+    if bundle["iterations"]:
+        lines.extend(["## Iteraciones anteriores", ""])
+        for record in bundle["iterations"]:
+            date = (record.get("timestamp") or "")[:10]
+            heading = f"### Iteración {record['iteration']}" + (f" ({date})" if date else "")
+            lines.extend([heading, ""])
+            lines.extend(_markdown_answers(record["answers"], "####") or ["_Sin respuestas_", ""])
+
+    lines.extend([
+        "## YAML final",
+        "",
+        "```yaml",
+        yaml.safe_dump(bundle["yaml_config"], sort_keys=False, allow_unicode=True).rstrip(),
+        "```",
+        "",
+    ])
+    return "\n".join(lines)
+
+
+def compile_prompt_bundle(
+    context: Dict[str, Any],
+    yaml_config: Dict[str, Any],
+    answers: Optional[Dict[str, Any]],
+    iteration_history: Optional[List[Dict[str, Any]]],
+    bundle_format: str = "markdown"
+) -> bytes:
+    """
+    Paquete serializado en el formato pedido (función pura, apta para el executor)
+
+    Raises:
+        ValueError: Si el formato no es markdown ni json
+    """
+    if bundle_format not in BUNDLE_FORMATS:
+        raise ValueError(f"Formato de paquete inválido: {bundle_format}")
+
+    bundle = build_prompt_bundle(context, yaml_config, answers, iteration_history)
+    if bundle_format == "json":
+        return json.dumps(bundle, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    return render_prompt_bundle_markdown(bundle).encode("utf-8")
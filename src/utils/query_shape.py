@@ -0,0 +1,85 @@
+"""
+Forma (shape) de un comando de MongoDB sin valores sensibles
+"""
+from typing import Any, Mapping
+
+
+# Campos de protocolo que no aportan a la forma de la consulta
+PROTOCOL_FIELDS = frozenset({
+    "lsid", "$db", "$clusterTime", "$readPreference", "txnNumber",
+    "autocommit", "startTransaction", "readConcern", "writeConcern",
+    "apiVersion", "apiStrict", "apiDeprecationErrors", "comment",
+})
+
+# Campos que describen la ejecución y no contienen datos: se conservan tal cual
+STRUCTURAL_FIELDS = frozenset({
+    "sort", "hint", "limit", "skip", "batchSize", "ordered",
+    "singleBatch", "maxTimeMS", "allowDiskUse",
+})
+
+# Campos con los documentos de una escritura: solo interesa cuántos son
+PAYLOAD_FIELDS = frozenset({"documents", "updates", "deletes"})
+
+MAX_DEPTH = 8
+PLACEHOLDER = "?"
+
+
+def _shape(value: Any, depth: int) -> Any:
+    if depth > MAX_DEPTH:
+        return "…"
+    if isinstance(value, Mapping):
+        return {str(key): _shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return []
+        # Listas de valores ($in, $nin...) se resumen; las de documentos
+        # (pipeline, $and, $or) conservan la forma de cada elemento
+        if all(not isinstance(item, (Mapping, list, tuple)) for item in value):
+            return [PLACEHOLDER]
+        return [_shape(item, depth + 1) for item in value]
+    return PLACEHOLDER
+
+
+def command_shape(command: Mapping[str, Any], command_name: str) -> dict:
+    """
+    Forma de un comando con los valores reemplazados por '?'
+
+    Se conservan el nombre del comando y la colección (primer campo), los
+    operadores y los nombres de campos; los documentos de inserts/updates
+    se reducen a su cantidad.
+
+    Args:
+        command: Comando tal como lo recibe el CommandListener
+        command_name: Nombre del comando (find, aggregate, update...)
+
+    Returns:
+        Diccionario serializable a JSON
+    """
+    shape = {}
+    for key, value in command.items():
+        if key in PROTOCOL_FIELDS:
+            continue
+        if key == command_name:
+            shape[key] = value if isinstance(value, str) else PLACEHOLDER
+        elif key in STRUCTURAL_FIELDS:
+            shape[key] = dict(value) if isinstance(value, Mapping) else value
+        elif key in PAYLOAD_FIELDS and isinstance(value, (list, tuple)):
+            if key == "documents":
+                shape[key] = len(value)
+            else:
+                # Conserva filtro/operadores del primero: suele ser representativo
+                shape[key] = {"count": len(value), "first": _shape(value[0], 1) if value else None}
+        else:
+            shape[key] = _shape(value, 1)
+    return shape
+
+
+def reply_count(reply: Mapping[str, Any]) -> int:
+    """Documentos devueltos o afectados según la respuesta del servidor"""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, Mapping):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        if isinstance(batch, list):
+            return len(batch)
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
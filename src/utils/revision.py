@@ -0,0 +1,91 @@
+"""
+Control de concurrencia optimista con número de revisión
+"""
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+
+
+class RevisionConflictError(ValueError):
+    """El documento cambió desde que se leyó (la revisión esperada no coincide)"""
+
+    def __init__(self, expected: int, current: Optional[int] = None):
+        self.expected = expected
+        self.current = current
+        super().__init__(
+            f"El recurso fue modificado: revisión esperada {expected}, actual {current}"
+        )
+
+
+def revision_filter(expected: int) -> Any:
+    """Condición sobre el campo revision (los documentos previos no lo tienen)"""
+    return {"$in": [0, None]} if expected == 0 else expected
+
+
+def format_etag(revision: int) -> str:
+    """ETag de una revisión"""
+    return f'"{revision}"'
+
+
+def parse_if_match(header: Optional[str]) -> Optional[int]:
+    """
+    Interpreta un header If-Match con un único ETag de revisión
+
+    If-Match usa comparación fuerte (RFC 9110): un ETag débil (W/"...")
+    nunca coincide.
+
+    Returns:
+        La revisión esperada, o None si no hay header o es "*"
+
+    Raises:
+        ValueError: Si el valor no es un ETag fuerte de revisión
+    """
+    if header is None:
+        return None
+
+    value = header.strip()
+    if value == "*":
+        return None
+    if value.startswith("W/"):
+        raise ValueError(f"If-Match no admite ETags débiles: {header}")
+
+    value = value.strip('"')
+    if not value.isdigit():
+        raise ValueError(f"If-Match inválido: {header}")
+    return int(value)
+
+
+async def update_with_revision(
+    collection,
+    doc_id: Any,
+    expected: int,
+    update: Dict[str, Any]
+) -> int:
+    """
+    Aplica update solo si el documento sigue en la revisión esperada
+
+    Incrementa revision en la misma operación, así dos escrituras
+    concurrentes basadas en la misma lectura nunca se pisan.
+
+    Returns:
+        La nueva revisión
+
+    Raises:
+        ValueError: Si el documento no existe
+        RevisionConflictError: Si la revisión cambió
+    """
+    update = {**update, "$inc": {**update.get("$inc", {}), "revision": 1}}
+
+    updated = await collection.find_one_and_update(
+        {"_id": doc_id, "revision": revision_filter(expected)},
+        update,
+        projection={"revision": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is not None:
+        return updated["revision"]
+
+    current = await collection.find_one({"_id": doc_id}, {"revision": 1})
+    if current is None:
+        raise ValueError(f"Documento {doc_id} no encontrado")
+    raise RevisionConflictError(expected, current.get("revision", 0))
@@ -0,0 +1,176 @@
+"""
+Utilidades de búsqueda de texto sobre el contenido de las sesiones
+"""
+import math
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .text import fold_accents
+
+
+def _texts(value: Any) -> Iterator[str]:
+    """Valores de texto de un YAML o unas respuestas (listas, objetos anidados)"""
+    if isinstance(value, bool) or value is None:
+        return
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _texts(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _texts(item)
+    else:
+        yield str(value)
+
+
+def _search_texts(
+    yaml_config: Optional[Dict[str, Any]],
+    answers: Optional[Dict[str, Any]]
+) -> List[str]:
+    """Textos que cubren search_text y search_terms: primero las respuestas, después el YAML"""
+    return list(_texts(answers or {})) + list(_texts(yaml_config or {}))
+
+
+def build_search_text(
+    yaml_config: Optional[Dict[str, Any]],
+    answers: Optional[Dict[str, Any]],
+    max_chars: Optional[int] = None
+) -> str:
+    """
+    Texto de búsqueda de una sesión: valores de texto de respuestas y YAML
+
+    Solo los valores (sin claves ni sintaxis JSON), sin repetir, con los
+    espacios colapsados y en minúsculas para que la búsqueda (substring,
+    case-insensitive) se resuelva en MongoDB junto con los filtros y facetas.
+    Las respuestas van primero: si se supera max_chars se recorta el YAML.
+    Función pura (sin I/O) para poder ejecutarse en el pool de procesos.
+
+    Args:
+        yaml_config: YAML de la iteración actual
+        answers: Respuestas del experto
+        max_chars: Tope de caracteres (el campo vive también en los stubs
+            de almacenamiento frío y en el working set de cada sesión)
+
+    Returns:
+        Texto normalizado
+    """
+    lines = dict.fromkeys(" ".join(text.split()).lower() for text in _search_texts(yaml_config, answers))
+    text = "\n".join(line for line in lines if line)
+    return text[:max_chars] if max_chars else text
+
+
+def search_pattern(query: str) -> str:
+    """Regex (literal, en minúsculas) que busca la consulta dentro de search_text"""
+    return re.escape(query.strip().lower())
+
+
+# Variantes en minúsculas con diacríticos de cada letra base (a -> áàâäã...)
+_ACCENTED: Dict[str, str] = {}
+for _code in range(0xC0, 0x180):  # Latin-1 y Latin Extended-A
+    _char = chr(_code).lower()
+    _base = fold_accents(_char)
+    if len(_char) == 1 and len(_base) == 1 and _base.isascii() and _base != _char \
+            and _char not in _ACCENTED.get(_base, ""):
+        _ACCENTED[_base] = _ACCENTED.get(_base, "") + _char
+
+
+def accent_insensitive_pattern(word: str) -> str:
+    """
+    Regex que busca una palabra normalizada (sin acentos) dentro de search_text,
+    que conserva los acentos
+
+    Example:
+        >>> re.search(accent_insensitive_pattern("descripcion"), "descripción general") is not None
+        True
+    """
+    return "".join(
+        f"[{char}{_ACCENTED[char]}]" if char in _ACCENTED else re.escape(char)
+        for char in word
+    )
+
+
+# ============================================================================
+# BÚSQUEDA TOLERANTE A ERRORES (trigramas)
+# ============================================================================
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# Palabras más cortas no aportan trigramas propios (solo relleno)
+MIN_TERM_LENGTH = 3
+
+
+def search_terms_from_text(text: str) -> List[str]:
+    """
+    Palabras normalizadas de un texto: minúsculas, sin acentos y sin repetir
+
+    Example:
+        >>> search_terms_from_text("Descripción del clúster de Kubernetes")
+        ['descripcion', 'del', 'cluster', 'kubernetes']
+    """
+    words = _WORD.findall(fold_accents(text).lower())
+    return list(dict.fromkeys(word for word in words if len(word) >= MIN_TERM_LENGTH))
+
+
+def build_search_terms(
+    yaml_config: Optional[Dict[str, Any]],
+    answers: Optional[Dict[str, Any]],
+    max_terms: Optional[int] = None
+) -> List[str]:
+    """
+    Vocabulario de una sesión para la búsqueda difusa
+
+    Palabras de los mismos textos que search_text (valores de respuestas y
+    de todo el YAML: títulos, descripciones, opciones, ayudas...),
+    normalizadas con search_terms_from_text.
+
+    Args:
+        yaml_config: YAML de la iteración actual
+        answers: Respuestas del experto
+        max_terms: Tope de palabras distintas; las de las respuestas van
+            primero, así el recorte descarta palabras del YAML
+
+    Returns:
+        Lista de palabras sin repetir
+    """
+    terms = search_terms_from_text("\n".join(_search_texts(yaml_config, answers)))
+    return terms[:max_terms] if max_terms else terms
+
+
+def build_search_fields(
+    yaml_config: Optional[Dict[str, Any]],
+    answers: Optional[Dict[str, Any]],
+    max_terms: Optional[int] = None,
+    max_chars: Optional[int] = None
+) -> Dict[str, Any]:
+    """search_text y search_terms de una sesión en una sola llamada (para el pool de procesos)"""
+    return {
+        "search_text": build_search_text(yaml_config, answers, max_chars),
+        "search_terms": build_search_terms(yaml_config, answers, max_terms),
+    }
+
+
+def trigrams(term: str) -> List[str]:
+    """
+    Trigramas de una palabra, con relleno como pg_trgm (dos espacios delante, uno detrás)
+
+    Example:
+        >>> trigrams("red")
+        ['  r', ' re', 'ed ', 'red']
+    """
+    padded = f"  {term} "
+    return sorted({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Similitud de Jaccard entre los trigramas de dos palabras (0 a 1)"""
+    grams_a, grams_b = set(trigrams(a)), set(trigrams(b))
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def gram_count_bounds(gram_count: int, threshold: float) -> Tuple[int, int]:
+    """
+    Rango de nº de trigramas de las palabras que pueden alcanzar threshold
+
+    La similitud de Jaccard nunca supera min(|A|, |B|) / max(|A|, |B|), así
+    que las palabras fuera de este rango se descartan sin compararlas.
+    """
+    return math.ceil(gram_count * threshold), math.floor(gram_count / threshold)
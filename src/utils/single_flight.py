@@ -0,0 +1,168 @@
+"""
+Single-flight: lecturas idénticas concurrentes comparten una sola ejecución
+
+Cuando muchos clientes piden lo mismo en el mismo instante (un link
+compartido en una reunión), solo el primero lee de MongoDB; los demás
+esperan ese mismo resultado. No es una caché: la entrada desaparece en
+cuanto la lectura termina y el siguiente pedido vuelve a leer.
+
+Importante: vive en el proceso, cada worker deduplica solo sus pedidos.
+"""
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+# Grupos creados en el proceso (para /api/admin/single-flight)
+_groups: List["SingleFlight"] = []
+
+
+class _Flight:
+    """Lectura en curso y cuántos pedidos la esperan"""
+
+    __slots__ = ("future", "callers", "forgotten")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.callers = 1
+        self.forgotten = False
+
+
+class SingleFlight:
+    """
+    Deduplica llamadas concurrentes con la misma clave
+
+    Las métricas por clave (pedidos, ejecuciones, deduplicados) se guardan
+    para las últimas metrics_size claves pedidas, así no crecen sin límite.
+    """
+
+    def __init__(self, name: str, metrics_size: int = 1000, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self.metrics_size = metrics_size
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._keys: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self.calls = 0
+        self.executions = 0
+        self.deduplicated = 0
+        _groups.append(self)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        label: Optional[str] = None,
+        copy: Optional[Callable[[T], T]] = None,
+        on_done: Optional[Callable[[T], None]] = None
+    ) -> T:
+        """
+        Ejecuta fn o se une a la ejecución en curso de la misma clave
+
+        Args:
+            key: Clave de la lectura (misma clave = mismo resultado)
+            fn: Lectura a ejecutar (sin argumentos)
+            label: Nombre de la clave en las métricas (default: str(key));
+                para no exponer valores secretos como tokens
+            copy: Si varios pedidos compartieron el resultado, cada uno
+                recibe copy(resultado) y puede modificarlo sin afectar a otros
+            on_done: Se llama con el resultado si la lectura terminó bien y
+                no se olvidó (forget) mientras corría; p. ej. para cachearlo
+
+        Raises:
+            La excepción de fn, en cada pedido que la esperaba
+        """
+        if not self.enabled:
+            result = await fn()
+            if on_done is not None:
+                on_done(result)
+            return result
+
+        stats = self._key_stats(key if label is None else label)
+        self.calls += 1
+        stats["calls"] += 1
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            self._flights[key] = flight
+            flight.future.add_done_callback(lambda done: self._finished(key, flight, on_done))
+            self.executions += 1
+            stats["executions"] += 1
+        else:
+            flight.callers += 1
+            self.deduplicated += 1
+            stats["deduplicated"] += 1
+            stats["max_waiters"] = max(stats["max_waiters"], flight.callers)
+
+        # shield: si se cancela un pedido, la lectura sigue para los demás
+        result = await asyncio.shield(flight.future)
+        # Terminada la lectura ya nadie más se une: callers es definitivo
+        if copy is not None and flight.callers > 1:
+            return copy(result)
+        return result
+
+    def _finished(self, key: Hashable, flight: _Flight, on_done: Optional[Callable[[Any], None]]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.future.cancelled():
+            return
+        # Marca la excepción como leída aunque todos los pedidos se hayan cancelado
+        if flight.future.exception() is not None:
+            return
+        if on_done is not None and not flight.forgotten:
+            on_done(flight.future.result())
+
+    def forget(self, key: Optional[Hashable] = None) -> None:
+        """
+        Los próximos pedidos de key (o de todas las claves) leen de nuevo
+
+        Se usa tras escribir: quien pida el dato después de la escritura no
+        se une a una lectura empezada antes. Los que ya esperan reciben esa
+        lectura igual.
+        """
+        flights = list(self._flights.items()) if key is None else [(key, self._flights.get(key))]
+        for flight_key, flight in flights:
+            if flight is not None:
+                flight.forgotten = True
+                del self._flights[flight_key]
+
+    def _key_stats(self, label: Hashable) -> Dict[str, int]:
+        label = str(label)
+        stats = self._keys.get(label)
+        if stats is None:
+            stats = {"calls": 0, "executions": 0, "deduplicated": 0, "max_waiters": 1}
+            self._keys[label] = stats
+            while len(self._keys) > self.metrics_size:
+                self._keys.popitem(last=False)
+        else:
+            self._keys.move_to_end(label)
+        return stats
+
+    def metrics(self, top: int = 20) -> Dict[str, Any]:
+        """
+        Totales y las top claves con más pedidos deduplicados
+
+        - **in_flight**: Lecturas en curso ahora
+        - **max_waiters**: Máximo de pedidos que esperaron una misma lectura
+        """
+        keys: List[Dict[str, Any]] = sorted(
+            ({"key": label, **stats} for label, stats in self._keys.items()),
+            key=lambda entry: (-entry["deduplicated"], -entry["calls"])
+        )
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "in_flight": len(self._flights),
+            "calls": self.calls,
+            "executions": self.executions,
+            "deduplicated": self.deduplicated,
+            "tracked_keys": len(self._keys),
+            "keys": keys[:top],
+        }
+
+
+def single_flight_metrics(top: int = 20) -> List[Dict[str, Any]]:
+    """Métricas de todos los grupos single-flight del proceso"""
+    return [group.metrics(top) for group in _groups]
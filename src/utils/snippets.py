@@ -0,0 +1,142 @@
+"""
+Extracción de fragmentos (snippets) resaltados para búsqueda de texto
+"""
+import re
+import shlex
+from html import escape
+from typing import Any, Dict, List, Tuple
+
+from .text import fold_accents
+
+
+def _fold_char(char: str) -> str:
+    """Normaliza un carácter manteniendo la longitud (para alinear posiciones)"""
+    folded = fold_accents(char).lower()
+    return folded if len(folded) == 1 else char
+
+
+def _fold_aligned(text: str) -> str:
+    """Versión sin acentos y en minúsculas de text, con las mismas posiciones"""
+    return "".join(_fold_char(c) for c in text)
+
+
+def parse_search_terms(query: str) -> List[str]:
+    """
+    Extrae los términos positivos de una consulta $text de MongoDB
+    
+    Soporta frases entre comillas e ignora los términos negados (-termino)
+    """
+    try:
+        parts = shlex.split(query)
+    except ValueError:
+        parts = query.split()
+    
+    terms = []
+    for part in parts:
+        if not part or part.startswith("-"):
+            continue
+        term = _fold_aligned(part.strip())
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def _find_matches(folded: str, terms: List[str]) -> List[Tuple[int, int]]:
+    """Posiciones (inicio, fin) de los términos en el texto normalizado"""
+    matches = []
+    for term in terms:
+        found = [(m.start(), m.end()) for m in re.finditer(re.escape(term), folded)]
+        
+        # Sin coincidencia exacta: probar la raíz (MongoDB aplica stemming)
+        if not found and len(term) > 4:
+            stem = term[:max(4, len(term) - 2)]
+            found = [(m.start(), m.end()) for m in re.finditer(r"\b" + re.escape(stem) + r"\w*", folded)]
+        
+        matches.extend(found)
+    
+    # Ordenar y descartar solapamientos
+    matches.sort()
+    merged = []
+    for start, end in matches:
+        if merged and start < merged[-1][1]:
+            continue
+        merged.append((start, end))
+    return merged
+
+
+def _highlight(text: str, matches: List[Tuple[int, int]], offset: int = 0) -> str:
+    """Escapa el texto y envuelve las coincidencias en <mark>"""
+    parts = []
+    cursor = 0
+    for start, end in matches:
+        start, end = start - offset, end - offset
+        if start < 0 or end > len(text):
+            continue
+        parts.append(escape(text[cursor:start]))
+        parts.append(f"<mark>{escape(text[start:end])}</mark>")
+        cursor = end
+    parts.append(escape(text[cursor:]))
+    return "".join(parts)
+
+
+def build_file_hits(
+    files: List[Dict[str, Any]],
+    query: str,
+    context: int = 80
+) -> List[Dict[str, Any]]:
+    """
+    Busca los términos en cada archivo y genera un snippet resaltado
+    
+    Función pura (sin I/O) para poder ejecutarse en el pool de procesos.
+    
+    Args:
+        files: Archivos del documento ({"path", "content"})
+        query: Consulta de búsqueda (sintaxis $text)
+        context: Caracteres de contexto a cada lado de la coincidencia
+    
+    Returns:
+        Lista de {"path", "matches", "snippet", "path_highlighted"}
+        ordenada por relevancia (coincidencias en la ruta pesan más)
+    """
+    terms = parse_search_terms(query)
+    if not terms:
+        return []
+    
+    hits = []
+    for file in files:
+        path = file.get("path", "")
+        content = file.get("content", "")
+        
+        path_matches = _find_matches(_fold_aligned(path), terms)
+        content_matches = _find_matches(_fold_aligned(content), terms)
+        if not path_matches and not content_matches:
+            continue
+        
+        if content_matches:
+            first_start, first_end = content_matches[0]
+            start = max(0, first_start - context)
+            end = min(len(content), first_end + context)
+            
+            # Ajustar a límites de palabra
+            if start > 0:
+                space = content.rfind(" ", 0, start)
+                start = space + 1 if space != -1 and first_start - space < context * 2 else start
+            if end < len(content):
+                space = content.find(" ", end)
+                end = space if space != -1 and space - first_end < context * 2 else end
+            
+            window = [(s, e) for s, e in content_matches if s >= start and e <= end]
+            snippet = _highlight(content[start:end], window, offset=start)
+            snippet = ("…" if start > 0 else "") + snippet + ("…" if end < len(content) else "")
+        else:
+            snippet = escape(content[:context * 2]) + ("…" if len(content) > context * 2 else "")
+        
+        hits.append({
+            "path": path,
+            "path_highlighted": _highlight(path, path_matches),
+            "matches": len(content_matches) + 5 * len(path_matches),
+            "snippet": snippet.replace("\n", " "),
+        })
+    
+    hits.sort(key=lambda h: h["matches"], reverse=True)
+    return hits
@@ -0,0 +1,365 @@
+"""
+Generador determinista de datos sintéticos para pruebas de carga
+
+Produce documentos crudos (listos para insert_many) de projects,
+analysis_sessions y generated_docs con volúmenes y formas parecidas a
+producción. Misma semilla + mismos parámetros = mismos documentos.
+"""
+import hashlib
+import random
+import string
+import struct
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from bson import DBRef, ObjectId
+
+from .answer_validator import AnswerValidator, completion_ratio
+from .search import build_search_fields
+from .yaml_validator import validate_yaml_structure
+
+
+TOKEN_ALPHABET = string.ascii_letters + string.digits
+
+ANALYSIS_TYPES = [
+    "deployment", "api", "arquitectura", "requerimientos", "vista-ejecutiva",
+    "tecnica", "procesos-negocio", "adr", "swagger",
+]
+
+# Distribuciones por defecto (pesos relativos)
+DEFAULT_TYPE_WEIGHTS = {
+    "deployment": 4, "api": 4, "arquitectura": 3, "requerimientos": 3,
+    "tecnica": 2, "vista-ejecutiva": 1, "procesos-negocio": 1, "adr": 1, "swagger": 1,
+}
+DEFAULT_ITERATION_WEIGHTS = {1: 50, 2: 30, 3: 15, 4: 4, 5: 1}
+DEFAULT_STATUS_WEIGHTS = {"pending_answers": 35, "in_review": 15, "completed": 50}
+
+SECTION_ICONS = ["☁️", "🐳", "🔐", "📊", "⚙️", "🗄️", "🌐", "🧪", "📦", "🚀"]
+TOPICS = [
+    "Infraestructura", "Contenedores", "Seguridad", "Monitoreo", "Configuración",
+    "Base de datos", "Red", "Testing", "Dependencias", "Despliegue",
+    "Autenticación", "Integraciones", "Rendimiento", "Escalabilidad", "Logs",
+]
+WORDS = (
+    "servicio api cliente servidor despliegue contenedor base datos cola mensaje "
+    "usuario proceso negocio flujo error reintento caché índice consulta latencia "
+    "token sesión permiso rol entorno variable configuración pipeline build test "
+    "módulo componente interfaz contrato versión release backup réplica nodo"
+).split()
+TECHNOLOGIES = [
+    "Python + FastAPI", "Node.js + Express", "Java + Spring Boot", "Go + Gin",
+    ".NET + ASP.NET Core", "Ruby on Rails", "PHP + Laravel", "React + Next.js",
+]
+CLOUD_OPTIONS = [("aws", "AWS"), ("azure", "Azure"), ("gcp", "Google Cloud"), ("onprem", "On-premise")]
+YES_NO = [("si", "Sí"), ("no", "No"), ("parcial", "Parcialmente")]
+
+
+def parse_weights(spec: Optional[str], cast=str) -> Optional[Dict[Any, float]]:
+    """
+    Interpreta una distribución "clave=peso,clave=peso" (ej: "api=3,adr=1")
+
+    Raises:
+        ValueError: Si el formato es inválido
+    """
+    if not spec:
+        return None
+
+    weights = {}
+    for item in spec.split(","):
+        key, sep, weight = item.partition("=")
+        if not sep:
+            raise ValueError(f"Distribución inválida: '{item}' (se espera clave=peso)")
+        weights[cast(key.strip())] = float(weight)
+    return weights
+
+
+class SyntheticDataGenerator:
+    """
+    Genera proyectos con sus sesiones y documentos de forma determinista
+
+    Los formularios se toman de un pool de plantillas por tipo de análisis
+    (validadas con validate_yaml_structure al construir el generador), así
+    la generación de un millón de sesiones no está limitada por la CPU.
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        sessions_per_project: Tuple[int, int] = (5, 20),
+        type_weights: Optional[Dict[str, float]] = None,
+        iteration_weights: Optional[Dict[int, float]] = None,
+        status_weights: Optional[Dict[str, float]] = None,
+        docs_ratio: float = 0.3,
+        files_per_doc: Tuple[int, int] = (2, 8),
+        file_kb: Tuple[int, int] = (1, 8),
+        days: int = 365,
+        templates_per_type: int = 8,
+        now: Optional[datetime] = None
+    ):
+        self.rng = random.Random(seed)
+        self.sessions_per_project = sessions_per_project
+        self.docs_ratio = docs_ratio
+        self.files_per_doc = files_per_doc
+        self.file_kb = file_kb
+        self.days = days
+        self.now = now or datetime(2025, 1, 1)
+
+        type_weights = type_weights or DEFAULT_TYPE_WEIGHTS
+        unknown = set(type_weights) - set(ANALYSIS_TYPES)
+        if unknown:
+            raise ValueError(f"Tipos de análisis desconocidos: {sorted(unknown)}")
+        self._types, self._type_weights = zip(*type_weights.items())
+
+        iteration_weights = iteration_weights or DEFAULT_ITERATION_WEIGHTS
+        self._iterations, self._iteration_weights = zip(*iteration_weights.items())
+
+        status_weights = status_weights or DEFAULT_STATUS_WEIGHTS
+        self._statuses, self._status_weights = zip(*status_weights.items())
+
+        self.templates = {
+            analysis_type: [self._build_yaml(analysis_type, i) for i in range(templates_per_type)]
+            for analysis_type in self._types
+        }
+        for templates in self.templates.values():
+            for yaml_config in templates:
+                validate_yaml_structure(yaml_config)
+
+        self._paragraphs = [self._paragraph() for _ in range(64)]
+        self._project_count = 0
+
+    # ============================================
+    # PRIMITIVAS
+    # ============================================
+
+    def _object_id(self, moment: datetime) -> ObjectId:
+        """ObjectId con el timestamp de moment y el resto de la semilla"""
+        seconds = int((moment - datetime(1970, 1, 1)).total_seconds())
+        return ObjectId(struct.pack(">I", seconds) + self.rng.randbytes(8))
+
+    def _moment(self, after: Optional[datetime] = None) -> datetime:
+        start = after or self.now - timedelta(days=self.days)
+        span = max(1, int((self.now - start).total_seconds()))
+        # Milisegundos: la precisión que conserva BSON
+        moment = start + timedelta(seconds=self.rng.randrange(span))
+        return moment.replace(microsecond=self.rng.randrange(1000) * 1000)
+
+    def _token(self) -> str:
+        return "".join(self.rng.choices(TOKEN_ALPHABET, k=16))
+
+    def _words(self, count: int) -> str:
+        return " ".join(self.rng.choices(WORDS, k=count))
+
+    def _paragraph(self) -> str:
+        sentences = [self._words(self.rng.randint(6, 16)).capitalize() + "." for _ in range(self.rng.randint(3, 6))]
+        return " ".join(sentences)
+
+    # ============================================
+    # FORMULARIOS (yaml_config)
+    # ============================================
+
+    def _question(self, question_id: str, topic: str) -> Dict[str, Any]:
+        kind = self.rng.choices(
+            ["text", "textarea", "select", "radio", "checkbox"],
+            weights=[3, 2, 2, 2, 2]
+        )[0]
+        question = {
+            "id": question_id,
+            "type": kind,
+            "label": f"¿{self._words(self.rng.randint(3, 8)).capitalize()} ({topic.lower()})?",
+            "required": self.rng.random() < 0.4,
+        }
+        if kind in ("text", "textarea"):
+            question["placeholder"] = self._words(3)
+            if kind == "textarea":
+                question["rows"] = self.rng.choice([3, 4, 6])
+        else:
+            pool = CLOUD_OPTIONS if kind == "checkbox" else YES_NO
+            question["options"] = [{"value": value, "label": label} for value, label in pool]
+            if self.rng.random() < 0.2:
+                question["showOther"] = True
+                question["otherPlaceholder"] = "Especificar..."
+        if self.rng.random() < 0.3:
+            question["help"] = self._words(8).capitalize()
+        return question
+
+    def _build_yaml(self, analysis_type: str, variant: int) -> Dict[str, Any]:
+        sections = []
+        for section_index in range(self.rng.randint(2, 5)):
+            topic = self.rng.choice(TOPICS)
+            questions = [
+                self._question(f"{analysis_type.replace('-', '_')}_{variant}_{section_index}_{q}", topic)
+                for q in range(self.rng.randint(3, 8))
+            ]
+            sections.append({
+                "icon": self.rng.choice(SECTION_ICONS),
+                "title": topic,
+                "description": self._words(10).capitalize(),
+                "questions": questions,
+            })
+        return {
+            "title": f"{analysis_type.capitalize()} - Variante {variant + 1}",
+            "description": "Completa este formulario para generar la documentación.",
+            "sections": sections,
+        }
+
+    def _answers(self, yaml_config: Dict[str, Any], fill_ratio: float) -> Dict[str, Any]:
+        answers = {}
+        for section in yaml_config["sections"]:
+            for question in section["questions"]:
+                if self.rng.random() > fill_ratio:
+                    continue
+                kind = question["type"]
+                if kind == "checkbox":
+                    values = [option["value"] for option in question["options"]]
+                    answers[question["id"]] = self.rng.sample(values, self.rng.randint(1, len(values)))
+                elif kind in ("select", "radio"):
+                    answers[question["id"]] = self.rng.choice(question["options"])["value"]
+                elif kind == "textarea":
+                    answers[question["id"]] = self.rng.choice(self._paragraphs)
+                else:
+                    answers[question["id"]] = self._words(self.rng.randint(1, 6))
+        return answers
+
+    # ============================================
+    # DOCUMENTOS
+    # ============================================
+
+    def project(self) -> Dict[str, Any]:
+        """Documento crudo de un proyecto"""
+        self._project_count += 1
+        created_at = self._moment()
+        name = f"Sistema {self.rng.choice(TOPICS)} {self._project_count:07d}"
+        return {
+            "_id": self._object_id(created_at),
+            "name": name,
+            "description": self._words(12).capitalize(),
+            "created_by": f"analista{self.rng.randrange(200):03d}@empresa.com",
+            "created_at": created_at,
+            "updated_at": self._moment(created_at),
+            "status": self.rng.choices(["active", "completed", "archived"], weights=[80, 15, 5])[0],
+            "metadata": {
+                "repository": f"https://git.empresa.com/{name.lower().replace(' ', '-')}",
+                "technology": self.rng.choice(TECHNOLOGIES),
+            },
+            "revision": 0,
+        }
+
+    def session(self, project: Dict[str, Any]) -> Dict[str, Any]:
+        """Documento crudo de una sesión de análisis del proyecto"""
+        analysis_type = self.rng.choices(self._types, weights=self._type_weights)[0]
+        iteration = self.rng.choices(self._iterations, weights=self._iteration_weights)[0]
+        status = self.rng.choices(self._statuses, weights=self._status_weights)[0]
+        if project["status"] == "archived":
+            status = "archived"
+
+        templates = self.templates[analysis_type]
+        created_at = self._moment(project["created_at"])
+        updated_at = created_at
+
+        history = []
+        for previous in range(1, iteration):
+            updated_at = self._moment(updated_at)
+            yaml_generated = self.rng.choice(templates)
+            history.append({
+                "iteration": previous,
+                "yaml_generated": yaml_generated,
+                "answers_provided": self._answers(yaml_generated, 0.9),
+                "timestamp": updated_at,
+            })
+
+        yaml_config = self.rng.choice(templates)
+        fill_ratio = 1.0 if status in ("completed", "archived") else self.rng.random()
+        answers = self._answers(yaml_config, fill_ratio)
+        progress = AnswerValidator(yaml_config).completeness(answers)
+        progress["completion"] = completion_ratio(progress["required_answered"], progress["required_total"])
+
+        session = {
+            "_id": self._object_id(created_at),
+            "project": DBRef("projects", project["_id"]),
+            "project_name": project["name"],
+            "analysis_type": analysis_type,
+            "status": status,
+            "yaml_config": yaml_config,
+            "answers": answers,
+            **build_search_fields(yaml_config, answers),
+            **progress,
+            "iteration": iteration,
+            "needs_more_info": status == "pending_answers",
+            "share_token": self._token(),
+            "created_by": project["created_by"],
+            "assigned_to": f"experto{self.rng.randrange(500):03d}@empresa.com",
+            "created_at": created_at,
+            "updated_at": self._moment(updated_at),
+            "iteration_history": history,
+            "revision": iteration,
+            "in_cold_storage": False,
+            "archived_at": None,
+        }
+        session["completed_at"] = session["updated_at"] if status == "completed" else None
+        return session
+
+    def _markdown(self, title: str, target_bytes: int) -> str:
+        parts = [f"# {title}\n"]
+        size = len(parts[0])
+        section = 0
+        while size < target_bytes:
+            section += 1
+            block = f"\n## {section}. {self.rng.choice(TOPICS)}\n\n{self.rng.choice(self._paragraphs)}\n"
+            if section % 3 == 0:
+                block += "\n| Componente | Valor |\n|---|---|\n" + "".join(
+                    f"| {self.rng.choice(WORDS)} | {self.rng.choice(WORDS)} |\n" for _ in range(4)
+                )
+            parts.append(block)
+            size += len(block.encode("utf-8"))
+        return "".join(parts)
+
+    def generated_doc(self, project: Dict[str, Any], session: Dict[str, Any]) -> Dict[str, Any]:
+        """Documento crudo con los .md generados a partir de la sesión"""
+        generated_at = self._moment(session["updated_at"])
+        folder = f"ai_docs/{session['analysis_type']}"
+
+        files = []
+        for index in range(self.rng.randint(*self.files_per_doc)):
+            title = f"{self.rng.choice(TOPICS)} {index + 1}"
+            content = self._markdown(title, self.rng.randint(*self.file_kb) * 1024)
+            encoded = content.encode("utf-8")
+            files.append({
+                "path": f"{folder}/{index + 1:02d}-{title.lower().replace(' ', '-')}.md",
+                "content": content,
+                "size": len(encoded),
+                "hash": hashlib.sha256(encoded).hexdigest(),
+                "generated_at": generated_at,
+            })
+
+        archived = project["status"] == "archived"
+        return {
+            "_id": self._object_id(generated_at),
+            "project": DBRef("projects", project["_id"]),
+            "project_name": project["name"],
+            "analysis_session": DBRef("analysis_sessions", session["_id"]),
+            "files": files,
+            "generated_at": generated_at,
+            "generated_by": project["created_by"],
+            "archived": archived,
+            "archived_at": generated_at if archived else None,
+        }
+
+    def projects(self, count: int) -> Iterator[Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """
+        Genera count proyectos
+
+        Yields:
+            Tuplas (proyecto, sesiones, documentos generados)
+        """
+        for _ in range(count):
+            project = self.project()
+            sessions = [
+                self.session(project)
+                for _ in range(self.rng.randint(*self.sessions_per_project))
+            ]
+            docs = [
+                self.generated_doc(project, session)
+                for session in sessions
+                if session["status"] in ("completed", "archived") and self.rng.random() < self.docs_ratio
+            ]
+            yield project, sessions, docs
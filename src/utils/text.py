@@ -0,0 +1,31 @@
+"""
+Utilidades de normalización de texto
+"""
+import re
+import unicodedata
+
+
+def fold_accents(text: str) -> str:
+    """
+    Elimina acentos y diacríticos ("Descripción" -> "Descripcion")
+    
+    Args:
+        text: Texto original
+    
+    Returns:
+        Texto sin marcas diacríticas
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def slugify(text: str) -> str:
+    """
+    Convierte un texto en un identificador apto para URLs/anchors
+    
+    Example:
+        >>> slugify("1. Descripción General")
+        '1-descripcion-general'
+    """
+    folded = fold_accents(text).lower()
+    return re.sub(r"[^a-z0-9]+", "-", folded).strip("-")
@@ -2,10 +2,46 @@
 Validador de estructura YAML para formularios
 """
 import yaml
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field, validator
 
 
+# Loader en C (libyaml) cuando está disponible; fallback al loader puro Python
+_BaseSafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class LimitedSafeLoader(_BaseSafeLoader):
+    """
+    SafeLoader con límite de nodos
+
+    Rechaza anchors/aliases (evita expansiones tipo "billion laughs")
+    y corta el parseo al superar max_nodes.
+    """
+    
+    max_nodes: Optional[int] = None
+    
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.node_count = 0
+    
+    def construct_object(self, node, deep=False):
+        # Un nodo ya construido solo se revisita a través de un alias
+        if node in self.constructed_objects:
+            raise yaml.constructor.ConstructorError(
+                None, None, "anchors/aliases no permitidos", node.start_mark
+            )
+        
+        self.node_count += 1
+        if self.max_nodes is not None and self.node_count > self.max_nodes:
+            raise yaml.constructor.ConstructorError(
+                None, None,
+                f"el YAML supera el máximo de {self.max_nodes} nodos",
+                node.start_mark
+            )
+        
+        return super().construct_object(node, deep=deep)
+
+
 class YAMLQuestion(BaseModel):
     """Estructura de una pregunta en el YAML"""
     id: str
@@ -70,12 +106,35 @@ def validate_yaml_structure(yaml_dict: Dict[str, Any]) -> bool:
         raise ValueError(f"YAML inválido: {str(e)}")
 
 
-def parse_yaml_string(yaml_str: str) -> Dict[str, Any]:
+def load_yaml(yaml_str: str, max_nodes: Optional[int] = None) -> Any:
+    """
+    Carga un string YAML con el loader seguro y limitado
+    
+    Args:
+        yaml_str: String YAML
+        max_nodes: Máximo de nodos permitidos (None = sin límite)
+    
+    Returns:
+        Objeto Python resultante
+    
+    Raises:
+        yaml.YAMLError: Si el YAML es inválido o supera los límites
+    """
+    loader = LimitedSafeLoader(yaml_str)
+    loader.max_nodes = max_nodes
+    try:
+        return loader.get_single_data()
+    finally:
+        loader.dispose()
+
+
+def parse_yaml_string(yaml_str: str, max_nodes: Optional[int] = None) -> Dict[str, Any]:
     """
     Parsea un string YAML y lo valida
     
     Args:
         yaml_str: String YAML
+        max_nodes: Máximo de nodos permitidos (None = sin límite)
     
     Returns:
         Diccionario con el YAML parseado
@@ -84,10 +143,14 @@ def parse_yaml_string(yaml_str: str) -> Dict[str, Any]:
         ValueError: Si el YAML es inválido
     """
     try:
-        yaml_dict = yaml.safe_load(yaml_str)
+        yaml_dict = load_yaml(yaml_str, max_nodes=max_nodes)
+        if not isinstance(yaml_dict, dict):
+            raise ValueError("YAML inválido: el documento raíz debe ser un objeto")
         validate_yaml_structure(yaml_dict)
         return yaml_dict
     except yaml.YAMLError as e:
         raise ValueError(f"Error parseando YAML: {str(e)}")
+    except ValueError:
+        raise
     except Exception as e:
         raise ValueError(f"YAML inválido: {str(e)}")
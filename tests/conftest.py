@@ -0,0 +1,18 @@
+"""
+Fixtures compartidas de los tests
+"""
+import pytest_asyncio
+
+from src.config.database import Database
+from src.controllers import search_index_controller
+from src.repositories import MemoryBackend
+
+
+@pytest_asyncio.fixture
+async def memory_db():
+    """Beanie inicializado sobre una base de datos en memoria vacía"""
+    # El vocabulario empieza vacío: las palabras registradas por otros tests no están
+    search_index_controller._known_terms.clear()
+    await Database.connect_db(backend=MemoryBackend())
+    yield
+    await Database.close_db()
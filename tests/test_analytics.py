@@ -0,0 +1,138 @@
+"""
+Tests para los rollups diarios de analytics
+"""
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from src.controllers.analysis_controller import AnalysisController
+from src.controllers.analytics_controller import AnalyticsController
+from src.controllers.generated_doc_controller import GeneratedDocController
+from src.controllers.project_controller import ProjectController
+from src.models.analysis_session import AnalysisSession, AnalysisType
+from src.models.analytics_rollup import AnalyticsRollup
+from src.utils.analytics import add_to_buckets, day_bucket, derive_metrics, iso_week, rollup_rows
+from tests.test_answer_validator import YAML_CONFIG
+
+
+def test_buckets_by_day_and_dimension():
+    """Test de buckets por día, proyecto y analista con su semana ISO"""
+    buckets = {}
+    rows = rollup_rows("p1", "Shop", "a@b.c")
+
+    add_to_buckets(buckets, datetime(2026, 1, 5, 9), rows, {"analyses_created": 1})
+    add_to_buckets(buckets, datetime(2026, 1, 5, 23), rows, {"analyses_created": 1})
+    add_to_buckets(buckets, datetime(2026, 1, 6, 1), rollup_rows("p1", "Shop", None), {"iterations_added": 1})
+
+    assert day_bucket(datetime(2026, 1, 5, 9, 30)) == datetime(2026, 1, 5)
+    assert iso_week(datetime(2026, 1, 1)) == "2026-W01"
+    assert len(buckets) == 3
+    monday = buckets[("project", "p1", datetime(2026, 1, 5))]
+    assert monday["analyses_created"] == 2 and monday["week"] == "2026-W02"
+    assert buckets[("analyst", "a@b.c", datetime(2026, 1, 5))]["analyses_created"] == 2
+    assert buckets[("project", "p1", datetime(2026, 1, 6))]["iterations_added"] == 1
+
+
+def test_derive_metrics():
+    """Test de promedios derivados (None sin análisis)"""
+    metrics = derive_metrics({
+        "analyses_created": 2, "iterations_added": 3,
+        "analyses_completed": 2, "completed_iterations": 5, "completion_seconds": 7200,
+    })
+
+    assert metrics == {"iterations_per_analysis": 1.5, "avg_iterations_to_complete": 2.5, "avg_hours_to_complete": 1.0}
+    assert derive_metrics({})["avg_hours_to_complete"] is None
+
+
+@pytest.mark.asyncio
+async def test_incremental_rollups_match_rebuild(memory_db):
+    """Test de que los $inc de cada escritura cuentan lo mismo que rebuild()"""
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="a@b.c"
+    )
+    await AnalysisController.add_iteration(session.id, YAML_CONFIG)
+    await AnalysisController.complete_analysis(session.id)
+    await AnalysisController.complete_analysis(session.id)
+    await GeneratedDocController.save_generated_docs(
+        project_id=project.id,
+        analysis_session_id=session.id,
+        files=[{"path": "ai_docs/a.md", "content": "# A"}, {"path": "ai_docs/b.md", "content": "# B"}],
+        generated_by="a@b.c"
+    )
+
+    incremental = await AnalyticsController.query(group_by="project")
+    totals = incremental["totals"]
+    assert totals["analyses_created"] == 1 and totals["iterations_added"] == 1
+    assert totals["analyses_completed"] == 1 and totals["completed_iterations"] == 2
+    assert totals["docs_generated"] == 1 and totals["files_generated"] == 2
+    assert {bucket["key"] for bucket in incremental["buckets"]} == {str(project.id)}
+    assert {bucket["label"] for bucket in incremental["buckets"]} == {"Shop"}
+
+    await AnalyticsRollup.get_motor_collection().delete_many({})
+    stats = await AnalyticsController.rebuild()
+
+    assert stats["sessions"] == 1 and stats["docs"] == 1
+    rebuilt = await AnalyticsController.query(group_by="project")
+    # completion_seconds: las fechas guardadas tienen precisión de milisegundos
+    assert rebuilt["totals"] == pytest.approx(totals, abs=0.01)
+    by_analyst = await AnalyticsController.query(group_by="analyst", granularity="week")
+    assert by_analyst["buckets"][0]["period"] == iso_week(datetime.utcnow())
+
+
+@pytest.mark.asyncio
+async def test_query_rejects_inverted_range(memory_db):
+    """Test de rango de fechas inválido"""
+    with pytest.raises(ValueError):
+        await AnalyticsController.query(date_from=date(2026, 2, 1), date_to=date(2026, 1, 1))
+
+
+class _CompleteBeforeUpdate:
+    """Colección que completa una sesión justo antes del primer update_many"""
+
+    def __init__(self, collection, complete):
+        self._collection = collection
+        self._complete = complete
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    async def update_many(self, *args, **kwargs):
+        complete, self._complete = self._complete, None
+        if complete is not None:
+            await complete()
+        return await self._collection.update_many(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_bulk_complete_skips_sessions_completed_concurrently(memory_db, monkeypatch):
+    """Test de que bulk_complete no vuelve a contar una sesión completada entre la lectura y el update"""
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    sessions = [
+        await AnalysisController.create_analysis(
+            project_id=project.id,
+            analysis_type=AnalysisType.API,
+            yaml_config=YAML_CONFIG,
+            created_by="a@b.c"
+        )
+        for _ in range(2)
+    ]
+    collection = AnalysisSession.get_motor_collection()
+
+    async def complete_first():
+        # En otro milisegundo que el completed_at del bulk (lo que las distingue)
+        await asyncio.sleep(0.002)
+        await AnalysisController.complete_analysis(sessions[0].id)
+
+    racing = _CompleteBeforeUpdate(collection, complete_first)
+    monkeypatch.setattr(AnalysisSession, "get_motor_collection", classmethod(lambda cls: racing))
+
+    result = await AnalysisController.bulk_complete(analysis_ids=[s.id for s in sessions])
+
+    assert result["modified"] == 1
+    totals = (await AnalyticsController.query())["totals"]
+    assert totals["analyses_completed"] == 2
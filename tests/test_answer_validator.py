@@ -0,0 +1,83 @@
+"""
+Tests para la validación de respuestas contra el YAML
+"""
+import pytest
+
+from src.utils.answer_validator import AnswerValidator, AnswerValidationError, completion_ratio
+
+
+YAML_CONFIG = {
+    "title": "Deployment",
+    "description": "Formulario",
+    "sections": [
+        {
+            "icon": "☁️",
+            "title": "Cloud",
+            "questions": [
+                {"id": "projectName", "type": "text", "label": "Nombre", "required": True},
+                {
+                    "id": "cloudProvider",
+                    "type": "checkbox",
+                    "label": "Cloud",
+                    "options": [{"value": "aws", "label": "AWS"}, {"value": "gcp", "label": "GCP"}]
+                },
+                {
+                    "id": "hasDocker",
+                    "type": "radio",
+                    "label": "¿Docker?",
+                    "showOther": True,
+                    "options": [{"value": "si", "label": "Sí"}, {"value": "no", "label": "No"}]
+                },
+            ]
+        }
+    ]
+}
+
+
+def test_valid_partial_answers():
+    """Test de autosave parcial válido"""
+    validator = AnswerValidator(YAML_CONFIG)
+    
+    validator.validate({"cloudProvider": ["aws"], "hasDocker": "otra cosa", "hasDocker_other": "podman"})
+
+
+def test_invalid_option_and_type():
+    """Test de opción no permitida y tipo incorrecto"""
+    validator = AnswerValidator(YAML_CONFIG)
+    
+    with pytest.raises(AnswerValidationError) as exc:
+        validator.validate({"cloudProvider": ["azure"], "projectName": 42, "unknown": "x"})
+    
+    assert set(exc.value.errors) == {"cloudProvider", "projectName", "unknown"}
+
+
+def test_required_on_complete():
+    """Test de preguntas requeridas en el envío final"""
+    validator = AnswerValidator(YAML_CONFIG)
+    
+    with pytest.raises(AnswerValidationError) as exc:
+        validator.validate({"cloudProvider": ["gcp"]}, current={}, require_complete=True)
+    assert "projectName" in exc.value.errors
+    
+    validator.validate({"cloudProvider": ["gcp"]}, current={"projectName": "Shop"}, require_complete=True)
+
+
+def test_completeness_counters():
+    """Test de contadores de avance (vacíos y "Otro" no cuentan)"""
+    validator = AnswerValidator(YAML_CONFIG)
+    
+    progress = validator.completeness({"projectName": "  ", "cloudProvider": ["aws"], "hasDocker_other": "podman"})
+    assert progress == {"answered_count": 1, "required_total": 1, "required_answered": 0}
+    assert completion_ratio(progress["required_answered"], progress["required_total"]) == 0.0
+    assert completion_ratio(0, 0) == 1.0
+
+
+def test_completeness_delta():
+    """Test de variación incremental de los contadores"""
+    validator = AnswerValidator(YAML_CONFIG)
+    current = {"cloudProvider": ["aws"]}
+    
+    assert validator.completeness_delta(current, {"projectName": "Shop"}) == {"answered_count": 1, "required_answered": 1}
+    assert validator.completeness_delta(current, {"cloudProvider": [], "hasDocker": "si"}) == {}
+    assert validator.completeness_delta(current, {"cloudProvider": ["gcp"], "hasDocker_other": "x"}) == {}
+    assert validator.completeness_delta({"projectName": "Shop"}, {"projectName": ""}) == {"answered_count": -1, "required_answered": -1}
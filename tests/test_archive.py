@@ -0,0 +1,159 @@
+"""
+Tests para el almacenamiento frío de sesiones
+"""
+from datetime import datetime
+
+import pytest
+
+from src.controllers.analysis_controller import AnalysisController
+from src.controllers.archive_controller import ArchiveController
+from src.controllers.project_controller import ProjectController
+from src.models.analysis_archive import AnalysisArchive
+from src.models.analysis_session import AnalysisSession, AnalysisType
+from tests.test_answer_validator import YAML_CONFIG
+
+
+@pytest.mark.asyncio
+async def test_list_and_search_rehydrate_archived_sessions(memory_db):
+    """Test de que listado, stream y búsqueda devuelven el contenido archivado"""
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="a@b.c"
+    )
+    await AnalysisController.update_answers(session.share_token, {"projectName": "kubernetes shop"})
+    await AnalysisController.complete_analysis(session.id)
+
+    stats = await ArchiveController.archive_sessions(older_than_days=0)
+    assert stats["archived"] == 1
+    raw = await AnalysisSession.get_motor_collection().find_one({"_id": session.id})
+    assert raw["in_cold_storage"] and raw["answers"] == {}
+
+    listed = await AnalysisController.list_project_analyses(project.id)
+    streamed = [s async for s in await AnalysisController.iter_project_analyses(project.id)]
+    found = (await AnalysisController.search_analyses("kubernetes", fuzzy=False))["hits"]
+    searched = [s async for s in await AnalysisController.iter_search_analyses("kubernetes", fuzzy=False)]
+
+    for sessions in (listed, streamed, found, searched):
+        assert len(sessions) == 1
+        assert sessions[0].answers == {"projectName": "kubernetes shop"}
+        assert sessions[0].yaml_config == YAML_CONFIG
+        assert sessions[0].in_cold_storage
+
+
+class _EditBeforeStub:
+    """Colección que modifica una sesión justo antes de convertirlas en stubs"""
+
+    def __init__(self, collection, session_id):
+        self._collection = collection
+        self._session_id = session_id
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    async def bulk_write(self, *args, **kwargs):
+        await self._collection.update_one({"_id": self._session_id}, {"$set": {"updated_at": datetime.utcnow()}})
+        return await self._collection.bulk_write(*args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_archive_skips_sessions_edited_since_read(memory_db, monkeypatch):
+    """Test de que una sesión editada durante el archivado queda caliente y sin archivo"""
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    sessions = []
+    for _ in range(2):
+        session = await AnalysisController.create_analysis(
+            project_id=project.id,
+            analysis_type=AnalysisType.API,
+            yaml_config=YAML_CONFIG,
+            created_by="a@b.c"
+        )
+        await AnalysisController.complete_analysis(session.id)
+        sessions.append(session)
+
+    edited = _EditBeforeStub(AnalysisSession.get_motor_collection(), sessions[0].id)
+    monkeypatch.setattr(AnalysisSession, "get_motor_collection", classmethod(lambda cls: edited))
+    stats = await ArchiveController.archive_sessions(older_than_days=0)
+    monkeypatch.undo()
+
+    assert stats["archived"] == 1
+    archived = await AnalysisArchive.get_motor_collection().distinct("session_id", {})
+    assert archived == [sessions[1].id]
+    hot = await AnalysisController.get_analysis(sessions[0].id)
+    assert not hot.in_cold_storage and hot.yaml_config == YAML_CONFIG
+
+
+async def _archived_session():
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="a@b.c"
+    )
+    await AnalysisController.update_answers(session.share_token, {"projectName": "Shop"})
+    await AnalysisController.complete_analysis(session.id)
+    await ArchiveController.archive_sessions(older_than_days=0)
+    return session
+
+
+@pytest.mark.asyncio
+async def test_concurrent_restores_of_the_same_stub(memory_db):
+    """Test de dos pedidos que leyeron el mismo stub: uno restaura, el otro relee"""
+    session = await _archived_session()
+    first = await AnalysisSession.get(session.id)
+    second = await AnalysisSession.get(session.id)
+    assert first.in_cold_storage and second.in_cold_storage
+
+    await ArchiveController.restore(first)
+    # El primero sigue y modifica la sesión ya caliente
+    await AnalysisSession.get_motor_collection().update_one(
+        {"_id": session.id}, {"$set": {"answers.projectName": "Shop 2"}, "$inc": {"revision": 1}}
+    )
+    assert await AnalysisArchive.find(AnalysisArchive.session_id == session.id).count() == 0
+
+    # El segundo ya no encuentra el archivo: toma la sesión actual en vez de fallar
+    restored = await ArchiveController.restore(second)
+    assert not restored.in_cold_storage and restored.archived_at is None
+    assert restored.answers == {"projectName": "Shop 2"}
+    assert restored.revision == first.revision + 1
+    assert restored.yaml_config == YAML_CONFIG
+
+
+@pytest.mark.asyncio
+async def test_restore_loses_race_after_reading_archive(memory_db):
+    """Test de restore que leyó el archivo pero otro pedido restauró antes de su escritura"""
+    session = await _archived_session()
+    stub = await AnalysisSession.get(session.id)
+    await ArchiveController.rehydrate(stub)
+
+    other = await AnalysisSession.get(session.id)
+    await ArchiveController.restore(other)
+    await AnalysisSession.get_motor_collection().update_one(
+        {"_id": session.id}, {"$set": {"answers.projectName": "Shop 2"}}
+    )
+
+    restored = await ArchiveController.restore(stub)
+    assert not restored.in_cold_storage
+    assert restored.answers == {"projectName": "Shop 2"}
+    raw = await AnalysisSession.get_motor_collection().find_one({"_id": session.id})
+    assert raw["answers"] == {"projectName": "Shop 2"}
+
+
+@pytest.mark.asyncio
+async def test_read_of_stub_restored_meanwhile(memory_db):
+    """Test de get_analysis cuando otro pedido restauró la sesión tras leer el stub"""
+    session = await _archived_session()
+    stub = await AnalysisSession.get(session.id)
+    listed_stub = await AnalysisSession.get(session.id)
+    await ArchiveController.restore(await AnalysisSession.get(session.id))
+
+    rehydrated = await ArchiveController.rehydrate(stub)
+    assert not rehydrated.in_cold_storage
+    assert rehydrated.answers == {"projectName": "Shop"}
+
+    [listed] = await ArchiveController.rehydrate_many([listed_stub])
+    assert not listed.in_cold_storage
+    assert listed.answers == {"projectName": "Shop"}
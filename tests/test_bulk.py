@@ -0,0 +1,19 @@
+"""
+Tests de la lectura de cursores por lotes
+"""
+import pytest
+
+from src.repositories.memory import MemoryClient
+from src.utils.bulk import iter_batches
+
+
+@pytest.mark.asyncio
+async def test_iter_batches_keeps_order_and_bounds_size():
+    """Lotes de batch_size documentos en el orden del cursor; el último puede ser menor"""
+    collection = MemoryClient()["test"]["items"]
+    await collection.insert_many([{"n": n} for n in range(7)])
+    
+    cursor = collection.find({}, {"_id": 0}).sort("n", -1)
+    batches = [batch async for batch in iter_batches(cursor, batch_size=3)]
+    
+    assert [[doc["n"] for doc in batch] for batch in batches] == [[6, 5, 4], [3, 2, 1], [0]]
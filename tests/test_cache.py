@@ -0,0 +1,32 @@
+"""
+Tests para las cachés en memoria
+"""
+from src.utils.cache import LRUCache, TTLCache
+
+
+def test_lru_evicts_least_recently_used():
+    """Test de descarte por LRU"""
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert "a" in cache and "c" in cache and "b" not in cache
+
+
+def test_ttl_expires_entries():
+    """Test de vencimiento e invalidación por TTL"""
+    now = [100.0]
+    cache = TTLCache(maxsize=10, ttl=30, clock=lambda: now[0])
+    cache.set("p1", "Shop")
+    
+    now[0] += 29
+    assert cache.get("p1") == "Shop"
+    now[0] += 1
+    assert cache.get("p1") is None
+    assert "p1" not in cache
+    
+    cache.set("p2", "Blog")
+    assert cache.pop("p2") == "Blog"
+    assert cache.stats()["expired"] == 1 and cache.hits == 1 and cache.misses == 1
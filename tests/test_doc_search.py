@@ -0,0 +1,80 @@
+"""
+Tests para la búsqueda en documentos generados (snippets y cursor)
+"""
+import pytest
+
+from src.controllers.analysis_controller import AnalysisController
+from src.controllers.generated_doc_controller import GeneratedDocController
+from src.controllers.project_controller import ProjectController
+from src.models.analysis_session import AnalysisType
+from src.utils.cursor import decode_cursor, encode_cursor
+from src.utils.snippets import build_file_hits, parse_search_terms
+from tests.test_answer_validator import YAML_CONFIG
+
+
+def test_parse_search_terms():
+    """Test de frases, negaciones, acentos y repetidos"""
+    assert parse_search_terms('Despliegue "cloud run" -docker DESPLIEGUE') == ["despliegue", "cloud run"]
+    assert parse_search_terms("-solo") == []
+
+
+def test_build_file_hits_snippets_and_highlight():
+    """Test de snippet con contexto, resaltado escapado y orden por relevancia"""
+    files = [
+        {"path": "ai_docs/otro.md", "content": "Nada que ver aquí"},
+        {"path": "ai_docs/api.md", "content": "x" * 200 + " Usamos <Kubernetes> en producción " + "y" * 200},
+        {"path": "ai_docs/kubernetes.md", "content": "Guía de despliegue"},
+    ]
+
+    hits = build_file_hits(files, "kubernetes", context=20)
+
+    assert [hit["path"] for hit in hits] == ["ai_docs/kubernetes.md", "ai_docs/api.md"]
+    assert hits[0]["path_highlighted"] == "ai_docs/<mark>kubernetes</mark>.md"
+    snippet = hits[1]["snippet"]
+    assert "&lt;<mark>Kubernetes</mark>&gt;" in snippet
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert len(snippet) < 100
+    # Sin acentos en la consulta también resalta el texto acentuado
+    assert "<mark>producción</mark>" in build_file_hits(files, "produccion")[0]["snippet"]
+    assert build_file_hits(files, "-kubernetes") == []
+
+
+def test_cursor_round_trip():
+    """Test de ida y vuelta del cursor y rechazo de cursores inválidos"""
+    position = {"score": 1.25, "id": "65a000000000000000000000"}
+
+    assert decode_cursor(encode_cursor(position)) == position
+    assert "=" not in encode_cursor(position)
+    # No es base64 / no es un objeto JSON ([1,2])
+    for invalid in ("%%%", "WzEsMl0"):
+        with pytest.raises(ValueError):
+            decode_cursor(invalid)
+
+
+@pytest.mark.asyncio
+async def test_search_docs_limit_counts_documents(memory_db):
+    """Test de que limit cuenta documentos: una página trae todos sus hits"""
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="a@b.c"
+    )
+    for _ in range(2):
+        await GeneratedDocController.save_generated_docs(
+            project_id=project.id,
+            analysis_session_id=session.id,
+            files=[
+                {"path": "ai_docs/a.md", "content": "Despliegue en kubernetes"},
+                {"path": "ai_docs/b.md", "content": "Otro cluster kubernetes"},
+            ],
+            generated_by="a@b.c"
+        )
+
+    first, cursor = await GeneratedDocController.search_docs("kubernetes", limit=1)
+    second, last = await GeneratedDocController.search_docs("kubernetes", limit=1, cursor=cursor)
+
+    assert len(first) == 2 and len({hit["doc_id"] for hit in first}) == 1
+    assert cursor is not None and last is None
+    assert len(second) == 2 and second[0]["doc_id"] != first[0]["doc_id"]
@@ -0,0 +1,43 @@
+"""
+Tests del pool CPU-bound compartido
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.config.executor import CPUExecutor, estimate_size
+from src.config.settings import settings
+
+
+def test_estimate_size():
+    """Test del tamaño aproximado de un payload JSON-like"""
+    assert estimate_size("abc") == 3
+    assert estimate_size({"ab": ["c", 1]}) == 1 + 2 + 2 + 1 + 8
+
+
+@pytest.mark.asyncio
+async def test_shutdown_does_not_block_event_loop(monkeypatch):
+    """Test de que el event loop sigue atendiendo mientras el pool termina su trabajo"""
+    monkeypatch.setattr(settings, "executor_kind", "thread")
+    monkeypatch.setattr(settings, "executor_max_workers", 1)
+    monkeypatch.setattr(settings, "executor_offload_threshold", 0)
+    CPUExecutor.start()
+
+    job = asyncio.ensure_future(CPUExecutor.run(time.sleep, 0.3, size=1))
+    await asyncio.sleep(0.05)
+
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticking = asyncio.ensure_future(ticker())
+    await CPUExecutor.shutdown()
+    ticking.cancel()
+
+    assert job.done() and CPUExecutor.executor is None
+    assert ticks >= 5
@@ -0,0 +1,39 @@
+"""
+Tests de la compilación del YAML a esquema de formulario
+"""
+import copy
+
+import bson
+
+from src.utils.form_schema import compile_form_schema, encode_form_schema
+from tests.test_answer_validator import YAML_CONFIG
+
+
+def test_compile_resolves_defaults_and_lookups():
+    """Orden estable, defaults aplicados y tablas de opciones por pregunta"""
+    yaml_config = copy.deepcopy(YAML_CONFIG)
+    questions = yaml_config["sections"][0]["questions"]
+    questions[1]["default"] = "AWS, gcp, azure"
+    questions[2]["default"] = "podman"
+    
+    schema = compile_form_schema(yaml_config)
+    
+    assert schema["sections"][0]["questionIds"] == ["projectName", "cloudProvider", "hasDocker"]
+    assert [q["id"] for q in schema["questions"]] == ["projectName", "cloudProvider", "hasDocker"]
+    name, cloud, docker = schema["questions"]
+    assert name["default"] == "" and name["placeholder"] == "" and name["required"] is True
+    assert cloud["multiple"] is True and cloud["default"] == ["aws", "gcp"]
+    assert docker["default"] == "podman" and docker["otherKey"] == "hasDocker_other"
+    assert schema["optionLabels"]["hasDocker"] == {"si": "Sí", "no": "No"}
+    assert schema["required"] == ["projectName"]
+
+
+def test_hash_is_stable_across_storage_roundtrip():
+    """El hash depende solo del contenido (no del orden de claves al guardarlo en MongoDB)"""
+    schema = compile_form_schema(YAML_CONFIG)
+    body, schema_hash = encode_form_schema(schema)
+    
+    stored = bson.decode(bson.encode({"content": schema}))["content"]
+    
+    assert encode_form_schema(stored) == (body, schema_hash)
+    assert encode_form_schema(compile_form_schema({**YAML_CONFIG, "title": "Otro"}))[1] != schema_hash
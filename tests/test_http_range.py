@@ -0,0 +1,89 @@
+"""
+Tests para HTTP Range y el endpoint de archivos de documentos
+"""
+import httpx
+import pytest
+
+from src.controllers.analysis_controller import AnalysisController
+from src.controllers.generated_doc_controller import GeneratedDocController
+from src.controllers.project_controller import ProjectController
+from src.main import app
+from src.models.analysis_session import AnalysisType
+from src.utils.http_range import RangeNotSatisfiable, parse_range
+from tests.test_answer_validator import YAML_CONFIG
+
+
+def test_parse_range_single_ranges():
+    """Test de rangos cerrados, abiertos y por sufijo"""
+    assert parse_range("bytes=0-3", 10) == (0, 3)
+    assert parse_range("bytes=4-", 10) == (4, 9)
+    assert parse_range("bytes=-3", 10) == (7, 9)
+    assert parse_range("bytes=-30", 10) == (0, 9)
+    # El último byte más allá del tamaño se recorta
+    assert parse_range("bytes=5-100", 10) == (5, 9)
+
+
+def test_parse_range_served_complete():
+    """Test de casos que se sirven completos (sin header, multi-rango, otra unidad)"""
+    assert parse_range(None, 10) is None
+    assert parse_range("bytes=0-1,4-5", 10) is None
+    assert parse_range("items=0-1", 10) is None
+    assert parse_range("bytes=-", 10) is None
+    # Último < primero: inválido, se ignora el header (RFC 9110 §14.1.1)
+    assert parse_range("bytes=5-2", 10) is None
+
+
+@pytest.mark.parametrize("header,size", [
+    ("bytes=10-", 10),
+    ("bytes=12-20", 10),
+    ("bytes=-0", 10),
+    ("bytes=0-", 0),
+    ("bytes=-5", 0),
+])
+def test_parse_range_not_satisfiable(header, size):
+    """Test de rangos fuera del recurso (416)"""
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range(header, size)
+
+
+@pytest.mark.asyncio
+async def test_get_doc_file_ranges(memory_db):
+    """Test del endpoint de un archivo: 200, 206, 304, 416 y Range inválido ignorado"""
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="a@b.c"
+    )
+    doc = await GeneratedDocController.save_generated_docs(
+        project_id=project.id,
+        analysis_session_id=session.id,
+        files=[
+            {"path": "ai_docs/api.md", "content": "# Título\n"},
+            {"path": "ai_docs/preview.html", "content": "<p>hola</p>"},
+        ],
+        generated_by="a@b.c"
+    )
+    url = f"/api/docs/{doc.id}/files/ai_docs/api.md"
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        full = await client.get(url)
+        partial = await client.get(url, headers={"Range": "bytes=2-"})
+        cached = await client.get(url, headers={"If-None-Match": full.headers["etag"]})
+        outside = await client.get(url, headers={"Range": "bytes=100-"})
+        invalid = await client.get(url, headers={"Range": "bytes=5-2"})
+        raw_html = await client.get(f"/api/docs/{doc.id}/files/ai_docs/preview.html", headers={"Range": "bytes=0-2"})
+        rendered = await client.get(f"/api/docs/{doc.id}/html/ai_docs/api.md")
+
+    body = "# Título\n".encode("utf-8")
+    assert full.status_code == 200 and full.content == body
+    assert full.headers["content-type"] == "text/markdown; charset=utf-8"
+    assert partial.status_code == 206 and partial.content == body[2:]
+    assert partial.headers["content-range"] == f"bytes 2-{len(body) - 1}/{len(body)}"
+    assert cached.status_code == 304
+    assert outside.status_code == 416 and outside.headers["content-range"] == f"bytes */{len(body)}"
+    assert invalid.status_code == 200 and invalid.content == body
+    # Un archivo .html se descarga crudo (con Range); el renderizado tiene su propio prefijo
+    assert raw_html.status_code == 206 and raw_html.content == b"<p>"
+    assert rendered.status_code == 200 and rendered.headers["content-type"].startswith("text/html")
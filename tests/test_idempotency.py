@@ -0,0 +1,95 @@
+"""
+Tests para Idempotency-Key (reserva, respuesta guardada y retoma de claves abandonadas)
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from src.controllers.idempotency_controller import (
+    IdempotencyController,
+    IdempotencyInProgressError,
+    IdempotencyMismatchError,
+    IdempotencyOwnershipLostError,
+)
+from src.models.idempotency_record import IdempotencyRecord, IdempotencyStatus
+from src.routes.idempotency import run_idempotent
+
+
+SCOPE = "POST /api/projects"
+
+
+async def _expire_lock(key: str) -> None:
+    """Simula un intento que superó IDEMPOTENCY_LOCK_SECONDS"""
+    await IdempotencyRecord.get_motor_collection().update_one(
+        {"key": key, "scope": SCOPE},
+        {"$set": {"locked_at": datetime.utcnow() - timedelta(hours=1)}}
+    )
+
+
+@pytest.mark.asyncio
+async def test_begin_complete_and_replay(memory_db):
+    """Test de reserva, respuesta guardada y reintento con otro body"""
+    record = await IdempotencyController.begin("k1", SCOPE, {"name": "Shop"})
+    assert record.status == IdempotencyStatus.PENDING and record.owner
+
+    with pytest.raises(IdempotencyInProgressError):
+        await IdempotencyController.begin("k1", SCOPE, {"name": "Shop"})
+
+    await IdempotencyController.complete(record, 201, response={"id": "p1"})
+    replayed = await IdempotencyController.begin("k1", SCOPE, {"name": "Shop"})
+    assert replayed.status == IdempotencyStatus.COMPLETED
+    assert replayed.response == {"id": "p1"}
+
+    with pytest.raises(IdempotencyMismatchError):
+        await IdempotencyController.begin("k1", SCOPE, {"name": "Blog"})
+
+
+@pytest.mark.asyncio
+async def test_takeover_fences_the_original_attempt(memory_db):
+    """Test de que el intento original no completa ni libera una clave retomada"""
+    original = await IdempotencyController.begin("k2", SCOPE, {"name": "Shop"})
+    await _expire_lock("k2")
+    takeover = await IdempotencyController.begin("k2", SCOPE, {"name": "Shop"})
+    assert takeover.owner != original.owner
+
+    with pytest.raises(IdempotencyOwnershipLostError):
+        await IdempotencyController.complete(original, 201, response={"id": "original"})
+    await IdempotencyController.release(original)
+    assert await IdempotencyRecord.find_one(IdempotencyRecord.key == "k2") is not None
+
+    await IdempotencyController.complete(takeover, 201, response={"id": "takeover"})
+    replayed = await IdempotencyController.begin("k2", SCOPE, {"name": "Shop"})
+    assert replayed.response == {"id": "takeover"}
+
+
+class _Payload(BaseModel):
+    name: str
+
+
+class _Created(BaseModel):
+    id: str
+
+
+@pytest.mark.asyncio
+async def test_run_idempotent_returns_409_to_the_losing_attempt(memory_db):
+    """Test de 409 para el intento lento cuya clave retomó otro mientras creaba"""
+    payload = _Payload(name="Shop")
+
+    async def slow_create():
+        # Mientras este intento crea, la clave vence y otro la retoma y termina
+        await _expire_lock("k3")
+        await run_idempotent("k3", SCOPE, payload, 201, fast_create)
+        return _Created(id="slow")
+
+    async def fast_create():
+        return _Created(id="fast")
+
+    with pytest.raises(HTTPException) as error:
+        await run_idempotent("k3", SCOPE, payload, 201, slow_create)
+    assert error.value.status_code == 409
+
+    replayed = await run_idempotent("k3", SCOPE, payload, 201, slow_create)
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.body == b'{"id":"fast"}'
@@ -0,0 +1,27 @@
+"""
+Tests para el renderizado de markdown a HTML
+"""
+from src.utils.markdown_renderer import render_markdown, content_hash
+
+
+def test_render_escapes_raw_html():
+    """Test de sanitización del HTML crudo"""
+    html = render_markdown("Hola <script>alert(1)</script>")
+    
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
+
+
+def test_render_builds_toc_with_unique_ids():
+    """Test de la tabla de contenidos"""
+    html = render_markdown("# Descripción\n## Intro\n## Intro")
+    
+    assert '<a href="#descripcion">Descripción</a>' in html
+    assert '<h2 id="intro">' in html
+    assert '<h2 id="intro-1">' in html
+
+
+def test_content_hash_is_stable():
+    """Test del hash de contenido usado como clave de caché"""
+    assert content_hash("# A") == content_hash("# A")
+    assert content_hash("# A") != content_hash("# B")
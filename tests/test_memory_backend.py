@@ -0,0 +1,383 @@
+"""
+Tests del backend en memoria (semántica de consultas de MongoDB)
+
+Los tests con el fixture collection corren contra el backend en memoria y,
+si MONGODB_TEST_URL está definido (CI), también contra un MongoDB real: el
+mismo caso con el mismo resultado esperado verifica la paridad del emulador.
+TTL y operadores no soportados son solo del backend en memoria.
+"""
+import os
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from bson import DBRef, ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import TEXT, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from src.repositories.memory import MemoryClient
+from src.utils.search import accent_insensitive_pattern
+
+
+MONGODB_TEST_URL = os.environ.get("MONGODB_TEST_URL")
+
+
+@pytest.fixture
+def memory_collection():
+    return MemoryClient()["test"]["items"]
+
+
+@pytest_asyncio.fixture(params=["memory", "mongo"])
+async def collection(request, memory_collection):
+    """Colección vacía en memoria o en una base temporal de MONGODB_TEST_URL"""
+    if request.param == "memory":
+        yield memory_collection
+        return
+    if not MONGODB_TEST_URL:
+        pytest.skip("MONGODB_TEST_URL no definido (paridad contra MongoDB real)")
+    client = AsyncIOMotorClient(MONGODB_TEST_URL)
+    database_name = f"parity_{ObjectId()}"
+    yield client[database_name]["items"]
+    await client.drop_database(database_name)
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_filters_sort_and_dbref_paths(collection):
+    """Filtros con operadores, rutas en arrays y DBRef, y orden multi-campo"""
+    project_id = ObjectId()
+    await collection.insert_many([
+        {"name": "b", "size": 2, "project": DBRef("projects", project_id), "files": [{"path": "x.md"}]},
+        {"name": "a", "size": 2, "project": DBRef("projects", ObjectId()), "files": [{"path": "y.md"}]},
+        {"name": "c", "size": 1, "tags": ["red"]},
+    ])
+
+    assert await collection.count_documents({"project.$id": project_id}) == 1
+    assert await collection.count_documents({"files.path": "y.md"}) == 1
+    assert await collection.count_documents({"tags": "red", "size": {"$lt": 2}}) == 1
+    assert await collection.count_documents({"$or": [{"size": {"$gte": 2}}, {"tags": {"$exists": True}}]}) == 3
+    assert await collection.count_documents({"name": {"$nin": ["a", "b"]}, "project": None}) == 1
+
+    docs = await collection.find({}, {"name": 1, "_id": 0}).sort([("size", -1), ("name", 1)]).to_list(None)
+    assert docs == [{"name": "a"}, {"name": "b"}, {"name": "c"}]
+
+
+@pytest.mark.asyncio
+async def test_updates_and_upsert(collection):
+    """Operadores de actualización, documentos modificados y upsert"""
+    await collection.insert_one({"_id": 1, "revision": 0, "history": []})
+
+    result = await collection.update_one(
+        {"_id": 1, "revision": 0},
+        {"$inc": {"revision": 1}, "$push": {"history": "v1"}, "$set": {"answers.q1": "si"}}
+    )
+    assert (result.matched_count, result.modified_count) == (1, 1)
+    assert await collection.find_one({"_id": 1}) == {
+        "_id": 1, "revision": 1, "history": ["v1"], "answers": {"q1": "si"}
+    }
+
+    result = await collection.update_one({"_id": 1, "revision": 0}, {"$inc": {"revision": 1}})
+    assert result.matched_count == 0
+
+    result = await collection.update_one({"key": "k"}, {"$set": {"value": 1}}, upsert=True)
+    assert result.upserted_id is not None
+    assert await collection.find_one({"key": "k"}, {"_id": 0}) == {"key": "k", "value": 1}
+
+
+@pytest.mark.asyncio
+async def test_unique_index(collection):
+    """Los índices únicos rechazan duplicados también al actualizar"""
+    await collection.create_index([("key", 1), ("scope", 1)], unique=True)
+    await collection.insert_one({"key": "k", "scope": "a"})
+    await collection.insert_one({"key": "k", "scope": "b"})
+
+    with pytest.raises(DuplicateKeyError):
+        await collection.insert_one({"key": "k", "scope": "a"})
+    with pytest.raises(DuplicateKeyError):
+        await collection.update_one({"scope": "b"}, {"$set": {"scope": "a"}})
+    assert await collection.count_documents({}) == 2
+
+
+@pytest.mark.asyncio
+async def test_find_one_and_update_return_document(collection):
+    """Documento previo o posterior según ReturnDocument, con proyección"""
+    await collection.insert_one({"_id": 1, "revision": 0, "answers": {"q1": "a"}})
+
+    before = await collection.find_one_and_update(
+        {"_id": 1},
+        {"$inc": {"revision": 1}, "$set": {"answers.q2": "b"}},
+        projection={"answers": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    after = await collection.find_one_and_update(
+        {"_id": 1},
+        {"$inc": {"revision": 1}},
+        projection={"revision": 1, "_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    missing = await collection.find_one_and_update({"_id": 2}, {"$set": {"x": 1}})
+    upserted = await collection.find_one_and_update(
+        {"_id": 3}, {"$set": {"x": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+
+    assert before == {"_id": 1, "answers": {"q1": "a"}}
+    assert after == {"revision": 2}
+    assert missing is None
+    assert upserted == {"_id": 3, "x": 1}
+
+
+@pytest.mark.asyncio
+async def test_bulk_write_upserts_and_duplicates(collection):
+    """Upserts en bulk_write y errores de clave duplicada (ordered y unordered)"""
+    await collection.create_index([("key", 1)], unique=True)
+
+    result = await collection.bulk_write([
+        UpdateOne({"key": "a"}, {"$inc": {"n": 1}}, upsert=True),
+        UpdateOne({"key": "a"}, {"$inc": {"n": 1}}, upsert=True),
+        ReplaceOne({"key": "b"}, {"key": "b", "n": 5}, upsert=True),
+    ])
+    assert (result.upserted_count, result.matched_count, result.modified_count) == (2, 1, 1)
+    assert await collection.find_one({"key": "a"}, {"_id": 0}) == {"key": "a", "n": 2}
+
+    with pytest.raises(BulkWriteError) as unordered:
+        await collection.bulk_write([
+            InsertOne({"key": "a"}),
+            InsertOne({"key": "c"}),
+            UpdateOne({"key": "c"}, {"$set": {"key": "b"}}),
+        ], ordered=False)
+    errors = unordered.value.details["writeErrors"]
+    assert [(error["index"], error["code"]) for error in errors] == [(0, 11000), (2, 11000)]
+    assert await collection.count_documents({"key": "c"}) == 1
+
+    with pytest.raises(BulkWriteError) as ordered:
+        await collection.bulk_write([InsertOne({"key": "a"}), InsertOne({"key": "d"})])
+    assert ordered.value.details["nInserted"] == 0
+    assert await collection.count_documents({"key": "d"}) == 0
+
+
+@pytest.mark.asyncio
+async def test_aggregation_stages(collection):
+    """$facet, $group con $first/$last y expresiones $setIntersection/$indexOfArray"""
+    await collection.insert_many([
+        {"_id": 1, "project": "p1", "day": 1, "label": "viejo", "tags": ["a", "b"]},
+        {"_id": 2, "project": "p1", "day": 2, "label": "nuevo", "tags": ["b", "c"]},
+        {"_id": 3, "project": "p2", "day": 1, "label": "otro", "tags": ["c"]},
+    ])
+
+    result = await collection.aggregate([
+        {"$sort": {"day": 1}},
+        {"$facet": {
+            "groups": [
+                {"$group": {
+                    "_id": "$project",
+                    "first": {"$first": "$label"},
+                    "last": {"$last": "$label"},
+                    "count": {"$sum": 1},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+            "total": [{"$count": "count"}],
+            "tags": [
+                {"$project": {
+                    "_id": 1,
+                    "common": {"$setIntersection": ["$tags", ["b", "c"]]},
+                    "position": {"$indexOfArray": ["$tags", "c"]},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+        }},
+    ]).to_list(length=None)
+
+    facets = result[0]
+    assert facets["groups"] == [
+        {"_id": "p1", "first": "viejo", "last": "nuevo", "count": 2},
+        {"_id": "p2", "first": "otro", "last": "otro", "count": 1},
+    ]
+    assert facets["total"] == [{"count": 3}]
+    assert [sorted(row["common"]) for row in facets["tags"]] == [["b"], ["b", "c"], ["c"]]
+    assert [row["position"] for row in facets["tags"]] == [-1, 1, 0]
+
+
+@pytest.mark.asyncio
+async def test_ttl_index_expires_documents(memory_collection):
+    """Los índices TTL borran los documentos vencidos al consultar"""
+    await memory_collection.create_index([("delivered_at", 1)], expireAfterSeconds=60)
+    now = datetime.utcnow()
+    await memory_collection.insert_many([
+        {"_id": "old", "delivered_at": now - timedelta(minutes=5)},
+        {"_id": "new", "delivered_at": now},
+        {"_id": "pending"},
+    ])
+
+    assert sorted(doc["_id"] for doc in await memory_collection.find({}).to_list(None)) == ["new", "pending"]
+
+
+@pytest.mark.asyncio
+async def test_unsupported_operators_raise(memory_collection):
+    """Operadores no implementados fallan explícitamente en lugar de ignorarse"""
+    await memory_collection.insert_one({"_id": 1, "tags": ["a"]})
+
+    with pytest.raises(NotImplementedError):
+        await memory_collection.count_documents({"tags": {"$where": "true"}})
+    with pytest.raises(NotImplementedError):
+        await memory_collection.update_one({"_id": 1}, {"$bit": {"n": {"and": 1}}})
+    with pytest.raises(NotImplementedError):
+        await memory_collection.aggregate([{"$bucketAuto": {"groupBy": "$n", "buckets": 2}}]).to_list(None)
+    with pytest.raises(NotImplementedError):
+        await memory_collection.aggregate([{"$project": {"x": {"$zip": {"inputs": ["$tags"]}}}}]).to_list(None)
+
+    # Operadores de MongoDB que la aplicación no usa (no se emulan)
+    with pytest.raises(NotImplementedError):
+        await memory_collection.count_documents({"tags": {"$all": ["a"]}})
+    with pytest.raises(NotImplementedError):
+        await memory_collection.update_one({"_id": 1}, {"$addToSet": {"tags": "b"}})
+    with pytest.raises(NotImplementedError):
+        await memory_collection.update_one({"_id": 1}, {"$push": {"tags": {"$each": ["b"], "$slice": 1}}})
+    with pytest.raises(NotImplementedError):
+        await memory_collection.find_one({"_id": 1}, {"tags": {"$slice": 1}})
+    with pytest.raises(NotImplementedError):
+        await memory_collection.aggregate([{"$unwind": "$tags"}]).to_list(None)
+    with pytest.raises(NotImplementedError):
+        await memory_collection.aggregate([{"$group": {"_id": None, "tags": {"$push": "$tags"}}}]).to_list(None)
+
+
+async def _search_documents(collection):
+    await collection.insert_many([
+        {
+            "_id": 1,
+            "search_terms": ["kubernetes", "eks"],
+            "search_text": "orquestación kubernetes",
+            "files": [{"path": "a.md", "content": "A"}, {"path": "b.md", "content": "B"}],
+        },
+        {"_id": 2, "search_terms": ["terraform"], "search_text": "infraestructura", "files": [{"path": "c.md"}]},
+        {"_id": 3},
+    ])
+
+
+@pytest.mark.asyncio
+async def test_multikey_regex_and_elem_match_projection(collection):
+    """$in/$nin/$ne sobre arrays, $regex con acentos, $elemMatch en la proyección y distinct"""
+    await _search_documents(collection)
+
+    assert await collection.count_documents({"search_terms": {"$in": ["eks", "aws"]}}) == 1
+    assert await collection.count_documents({"search_terms": {"$nin": ["eks"]}}) == 2
+    assert await collection.count_documents({"search_terms": {"$ne": "terraform"}}) == 2
+    assert await collection.count_documents({"search_text": {"$regex": accent_insensitive_pattern("orquestacion")}}) == 1
+    assert await collection.count_documents({"search_text": {"$regex": "KUBER", "$options": "i"}}) == 1
+    assert await collection.count_documents({"files.path": {"$exists": True}}) == 2
+    assert await collection.count_documents({"$and": [{"_id": {"$gt": 1}}, {"_id": {"$lte": 3}}]}) == 2
+
+    projection = {"files": {"$elemMatch": {"path": "b.md"}}}
+    assert await collection.find_one({"_id": 1}, projection) == {"_id": 1, "files": [{"path": "b.md", "content": "B"}]}
+    assert await collection.find_one({"_id": 2}, projection) == {"_id": 2}
+
+    assert sorted(await collection.distinct("search_terms")) == ["eks", "kubernetes", "terraform"]
+
+
+@pytest.mark.asyncio
+async def test_sort_missing_values_and_arrays(collection):
+    """Campos inexistentes primero en orden ascendente; los arrays ordenan por su menor/mayor elemento"""
+    await _search_documents(collection)
+
+    async def ids(sort):
+        return [doc["_id"] for doc in await collection.find({}, {"_id": 1}).sort(sort).to_list(None)]
+
+    assert await ids([("search_text", 1), ("_id", 1)]) == [3, 2, 1]
+    assert await ids([("search_text", -1), ("_id", 1)]) == [1, 2, 3]
+    assert await ids([("search_terms", 1), ("_id", 1)]) == [3, 1, 2]
+    assert await ids([("search_terms", -1), ("_id", 1)]) == [2, 1, 3]
+
+
+@pytest.mark.asyncio
+async def test_outbox_and_counter_updates(collection):
+    """$pull con condición, $unset, $push con $each y upsert con $setOnInsert"""
+    await collection.insert_one({
+        "_id": 1, "outbox": [{"id": "e1"}, {"id": "e2"}], "claim": {"by": "w"}, "last_error": "x"
+    })
+
+    await collection.update_one(
+        {"_id": 1},
+        {"$pull": {"outbox": {"id": {"$in": ["e1"]}}}, "$unset": {"claim": "", "last_error": ""}}
+    )
+    await collection.update_one({"_id": 1}, {"$push": {"outbox": {"$each": [{"id": "e3"}, {"id": "e4"}]}}})
+    assert await collection.find_one({"_id": 1}) == {"_id": 1, "outbox": [{"id": "e2"}, {"id": "e3"}, {"id": "e4"}]}
+
+    for created in ("primero", "segundo"):
+        await collection.update_one(
+            {"day": "2024-01-01", "key": "k"},
+            {"$inc": {"count": 1}, "$setOnInsert": {"created": created}},
+            upsert=True
+        )
+    assert await collection.find_one({"key": "k"}, {"_id": 0}) == {
+        "day": "2024-01-01", "key": "k", "count": 2, "created": "primero"
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_score_expressions(collection):
+    """Expresiones del puntaje de búsqueda: $max/$map/$arrayElemAt, $regexMatch/$cond y demás"""
+    created = datetime(2024, 1, 1, 12, 0, 0)
+    await collection.insert_many([
+        {
+            "_id": 1, "terms": ["kubernetes", "eks"], "text": "Orquestación Kubernetes",
+            "created": created, "updated": created + timedelta(milliseconds=1500),
+        },
+        {"_id": 2, "terms": ["terraform"], "text": "Infraestructura", "label": "iac"},
+        {"_id": 3, "text": "ñ"},
+    ])
+    candidates = ["eks", "kubernetes"]
+
+    result = await collection.aggregate([
+        {"$sort": {"_id": 1}},
+        {"$addFields": {
+            "best": {"$max": {"$map": {
+                "input": {"$setIntersection": ["$terms", {"$literal": candidates}]},
+                "as": "term",
+                "in": {"$arrayElemAt": [
+                    {"$literal": [0.5, 1.0]},
+                    {"$indexOfArray": [{"$literal": candidates}, "$$term"]},
+                ]},
+            }}},
+            "hit": {"$cond": [{"$regexMatch": {"input": "$text", "regex": "orq", "options": "i"}}, 1, 0]},
+            "label": {"$ifNull": ["$label", "sin etiqueta"]},
+            "bytes": {"$strLenBytes": "$text"},
+            "count": {"$size": {"$ifNull": ["$terms", []]}},
+            "ratio": {"$divide": [{"$add": [1, 2]}, {"$subtract": [10, 6]}]},
+            "age_ms": {"$subtract": ["$updated", "$created"]},
+            "missing": {"$arrayElemAt": ["$terms", 5]},
+        }},
+        {"$project": {"terms": 0, "text": 0, "created": 0, "updated": 0}},
+    ]).to_list(None)
+
+    assert result == [
+        {"_id": 1, "best": 1.0, "hit": 1, "label": "sin etiqueta", "bytes": 24, "count": 2, "ratio": 0.75, "age_ms": 1500},
+        {"_id": 2, "best": None, "hit": 0, "label": "iac", "bytes": 15, "count": 1, "ratio": 0.75, "age_ms": None},
+        # Fuera de rango "missing" no existe; sobre un array null vale null
+        {"_id": 3, "best": None, "hit": 0, "label": "sin etiqueta", "bytes": 2, "count": 0, "ratio": 0.75, "age_ms": None,
+         "missing": None},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_text_search_ranks_by_weight(collection):
+    """$text con el índice de GeneratedDoc: los pesos por campo ordenan por textScore"""
+    await collection.create_index(
+        [("files.path", TEXT), ("files.content", TEXT)],
+        weights={"files.path": 5, "files.content": 1},
+        default_language="spanish"
+    )
+    await collection.insert_many([
+        {"_id": "body", "files": [{"path": "readme.md", "content": "usamos terraform para la infraestructura"}]},
+        {"_id": "path", "files": [{"path": "infra/terraform.md", "content": "variables"}]},
+        {"_id": "none", "files": [{"path": "api.md", "content": "contratos"}]},
+    ])
+
+    result = await collection.aggregate([
+        {"$match": {"$text": {"$search": "terraform"}}},
+        {"$addFields": {"score": {"$meta": "textScore"}}},
+        {"$sort": {"score": -1}},
+    ]).to_list(None)
+
+    assert [doc["_id"] for doc in result] == ["path", "body"]
+    assert all(doc["score"] > 0 for doc in result)
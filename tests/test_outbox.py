@@ -0,0 +1,117 @@
+"""
+Tests para el outbox de eventos y el dispatcher de webhooks
+"""
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from src.config.settings import settings
+from src.controllers.analysis_controller import AnalysisController
+from src.controllers.outbox_controller import OutboxController
+from src.controllers.project_controller import ProjectController
+from src.models.analysis_session import AnalysisSession, AnalysisType
+from src.models.outbox_event import OutboxEvent, OutboxStatus
+from src.utils.outbox import backoff_seconds, batches_by_target, is_permanent_failure, with_events
+from tests.test_answer_validator import YAML_CONFIG
+
+
+TARGETS = "http://hooks.test/copilot,http://hooks.test/chat"
+
+
+def test_with_events_and_backoff():
+    """Test del $push del evento y del backoff exponencial con tope"""
+    update = with_events({"$set": {"a": 1}}, [{"id": "e1"}])
+
+    assert update == {"$set": {"a": 1}, "$push": {"outbox": {"$each": [{"id": "e1"}]}}}
+    assert with_events({"$set": {"a": 1}}, []) == {"$set": {"a": 1}}
+    assert [backoff_seconds(n, 2, 10) for n in (1, 2, 3, 4)] == [2, 4, 8, 10]
+    assert is_permanent_failure(400) and not is_permanent_failure(429) and not is_permanent_failure(503)
+
+
+def test_batches_by_target_keeps_order():
+    """Test de agrupado por destino en lotes, conservando el orden"""
+    deliveries = [{"target": "a", "n": 1}, {"target": "b", "n": 2}, {"target": "a", "n": 3}, {"target": "a", "n": 4}]
+
+    grouped = batches_by_target(deliveries, 2)
+
+    assert [[d["n"] for d in batch] for batch in grouped["a"]] == [[1, 3], [4]]
+    assert [[d["n"] for d in batch] for batch in grouped["b"]] == [[2]]
+
+
+async def _answered_session():
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="a@b.c"
+    )
+    await AnalysisController.update_answers(session.share_token, {"projectName": "Shop"})
+    return session
+
+
+@pytest.mark.asyncio
+async def test_relay_and_dispatch(memory_db, monkeypatch):
+    """Test de evento escrito con las respuestas y enviado en un lote por destino"""
+    monkeypatch.setattr(settings, "webhook_urls", TARGETS)
+    session = await _answered_session()
+
+    raw = await AnalysisSession.get_motor_collection().find_one({"_id": session.id})
+    assert len(raw["outbox"]) == 1
+
+    assert await OutboxController.relay() == 1
+    assert await OutboxController.relay() == 0
+    assert await OutboxEvent.count() == 2
+
+    received = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        received.append((str(request.url), json.loads(request.content)))
+        return httpx.Response(204)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        stats = await OutboxController.dispatch(client)
+
+    assert stats == {"delivered": 2, "retried": 0, "failed": 0}
+    assert sorted(url for url, _ in received) == ["http://hooks.test/chat", "http://hooks.test/copilot"]
+    event = received[0][1]["events"][0]
+    assert event["type"] == "answers.received"
+    assert event["payload"]["analysis_id"] == str(session.id)
+    assert event["payload"]["question_ids"] == ["projectName"]
+    assert await OutboxEvent.find(OutboxEvent.status == OutboxStatus.DELIVERED).count() == 2
+
+
+@pytest.mark.asyncio
+async def test_dispatch_retries_with_backoff(memory_db, monkeypatch):
+    """Test de reintento con backoff ante 503 y fallo definitivo ante 400"""
+    monkeypatch.setattr(settings, "webhook_urls", TARGETS)
+    await _answered_session()
+    await OutboxController.relay()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503 if request.url.path == "/copilot" else 400)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        stats = await OutboxController.dispatch(client)
+        assert stats == {"delivered": 0, "retried": 1, "failed": 1}
+        # El reintento todavía no venció
+        assert await OutboxController.dispatch(client) == {"delivered": 0, "retried": 0, "failed": 0}
+
+    retried = await OutboxEvent.find_one(OutboxEvent.target == "http://hooks.test/copilot")
+    assert retried.status == OutboxStatus.PENDING
+    assert retried.attempts == 1 and retried.last_error == "HTTP 503"
+    assert retried.next_attempt_at > datetime.utcnow()
+    failed = await OutboxEvent.find_one(OutboxEvent.target == "http://hooks.test/chat")
+    assert failed.status == OutboxStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_no_events_without_targets(memory_db, monkeypatch):
+    """Test de que sin WEBHOOK_URLS no se acumulan eventos"""
+    monkeypatch.setattr(settings, "webhook_urls", "")
+    session = await _answered_session()
+
+    raw = await AnalysisSession.get_motor_collection().find_one({"_id": session.id})
+    assert raw["outbox"] == []
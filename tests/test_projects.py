@@ -1,11 +1,21 @@
 """
 Tests para el controlador de proyectos
 """
+import asyncio
+
 import pytest
 from beanie import PydanticObjectId
 
 from src.models.project import Project, ProjectStatus
+from src.models.analysis_session import AnalysisSession, AnalysisType
+from src.models.generated_doc import GeneratedDoc
+from src.controllers.analysis_controller import AnalysisController
+from src.controllers.generated_doc_controller import GeneratedDocController
 from src.controllers.project_controller import ProjectController
+from tests.test_answer_validator import YAML_CONFIG
+
+
+pytestmark = pytest.mark.usefixtures("memory_db")
 
 
 @pytest.mark.asyncio
@@ -45,3 +55,94 @@ async def test_list_projects():
     projects = await ProjectController.list_projects()
     
     assert len(projects) >= 2
+
+
+@pytest.mark.asyncio
+async def test_get_project_cache(monkeypatch):
+    """Test de lecturas concurrentes coalescidas e invalidación al actualizar"""
+    project = await ProjectController.create_project(
+        name="Cached",
+        description="Desc",
+        created_by="test@example.com"
+    )
+    
+    reads = []
+    original_get = Project.get.__func__
+    
+    async def counting_get(cls, document_id, *args, **kwargs):
+        reads.append(document_id)
+        await asyncio.sleep(0)
+        return await original_get(cls, document_id, *args, **kwargs)
+    
+    monkeypatch.setattr(Project, "get", classmethod(counting_get))
+    
+    results = await asyncio.gather(*(ProjectController.get_project(project.id) for _ in range(10)))
+    assert len(reads) == 1
+    assert {p.name for p in results} == {"Cached"}
+    
+    # Las copias son independientes de la caché
+    results[0].name = "Mutado"
+    assert (await ProjectController.get_project(project.id)).name == "Cached"
+    assert len(reads) == 1
+    
+    await ProjectController.update_project(project.id, name="Renombrado")
+    assert (await ProjectController.get_project(project.id)).name == "Renombrado"
+
+
+@pytest.mark.asyncio
+async def test_new_session_gets_current_name_with_warm_cache():
+    """Test de project_name actual aunque otro worker renombró con la caché caliente"""
+    project = await ProjectController.create_project(
+        name="Original",
+        description="Desc",
+        created_by="test@example.com"
+    )
+    assert (await ProjectController.get_project(project.id)).name == "Original"
+    
+    # Renombre en otro worker: la caché de este worker no se entera
+    await Project.get_motor_collection().update_one(
+        {"_id": project.id}, {"$set": {"name": "Renombrado"}, "$inc": {"revision": 1}}
+    )
+    assert (await ProjectController.get_project(project.id)).name == "Original"
+    
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="test@example.com"
+    )
+    assert session.project_name == "Renombrado"
+    assert (await AnalysisSession.get(session.id)).project_name == "Renombrado"
+    
+    doc = await GeneratedDocController.save_generated_docs(
+        project_id=project.id,
+        analysis_session_id=session.id,
+        files=[{"path": "README.md", "content": "# Hola"}],
+        generated_by="copilot"
+    )
+    assert (await GeneratedDoc.get(doc.id)).project_name == "Renombrado"
+
+
+@pytest.mark.asyncio
+async def test_recheck_project_name_after_concurrent_rename():
+    """Test de corrección del nombre si el renombre ocurre entre la lectura y el insert"""
+    project = await ProjectController.create_project(
+        name="Original",
+        description="Desc",
+        created_by="test@example.com"
+    )
+    session = AnalysisSession(
+        project=project,
+        project_name="Original",
+        analysis_type=AnalysisType.API,
+        yaml_config={},
+        share_token="recheck-token",
+        created_by="test@example.com"
+    )
+    await session.insert()
+    await Project.get_motor_collection().update_one({"_id": project.id}, {"$set": {"name": "Nuevo"}})
+    
+    await ProjectController.recheck_project_name(session)
+    stored = await AnalysisSession.get(session.id)
+    assert session.project_name == stored.project_name == "Nuevo"
+    assert session.revision == stored.revision == 1
@@ -0,0 +1,79 @@
+"""
+Tests para el paquete de prompt de Copilot
+"""
+import json
+from datetime import datetime
+
+import pytest
+
+from src.controllers.analysis_controller import AnalysisController
+from src.controllers.project_controller import ProjectController
+from src.controllers.prompt_bundle_controller import PromptBundleController
+from src.models.analysis_session import AnalysisType
+from src.utils.prompt_bundle import compile_prompt_bundle, pair_answers
+from tests.test_answer_validator import YAML_CONFIG
+
+
+CONTEXT = {"id": "abc", "project_name": "Shop", "analysis_type": "deployment", "status": "completed", "iteration": 2, "revision": 7}
+
+
+def test_pair_answers_drops_empty_and_uses_labels():
+    """Test de preguntas emparejadas con sus respuestas (sin vacías, con labels y "Otro")"""
+    answers = {"projectName": "  ", "cloudProvider": ["aws", "gcp"], "hasDocker": "podman", "hasDocker_other": "rootless"}
+    
+    sections = pair_answers(YAML_CONFIG, answers)
+    
+    assert sections == [{"title": "Cloud", "answers": [
+        {"id": "cloudProvider", "question": "Cloud", "answer": ["AWS", "GCP"]},
+        {"id": "hasDocker", "question": "¿Docker?", "answer": "podman", "other": "rootless"},
+    ]}]
+    assert pair_answers(YAML_CONFIG, {}) == []
+
+
+def test_compile_markdown_and_json():
+    """Test del paquete en markdown y JSON con el historial de iteraciones"""
+    history = [{
+        "iteration": 1,
+        "yaml_generated": YAML_CONFIG,
+        "answers_provided": {"projectName": "Shop\nv2"},
+        "timestamp": datetime(2026, 1, 5, 10, 0),
+    }]
+    answers = {"hasDocker": "si"}
+    
+    markdown = compile_prompt_bundle(CONTEXT, YAML_CONFIG, answers, history).decode("utf-8")
+    assert markdown.startswith("# Deployment\n")
+    assert "- **¿Docker?** (`hasDocker`): Sí" in markdown
+    assert "### Iteración 1 (2026-01-05)" in markdown
+    assert "- **Nombre** (`projectName`): Shop\n  v2" in markdown
+    assert "```yaml\ntitle: Deployment" in markdown
+    
+    bundle = json.loads(compile_prompt_bundle(CONTEXT, YAML_CONFIG, answers, history, "json"))
+    assert bundle["analysis"]["revision"] == 7
+    assert bundle["iterations"][0]["timestamp"] == "2026-01-05T10:00:00"
+    assert bundle["yaml_config"] == YAML_CONFIG
+    
+    with pytest.raises(ValueError):
+        compile_prompt_bundle(CONTEXT, YAML_CONFIG, answers, history, "html")
+
+
+@pytest.mark.asyncio
+async def test_rename_invalidates_bundle(memory_db):
+    """Test de que renombrar el proyecto da una revisión (y un paquete) nuevos"""
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="a@b.c"
+    )
+    await AnalysisController.complete_analysis(session.id)
+    revision = await PromptBundleController.get_revision(session.id)
+    body, _ = await PromptBundleController.get_body(session.id, revision)
+    assert "- Proyecto: Shop" in body.decode("utf-8")
+
+    await ProjectController.update_project(project.id, name="Tienda")
+
+    renamed = await PromptBundleController.get_revision(session.id)
+    body, _ = await PromptBundleController.get_body(session.id, renamed)
+    assert renamed > revision
+    assert "- Proyecto: Tienda" in body.decode("utf-8")
@@ -0,0 +1,40 @@
+"""
+Tests de la forma redactada de comandos de MongoDB
+"""
+from src.utils.query_shape import command_shape, reply_count
+
+
+def test_command_shape_redacts_values():
+    """Los valores se reemplazan por '?' y se conservan campos y operadores"""
+    command = {
+        "find": "analysis_sessions",
+        "filter": {"share_token": "abc123", "status": {"$in": ["completed", "archived"]}},
+        "sort": {"created_at": -1},
+        "lsid": {"id": "x"},
+        "$db": "documentation_ai",
+    }
+    
+    assert command_shape(command, "find") == {
+        "find": "analysis_sessions",
+        "filter": {"share_token": "?", "status": {"$in": ["?"]}},
+        "sort": {"created_at": -1},
+    }
+
+
+def test_command_shape_summarizes_payloads():
+    """Los documentos de inserts/updates se reducen a su cantidad"""
+    insert = {"insert": "projects", "documents": [{"name": "a"}, {"name": "b"}], "ordered": False}
+    update = {"update": "projects", "updates": [{"q": {"_id": 1}, "u": {"$set": {"name": "x"}}}]}
+    
+    assert command_shape(insert, "insert") == {"insert": "projects", "documents": 2, "ordered": False}
+    assert command_shape(update, "update")["updates"] == {
+        "count": 1,
+        "first": {"q": {"_id": "?"}, "u": {"$set": {"name": "?"}}},
+    }
+
+
+def test_reply_count():
+    """Cantidad de documentos devueltos o afectados"""
+    assert reply_count({"cursor": {"firstBatch": [{}, {}], "id": 0}}) == 2
+    assert reply_count({"n": 5, "ok": 1}) == 5
+    assert reply_count({"ok": 1}) == 0
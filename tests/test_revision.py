@@ -0,0 +1,31 @@
+"""
+Tests de ETag / If-Match por revisión
+"""
+import pytest
+
+from src.utils.revision import format_etag, parse_if_match, revision_filter
+
+
+def test_parse_if_match_roundtrip():
+    """El ETag emitido se acepta como If-Match"""
+    assert parse_if_match(format_etag(7)) == 7
+    assert parse_if_match(None) is None
+    assert parse_if_match("*") is None
+
+
+def test_parse_if_match_invalid():
+    """Un ETag que no es una revisión no puede coincidir"""
+    with pytest.raises(ValueError):
+        parse_if_match('"abc"')
+
+
+def test_parse_if_match_rejects_weak_etags():
+    """If-Match compara en forma fuerte: un ETag débil nunca coincide (412)"""
+    with pytest.raises(ValueError):
+        parse_if_match('W/"7"')
+
+
+def test_revision_filter_matches_legacy_documents():
+    """La revisión 0 incluye documentos creados antes de existir el campo"""
+    assert revision_filter(0) == {"$in": [0, None]}
+    assert revision_filter(3) == 3
@@ -0,0 +1,208 @@
+"""
+Tests del vocabulario y los trigramas de la búsqueda difusa, y de la
+búsqueda de sesiones (total, facetas y paginación)
+"""
+import json
+
+import pytest
+
+from src.config.settings import settings
+from src.controllers.analysis_controller import AnalysisController
+from src.controllers.project_controller import ProjectController
+from src.models.analysis_session import AnalysisSession, AnalysisStatus, AnalysisType
+from src.utils.search import build_search_terms, build_search_text, gram_count_bounds, trigram_similarity, trigrams
+
+
+YAML_CONFIG = {
+    "title": "Deployment",
+    "sections": [
+        {
+            "title": "Descripción General",
+            "questions": [
+                {"id": "orchestrator", "type": "text", "label": "¿Qué orquestador usan?"},
+                {"id": "cloud", "type": "checkbox", "label": "Cloud", "options": []},
+            ]
+        }
+    ]
+}
+
+# YAML válido para crear sesiones (el de arriba omite campos obligatorios)
+FORM_CONFIG = {
+    "title": "Deployment",
+    "description": "Formulario",
+    "sections": [{"icon": "☁️", **YAML_CONFIG["sections"][0]}],
+}
+
+
+def test_build_search_terms_folds_accents_and_dedupes():
+    """Respuestas y todo el YAML, sin acentos ni palabras repetidas ni cortas"""
+    answers = {"orchestrator": "Kubernetes (EKS)", "cloud": ["aws", "gcp"], "hasDocker": True}
+    
+    terms = build_search_terms(YAML_CONFIG, answers)
+    
+    assert terms == [
+        "kubernetes", "eks", "aws", "gcp",
+        "deployment", "descripcion", "general", "orchestrator", "text", "que", "orquestador", "usan",
+        "cloud", "checkbox",
+    ]
+
+
+def test_build_search_terms_covers_search_text_fields():
+    """Descripciones, opciones, ayudas y placeholders también se indexan"""
+    yaml_config = {
+        "title": "API",
+        "description": "Contratos públicos",
+        "sections": [{"title": "Gateway", "questions": [{
+            "id": "gw", "type": "select", "label": "Gateway",
+            "options": ["Apigee", "Kong"], "help": "Incluir throttling", "placeholder": "Ej. ratelimit",
+        }]}],
+    }
+    
+    terms = build_search_terms(yaml_config, {})
+    
+    for word in ("contratos", "publicos", "apigee", "kong", "throttling", "ratelimit"):
+        assert word in terms
+
+
+def test_build_search_terms_truncation_keeps_answers():
+    """Con max_terms se descartan primero las palabras del YAML"""
+    answers = {"orchestrator": "Kubernetes (EKS)", "cloud": ["aws", "gcp"]}
+    
+    assert build_search_terms(YAML_CONFIG, answers, max_terms=4) == ["kubernetes", "eks", "aws", "gcp"]
+    assert build_search_terms(YAML_CONFIG, answers, max_terms=2) == ["kubernetes", "eks"]
+
+
+def test_build_search_text_is_bounded_and_keeps_answers():
+    """Solo valores de texto (sin claves ni JSON), respuestas primero y acotado a max_chars"""
+    answers = {"orchestrator": "Kubernetes   (EKS)", "cloud": ["aws", "aws"], "hasDocker": True}
+    
+    text = build_search_text(YAML_CONFIG, answers)
+    
+    assert text.startswith("kubernetes (eks)\naws\n")
+    assert "orchestrator\"" not in text and "true" not in text and "{" not in text
+    assert YAML_CONFIG["sections"][0]["title"].lower() in text
+    assert len(text) < len(json.dumps(YAML_CONFIG, ensure_ascii=False))
+    assert build_search_text(YAML_CONFIG, answers, max_chars=20) == "kubernetes (eks)\naws"
+
+
+def test_trigram_similarity_tolerates_typos():
+    """Un error de tipeo conserva la mayoría de los trigramas"""
+    assert trigrams("aws") == ["  a", " aw", "aws", "ws "]
+    assert trigram_similarity("kubernetes", "kubernetes") == 1
+    assert trigram_similarity("kubernets", "kubernetes") > 0.6
+    assert trigram_similarity("kubernetes", "terraform") < 0.1
+
+
+def test_gram_count_bounds():
+    """Las palabras demasiado cortas o largas no pueden alcanzar el umbral"""
+    assert gram_count_bounds(10, 0.5) == (5, 20)
+
+
+async def _sessions():
+    """Dos proyectos y tres sesiones con distinto estado y asignado"""
+    shop = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    blog = await ProjectController.create_project(name="Blog", description=None, created_by="a@b.c")
+    sessions = []
+    for project, assigned_to in ((shop, "ana@b.c"), (shop, "luis@b.c"), (blog, "ana@b.c")):
+        sessions.append(await AnalysisController.create_analysis(
+            project_id=project.id,
+            analysis_type=AnalysisType.API,
+            yaml_config=FORM_CONFIG,
+            created_by="a@b.c",
+            assigned_to=assigned_to
+        ))
+    await AnalysisController.complete_analysis(sessions[0].id)
+    return shop, blog, sessions
+
+
+def _counts(facet):
+    return {item["value"]: item["count"] for item in facet}
+
+
+@pytest.mark.asyncio
+async def test_search_facets_follow_filters(memory_db):
+    """Test de total y facetas calculados sobre la búsqueda ya filtrada"""
+    shop, blog, _ = await _sessions()
+
+    everything = await AnalysisController.search_analyses("deployment", fuzzy=False)
+    assert everything["total"] == 3
+    assert _counts(everything["facets"]["status"]) == {"completed": 1, "pending_answers": 2}
+    assert _counts(everything["facets"]["assigned_to"]) == {"ana@b.c": 2, "luis@b.c": 1}
+    assert _counts(everything["facets"]["project"]) == {str(shop.id): 2, str(blog.id): 1}
+
+    pending = await AnalysisController.search_analyses(
+        "deployment", status=AnalysisStatus.PENDING_ANSWERS, assigned_to="ana@b.c", fuzzy=False
+    )
+    assert pending["total"] == 1
+    assert _counts(pending["facets"]["status"]) == {"pending_answers": 1}
+    assert _counts(pending["facets"]["assigned_to"]) == {"ana@b.c": 1}
+    assert pending["facets"]["project"] == [{"value": str(blog.id), "label": "Blog", "count": 1}]
+
+
+@pytest.mark.asyncio
+async def test_search_project_filter_and_paging(memory_db):
+    """Test del filtro por proyecto (project.$id) y de offset/limit con total"""
+    shop, _, sessions = await _sessions()
+
+    in_shop = await AnalysisController.search_analyses("deployment", project_id=shop.id, fuzzy=False)
+    assert in_shop["total"] == 2
+    assert {hit.id for hit in in_shop["hits"]} == {sessions[0].id, sessions[1].id}
+
+    pages = [
+        await AnalysisController.search_analyses("deployment", limit=2, offset=offset, fuzzy=False)
+        for offset in (0, 2, 4)
+    ]
+    assert [len(page["hits"]) for page in pages] == [2, 1, 0]
+    assert all(page["total"] == 3 for page in pages)
+    # Más recientes primero, sin repetidos entre páginas
+    assert [hit.id for page in pages for hit in page["hits"]] == [s.id for s in reversed(sessions)]
+
+
+@pytest.mark.asyncio
+async def test_search_text_updated_with_answers(memory_db):
+    """Test de search_text recalculado al guardar respuestas"""
+    _, _, sessions = await _sessions()
+    session = sessions[1]
+
+    assert (await AnalysisController.search_analyses("kubernetes", fuzzy=False))["total"] == 0
+    await AnalysisController.update_answers(session.share_token, {"orchestrator": "Kubernetes (EKS)"})
+
+    raw = await AnalysisSession.get_motor_collection().find_one({"_id": session.id})
+    assert "kubernetes (eks)" in raw["search_text"].lower()
+    found = await AnalysisController.search_analyses("kubernetes", fuzzy=False)
+    assert [hit.id for hit in found["hits"]] == [session.id]
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_matches_yaml_descriptions(memory_db):
+    """Test de búsqueda difusa sobre la descripción del YAML (antes solo títulos y etiquetas)"""
+    _, _, sessions = await _sessions()
+
+    found = await AnalysisController.search_analyses("formulraio")
+    assert found["total"] == 3
+    assert {hit.id for hit in found["hits"]} == {session.id for session in sessions}
+
+
+@pytest.mark.asyncio
+async def test_fuzzy_search_falls_back_to_substring(memory_db, monkeypatch):
+    """Test de palabra sin candidatas en el vocabulario: se busca en search_text"""
+    monkeypatch.setattr(settings, "search_max_terms", 1)
+    _, _, sessions = await _sessions()
+    await AnalysisController.update_answers(sessions[1].share_token, {"orchestrator": "Kubernetes"})
+
+    # "orquestador" solo está en search_text (fuera del tope de search_terms)
+    raw = await AnalysisSession.get_motor_collection().find_one({"_id": sessions[1].id})
+    assert raw["search_terms"] == ["kubernetes"]
+    found = await AnalysisController.search_analyses("orquestador")
+    assert found["total"] == 3
+
+    # Sin acentos en la consulta, con acentos en el texto
+    found = await AnalysisController.search_analyses("descripcion")
+    assert found["total"] == 3
+
+    # Una palabra con candidatas y otra sin: ordena por relevancia
+    found = await AnalysisController.search_analyses("kubernetes orquestador")
+    assert found["total"] == 3
+    assert found["hits"][0].id == sessions[1].id
+
+    assert (await AnalysisController.search_analyses("inexistente"))["total"] == 0
@@ -0,0 +1,103 @@
+"""
+Tests para el single-flight de lecturas concurrentes
+"""
+import asyncio
+
+import pytest
+
+from src.controllers.analysis_controller import AnalysisController, _session_reads
+from src.controllers.project_controller import ProjectController
+from src.models.analysis_session import AnalysisType
+from src.utils.single_flight import SingleFlight
+from tests.test_answer_validator import YAML_CONFIG
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test de una sola ejecución para pedidos simultáneos de la misma clave"""
+    flight = SingleFlight("test")
+    executions = []
+    release = asyncio.Event()
+
+    async def read(key):
+        executions.append(key)
+        await release.wait()
+        return {"key": key}
+
+    calls = [asyncio.ensure_future(flight.do(key, lambda key=key: read(key), copy=dict)) for key in "aaab"]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls)
+
+    assert executions == ["a", "b"]
+    assert [result["key"] for result in results] == ["a", "a", "a", "b"]
+    # Compartido entre varios: cada uno recibe su copia
+    assert results[0] is not results[1]
+
+    metrics = flight.metrics()
+    assert (metrics["calls"], metrics["executions"], metrics["deduplicated"]) == (4, 2, 2)
+    assert metrics["keys"][0] == {"key": "a", "calls": 3, "executions": 1, "deduplicated": 2, "max_waiters": 3}
+    assert metrics["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_forget_and_cancellation():
+    """Test de error compartido, forget y cancelación de un pedido"""
+    flight = SingleFlight("test", metrics_size=1)
+    release = asyncio.Event()
+    cached = []
+
+    async def fail():
+        await release.wait()
+        raise RuntimeError("mongo caído")
+
+    calls = [asyncio.ensure_future(flight.do("k", fail)) for _ in range(2)]
+    await asyncio.sleep(0)
+    calls[0].cancel()
+    release.set()
+    with pytest.raises(RuntimeError):
+        await calls[1]
+
+    async def read():
+        await asyncio.sleep(0)
+        return "viejo"
+
+    first = asyncio.ensure_future(flight.do("k", read, on_done=cached.append))
+    await asyncio.sleep(0)
+    flight.forget("k")
+    second = await flight.do("k", read, on_done=cached.append)
+
+    assert await first == "viejo" and second == "viejo"
+    # La lectura olvidada no se entrega a on_done
+    assert cached == ["viejo"]
+    assert flight.metrics()["tracked_keys"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_analysis_single_flight(memory_db):
+    """Test de get_analysis y get_analysis_by_token simultáneos"""
+    project = await ProjectController.create_project(name="Shop", description=None, created_by="a@b.c")
+    session = await AnalysisController.create_analysis(
+        project_id=project.id,
+        analysis_type=AnalysisType.API,
+        yaml_config=YAML_CONFIG,
+        created_by="a@b.c"
+    )
+    before = _session_reads.metrics(top=1000)
+
+    sessions = await asyncio.gather(*(
+        [AnalysisController.get_analysis(session.id) for _ in range(5)]
+        + [AnalysisController.get_analysis_by_token(session.share_token) for _ in range(5)]
+    ))
+    after = _session_reads.metrics(top=1000)
+
+    assert {s.id for s in sessions} == {session.id}
+    assert all(s.project_name == "Shop" for s in sessions)
+    assert len({id(s) for s in sessions}) == 10
+    assert after["executions"] - before["executions"] == 2
+    assert after["deduplicated"] - before["deduplicated"] == 8
+    # El token no aparece en las métricas
+    assert all(session.share_token not in entry["key"] for entry in after["keys"])
+
+    with pytest.raises(ValueError):
+        await AnalysisController.get_analysis_by_token("no-existe")
@@ -0,0 +1,32 @@
+"""
+Tests del generador de datos sintéticos
+"""
+import bson
+
+from src.utils.synthetic_data import SyntheticDataGenerator, parse_weights
+from src.utils.answer_validator import AnswerValidator
+
+
+def test_same_seed_same_documents():
+    """La misma semilla produce exactamente los mismos documentos"""
+    first = list(SyntheticDataGenerator(seed=3).projects(5))
+    second = list(SyntheticDataGenerator(seed=3).projects(5))
+    
+    assert bson.encode({"data": first}) == bson.encode({"data": second})
+
+
+def test_answers_match_generated_forms():
+    """Las respuestas generadas pasan la validación del formulario"""
+    for project, sessions, docs in SyntheticDataGenerator(seed=5).projects(5):
+        for session in sessions:
+            AnswerValidator(session["yaml_config"]).validate(session["answers"])
+            assert session["project"].id == project["_id"]
+        for doc in docs:
+            assert all(file["size"] == len(file["content"].encode("utf-8")) for file in doc["files"])
+
+
+def test_parse_weights():
+    """Distribuciones en formato clave=peso"""
+    assert parse_weights("api=3,adr=1") == {"api": 3.0, "adr": 1.0}
+    assert parse_weights("1=5,2=1", int) == {1: 5.0, 2: 1.0}
+    assert parse_weights(None) is None
@@ -0,0 +1,39 @@
+"""
+Tests para el parseo y validación de YAML
+"""
+import pytest
+
+from src.utils.yaml_validator import parse_yaml_string
+
+
+VALID_YAML = """
+title: "🚀 Deployment"
+description: Completa este formulario
+sections:
+  - icon: "☁️"
+    title: Cloud
+    questions:
+      - id: cloudProvider
+        type: checkbox
+        label: ¿Qué cloud providers usa?
+"""
+
+
+def test_parse_valid_yaml():
+    """Test de parseo de un YAML válido"""
+    yaml_dict = parse_yaml_string(VALID_YAML)
+    
+    assert yaml_dict["title"] == "🚀 Deployment"
+    assert yaml_dict["sections"][0]["questions"][0]["id"] == "cloudProvider"
+
+
+def test_parse_yaml_rejects_aliases():
+    """Test de rechazo de anchors/aliases"""
+    with pytest.raises(ValueError):
+        parse_yaml_string(VALID_YAML + "extra: &a [1]\nother: *a\n")
+
+
+def test_parse_yaml_node_limit():
+    """Test del límite de nodos"""
+    with pytest.raises(ValueError):
+        parse_yaml_string(VALID_YAML, max_nodes=5)